@@ -0,0 +1,5 @@
+"""
+基准测试和端到端校验脚本，不属于运行时包。在仓库根目录运行：
+
+    python -m benchmarks.<name> --help
+"""
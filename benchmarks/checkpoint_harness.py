@@ -0,0 +1,209 @@
+"""
+阶段级失效验证
+
+用计数的假模型替换检测、OCR、文本行合并、mask 细化、修复的 dispatch，以及翻译和渲染，
+先用基准配置跑一遍，再依次只修改某一项配置重跑，检查：
+- 实际执行的阶段不超出 affected_stages() 给出的范围（阶段 key 按实际输入计算，上游重跑但输出不变时下游仍会命中）
+- 渲染总是执行
+- REQUIRED 中列出的配置变化只执行给定的阶段，例如只改字体时只重新渲染，只换翻译器时不再执行检测/OCR/修复
+
+    python -m benchmarks.checkpoint_harness
+    python -m benchmarks.checkpoint_harness --checkpoint-dir /tmp/mt-checkpoints
+"""
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+from collections import Counter
+
+import numpy as np
+
+from manga_translator.config import Alignment, Translator
+from manga_translator.utils.checkpoint import PIPELINE_STAGES, affected_stages
+from manga_translator.utils.generic import Context, Quadrilateral
+from manga_translator.utils.textblock import TextBlock
+
+# (名称, 配置段, 字段, 新值)
+CHANGES = [
+    ('same config', None, None, None),
+    ('render.font_size_offset', 'render', 'font_size_offset', 4),
+    ('render.font_path', 'render', 'font_path', 'Arial-Unicode-Regular.ttf'),
+    ('render.alignment', 'render', 'alignment', Alignment.center),
+    ('translator.translator', 'translator', 'translator', Translator.original),
+    ('translator.target_lang', 'translator', 'target_lang', 'ENG'),
+    ('inpainter.inpainting_size', 'inpainter', 'inpainting_size', 1536),
+    ('mask_dilation_offset', None, 'mask_dilation_offset', 30),
+    ('ocr.prob', 'ocr', 'prob', 0.3),
+    ('detector.text_threshold', 'detector', 'text_threshold', 0.6),
+    ('onnx.intra_op_num_threads', 'onnx', 'intra_op_num_threads', 2),
+]
+
+# 这些配置变化必须只执行给定的阶段
+REQUIRED = {
+    'same config': ['rendering'],
+    'render.font_size_offset': ['rendering'],
+    'render.font_path': ['rendering'],
+    'render.alignment': ['rendering'],
+    'translator.translator': ['translation', 'rendering'],
+    'inpainter.inpainting_size': ['inpainting', 'rendering'],
+    'onnx.intra_op_num_threads': ['rendering'],
+}
+
+
+def make_page(size: int = 400, shade: int = 0) -> np.ndarray:
+    """合成页面；shade 不同的页面图片和 OCR 结果都不同"""
+    img = np.full((size, size, 3), 255, dtype=np.uint8)
+    img[60:120, 40:240] = shade
+    return img
+
+
+def _install_fakes(translator, counts: Counter):
+    """把模型相关的 dispatch 换成计数的假实现，其余逻辑（包括检查点）走真实代码"""
+    from manga_translator import manga_translator as mt
+
+    async def detect(detector_key, image, *args, **kwargs):
+        counts['detection'] += 1
+        pts = np.array([[40, 60], [240, 60], [240, 120], [40, 120]])
+        mask_raw = np.zeros(image.shape[:2], dtype=np.uint8)
+        mask_raw[60:120, 40:240] = 255
+        # verbose 时与 DBNet 一样返回 (边框图, 二值 mask, raw_mask_mask) 调试图
+        verbose = args[9] if len(args) > 9 else False
+        debug = (image.copy(), mask_raw.copy(), mask_raw // 2) if verbose else None
+        return [Quadrilateral(pts, '', 0.9)], mask_raw, debug
+
+    async def ocr(ocr_key, image, textlines, *args, **kwargs):
+        counts['ocr'] += 1
+        for textline in textlines:
+            textline.text = f'こんにちは世界{int(image[60, 40, 0])}'
+            textline.prob = 0.9
+        return textlines
+
+    async def merge(textlines, width, height, config, verbose=False):
+        counts['textline_merge'] += 1
+        return [TextBlock(lines=[tl.pts], texts=[tl.text], font_size=40, prob=tl.prob,
+                          fg_color=(0, 0, 0), bg_color=(255, 255, 255)) for tl in textlines]
+
+    async def refine(text_regions, raw_image, raw_mask, *args, **kwargs):
+        counts['mask_refinement'] += 1
+        return raw_mask.copy()
+
+    async def inpaint(inpainter_key, image, mask, *args, **kwargs):
+        counts['inpainting'] += 1
+        result = image.copy()
+        result[mask > 0] = 255
+        return result
+
+    async def translate(contexts_with_configs, batch_size):
+        counts['translation'] += 1
+        counts['translated_pages'] += len(contexts_with_configs)
+        for ctx, config in contexts_with_configs:
+            for region in ctx.text_regions:
+                region.translation = f'[{config.translator.translator.value}:{config.translator.target_lang}] {region.text}'
+                region.target_lang = config.translator.target_lang
+                region._alignment = config.render.alignment
+                region._direction = config.render.direction
+            # 与真实实现一样把译文加入上下文历史
+            translator.all_page_translations.append({region.text: region.translation for region in ctx.text_regions})
+        return contexts_with_configs
+
+    async def render(config, ctx):
+        counts['rendering'] += 1
+        return ctx.img_inpainted
+
+    mt.dispatch_detection = detect
+    mt.dispatch_ocr = ocr
+    mt.dispatch_textline_merge = merge
+    mt.dispatch_mask_refinement = refine
+    mt.dispatch_inpainting = inpaint
+    translator._translate_contexts_in_batches = translate
+    translator._run_text_rendering = render
+
+
+def make_translator(checkpoint_dir: str = None):
+    """启用检查点（指定目录时用磁盘，否则用内存）并换上假模型的 MangaTranslator，以及各阶段的执行次数"""
+    from manga_translator.manga_translator import MangaTranslator
+
+    params = {'checkpoint_dir': checkpoint_dir} if checkpoint_dir else {'stage_cache_mb': 64}
+    translator = MangaTranslator(params)
+    counts = Counter()
+    _install_fakes(translator, counts)
+    return translator, counts
+
+
+def base_config():
+    from manga_translator.config import Config
+
+    config = Config()
+    config.force_simple_sort = True
+    config.translator.target_lang = 'CHS'
+    return config
+
+
+async def prepare_page(translator, image: np.ndarray, config) -> Context:
+    """执行翻译之前的阶段（检测、OCR、文本行合并）"""
+    ctx = Context()
+    ctx.img_rgb = image
+    ctx.textlines, ctx.mask_raw, ctx.mask = await translator._run_detection(config, ctx)
+    ctx.textlines = await translator._run_ocr(config, ctx)
+    ctx.text_regions = await translator._run_textline_merge(config, ctx)
+    return ctx
+
+
+async def run_page(translator, image: np.ndarray, config):
+    """按 _translate_until_translation / _complete_translation_pipeline 的顺序执行各阶段"""
+    ctx = await prepare_page(translator, image, config)
+    await translator._batch_translate_contexts([(ctx, config)], 1)
+    if ctx.mask is None:
+        ctx.mask = await translator._run_mask_refinement(config, ctx)
+    ctx.img_inpainted = await translator._run_inpainting(config, ctx)
+    ctx.img_rendered = await translator._run_text_rendering(config, ctx)
+    return ctx
+
+
+def _apply(config, section, field, value):
+    config = config.model_copy(deep=True)
+    setattr(getattr(config, section) if section else config, field, value)
+    return config
+
+
+async def run_harness(checkpoint_dir: str = None) -> list:
+    translator, counts = make_translator(checkpoint_dir)
+    base = base_config()
+    image = make_page()
+
+    await run_page(translator, image, base)
+    rows = []
+    for name, section, field, value in CHANGES:
+        config = base if field is None else _apply(base, section, field, value)
+        counts.clear()
+        await run_page(translator, image, config)
+        executed = [stage for stage in PIPELINE_STAGES if counts[stage]]
+        allowed = affected_stages(base, config)
+        ok = set(executed) <= set(allowed) | {'rendering'} and 'rendering' in executed
+        if name in REQUIRED:
+            ok = ok and executed == REQUIRED[name]
+        rows.append({
+            'change': name,
+            'executed': executed,
+            'allowed': allowed,
+            'ok': ok,
+        })
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stage invalidation harness')
+    parser.add_argument('--checkpoint-dir', default=None, help='使用磁盘检查点（默认使用临时目录）')
+    parser.add_argument('--memory', action='store_true', help='使用内存检查点')
+    args = parser.parse_args()
+
+    if args.memory:
+        results = asyncio.run(run_harness())
+    elif args.checkpoint_dir:
+        results = asyncio.run(run_harness(args.checkpoint_dir))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            results = asyncio.run(run_harness(tmp))
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    sys.exit(0 if all(row['ok'] for row in results) else 1)
@@ -0,0 +1,114 @@
+"""
+48px OCR 颜色估计基准测试
+
+用合成的 infer_beam_batch_tensor 输出（每个区域的字符序列、逐字符前景/背景色和有无颜色的预测）对比：
+- per_char：逐区域、逐字符用 AvgMeter 累加（之前的实现）
+- batch：estimate_colors_batch，把整批预测堆叠后按区域 bincount 求平均
+页面区域数默认 100 / 200 / 400，每批 16 个区域（与 Model48pxOCR 的默认批大小相同），检查两者结果完全相同。
+
+    python -m benchmarks.color_estimation_bench
+    python -m benchmarks.color_estimation_bench --regions 100 300 --max-chars 120 --repeat 5
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+import numpy as np
+import torch
+
+from manga_translator.ocr.model_48px import estimate_colors_batch
+from manga_translator.utils.generic import AvgMeter
+
+# 0: <PAD>, 1: <S>, 2: </S>, 3: <SP>，其余为普通字符
+DICTIONARY = ['<PAD>', '<S>', '</S>', '<SP>'] + [chr(0x4e00 + i) for i in range(2000)]
+BATCH_SIZE = 16
+
+
+def make_batch(regions: int, max_chars: int, rng: np.random.Generator) -> list:
+    ret = []
+    for _ in range(regions):
+        length = int(rng.integers(1, max_chars + 1))
+        chars = rng.integers(3, len(DICTIONARY), length)
+        chars[0] = 1
+        # 部分序列在中间结束，</S> 之后的预测应被忽略
+        if length > 2 and rng.random() < 0.7:
+            chars[int(rng.integers(1, length))] = 2
+        ret.append((
+            torch.from_numpy(chars),
+            float(rng.random()),
+            torch.from_numpy(rng.random((length, 3), dtype=np.float32)),
+            torch.from_numpy(rng.random((length, 3), dtype=np.float32)),
+            torch.from_numpy(rng.random((length, 2), dtype=np.float32)),
+            torch.from_numpy(rng.random((length, 2), dtype=np.float32)),
+        ))
+    return ret
+
+
+def estimate_colors_per_char(ret, dictionary) -> list:
+    """之前 Model48pxOCR 中逐字符的颜色估计"""
+    colors = []
+    for pred_chars_index, prob, fg_pred, bg_pred, fg_ind_pred, bg_ind_pred in ret:
+        has_fg = (fg_ind_pred[:, 1] > fg_ind_pred[:, 0])
+        has_bg = (bg_ind_pred[:, 1] > bg_ind_pred[:, 0])
+        fr, fg, fb, br, bg, bb = (AvgMeter() for _ in range(6))
+        for chid, c_fg, c_bg, h_fg, h_bg in zip(pred_chars_index, fg_pred, bg_pred, has_fg, has_bg):
+            ch = dictionary[chid]
+            if ch == '<S>':
+                continue
+            if ch == '</S>':
+                break
+            if h_fg.item():
+                fr(int(c_fg[0] * 255))
+                fg(int(c_fg[1] * 255))
+                fb(int(c_fg[2] * 255))
+            if h_bg.item():
+                br(int(c_bg[0] * 255))
+                bg(int(c_bg[1] * 255))
+                bb(int(c_bg[2] * 255))
+            else:
+                br(int(c_fg[0] * 255))
+                bg(int(c_fg[1] * 255))
+                bb(int(c_fg[2] * 255))
+        colors.append(tuple(min(max(int(m()), 0), 255) for m in (fr, fg, fb, br, bg, bb)))
+    return colors
+
+
+def _time(method, batches: list, repeat: int):
+    timings = []
+    colors = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        colors = [color for batch in batches for color in method(batch, DICTIONARY)]
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), colors
+
+
+def run_benchmark(region_counts=(100, 200, 400), max_chars: int = 60, repeat: int = 3, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for regions in region_counts:
+        page = make_batch(regions, max_chars, rng)
+        batches = [page[i:i + BATCH_SIZE] for i in range(0, regions, BATCH_SIZE)]
+        per_char_s, expected = _time(estimate_colors_per_char, batches, repeat)
+        batch_s, colors = _time(estimate_colors_batch, batches, repeat)
+        rows.append({
+            'regions': regions,
+            'per_char_ms': round(per_char_s * 1000, 1),
+            'batch_ms': round(batch_s * 1000, 1),
+            'speedup': round(per_char_s / max(batch_s, 1e-9), 2),
+            'identical': colors == expected,
+        })
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='48px OCR color estimation benchmark')
+    parser.add_argument('--regions', type=int, nargs='+', default=[100, 200, 400])
+    parser.add_argument('--max-chars', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    result = run_benchmark(args.regions, args.max_chars, args.repeat)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    sys.exit(0 if all(row['identical'] for row in result) else 1)
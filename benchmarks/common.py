@@ -0,0 +1,70 @@
+"""
+基准测试共用的合成数据和辅助函数
+"""
+import os
+from collections import Counter
+
+import numpy as np
+
+from manga_translator.rendering import text_render
+from manga_translator.utils.generic import BASE_PATH
+from manga_translator.utils.textblock import TextBlock
+
+DEFAULT_FONT = os.path.join(BASE_PATH, 'fonts', 'anime_ace_3.ttf')
+
+WORDS = ('the', 'of', 'and', 'to', 'you', 'that', 'it', 'was', 'for', 'on', 'are', 'with', 'they', 'be', 'at',
+         'one', 'have', 'this', 'from', 'by', 'hot', 'word', 'but', 'what', 'some', 'is', 'can', 'out', 'other',
+         'were', 'all', 'there', 'when', 'your', 'how', 'said', 'each', 'she', 'which', 'their', 'time', 'will',
+         'way', 'about', 'many', 'then', 'them', 'would', 'write', 'like', 'these', 'her', 'long', 'make', 'thing',
+         'see', 'him', 'two', 'look', 'more', 'could', 'come', 'number', 'sound', 'people', 'water', 'called',
+         'absolutely', 'incredible', 'understand', 'everything', 'somewhere', 'tomorrow', 'remember', 'dangerous')
+CJK_CHARS = ('的一是了我不人在他有这个上们来到时大地为子中你说生国年着就那和要她出也得里后自以会家可下而过天去能对小多然于心学'
+             '么之都好看起发当没成只如事把还用第样道想作种开美总从无情己面最女但现前些所同日手又行意动方期它头经长儿回位分爱老因很给名法间')
+
+
+def supported_chars(chars: str) -> str:
+    """当前渲染器（主字体和后备字体）能显示的字符"""
+    return ''.join(c for c in chars if text_render.get_renderer().select_face(c) is not None)
+
+
+def clear_render_caches():
+    """清空字形、描边和排版缓存，使下一次渲染从冷缓存开始"""
+    text_render.get_renderer().clear_caches()
+    text_render.clear_layout_caches()
+
+
+def rect_block(x: int, y: int, w: int, h: int, translation: str, **kwargs) -> TextBlock:
+    """由单个矩形文本行构成的 TextBlock"""
+    kwargs.setdefault('texts', ['x'])
+    return TextBlock(lines=[np.array([[x, y], [x + w, y], [x + w, y + h], [x, y + h]])],
+                     translation=translation, **kwargs)
+
+
+class CallCounter:
+    """统计精确排版（calc_horizontal / calc_vertical）的调用次数和累计耗时（包括缓存命中）"""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.seconds = 0.0
+        self._originals = {}
+
+    def __enter__(self):
+        import time
+
+        for name in ('calc_horizontal', 'calc_vertical'):
+            original = getattr(text_render, name)
+            self._originals[name] = original
+
+            def wrapper(*args, _name=name, _original=original, **kwargs):
+                self.counts[_name] += 1
+                start = time.perf_counter()
+                try:
+                    return _original(*args, **kwargs)
+                finally:
+                    self.seconds += time.perf_counter() - start
+            setattr(text_render, name, wrapper)
+        return self
+
+    def __exit__(self, *exc):
+        for name, original in self._originals.items():
+            setattr(text_render, name, original)
@@ -0,0 +1,142 @@
+"""
+文字合成基准测试
+
+在 4K 页面上把预先渲染好的 RGBA 文字块（含透视变形）透视变换并合成到图片上，对比：
+- full_page：每个区域在整页大小的画布上变换，再用整页大小的透明度蒙版混合
+- local_margin：在带大边距（max(w, h) / 2 + 100）的局部区域变换，浮点混合（之前的实现）
+- roi：只在目标外接矩形内变换，颜色乘透明度提前算好，合成时同样是浮点混合（warp_text_box + composite_patch）
+报告每页耗时，以及与 full_page 结果的最大像素差（三者的浮点混合相同，结果应完全一致）。
+
+    python -m benchmarks.composite_bench
+    python -m benchmarks.composite_bench --font fonts/anime_ace_3.ttf --regions 60 --size 3840 2160
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from manga_translator.rendering import composite_patch, text_render, warp_text_box
+
+from .common import DEFAULT_FONT, WORDS
+
+
+def make_boxes(regions: int, height: int, width: int, seed: int = 0):
+    rng = random.Random(seed)
+    boxes = []
+    for _ in range(regions):
+        font_size = rng.randint(28, 64)
+        text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(6, 16)))
+        box = text_render.put_text_horizontal(font_size, text, font_size * 8, font_size * 5, 'center', False,
+                                              (rng.randint(0, 80),) * 3, (255, 255, 255), stroke_width=0.1)
+        h, w = box.shape[:2]
+        scale = rng.uniform(0.6, 1.4)
+        x, y = rng.randint(-w // 4, width - w // 2), rng.randint(-h // 4, height - h // 2)
+        # 四个角点随机偏移，模拟倾斜的气泡
+        jitter = lambda: rng.uniform(-0.08, 0.08) * min(w, h)
+        dst = np.array([[[x + jitter(), y + jitter()],
+                         [x + w * scale + jitter(), y + jitter()],
+                         [x + w * scale + jitter(), y + h * scale + jitter()],
+                         [x + jitter(), y + h * scale + jitter()]]], dtype=np.float32)
+        boxes.append((box, dst))
+    return boxes
+
+
+def _src_points(box: np.ndarray) -> np.ndarray:
+    return np.array([[0, 0], [box.shape[1], 0], [box.shape[1], box.shape[0]], [0, box.shape[0]]], dtype=np.float32)
+
+
+def _clip_points(img: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    pts = dst[0].copy()
+    pts[:, 0] = np.clip(pts[:, 0], 0, img.shape[1])
+    pts[:, 1] = np.clip(pts[:, 1], 0, img.shape[0])
+    return pts
+
+
+def composite_full_page(img: np.ndarray, box: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    pts = _clip_points(img, dst)
+    M, _ = cv2.findHomography(_src_points(box), pts, cv2.RANSAC, 5.0)
+    rgba = cv2.warpPerspective(box, M, (img.shape[1], img.shape[0]), flags=cv2.INTER_LANCZOS4,
+                               borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+    # 只有外接矩形内的像素参与合成，与其他实现一致
+    x, y, w, h = cv2.boundingRect(np.round(pts).astype(np.int32))
+    mask = np.zeros(img.shape[:2] + (1,), dtype=np.float32)
+    mask[y:y + h, x:x + w] = rgba[y:y + h, x:x + w, 3:4].astype(np.float32) / 255.0
+    return np.clip(img.astype(np.float32) * (1 - mask) + rgba[:, :, :3].astype(np.float32) * mask, 0, 255).astype(np.uint8)
+
+
+def composite_local_margin(img: np.ndarray, box: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    img_h, img_w = img.shape[:2]
+    pts = _clip_points(img, dst)
+    x, y, w, h = cv2.boundingRect(np.round(pts).astype(np.int32))
+    margin = max(w, h) // 2 + 100
+    lx1, ly1 = max(0, x - margin), max(0, y - margin)
+    lx2, ly2 = min(img_w, x + w + margin), min(img_h, y + h + margin)
+    local = pts.copy()
+    local[:, 0] -= lx1
+    local[:, 1] -= ly1
+    M, _ = cv2.findHomography(_src_points(box), local, cv2.RANSAC, 5.0)
+    rgba = cv2.warpPerspective(box, M, (lx2 - lx1, ly2 - ly1), flags=cv2.INTER_LANCZOS4,
+                               borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+    vy1, vy2 = max(0, y - ly1), min(ly2 - ly1, y - ly1 + h)
+    vx1, vx2 = max(0, x - lx1), min(lx2 - lx1, x - lx1 + w)
+    if vy2 > vy1 and vx2 > vx1:
+        canvas = rgba[vy1:vy2, vx1:vx2, :3]
+        mask = rgba[vy1:vy2, vx1:vx2, 3:4].astype(np.float32) / 255.0
+        target = img[ly1 + vy1:ly1 + vy2, lx1 + vx1:lx1 + vx2]
+        img[ly1 + vy1:ly1 + vy2, lx1 + vx1:lx1 + vx2] = np.clip(
+            target.astype(np.float32) * (1 - mask) + canvas.astype(np.float32) * mask, 0, 255).astype(np.uint8)
+    return img
+
+
+def composite_roi(img: np.ndarray, box: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    return composite_patch(img, warp_text_box(img.shape, box, dst))
+
+
+METHODS = {
+    'full_page': composite_full_page,
+    'local_margin': composite_local_margin,
+    'roi': composite_roi,
+}
+
+
+def run_benchmark(font_path: str, regions: int = 60, height: int = 3840, width: int = 2160, repeat: int = 3) -> dict:
+    text_render.set_font(font_path)
+    boxes = make_boxes(regions, height, width)
+    page = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    results = {}
+    outputs = {}
+    for name, method in METHODS.items():
+        timings = []
+        for _ in range(repeat):
+            img = page.copy()
+            start = time.perf_counter()
+            for box, dst in boxes:
+                img = method(img, box, dst)
+            timings.append(time.perf_counter() - start)
+        outputs[name] = img
+        results[name] = {'ms': round(statistics.median(timings) * 1000, 1)}
+    reference = outputs['full_page'].astype(np.int16)
+    for name, img in outputs.items():
+        diff = np.abs(img.astype(np.int16) - reference)
+        results[name]['max_diff_vs_full_page'] = int(diff.max())
+        results[name]['pixels_differing'] = int(np.count_nonzero(diff.max(axis=2)))
+    results['roi']['speedup_vs_full_page'] = round(results['full_page']['ms'] / max(results['roi']['ms'], 1e-3), 2)
+    results['roi']['speedup_vs_local_margin'] = round(results['local_margin']['ms'] / max(results['roi']['ms'], 1e-3), 2)
+    return {'page': [height, width], 'regions': regions, **results}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Text compositing benchmark')
+    parser.add_argument('--font', default=DEFAULT_FONT)
+    parser.add_argument('--regions', type=int, default=60)
+    parser.add_argument('--size', type=int, nargs=2, default=[3840, 2160], metavar=('HEIGHT', 'WIDTH'))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    result = run_benchmark(args.font, args.regions, args.size[0], args.size[1], args.repeat)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    sys.exit(0 if result['roi']['max_diff_vs_full_page'] == 0 else 1)
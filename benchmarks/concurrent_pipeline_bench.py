@@ -0,0 +1,154 @@
+"""
+ConcurrentPipeline 合成基准测试
+
+用已知耗时的模拟阶段（time.sleep 模拟阻塞计算）替换真实模型，
+对比实测总耗时与理想流水线耗时（瓶颈阶段决定的下界）。
+
+    python -m benchmarks.concurrent_pipeline_bench --pages 40 --det 0.05 --inpaint 0.08 --render 0.03 --translate 0.2
+    python -m benchmarks.concurrent_pipeline_bench --det 0.01 --inpaint 0.1 --render 0.05 --workers 1 2 4
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+from manga_translator.utils.concurrent_pipeline import ConcurrentPipeline
+
+
+class _MockTranslator:
+    """实现 ConcurrentPipeline 用到的 MangaTranslator 接口，每个阶段按给定耗时阻塞"""
+
+    verbose = False
+    save_quality = 100
+    save_text = False
+    text_output_file = None
+    _current_save_info = None
+
+    def __init__(self, costs: SimpleNamespace):
+        self.costs = costs
+
+    def _check_cancelled(self):
+        pass
+
+    async def _report_progress(self, state: str, finished: bool = False):
+        pass
+
+    async def _run_detection(self, config, ctx):
+        time.sleep(self.costs.det)
+        return [None], None, None
+
+    async def _run_ocr(self, config, ctx):
+        time.sleep(self.costs.ocr)
+        return ctx.textlines
+
+    async def _run_textline_merge(self, config, ctx):
+        return [SimpleNamespace(text='', translation='')]
+
+    async def _batch_translate_contexts(self, batch, batch_size):
+        time.sleep(self.costs.translate + self.costs.translate_per_page * len(batch))
+        return batch
+
+    async def _run_mask_refinement(self, config, ctx):
+        return ctx.img_rgb[:, :, 0]
+
+    async def _run_inpainting(self, config, ctx):
+        time.sleep(self.costs.inpaint)
+        return ctx.img_rgb
+
+    async def _run_text_rendering(self, config, ctx):
+        time.sleep(self.costs.render)
+        return ctx.img_rgb
+
+    def _cleanup_context_memory(self, ctx, keep_result=True):
+        pass
+
+
+def ideal_seconds(pages: int, batch_size: int, costs: SimpleNamespace,
+                  inpaint_workers: int = 1, render_workers: int = 1) -> float:
+    """流水线耗时下界：每个阶段的总工作量（按线程数均分）加上它之前/之后的最短填充与排空时间"""
+    det = costs.det + costs.ocr
+    batches = math.ceil(pages / batch_size)
+    first_batch = min(batch_size, pages)
+    last_batch = pages - (batches - 1) * batch_size
+    translate_total = batches * costs.translate + pages * costs.translate_per_page
+    last_translate = costs.translate + last_batch * costs.translate_per_page
+    bounds = [
+        pages * det + min(costs.inpaint, last_translate) + costs.render,
+        first_batch * det + translate_total + costs.render,
+        det + math.ceil(pages / inpaint_workers) * costs.inpaint + costs.render,
+        det + max(costs.inpaint, costs.translate + first_batch * costs.translate_per_page)
+        + math.ceil(pages / render_workers) * costs.render,
+    ]
+    return max(bounds)
+
+
+def serial_seconds(pages: int, batch_size: int, costs: SimpleNamespace) -> float:
+    batches = math.ceil(pages / batch_size)
+    return (pages * (costs.det + costs.ocr + costs.inpaint + costs.render)
+            + batches * costs.translate + pages * costs.translate_per_page)
+
+
+def run_benchmark(pages: int, batch_size: int, costs: SimpleNamespace, size: int = 64,
+                  max_queue_pages: int = 0, inpaint_workers: int = 1, render_workers: int = 1) -> dict:
+    from PIL import Image
+
+    config = SimpleNamespace(
+        colorizer=SimpleNamespace(colorizer=SimpleNamespace(value='none')),
+        upscale=SimpleNamespace(upscale_ratio=None),
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        file_paths = []
+        for i in range(pages):
+            path = os.path.join(tmp, f'{i:04d}.png')
+            Image.new('RGB', (size, size), (255, 255, 255)).save(path)
+            file_paths.append(path)
+
+        # 模拟渲染是线程安全的，不需要串行
+        pipeline = ConcurrentPipeline(_MockTranslator(costs), batch_size, max_queue_pages=max_queue_pages,
+                                      inpaint_workers=inpaint_workers, render_workers=render_workers,
+                                      serialize_render=False)
+        start = time.perf_counter()
+        results = asyncio.run(pipeline.process_batch(file_paths, [config] * pages))
+        elapsed = time.perf_counter() - start
+        in_order = [ctx.image_name for ctx in results] == file_paths[:len(results)]
+
+    ideal = ideal_seconds(pages, batch_size, costs, inpaint_workers, render_workers)
+    return {
+        'pages': pages,
+        'batch_size': batch_size,
+        'inpaint_workers': inpaint_workers,
+        'render_workers': render_workers,
+        'in_order': in_order,
+        'max_queue_pages': pipeline.max_queue_pages,
+        'rendered': len(results),
+        'elapsed_s': round(elapsed, 3),
+        'ideal_s': round(ideal, 3),
+        'serial_s': round(serial_seconds(pages, batch_size, costs), 3),
+        'efficiency': round(ideal / elapsed, 3) if elapsed > 0 else 0.0,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='ConcurrentPipeline synthetic benchmark')
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--batch-size', type=int, default=4)
+    parser.add_argument('--queue-pages', type=int, default=0)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1], help='依次测试的修复/渲染线程数')
+    parser.add_argument('--det', type=float, default=0.04, help='检测耗时（秒/页）')
+    parser.add_argument('--ocr', type=float, default=0.02, help='OCR 耗时（秒/页）')
+    parser.add_argument('--translate', type=float, default=0.15, help='翻译固定耗时（秒/批）')
+    parser.add_argument('--translate-per-page', type=float, default=0.01, help='翻译耗时（秒/页）')
+    parser.add_argument('--inpaint', type=float, default=0.08, help='修复耗时（秒/页）')
+    parser.add_argument('--render', type=float, default=0.03, help='渲染耗时（秒/页）')
+    args = parser.parse_args()
+
+    costs = SimpleNamespace(det=args.det, ocr=args.ocr, translate=args.translate,
+                            translate_per_page=args.translate_per_page,
+                            inpaint=args.inpaint, render=args.render)
+    results = [run_benchmark(args.pages, args.batch_size, costs, max_queue_pages=args.queue_pages,
+                             inpaint_workers=n, render_workers=n) for n in args.workers]
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,330 @@
+"""
+模型下载验证
+
+在本地起一个 HTTP 服务模拟多个镜像（可设置首字节延迟、限速、传输到一半断开连接、不支持 Range、返回错误码），
+用 download_file / download_files / ModelWrapper._download 下载固定内容的文件，检查：
+- 多个备用链接时选用响应最快的镜像
+- 连接中断后按已下载位置续传，不从头开始
+- 已有 .part 文件时只下载剩余部分；服务器不支持 Range 时从头下载
+- 镜像失效或速度过慢时切换到下一个镜像
+- 多个文件并发下载快于逐个下载
+- 边下载边计算的 sha256 与文件内容一致，哈希不匹配时删除下载的文件
+- 设置了 HTTP_PROXY 环境变量时经代理下载
+
+    python -m benchmarks.download_harness
+    python -m benchmarks.download_harness --size-mb 8
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import socket
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from manga_translator.utils.download import download_file, download_files
+
+CHUNK_SIZE = 1 << 16
+
+
+class FixtureServer:
+    """
+    本地镜像服务：/<镜像名>/<文件名>
+
+    镜像参数：latency 首字节前的延迟（秒）、bytes_per_sec 限速、drop_after 传输多少字节后断开、
+    drops 断开的次数、ranges 是否支持 Range、status 固定返回的状态码
+
+    同时可作为 HTTP 代理：收到绝对 URI 形式的请求时按其路径提供文件，并计入 proxied_requests
+    """
+
+    def __init__(self, files: dict, mirrors: dict):
+        self.files = files
+        self.mirrors = mirrors
+        self.stats = {name: {'requests': 0, 'range_requests': 0, 'body_bytes': 0} for name in mirrors}
+        self.proxied_requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def url(self, mirror: str, name: str) -> str:
+        host, port = self._server.server_address
+        return f'http://{host}:{port}/{mirror}/{name}'
+
+    @property
+    def proxy_url(self) -> str:
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def reset_stats(self):
+        with self._lock:
+            self.proxied_requests = 0
+            for stats in self.stats.values():
+                stats.update(requests=0, range_requests=0, body_bytes=0)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                path = self.path
+                if path.startswith('http://'):
+                    with server._lock:
+                        server.proxied_requests += 1
+                    path = urlsplit(path).path
+                _, mirror, name = path.split('/', 2)
+                options = server.mirrors.get(mirror)
+                data = server.files.get(name)
+                if options is None or data is None:
+                    self.send_error(404)
+                    return
+                stats = server.stats[mirror]
+                range_header = self.headers.get('Range')
+                with server._lock:
+                    stats['requests'] += 1
+                    if range_header:
+                        stats['range_requests'] += 1
+                time.sleep(options.get('latency', 0))
+                if options.get('status', 200) != 200:
+                    self.send_error(options['status'])
+                    return
+
+                start, end = 0, len(data) - 1
+                match = re.match(r'bytes=(\d+)-(\d*)', range_header or '') if options.get('ranges', True) else None
+                if match:
+                    start = int(match.group(1))
+                    if match.group(2):
+                        end = min(end, int(match.group(2)))
+                    if start >= len(data):
+                        self.send_response(416)
+                        self.send_header('Content-Range', f'bytes */{len(data)}')
+                        self.send_header('Content-Length', '0')
+                        self.end_headers()
+                        return
+                    self.send_response(206)
+                    self.send_header('Content-Range', f'bytes {start}-{end}/{len(data)}')
+                else:
+                    self.send_response(200)
+                self.send_header('Accept-Ranges', 'bytes' if options.get('ranges', True) else 'none')
+                self.send_header('Content-Length', str(end - start + 1))
+                self.end_headers()
+
+                # 探测请求（只取 1 字节）不触发断开
+                drop = False
+                with server._lock:
+                    if end > start and options.get('drops', 0) > 0:
+                        options['drops'] -= 1
+                        drop = True
+                drop_after = options.get('drop_after', 0)
+                bytes_per_sec = options.get('bytes_per_sec')
+                sent = 0
+                offset = start
+                try:
+                    while offset <= end:
+                        size = min(CHUNK_SIZE, end - offset + 1)
+                        if drop and sent + size > drop_after:
+                            size = drop_after - sent
+                        if size > 0:
+                            self.wfile.write(data[offset:offset + size])
+                            self.wfile.flush()
+                            sent += size
+                            offset += size
+                            with server._lock:
+                                stats['body_bytes'] += size
+                        if drop and sent >= drop_after:
+                            # 模拟连接中断：不发送剩余内容直接关闭
+                            self.connection.shutdown(socket.SHUT_RDWR)
+                            return
+                        if bytes_per_sec:
+                            time.sleep(size / bytes_per_sec)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        return Handler
+
+
+def _fixture(name: str, size: int) -> bytes:
+    return random.Random(name).randbytes(size)
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _read(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+async def _run_scenarios(size: int, tmp: str) -> list:
+    files = {f'model_{i}.bin': _fixture(f'model_{i}.bin', size) for i in range(4)}
+    data = files['model_0.bin']
+    digest = _sha256(data)
+    mirrors = {
+        'fast': {},
+        'slow': {'latency': 0.3},
+        'steady': {'latency': 0.05},
+        'flaky': {'drop_after': size // 3, 'drops': 2},
+        'noranges': {'ranges': False},
+        'dead': {'status': 404},
+        'throttled': {'bytes_per_sec': 32 * 1024},
+        'latent': {'latency': 0.2, 'bytes_per_sec': 4 * size},
+    }
+    rows = []
+
+    with FixtureServer(files, mirrors) as server:
+        async def scenario(name, func):
+            path = os.path.join(tmp, name.replace(' ', '_'), 'model_0.bin.part')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            server.reset_stats()
+            start = time.perf_counter()
+            try:
+                ok, detail = await func(path)
+            except Exception as e:
+                ok, detail = False, f'{e.__class__.__name__}: {e}'
+            rows.append({'scenario': name, 'ok': ok, 'seconds': round(time.perf_counter() - start, 2), 'detail': detail})
+
+        async def fastest_mirror(path):
+            result = await download_file([server.url('slow', 'model_0.bin'), server.url('fast', 'model_0.bin')], path, digest)
+            body = {m: server.stats[m]['body_bytes'] for m in ('slow', 'fast')}
+            return result == digest and body['fast'] >= size and body['slow'] <= 1, body
+
+        async def resume_after_drops(path):
+            result = await download_file(server.url('flaky', 'model_0.bin'), path, digest)
+            stats = dict(server.stats['flaky'])
+            return (result == digest and _read(path) == data and stats['range_requests'] >= 2
+                    and stats['body_bytes'] < 2 * size), stats
+
+        async def resume_partial_file(path):
+            with open(path, 'wb') as f:
+                f.write(data[:size // 2])
+            result = await download_file(server.url('steady', 'model_0.bin'), path, digest)
+            stats = dict(server.stats['steady'])
+            return result == digest and stats['body_bytes'] == size - size // 2, stats
+
+        async def no_range_support(path):
+            with open(path, 'wb') as f:
+                f.write(data[:size // 2])
+            result = await download_file(server.url('noranges', 'model_0.bin'), path, digest)
+            return result == digest and _read(path) == data, dict(server.stats['noranges'])
+
+        async def dead_mirror_fallback(path):
+            result = await download_file([server.url('dead', 'model_0.bin'), server.url('steady', 'model_0.bin')], path, digest)
+            return result == digest, {m: dict(server.stats[m]) for m in ('dead', 'steady')}
+
+        async def too_slow_fallback(path):
+            # throttled 首字节更快，会被排在前面，速度检查失败后切换到 steady 并续传
+            result = await download_file([server.url('steady', 'model_0.bin'), server.url('throttled', 'model_0.bin')],
+                                         path, digest, min_speed_kbps=256, speed_check_interval=0.5)
+            body = {m: server.stats[m]['body_bytes'] for m in ('throttled', 'steady')}
+            return result == digest and _read(path) == data and body['throttled'] > 1 and body['steady'] < size, body
+
+        async def concurrent_files(path):
+            directory = os.path.dirname(path)
+            timings = {}
+            for concurrency in (1, 4):
+                jobs = [{'urls': server.url('latent', name), 'path': os.path.join(directory, f'{concurrency}_{name}'),
+                         'sha256': _sha256(content)} for name, content in files.items()]
+                start = time.perf_counter()
+                results = await download_files(jobs, concurrency=concurrency)
+                timings[concurrency] = round(time.perf_counter() - start, 2)
+                if results != [job['sha256'] for job in jobs]:
+                    return False, {'results': [str(r) for r in results]}
+            return timings[1] / timings[4] > 1.5, {'sequential_s': timings[1], 'concurrent_s': timings[4]}
+
+        async def proxy_from_env(path):
+            # .invalid 域名无法解析，只有经 HTTP_PROXY 指定的代理才能下载
+            names = ('HTTP_PROXY', 'http_proxy', 'NO_PROXY', 'no_proxy')
+            saved = {name: os.environ.pop(name, None) for name in names}
+            os.environ['HTTP_PROXY'] = server.proxy_url
+            try:
+                result = await download_file('http://mirror.invalid/fast/model_0.bin', path, digest, timeout=5)
+                jobs = [{'urls': f'http://mirror.invalid/steady/{name}', 'path': os.path.join(os.path.dirname(path), name),
+                         'sha256': _sha256(content)} for name, content in files.items() if name != 'model_0.bin']
+                results = await download_files(jobs, timeout=5)
+            finally:
+                for name, value in saved.items():
+                    os.environ.pop(name, None)
+                    if value is not None:
+                        os.environ[name] = value
+            ok = result == digest and results == [job['sha256'] for job in jobs]
+            return ok and server.proxied_requests >= 1 + len(jobs), {'proxied_requests': server.proxied_requests}
+
+        async def model_wrapper(path):
+            from manga_translator.utils.inference import ModelWrapper, ModelVerificationException
+            model_dir = os.path.dirname(path)
+
+            class FixtureModel(ModelWrapper):
+                _MODEL_DIR = model_dir
+                _MODEL_MAPPING = {
+                    f'model_{i}': {'url': [server.url('slow', f'model_{i}.bin'), server.url('flaky', f'model_{i}.bin')],
+                                   'hash': _sha256(files[f'model_{i}.bin']), 'file': '.'}
+                    for i in range(1, 4)
+                }
+
+                async def _load(self, device):
+                    pass
+
+                async def _unload(self):
+                    pass
+
+                async def _infer(self):
+                    pass
+
+            mirrors['flaky']['drops'] = 3
+            model = FixtureModel()
+            await model._download()
+            downloaded = all(_read(os.path.join(model_dir, f'model_{i}.bin')) == files[f'model_{i}.bin'] for i in range(1, 4))
+
+            class BadHashModel(FixtureModel):
+                _MODEL_MAPPING = {'model_0': {'url': server.url('fast', 'model_0.bin'), 'hash': '0' * 64, 'file': 'bad.bin'}}
+
+            try:
+                await BadHashModel()._download()
+                rejected = False
+            except ModelVerificationException:
+                rejected = not os.path.exists(os.path.join(model_dir, 'bad.bin.part'))
+            return downloaded and model._check_downloaded() and rejected, {'downloaded': downloaded, 'bad_hash_rejected': rejected}
+
+        await scenario('fastest mirror', fastest_mirror)
+        await scenario('resume after drops', resume_after_drops)
+        await scenario('resume partial file', resume_partial_file)
+        await scenario('no range support', no_range_support)
+        await scenario('dead mirror fallback', dead_mirror_fallback)
+        await scenario('too slow fallback', too_slow_fallback)
+        await scenario('concurrent files', concurrent_files)
+        await scenario('proxy from env', proxy_from_env)
+        await scenario('model wrapper', model_wrapper)
+    return rows
+
+
+def run_harness(size: int = 2 << 20) -> list:
+    with tempfile.TemporaryDirectory() as tmp:
+        return asyncio.run(_run_scenarios(size, tmp))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Model download harness')
+    parser.add_argument('--size-mb', type=float, default=2, help='每个测试文件的大小')
+    args = parser.parse_args()
+    results = run_harness(int(args.size_mb * (1 << 20)))
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    sys.exit(0 if all(row['ok'] for row in results) else 1)
@@ -0,0 +1,150 @@
+"""
+后备字体覆盖索引基准测试
+
+主字体缺少的字符（希腊字母、西里尔字母、符号等）需要在后备字体中查找，对比：
+- legacy：创建渲染器时打开全部后备字体，逐个字体调用 get_char_index 查找（之前的实现）
+- indexed：按字体文件哈希缓存 cmap 码位集合，查找时只做集合查询，只打开实际用到的后备字体
+报告首页延迟（新建渲染器并渲染一页纯拉丁文本）、混合文字页面的渲染耗时、打开的后备字体数、
+覆盖索引的冷（写磁盘缓存）/热（读磁盘缓存）构建耗时，并检查两者输出逐像素相同。
+
+    python -m benchmarks.font_coverage_bench
+    python -m benchmarks.font_coverage_bench --font fonts/anime_ace_3.ttf --fallback a.ttf b.ttc
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from manga_translator.rendering import text_render
+
+from .common import DEFAULT_FONT, WORDS
+
+MIXED_WORDS = ('Привет', 'спасибо', 'Москва', 'αλήθεια', 'Ωμέγα', 'λόγος', 'café', 'naïve', 'Straße', 'Ελλάδα',
+               '→', '★', '♪', '♥', '∞', '№', '€', '½', '…', '©')
+
+
+class LegacyRenderer(text_render.TextRenderer):
+    """之前的字体选择：所有后备字体在创建时打开，逐个字体检查是否包含字符"""
+
+    def update_font_selection(self):
+        super().update_font_selection()
+        self.font_selection = [self.font] if self.font else []
+        for font_path in self.fallback_font_paths:
+            face = self._open_fallback_font(font_path)
+            if face is not None:
+                self.font_selection.append(face)
+
+    def select_face(self, cdpt: str):
+        for face in self.font_selection:
+            if face.get_char_index(cdpt) != 0:
+                return face
+        return None
+
+    def last_face(self):
+        return self.font_selection[-1] if self.font_selection else None
+
+
+def make_texts(count: int, mixed: bool, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        words = [rng.choice(MIXED_WORDS) if mixed and rng.random() < 0.4 else rng.choice(WORDS)
+                 for _ in range(rng.randint(6, 14))]
+        texts.append(' '.join(words))
+    return texts
+
+
+def render_page(renderer, texts: list, font_size: int = 28) -> list:
+    text_render.clear_layout_caches()
+    with text_render.use_renderer(renderer):
+        return [text_render.put_text_horizontal(font_size, text, font_size * 12, font_size * 6, 'center', False,
+                                                (0, 0, 0), (255, 255, 255), hyphenate=False) for text in texts]
+
+
+def bench_renderer(renderer_class, font_path: str, latin: list, mixed: list, repeat: int):
+    first_page, mixed_page = [], []
+    outputs = None
+    opened = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        renderer = renderer_class(font_path)
+        render_page(renderer, latin)
+        first_page.append(time.perf_counter() - start)
+        opened_latin = len(renderer.font_cache)
+        renderer.clear_caches()
+        start = time.perf_counter()
+        outputs = render_page(renderer, mixed)
+        mixed_page.append(time.perf_counter() - start)
+        opened = len(renderer.font_cache)
+    return {
+        'first_page_ms': round(statistics.median(first_page) * 1000, 1),
+        'mixed_page_ms': round(statistics.median(mixed_page) * 1000, 1),
+        'fallback_fonts_opened_latin_page': opened_latin,
+        'fallback_fonts_opened_mixed_page': opened,
+    }, outputs
+
+
+def bench_index(fallback_fonts: list) -> dict:
+    previous_dir = text_render.FONT_COVERAGE_CACHE_DIR
+    with tempfile.TemporaryDirectory() as cache_dir:
+        text_render.FONT_COVERAGE_CACHE_DIR = cache_dir
+        try:
+            text_render._font_coverage.clear()
+            start = time.perf_counter()
+            sizes = [len(text_render.get_font_coverage(path)) for path in fallback_fonts]
+            cold = time.perf_counter() - start
+            text_render._font_coverage.clear()
+            start = time.perf_counter()
+            for path in fallback_fonts:
+                text_render.get_font_coverage(path)
+            warm = time.perf_counter() - start
+        finally:
+            text_render.FONT_COVERAGE_CACHE_DIR = previous_dir
+            text_render._font_coverage.clear()
+    return {
+        'codepoints': sizes,
+        'cold_build_ms': round(cold * 1000, 1),
+        'disk_cache_load_ms': round(warm * 1000, 1),
+    }
+
+
+def run_benchmark(font_path: str, fallback_fonts: list, regions: int = 24, repeat: int = 3) -> dict:
+    previous_fallbacks = text_render.FALLBACK_FONTS
+    text_render.FALLBACK_FONTS = fallback_fonts
+    try:
+        index = bench_index(fallback_fonts)
+        # 预热磁盘缓存
+        for path in fallback_fonts:
+            text_render.get_font_coverage(path)
+        latin, mixed = make_texts(regions, False), make_texts(regions, True, seed=1)
+        legacy, expected = bench_renderer(LegacyRenderer, font_path, latin, mixed, repeat)
+        indexed, outputs = bench_renderer(text_render.TextRenderer, font_path, latin, mixed, repeat)
+    finally:
+        text_render.FALLBACK_FONTS = previous_fallbacks
+    return {
+        'fallback_fonts': [os.path.basename(path) for path in fallback_fonts],
+        'coverage_index': index,
+        'legacy': legacy,
+        'indexed': indexed,
+        'first_page_speedup': round(legacy['first_page_ms'] / max(indexed['first_page_ms'], 1e-3), 2),
+        'pixel_identical': all(np.array_equal(a, b) for a, b in zip(expected, outputs)),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fallback font coverage index benchmark')
+    parser.add_argument('--font', default=DEFAULT_FONT)
+    parser.add_argument('--fallback', nargs='+', default=None, help='Fallback fonts, defaults to FALLBACK_FONTS')
+    parser.add_argument('--regions', type=int, default=24)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    fallback = [path for path in (args.fallback or text_render.FALLBACK_FONTS) if os.path.exists(path)]
+    result = run_benchmark(args.font, fallback, args.regions, args.repeat)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    sys.exit(0 if result['pixel_identical'] else 1)
@@ -0,0 +1,183 @@
+"""
+严格布局字号搜索基准测试
+
+在合成的密集页面（大量气泡、译文明显长于原文）上用 layout_mode='strict' 运行 resize_regions_to_font_size，
+对比 text_render.fit_font_size 与原来的两段循环（逐号缩小直到行数满足，再从该字号起逐号放大）：
+- 每页耗时（清空字形缓存后的首次运行，以及缓存预热后的中位数）
+- calc_horizontal / calc_vertical 的调用次数
+- 每个区域得到的字号是否相同（不同时以退出码 1 结束）
+
+    python -m benchmarks.font_fit_bench
+    python -m benchmarks.font_fit_bench --font fonts/anime_ace_3.ttf --regions 80 --repeat 5
+"""
+import argparse
+import contextlib
+import copy
+import json
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from manga_translator.config import Config
+from manga_translator.rendering import resize_regions_to_font_size, text_render
+from manga_translator.utils.textblock import TextBlock
+
+from .common import CJK_CHARS, DEFAULT_FONT, WORDS, CallCounter, clear_render_caches, supported_chars
+
+PUNCTUATION = '！？。，…'
+
+# 名称: (方向, 目标语言, 区域数量的倍数)
+PAGES = {
+    'dense_en_horizontal': ('h', 'ENG', 1.0),
+    'dense_en_br': ('h', 'ENG', 1.0),
+    'dense_en_vertical': ('v', 'ENG', 0.5),
+    'dense_cjk_vertical': ('v', 'CHS', 1.0),
+    'dense_cjk_horizontal': ('h', 'CHS', 0.5),
+}
+
+
+def _translation(rng: random.Random, page: str, length: int, lines: int, cjk: str) -> str:
+    if page.startswith('dense_cjk'):
+        text = ''.join(rng.choice(cjk) for _ in range(length))
+        return text + rng.choice(PUNCTUATION)
+    words = [rng.choice(WORDS) for _ in range(max(2, length // 5))]
+    if page == 'dense_en_br':
+        # 模拟 AI 断句：在译文中插入 [BR]
+        step = max(1, len(words) // lines)
+        for i in range(step, len(words), step):
+            words[i] = '[BR] ' + words[i]
+    return ' '.join(words).capitalize() + rng.choice('.!?')
+
+
+def make_regions(page: str, count: int, seed: int = 0):
+    direction, target_lang, _ = PAGES[page]
+    rng = random.Random(f'{page}:{seed}')
+    cjk = supported_chars(CJK_CHARS)
+    regions = []
+    for i in range(count):
+        lines = rng.randint(2, 5)
+        font_size = rng.randint(22, 44)
+        x, y = (i % 8) * 250 + 10, (i // 8) * 300 + 10
+        if direction == 'h':
+            w, h = rng.randint(120, 240), font_size * lines + rng.randint(0, font_size)
+            quads = [[[x, y + k * h // lines], [x + w, y + k * h // lines], [x + w, y + (k + 1) * h // lines], [x, y + (k + 1) * h // lines]]
+                     for k in range(lines)]
+        else:
+            w, h = font_size * lines + rng.randint(0, font_size), rng.randint(160, 280)
+            quads = [[[x + k * w // lines, y], [x + (k + 1) * w // lines, y], [x + (k + 1) * w // lines, y + h], [x + k * w // lines, y + h]]
+                     for k in range(lines)]
+        # 译文长度为原文能容纳的 1.5~4 倍，迫使字号大幅缩小
+        capacity = (w // font_size) * lines if direction == 'h' else (h // font_size) * lines
+        length = int(capacity * rng.uniform(1.5, 4.0))
+        region = TextBlock(lines=[np.array(q) for q in quads], texts=['x'] * lines, font_size=font_size,
+                           translation=_translation(rng, page, length, lines, cjk), target_lang=target_lang,
+                           direction=direction)
+        regions.append(region)
+    return regions
+
+
+def legacy_fit_font_size(text: str, horizontal: bool, max_width: int, max_height: int, max_lines: int,
+                         min_size: int, max_size: int, language: str = 'en_US') -> int:
+    """fit_font_size 之前严格布局中的两段循环"""
+    def line_count(size: int) -> int:
+        if horizontal:
+            return len(text_render.calc_horizontal(size, text, max_width=max_width, max_height=max_height, language=language)[0])
+        return len(text_render.calc_vertical(size, text, max_height=max_height)[0])
+
+    # 先缩小字体直到文本能放进文本框
+    font_size = max_size
+    while font_size >= min_size:
+        if line_count(font_size) <= max_lines:
+            break
+        font_size -= 1
+    # 再尝试扩大字体（但不超过初始大小）
+    max_fitting_font_size = font_size
+    test_font_size = font_size + 1
+    while test_font_size <= max_size:
+        if line_count(test_font_size) <= max_lines:
+            max_fitting_font_size = test_font_size
+            test_font_size += 1
+        else:
+            break
+    return max_fitting_font_size
+
+
+@contextlib.contextmanager
+def use_fit(fit):
+    original = text_render.fit_font_size
+    text_render.fit_font_size = fit
+    try:
+        yield
+    finally:
+        text_render.fit_font_size = original
+
+
+def strict_config() -> Config:
+    config = Config()
+    config.render.layout_mode = 'strict'
+    config.render.font_size_minimum = 8
+    return config
+
+
+def bench_page(page: str, regions: list, fit, repeat: int) -> dict:
+    config = strict_config()
+    img = np.zeros((2400, 2000, 3), dtype=np.uint8)
+
+    timings = []
+    sizes = None
+    calls = 0
+    for run in range(repeat + 1):
+        if run == 0:
+            clear_render_caches()
+        batch = copy.deepcopy(regions)
+        with use_fit(fit), CallCounter() as counter:
+            start = time.perf_counter()
+            resize_regions_to_font_size(img, batch, config)
+            timings.append(time.perf_counter() - start)
+        if run == 0:
+            sizes = [region.font_size for region in batch]
+            calls = sum(counter.counts.values())
+    return {
+        'page': page,
+        'regions': len(regions),
+        'cold_ms': round(timings[0] * 1000, 1),
+        'warm_ms': round(statistics.median(timings[1:]) * 1000, 1) if repeat else None,
+        'layout_calls': calls,
+        'font_sizes': sizes,
+    }
+
+
+def run_benchmark(font_path: str, regions: int = 48, repeat: int = 3, pages=None) -> list:
+    text_render.set_font(font_path)
+    results = []
+    for page in pages or PAGES:
+        if page.startswith('dense_cjk') and len(supported_chars(CJK_CHARS)) < len(CJK_CHARS) // 2:
+            results.append({'page': page, 'skipped': f'font has no CJK coverage: {font_path}'})
+            continue
+        page_regions = make_regions(page, max(1, int(regions * PAGES[page][2])))
+        legacy = bench_page(page, page_regions, legacy_fit_font_size, repeat)
+        current = bench_page(page, page_regions, text_render.fit_font_size, repeat)
+        results.append({
+            'page': page,
+            'regions': current['regions'],
+            'legacy': {k: legacy[k] for k in ('cold_ms', 'warm_ms', 'layout_calls')},
+            'fit_font_size': {k: current[k] for k in ('cold_ms', 'warm_ms', 'layout_calls')},
+            'speedup_cold': round(legacy['cold_ms'] / max(current['cold_ms'], 1e-3), 2),
+            'ok': current['font_sizes'] == legacy['font_sizes'],
+        })
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Strict layout font fitting benchmark')
+    parser.add_argument('--font', default=DEFAULT_FONT)
+    parser.add_argument('--regions', type=int, default=48, help='每页的区域数量')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--pages', nargs='+', choices=list(PAGES), default=None)
+    args = parser.parse_args()
+    results = run_benchmark(args.font, args.regions, args.repeat, args.pages)
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    sys.exit(0 if all(row.get('ok', True) for row in results) else 1)
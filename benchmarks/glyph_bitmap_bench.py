@@ -0,0 +1,146 @@
+"""
+字形位图基准测试
+
+对比字形位图的两种读取方式：
+- legacy：Glyph 把 bitmap.buffer 复制成 Python 列表，每次使用时再 np.array(buffer).reshape（之前的实现）
+- array：bitmap_to_array 按 pitch 从 FreeType 缓冲区一次性复制为 uint8 数组，put_char_* 直接使用
+报告两部分耗时：逐个加载字形并转换（不走缓存），以及用 put_text_vertical / put_text_horizontal
+渲染约 5 万个字符（字体支持 CJK 时为竖排中文，否则为横排拉丁字母），并检查两者输出逐像素相同。
+
+    python -m benchmarks.glyph_bitmap_bench
+    python -m benchmarks.glyph_bitmap_bench --font fonts/anime_ace_3.ttf --chars 50000
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from manga_translator.rendering import text_render
+
+from .common import CJK_CHARS, DEFAULT_FONT, WORDS, clear_render_caches, supported_chars
+
+
+class _LegacyBitmap:
+    def __init__(self, bitmap):
+        self.rows = bitmap.rows
+        self.width = bitmap.width
+        self.buffer = bitmap.buffer
+
+    @property
+    def array(self):
+        # 之前每个调用点都会重新构造数组
+        if self.rows * self.width == 0 or len(self.buffer) != self.rows * self.width:
+            return None
+        return np.array(self.buffer, dtype=np.uint8).reshape((self.rows, self.width))
+
+
+class LegacyGlyph(text_render.Glyph):
+    def __init__(self, glyph):
+        super().__init__(glyph)
+        self.bitmap = _LegacyBitmap(glyph.bitmap)
+
+
+def _with_glyph(glyph_class, func, *args):
+    original = text_render.Glyph
+    text_render.Glyph = glyph_class
+    clear_render_caches()
+    try:
+        return func(*args)
+    finally:
+        text_render.Glyph = original
+        clear_render_caches()
+
+
+def bench_conversion(glyph_class, chars: str, font_size: int, repeat: int) -> float:
+    """逐个加载字形并构造 Glyph，返回每个字符的平均微秒数"""
+    face = text_render.get_renderer().font
+    face.set_pixel_sizes(0, font_size)
+    timings = []
+    for _ in range(repeat):
+        elapsed = 0.0
+        for c in chars:
+            face.load_char(c)
+            start = time.perf_counter()
+            glyph = glyph_class(face.glyph)
+            glyph.bitmap.array
+            elapsed += time.perf_counter() - start
+        timings.append(elapsed)
+    return statistics.median(timings) / len(chars) * 1e6
+
+
+def make_texts(total_chars: int, vertical: bool, chars: str, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    texts = []
+    count = 0
+    while count < total_chars:
+        if vertical:
+            text = ''.join(rng.choice(chars) for _ in range(rng.randint(20, 60)))
+        else:
+            text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + '.'
+        texts.append(text)
+        count += len(text)
+    return texts
+
+
+def render_texts(texts: list, vertical: bool, font_size: int) -> list:
+    outputs = []
+    for text in texts:
+        if vertical:
+            box = text_render.put_text_vertical(font_size, text, font_size * 12, 'center', (0, 0, 0), (255, 255, 255), 0)
+        else:
+            box = text_render.put_text_horizontal(font_size, text, font_size * 14, font_size * 8, 'center', False,
+                                                  (0, 0, 0), (255, 255, 255), hyphenate=False)
+        outputs.append(box)
+    return outputs
+
+
+def _timed_render(texts: list, vertical: bool, font_size: int):
+    start = time.perf_counter()
+    outputs = render_texts(texts, vertical, font_size)
+    return time.perf_counter() - start, outputs
+
+
+def run_benchmark(font_path: str, total_chars: int = 50000, font_size: int = 32, repeat: int = 3) -> dict:
+    text_render.set_font(font_path)
+    cjk = supported_chars(CJK_CHARS)
+    vertical = bool(cjk)
+    chars = cjk if vertical else supported_chars(''.join(sorted(set(''.join(WORDS)))))
+    conversion = {
+        'legacy_us_per_char': round(bench_conversion(LegacyGlyph, chars, font_size, repeat), 2),
+        'array_us_per_char': round(bench_conversion(text_render.Glyph, chars, font_size, repeat), 2),
+    }
+    texts = make_texts(total_chars, vertical, chars)
+    rendered_chars = sum(len(t) for t in texts)
+    legacy_seconds, expected = _with_glyph(LegacyGlyph, _timed_render, texts, vertical, font_size)
+    array_seconds, outputs = _with_glyph(text_render.Glyph, _timed_render, texts, vertical, font_size)
+    identical = len(expected) == len(outputs) and all(
+        a is not None and b is not None and np.array_equal(a, b) for a, b in zip(expected, outputs))
+    return {
+        'script': 'cjk_vertical' if vertical else 'latin_horizontal',
+        'chars_rendered': rendered_chars,
+        'conversion': conversion,
+        'render': {
+            'legacy_ms': round(legacy_seconds * 1000, 1),
+            'array_ms': round(array_seconds * 1000, 1),
+            'legacy_us_per_char': round(legacy_seconds / rendered_chars * 1e6, 2),
+            'array_us_per_char': round(array_seconds / rendered_chars * 1e6, 2),
+            'speedup': round(legacy_seconds / max(array_seconds, 1e-9), 2),
+        },
+        'pixel_identical': identical,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Glyph bitmap conversion benchmark')
+    parser.add_argument('--font', default=DEFAULT_FONT)
+    parser.add_argument('--chars', type=int, default=50000)
+    parser.add_argument('--font-size', type=int, default=32)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    result = run_benchmark(args.font, args.chars, args.font_size, args.repeat)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    sys.exit(0 if result['pixel_identical'] else 1)
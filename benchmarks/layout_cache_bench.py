@@ -0,0 +1,108 @@
+"""
+排版缓存基准测试
+
+模拟一话漫画：多页，每页若干气泡，其中大部分是反复出现的短文本（人名、“...”、“!?”、拟声词），
+其余是各不相同的长句。对每页依次运行 rendering.dispatch，对比：
+- uncached：LAYOUT_CACHE 和 SHAPING_CACHE 容量为 0，每次都重新排版（缓存前的行为）
+- cached：默认容量，排版结果和分词/音节在页面之间复用
+报告整话耗时、calc_horizontal / calc_vertical 的耗时、两级缓存的命中率，并检查两者输出逐像素相同。
+
+    python -m benchmarks.layout_cache_bench
+    python -m benchmarks.layout_cache_bench --font fonts/anime_ace_3.ttf --pages 12 --regions 24
+"""
+import argparse
+import asyncio
+import copy
+import json
+import random
+import sys
+import time
+
+import numpy as np
+
+from manga_translator.config import Config
+from manga_translator.rendering import dispatch, text_render
+
+from .common import DEFAULT_FONT, WORDS, CallCounter, rect_block
+
+REPEATED = ('...', '!?', '?!', 'Huh?', 'Eh?!', 'Wha...', 'Hmm...', 'Naruto!', 'Sasuke!', 'Sakura-chan!',
+            'Master!', 'BOOM', 'WHOOSH', 'THUD', 'CRASH', 'Tch...', 'Right.', 'Yes!', 'No way!', 'Thank you!')
+
+
+def make_chapter(pages: int, regions: int, repeat_ratio: float = 0.7, seed: int = 0):
+    rng = random.Random(seed)
+    chapter = []
+    for _ in range(pages):
+        page = []
+        for i in range(regions):
+            x, y = (i % 6) * 200 + 10, (i // 6) * 260 + 10
+            if rng.random() < repeat_ratio:
+                # 短文本的气泡大小和原文字号比较固定
+                translation = rng.choice(REPEATED)
+                w, h = rng.choice(((80, 60), (100, 80), (120, 70)))
+                font_size = rng.choice((24, 28))
+            else:
+                translation = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(6, 16))).capitalize() + '.'
+                w, h = rng.randint(120, 180), rng.randint(100, 220)
+                font_size = rng.randint(20, 32)
+            page.append(rect_block(x, y, w, h, translation, font_size=font_size, target_lang='ENG',
+                                   direction='h', fg_color=(0, 0, 0), bg_color=(255, 255, 255)))
+        chapter.append(page)
+    return chapter
+
+
+def render_chapter(chapter: list, font_path: str, maxsize: int):
+    caches = {'layout': text_render.LAYOUT_CACHE, 'shaping': text_render.SHAPING_CACHE}
+    previous_maxsize = {name: cache.maxsize for name, cache in caches.items()}
+    for cache in caches.values():
+        cache.maxsize = maxsize
+    text_render.clear_layout_caches()
+    config = Config()
+    config.render.render_workers = 1
+    img = np.full((1400, 1200, 3), 255, dtype=np.uint8)
+    outputs = []
+    try:
+        with CallCounter() as timer:
+            start = time.perf_counter()
+            for page in chapter:
+                outputs.append(asyncio.run(dispatch(img.copy(), copy.deepcopy(page), font_path, config)))
+            elapsed = time.perf_counter() - start
+    finally:
+        for name, cache in caches.items():
+            cache.maxsize = previous_maxsize[name]
+    result = {
+        'chapter_ms': round(elapsed * 1000, 1),
+        'layout_ms': round(timer.seconds * 1000, 1),
+    }
+    for name, cache in caches.items():
+        lookups = cache.hits + cache.misses
+        result[f'{name}_hit_rate'] = round(cache.hits / lookups, 3) if lookups else None
+    return result, outputs
+
+
+def run_benchmark(font_path: str, pages: int = 8, regions: int = 24) -> dict:
+    chapter = make_chapter(pages, regions)
+    # 预热字形缓存，避免首次加载字形的开销计入先运行的一方
+    render_chapter(chapter, font_path, 0)
+    uncached, expected = render_chapter(chapter, font_path, 0)
+    cached, outputs = render_chapter(chapter, font_path, text_render.LAYOUT_CACHE.maxsize)
+    identical = all(np.array_equal(a, b) for a, b in zip(expected, outputs))
+    return {
+        'pages': pages,
+        'regions_per_page': regions,
+        'uncached': uncached,
+        'cached': cached,
+        'layout_speedup': round(uncached['layout_ms'] / max(cached['layout_ms'], 1e-3), 2),
+        'pixel_identical': identical,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Layout cache benchmark')
+    parser.add_argument('--font', default=DEFAULT_FONT)
+    parser.add_argument('--pages', type=int, default=8)
+    parser.add_argument('--regions', type=int, default=24)
+    args = parser.parse_args()
+    result = run_benchmark(args.font, args.pages, args.regions)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    sys.exit(0 if result['pixel_identical'] else 1)
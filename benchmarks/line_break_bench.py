@@ -0,0 +1,193 @@
+"""
+AI 断句优化基准测试
+
+对带 [BR] 的译文调用 optimize_line_breaks_for_region，对比 method='exhaustive'（逐个排版所有组合）和 'dp'（动态规划）：
+- 断句不超过 10 个时穷举可行，两者应选出相同的断句方案；只有在有效字号和均匀度都相同的并列方案之间选择不同时视为相同
+- 断句更多时穷举只是抽样，DP 的结果应不差于抽样结果
+- 耗时和 calc_horizontal / calc_vertical 的调用次数
+- 与之前的选择规则（baseline：按组合顺序逐个比较，结果依赖遍历顺序）相比，DP 的方案有多少相同、字号更大/更小、
+  字号相同时更均匀/更不均匀，以及字号的最大降幅
+
+    python -m benchmarks.line_break_bench
+    python -m benchmarks.line_break_bench --font fonts/anime_ace_3.ttf --regions 40 --long-breaks 40
+"""
+import argparse
+import contextlib
+import json
+import random
+import re
+import sys
+import time
+from collections import Counter
+
+import manga_translator.rendering as rendering
+from manga_translator.config import Config
+from manga_translator.rendering import calculate_uniformity, optimize_line_breaks_for_region, text_render
+
+from .common import CJK_CHARS, DEFAULT_FONT, WORDS, CallCounter, rect_block, supported_chars
+
+# 名称: (方向, 目标语言)
+PAGES = {
+    'en_horizontal': ('h', 'ENG'),
+    'cjk_horizontal': ('h', 'CHS'),
+    'cjk_vertical': ('v', 'CHS'),
+}
+
+
+def _translation(rng: random.Random, page: str, breaks: int, cjk: str) -> str:
+    segments = []
+    for _ in range(breaks + 1):
+        if page.startswith('cjk'):
+            segments.append(''.join(rng.choice(cjk) for _ in range(rng.randint(1, 9))))
+        else:
+            segments.append(' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))))
+    # AI 断句的几种写法
+    separator = rng.choice(('[BR]', ' [BR] ', '<br>', '【BR】')) if page.startswith('en') else rng.choice(('[BR]', '<br>'))
+    return separator.join(segments)
+
+
+def make_cases(page: str, count: int, min_breaks: int, max_breaks: int, seed: int = 0):
+    direction, target_lang = PAGES[page]
+    rng = random.Random(f'{page}:{min_breaks}:{seed}')
+    cjk = supported_chars(CJK_CHARS)
+    cases = []
+    for _ in range(count):
+        font_size = rng.randint(20, 40)
+        breaks = rng.randint(min_breaks, max_breaks)
+        # 气泡形状从扁宽到瘦高
+        width, height = rng.randint(3, 16) * font_size, rng.randint(3, 16) * font_size
+        region = rect_block(0, 0, width, height, _translation(rng, page, breaks, cjk), font_size=font_size,
+                            target_lang=target_lang, direction=direction)
+        cases.append((region, font_size, width, height))
+    return cases
+
+
+def pick_baseline(candidates: list):
+    """
+    之前 optimize_line_breaks_for_region 的选择规则：按组合顺序逐个比较，有效字号大 0.5px 以上时替换，
+    相差 0.5px 以内时更均匀才替换，结果依赖组合的顺序
+    """
+    best, best_font_size, best_uniformity = None, 0, float('inf')
+    for candidate in candidates:
+        _, font_size, uniformity, _ = candidate
+        if font_size > best_font_size + 0.5 or (abs(font_size - best_font_size) <= 0.5 and uniformity < best_uniformity):
+            best, best_font_size, best_uniformity = candidate, font_size, uniformity
+    return best
+
+
+@contextlib.contextmanager
+def baseline_selection():
+    """在 method='exhaustive' 中使用之前的选择规则"""
+    original = rendering._pick_line_break_candidate
+    rendering._pick_line_break_candidate = pick_baseline
+    try:
+        yield
+    finally:
+        rendering._pick_line_break_candidate = original
+
+
+def _run(cases: list, config: Config, method: str):
+    results = []
+    # 各方法排版的文本大量重复，清空排版缓存使耗时可比
+    text_render.clear_layout_caches()
+    with CallCounter() as counter:
+        start = time.perf_counter()
+        for region, font_size, width, height in cases:
+            results.append(optimize_line_breaks_for_region(region, config, font_size, width, height, method=method))
+        elapsed = time.perf_counter() - start
+    return results, elapsed, sum(counter.counts.values())
+
+
+def line_uniformity(region, config: Config, text: str, font_size: int) -> float:
+    text = re.sub(r'\s*(\[BR\]|<br>|【BR】)\s*', '\n', text, flags=re.IGNORECASE)
+    if region.horizontal:
+        lines, _ = text_render.calc_horizontal(font_size, text, max_width=99999, max_height=99999, language=region.target_lang)
+    else:
+        if config.render.auto_rotate_symbols:
+            text = text_render.auto_add_horizontal_tags(text)
+        lines, _ = text_render.calc_vertical(font_size, text, max_height=99999)
+    return calculate_uniformity(lines)
+
+
+def _compare(case: tuple, config: Config, exhaustive: tuple, dp: tuple, tractable: bool) -> str:
+    if exhaustive[0] == dp[0]:
+        return 'equal'
+    region, font_size = case[:2]
+    exhaustive_uniformity = line_uniformity(region, config, exhaustive[0], font_size)
+    dp_uniformity = line_uniformity(region, config, dp[0], font_size)
+    if abs(exhaustive[1] - dp[1]) < 1e-6 and abs(exhaustive_uniformity - dp_uniformity) < 1e-9:
+        return 'tie'
+    # 抽样的组合是全部组合的子集：DP 的字号不应低 0.5px 以上，且字号不更大时应更均匀
+    if not tractable and dp[1] >= exhaustive[1] - 0.5 and (dp[1] > exhaustive[1] or dp_uniformity <= exhaustive_uniformity):
+        return 'better'
+    return 'different'
+
+
+def _compare_baseline(case: tuple, config: Config, baseline: tuple, dp: tuple) -> str:
+    if baseline[0] == dp[0]:
+        return 'equal'
+    if dp[1] > baseline[1] + 1e-6:
+        return 'larger_font'
+    if dp[1] < baseline[1] - 1e-6:
+        return 'smaller_font'
+    region, font_size = case[:2]
+    baseline_uniformity = line_uniformity(region, config, baseline[0], font_size)
+    dp_uniformity = line_uniformity(region, config, dp[0], font_size)
+    if abs(baseline_uniformity - dp_uniformity) < 1e-9:
+        return 'tie'
+    return 'more_uniform' if dp_uniformity < baseline_uniformity else 'less_uniform'
+
+
+def bench_page(page: str, count: int, long_breaks: int, strict: bool = False) -> list:
+    config = Config()
+    config.render.layout_mode = 'smart_scaling'
+    config.render.strict_smart_scaling = strict
+    rows = []
+    for name, min_breaks, max_breaks in (('tractable', 1, 10), ('long', 11, long_breaks)):
+        cases = make_cases(page, count, min_breaks, max(min_breaks, max_breaks))
+        exhaustive, exhaustive_s, exhaustive_calls = _run(cases, config, 'exhaustive')
+        dp, dp_s, dp_calls = _run(cases, config, 'dp')
+        # 断句较多时 exhaustive 的组合是随机抽样，baseline 与 exhaustive 的抽样不同
+        with baseline_selection():
+            baseline, _, _ = _run(cases, config, 'exhaustive')
+        fit = Counter(_compare(case, config, e, d, name == 'tractable') for case, e, d in zip(cases, exhaustive, dp))
+        change = Counter(_compare_baseline(case, config, b, d) for case, b, d in zip(cases, baseline, dp))
+        rows.append({
+            'page': page,
+            'cases': name,
+            'strict': strict,
+            'regions': len(cases),
+            'breaks': [min_breaks, max_breaks],
+            'exhaustive': {'ms': round(exhaustive_s * 1000, 1), 'layout_calls': exhaustive_calls},
+            'dp': {'ms': round(dp_s * 1000, 1), 'layout_calls': dp_calls},
+            'speedup': round(exhaustive_s / max(dp_s, 1e-6), 2),
+            'dp_vs_exhaustive': dict(fit),
+            'dp_vs_baseline': dict(change),
+            'max_font_drop_px': round(max([0] + [b[1] - d[1] for b, d in zip(baseline, dp)]), 2),
+            'ok': fit['different'] == 0,
+        })
+    return rows
+
+
+def run_benchmark(font_path: str, regions: int = 40, long_breaks: int = 40, pages=None) -> list:
+    text_render.set_font(font_path)
+    results = []
+    for page in pages or PAGES:
+        if page.startswith('cjk') and len(supported_chars(CJK_CHARS)) < len(CJK_CHARS) // 2:
+            results.append({'page': page, 'skipped': f'font has no CJK coverage: {font_path}'})
+            continue
+        for strict in (False, True):
+            results.extend(bench_page(page, regions, long_breaks, strict))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Line break optimization benchmark')
+    parser.add_argument('--font', default=DEFAULT_FONT)
+    parser.add_argument('--regions', type=int, default=40, help='每组的区域数量')
+    parser.add_argument('--long-breaks', type=int, default=40, help='长译文的最大断句数')
+    parser.add_argument('--pages', nargs='+', choices=list(PAGES), default=None)
+    args = parser.parse_args()
+    results = run_benchmark(args.font, args.regions, args.long_breaks, args.pages)
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    sys.exit(0 if all(row.get('ok', True) for row in results) else 1)
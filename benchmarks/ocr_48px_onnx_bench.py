@@ -0,0 +1,105 @@
+"""
+48px OCR ONNX 推理基准测试
+
+不依赖下载的权重：用固定随机种子初始化的 OCR 模型导出 encoder / decoder_step 两张图，
+在合成的文本行切片上对比 torch（infer_beam_batch_tensor）与 ONNX Runtime（Model48pxOnnxRunner.infer_beam_batch）：
+- 结果：字符序列是否相同，prob 和逐字符颜色预测的最大差值
+- 吞吐：每秒处理的文本行数
+
+随机权重的模型很少输出 </S>，解码长度由 --max-seq-length 控制。
+
+    python -m benchmarks.ocr_48px_onnx_bench
+    python -m benchmarks.ocr_48px_onnx_bench --lines 16 --max-seq-length 64 --repeat 3
+"""
+import argparse
+import json
+import os
+import string
+import tempfile
+import time
+
+import numpy as np
+import torch
+
+from manga_translator.ocr.model_48px import OCR
+from manga_translator.ocr.model_48px_onnx import Model48pxOnnxRunner, export_48px_onnx
+
+# 0: <PAD>, 1: <S>, 2: </S>, 3: <SP>，其余为普通字符
+DICTIONARY = ['<PAD>', '<S>', '</S>', '<SP>'] + list(string.ascii_letters + string.digits)
+
+
+def make_model(seed: int = 0) -> OCR:
+    torch.manual_seed(seed)
+    return OCR(DICTIONARY, 255).eval()
+
+
+def make_crops(lines: int, seed: int = 0, max_width: int = 160):
+    """归一化后的 [N, 3, 48, W] 文本行切片（右侧补零）和各自的宽度"""
+    rng = np.random.default_rng(seed)
+    widths = [int(w) for w in rng.integers(24, max_width + 1, lines)]
+    image = np.zeros((lines, 3, 48, max(widths)), dtype=np.float32)
+    for i, w in enumerate(widths):
+        image[i, :, :, :w] = rng.uniform(-1, 1, (3, 48, w))
+    return image, widths
+
+
+def export(model: OCR, directory: str) -> Model48pxOnnxRunner:
+    encoder_path = os.path.join(directory, 'encoder.onnx')
+    decoder_path = os.path.join(directory, 'decoder_step.onnx')
+    export_48px_onnx(model, encoder_path, decoder_path)
+    return Model48pxOnnxRunner(encoder_path, decoder_path)
+
+
+def run_torch(model: OCR, image: np.ndarray, widths, max_seq_length: int) -> list:
+    with torch.no_grad():
+        return model.infer_beam_batch_tensor(torch.from_numpy(image), widths, beams_k=5, max_seq_length=max_seq_length)
+
+
+def run_onnx(runner: Model48pxOnnxRunner, image: np.ndarray, widths, max_seq_length: int) -> list:
+    return runner.infer_beam_batch(image, widths, beams_k=5, max_seq_length=max_seq_length)
+
+
+def compare(torch_results: list, onnx_results: list) -> dict:
+    """字符序列完全相同的行数，以及 prob（相对）和颜色预测（绝对）的最大差值"""
+    matches, prob_diff, color_diff = 0, 0.0, 0.0
+    for t, o in zip(torch_results, onnx_results):
+        if not np.array_equal(t[0].cpu().numpy(), o[0]):
+            continue
+        matches += 1
+        prob_diff = max(prob_diff, abs(float(t[1]) - o[1]) / max(abs(float(t[1])), 1e-30))
+        for t_pred, o_pred in zip(t[2:], o[2:]):
+            color_diff = max(color_diff, float(np.abs(t_pred.cpu().numpy() - o_pred).max(initial=0)))
+    return {'token_matches': matches, 'max_prob_rel_diff': prob_diff, 'max_color_diff': color_diff}
+
+
+def run_benchmark(lines: int = 16, max_seq_length: int = 32, repeat: int = 3) -> dict:
+    model = make_model()
+    image, widths = make_crops(lines)
+    with tempfile.TemporaryDirectory() as directory:
+        runner = export(model, directory)
+        fns = {
+            'torch': lambda: run_torch(model, image, widths, max_seq_length),
+            'onnx': lambda: run_onnx(runner, image, widths, max_seq_length),
+        }
+        results, timings = {}, {}
+        for name, fn in fns.items():
+            results[name] = fn()
+            start = time.perf_counter()
+            for _ in range(repeat):
+                fn()
+            timings[name] = (time.perf_counter() - start) / repeat
+    report = {'lines': lines, 'max_seq_length': max_seq_length, 'torch_threads': torch.get_num_threads()}
+    report.update(compare(results['torch'], results['onnx']))
+    for name, seconds in timings.items():
+        report[f'{name}_ms'] = round(seconds * 1000, 1)
+        report[f'{name}_lines_per_s'] = round(lines / seconds, 1)
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='48px OCR torch vs ONNX Runtime benchmark (random weights)')
+    parser.add_argument('--lines', type=int, default=16)
+    parser.add_argument('--max-seq-length', type=int, default=32)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.lines, args.max_seq_length, args.repeat), indent=2))
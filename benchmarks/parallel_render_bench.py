@@ -0,0 +1,120 @@
+"""
+并行区域渲染基准测试
+
+在合成页面（多个互相重叠的气泡，横排/竖排、有无描边混合）上运行 rendering.dispatch，对比：
+- render_workers=1：逐个区域渲染（并行化之前的行为）
+- render_workers=N：区域并行渲染后按顺序合成
+检查两者的输出逐像素相同，并报告耗时。另外用两个线程同时渲染不同字体的页面，检查结果与单独渲染相同。
+
+    python -m benchmarks.parallel_render_bench
+    python -m benchmarks.parallel_render_bench --font fonts/anime_ace_3.ttf --regions 40 --workers 2 4 8
+"""
+import argparse
+import asyncio
+import copy
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+import numpy as np
+
+from manga_translator.config import Config
+from manga_translator.rendering import dispatch, text_render
+
+from .common import CJK_CHARS, DEFAULT_FONT, WORDS, rect_block, supported_chars
+
+
+def make_page(regions: int, seed: int = 0):
+    rng = random.Random(seed)
+    cjk = supported_chars(CJK_CHARS)
+    img = np.full((1600, 1200, 3), 255, dtype=np.uint8)
+    page = []
+    for i in range(regions):
+        font_size = rng.randint(18, 36)
+        # 网格间距小于气泡尺寸，相邻气泡会重叠，合成顺序不同时结果会不同
+        x, y = (i % 6) * 180 + rng.randint(0, 30), (i // 6) * 200 + rng.randint(0, 30)
+        w, h = rng.randint(160, 260), rng.randint(140, 240)
+        vertical = bool(cjk) and i % 3 == 2
+        if vertical:
+            translation = ''.join(rng.choice(cjk) for _ in range(rng.randint(8, 30)))
+        else:
+            translation = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 14))).capitalize()
+        region = rect_block(x, y, w, h, translation, font_size=font_size, target_lang='CHS' if vertical else 'ENG',
+                            direction='v' if vertical else 'h', fg_color=(rng.randint(0, 80),) * 3,
+                            bg_color=(255, 255, 255), default_stroke_width=rng.choice((0.0, 0.07, 0.2)))
+        page.append(region)
+    return img, page
+
+
+def _render(img: np.ndarray, page: list, font_path: str, workers: int) -> np.ndarray:
+    config = Config()
+    config.render.render_workers = workers
+    return asyncio.run(dispatch(img.copy(), copy.deepcopy(page), font_path, config))
+
+
+def _time(img: np.ndarray, page: list, font_path: str, workers: int, repeat: int):
+    timings = []
+    result = None
+    for _ in range(repeat + 1):
+        start = time.perf_counter()
+        result = _render(img, page, font_path, workers)
+        timings.append(time.perf_counter() - start)
+    return {
+        'first_ms': round(timings[0] * 1000, 1),
+        'warm_ms': round(statistics.median(timings[1:]) * 1000, 1) if repeat else None,
+    }, result
+
+
+def _concurrent_pages(img: np.ndarray, page: list, fonts: list) -> bool:
+    """两个线程同时用不同字体渲染同一页，结果应与各自单独渲染相同"""
+    expected = [_render(img, page, font, 1) for font in fonts]
+    results = [None] * len(fonts)
+
+    def worker(index: int):
+        for _ in range(3):
+            results[index] = _render(img, page, fonts[index], 2)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(fonts))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return all(r is not None and np.array_equal(r, e) for r, e in zip(results, expected))
+
+
+def run_benchmark(font_path: str, regions: int = 36, workers=(2, 4), repeat: int = 3) -> dict:
+    img, page = make_page(regions)
+    sequential, expected = _time(img, page, font_path, 1, repeat)
+    rows = []
+    for count in workers:
+        timing, result = _time(img, page, font_path, count, repeat)
+        rows.append({
+            'workers': count,
+            **timing,
+            'speedup_warm': round(sequential['warm_ms'] / max(timing['warm_ms'], 1e-3), 2) if repeat else None,
+            'pixel_identical': bool(np.array_equal(result, expected)),
+        })
+    fonts = [font_path, text_render.DEFAULT_FONT] if os.path.exists(text_render.DEFAULT_FONT) else [font_path, font_path]
+    return {
+        'regions': len(page),
+        'sequential': sequential,
+        'parallel': rows,
+        'concurrent_dispatch_identical': _concurrent_pages(img, page, fonts),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Parallel region rendering benchmark')
+    parser.add_argument('--font', default=DEFAULT_FONT)
+    parser.add_argument('--regions', type=int, default=36)
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    result = run_benchmark(args.font, args.regions, args.workers, args.repeat)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    ok = all(row['pixel_identical'] for row in result['parallel']) and result['concurrent_dispatch_identical']
+    sys.exit(0 if ok else 1)
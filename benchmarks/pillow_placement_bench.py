@@ -0,0 +1,189 @@
+"""
+英文 Pillow 渲染（text_render_pillow_eng）排版求解基准测试
+
+在拥挤的合成页面（100+ 个互相重叠的文本框）上对比碰撞求解：
+- legacy：螺旋搜索每一步与所有文本框比较，螺旋在图片外的点也逐个生成（之前的实现）
+- grid：均匀网格索引只比较附近的文本框，螺旋只生成图片内的点，整圈都在图片外时停止
+检查两者的最终位置完全相同。另外在带气泡的合成页面上运行完整的 render_textblock_list_eng，
+对比（legacy 求解 + 不缓存测量结果）与当前实现的耗时，并检查输出逐像素相同。
+
+    python -m benchmarks.pillow_placement_bench
+    python -m benchmarks.pillow_placement_bench --font fonts/anime_ace_3.ttf --boxes 100 200 400
+"""
+import argparse
+import copy
+import json
+import random
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from manga_translator.rendering import text_render_pillow_eng as pillow_eng
+
+from .common import DEFAULT_FONT, WORDS, rect_block
+
+
+def _legacy_spiral_points(anchor_x, anchor_y, limit):
+    yield anchor_x, anchor_y
+    for radius in range(1, int(limit**0.5)):
+        for dx in range(-radius, radius+1):
+            yield anchor_x + dx, anchor_y - radius
+            yield anchor_x + dx, anchor_y + radius
+        for dy in range(-radius+1, radius):
+            yield anchor_x - radius, anchor_y + dy
+            yield anchor_x + radius, anchor_y + dy
+
+
+def _legacy_find_collision_free_position(bbox_idx, bboxes, anchors, image_bounds, spiral_limit):
+    max_x, max_y = image_bounds
+    w = bboxes[bbox_idx][2] - bboxes[bbox_idx][0]
+    h = bboxes[bbox_idx][3] - bboxes[bbox_idx][1]
+    for x, y in _legacy_spiral_points(anchors[bbox_idx][0], anchors[bbox_idx][1], spiral_limit):
+        candidate = [x, y, x+w, y+h]
+        if not (0 <= x and 0 <= y and x+w <= max_x and y+h <= max_y):
+            continue
+        has_collision = False
+        for k, other_bbox in enumerate(bboxes):
+            if k != bbox_idx and pillow_eng._check_bbox_collision(candidate, other_bbox):
+                has_collision = True
+                break
+        if not has_collision:
+            return candidate
+    return None
+
+
+def legacy_solve(image_shape, initial_bboxes_xyxy, max_iterations=10, spiral_limit=1e5, padding=0):
+    """之前的 solve_collisions_spiral_xyxy"""
+    bboxes = [[x1-padding, y1-padding, x2+padding, y2+padding] for x1, y1, x2, y2 in initial_bboxes_xyxy]
+    if len(bboxes) <= 1:
+        return bboxes
+    anchors = [(b[0], b[1]) for b in bboxes]
+    for _ in range(max_iterations):
+        collision_found = False
+        for i in range(len(bboxes)):
+            for j in range(i+1, len(bboxes)):
+                if pillow_eng._check_bbox_collision(bboxes[i], bboxes[j]):
+                    collision_found = True
+                    new_position = _legacy_find_collision_free_position(j, bboxes, anchors, image_shape, spiral_limit)
+                    if new_position:
+                        bboxes[j] = new_position
+                    break
+        if not collision_found:
+            break
+    return bboxes
+
+
+def make_bboxes(count: int, width: int, height: int, seed: int = 0) -> list:
+    """气泡附近的文本框：成簇分布，簇内互相重叠，部分贴近或超出图片边缘"""
+    rng = random.Random(seed)
+    centers = [(rng.randint(0, width), rng.randint(0, height)) for _ in range(max(1, count // 6))]
+    bboxes = []
+    for _ in range(count):
+        cx, cy = rng.choice(centers)
+        w, h = rng.randint(60, 220), rng.randint(30, 140)
+        x, y = cx + rng.randint(-120, 120) - w // 2, cy + rng.randint(-120, 120) - h // 2
+        bboxes.append([x, y, x + w, y + h])
+    return bboxes
+
+
+def bench_solver(counts, width: int, height: int, repeat: int) -> list:
+    rows = []
+    for count in counts:
+        bboxes = make_bboxes(count, width, height)
+        timings = {'legacy': [], 'grid': []}
+        results = {}
+        for name, solve in (('legacy', legacy_solve), ('grid', pillow_eng.solve_collisions_spiral_xyxy)):
+            for _ in range(repeat):
+                start = time.perf_counter()
+                results[name] = solve((width, height), bboxes)
+                timings[name].append(time.perf_counter() - start)
+        legacy_ms, grid_ms = (statistics.median(timings[name]) * 1000 for name in ('legacy', 'grid'))
+        rows.append({
+            'boxes': count,
+            'legacy_ms': round(legacy_ms, 1),
+            'grid_ms': round(grid_ms, 1),
+            'speedup': round(legacy_ms / max(grid_ms, 1e-3), 2),
+            'identical': results['legacy'] == results['grid'],
+        })
+    return rows
+
+
+def make_page(regions: int, width: int, height: int, seed: int = 0):
+    rng = random.Random(seed)
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+    text_regions = []
+    cols = max(1, int((regions * width / height) ** 0.5))
+    cell_w, cell_h = width // cols, height // -(-regions // cols)
+    for i in range(regions):
+        cx, cy = (i % cols) * cell_w + cell_w // 2, (i // cols) * cell_h + cell_h // 2
+        cv2.ellipse(img, (cx, cy), (cell_w * 9 // 20, cell_h * 9 // 20), 0, 0, 360, (0, 0, 0), 2)
+        w, h = cell_w // 2, cell_h // 3
+        x, y = cx - w // 2, cy - h // 2
+        translation = rng.choice(('...', 'Huh?', 'No way!', 'Thank you!')) if rng.random() < 0.4 else \
+            ' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 12))).capitalize() + '.'
+        text_regions.append(rect_block(x, y, w, h, translation, font_size=rng.randint(20, 40), target_lang='ENG',
+                                       fg_color=(0, 0, 0), bg_color=(255, 255, 255)))
+    return img, text_regions
+
+
+def _render(font_path: str, img: np.ndarray, regions: list, legacy: bool) -> np.ndarray:
+    original_solve = pillow_eng.solve_collisions_spiral_xyxy
+    original_maxsize = pillow_eng.MEASURE_CACHE.maxsize
+    pillow_eng.MEASURE_CACHE.clear()
+    pillow_eng._load_font.cache_clear()
+    if legacy:
+        pillow_eng.solve_collisions_spiral_xyxy = legacy_solve
+        pillow_eng.MEASURE_CACHE.maxsize = 0
+    try:
+        return pillow_eng.render_textblock_list_eng(font_path, img.copy(), copy.deepcopy(regions), original_img=img,
+                                                   downscale_constraint=0.95)
+    finally:
+        pillow_eng.solve_collisions_spiral_xyxy = original_solve
+        pillow_eng.MEASURE_CACHE.maxsize = original_maxsize
+
+
+def bench_render(font_path: str, regions: int, width: int, height: int, repeat: int) -> dict:
+    img, text_regions = make_page(regions, width, height)
+    timings = {'legacy': [], 'current': []}
+    outputs = {}
+    for _ in range(repeat):
+        for name in timings:
+            start = time.perf_counter()
+            outputs[name] = _render(font_path, img, text_regions, name == 'legacy')
+            timings[name].append(time.perf_counter() - start)
+    legacy_ms, current_ms = (statistics.median(timings[name]) * 1000 for name in ('legacy', 'current'))
+    lookups = pillow_eng.MEASURE_CACHE.hits + pillow_eng.MEASURE_CACHE.misses
+    return {
+        'regions': regions,
+        'legacy_ms': round(legacy_ms, 1),
+        'current_ms': round(current_ms, 1),
+        'speedup': round(legacy_ms / max(current_ms, 1e-3), 2),
+        'measure_cache_hit_rate': round(pillow_eng.MEASURE_CACHE.hits / lookups, 3) if lookups else None,
+        'pixel_identical': bool(np.array_equal(outputs['legacy'], outputs['current'])),
+    }
+
+
+def run_benchmark(font_path: str, counts=(100, 200), regions: int = 120, width: int = 2000, height: int = 3000,
+                  repeat: int = 1) -> dict:
+    return {
+        'page': [height, width],
+        'solver': bench_solver(counts, width, height, repeat),
+        'render': bench_render(font_path, regions, width, height, repeat),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pillow English renderer placement benchmark')
+    parser.add_argument('--font', default=DEFAULT_FONT)
+    parser.add_argument('--boxes', type=int, nargs='+', default=[100, 200])
+    parser.add_argument('--regions', type=int, default=120)
+    parser.add_argument('--size', type=int, nargs=2, default=[3000, 2000], metavar=('HEIGHT', 'WIDTH'))
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+    result = run_benchmark(args.font, args.boxes, args.regions, args.size[1], args.size[0], args.repeat)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    ok = all(row['identical'] for row in result['solver']) and result['render']['pixel_identical']
+    sys.exit(0 if ok else 1)
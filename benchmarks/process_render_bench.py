@@ -0,0 +1,103 @@
+"""
+并发流水线进程池渲染基准测试
+
+用 parallel_render_bench 的合成页面（多个重叠气泡，横排/竖排、有无描边混合）做真实渲染，对比：
+- thread：在当前进程中逐页调用 rendering.dispatch（不使用进程池时的行为）
+- process=N：与 ConcurrentPipeline._render 相同，把图片放入 SharedImage 后提交 _render_worker 到 N 个 spawn 进程
+检查所有方式的输出逐像素相同，报告每秒渲染页数和相对 thread 的加速比。进程池先预热（导入模块、加载字体、
+创建 Hyphenator），预热不计入耗时。加速比受 CPU 核数限制，结果中同时给出 cpu_count。
+
+    python -m benchmarks.process_render_bench
+    python -m benchmarks.process_render_bench --pages 16 --regions 24 --processes 1 2 4
+"""
+import argparse
+import asyncio
+import copy
+import functools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from manga_translator.config import Config
+from manga_translator.rendering import dispatch, text_render
+from manga_translator.utils.concurrent_pipeline import _render_worker
+from manga_translator.utils.shared_image import SharedImage
+
+from .common import DEFAULT_FONT
+from .parallel_render_bench import make_page
+
+
+def _config() -> Config:
+    config = Config()
+    # 只测进程级并行，区域不再在进程内并行
+    config.render.render_workers = 1
+    return config
+
+
+def _memoize_hyphenator():
+    # 与 tests/conftest.py 相同：Hyphenator 每次创建都会检查/下载词典，每个进程每种语言只创建一次
+    if not hasattr(text_render.select_hyphenator, 'cache_info'):
+        text_render.select_hyphenator = functools.lru_cache(maxsize=None)(text_render.select_hyphenator)
+
+
+def _render_thread(pages: list, font_path: str) -> list:
+    config = _config()
+    return [asyncio.run(dispatch(img.copy(), copy.deepcopy(regions), font_path, config, img)) for img, regions in pages]
+
+
+def _render_processes(pool: ProcessPoolExecutor, pages: list, font_path: str) -> list:
+    config = _config()
+    submitted = []
+    for img, regions in pages:
+        shared = (SharedImage.from_array(img), SharedImage.from_array(img), SharedImage(img.shape, img.dtype))
+        submitted.append((shared, pool.submit(_render_worker, *shared[:2], regions, font_path, config, shared[2])))
+    outputs = []
+    for shared, future in submitted:
+        output, _ = future.result()
+        outputs.append(shared[2].copy() if output is None else output)
+        for image in shared:
+            image.release()
+    return outputs
+
+
+def run_benchmark(pages: int = 8, regions: int = 24, processes=(1, 2, 4), font_path: str = DEFAULT_FONT) -> dict:
+    _memoize_hyphenator()
+    text_render.set_font(font_path)
+    page_list = [make_page(regions, seed=i) for i in range(pages)]
+    _render_thread(page_list[:1], font_path)
+
+    start = time.perf_counter()
+    expected = _render_thread(page_list, font_path)
+    thread_seconds = time.perf_counter() - start
+    results = [{'mode': 'thread', 'seconds': round(thread_seconds, 2),
+                'pages_per_s': round(pages / thread_seconds, 2), 'speedup': 1.0, 'identical': True}]
+
+    for n in processes:
+        with ProcessPoolExecutor(max_workers=n, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_memoize_hyphenator) as pool:
+            _render_processes(pool, page_list[:n], font_path)
+            start = time.perf_counter()
+            outputs = _render_processes(pool, page_list, font_path)
+            seconds = time.perf_counter() - start
+        results.append({
+            'mode': f'process={n}',
+            'seconds': round(seconds, 2),
+            'pages_per_s': round(pages / seconds, 2),
+            'speedup': round(thread_seconds / seconds, 2),
+            'identical': all(np.array_equal(a, b) for a, b in zip(outputs, expected)),
+        })
+    return {'cpu_count': os.cpu_count(), 'pages': pages, 'regions': regions, 'results': results}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Process-pool page rendering benchmark (ConcurrentPipeline._render_worker)')
+    parser.add_argument('--pages', type=int, default=8)
+    parser.add_argument('--regions', type=int, default=24)
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--font', default=DEFAULT_FONT)
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.pages, args.regions, args.processes, args.font), indent=2))
@@ -0,0 +1,227 @@
+"""
+INT8 量化输出误差基准测试
+
+不依赖下载的权重：用固定随机种子初始化 ctd（yolov5s 结构的 blk_det + UnetHead + DBHead，
+按 comictextdetector.pt 的格式保存后经 TextDetBase 加载）和 48px OCR，走与
+`python -m manga_translator.utils.quantization calibrate` 相同的量化路径：
+- ctd：导出 ONNX，用合成页面静态量化，对比 blk / seg / det 三个输出
+- 48px OCR ONNX：encoder 静态量化（calibrate）和动态量化（ocr_quantize 运行时），decoder 动态量化，
+  对比 encoder 的 cross_k / cross_v 和单步 decoder 的 logprobs / layer_inputs / colors
+- 48px OCR torch：quantize_dynamic_model，经同样的 encoder / decoder_step 包装对比
+误差为相对 L2 误差 |int8 - fp32| / |fp32|，同时给出各自的推理耗时。随机权重的模型输出接近均匀分布，
+beam search 的字符序列对微小扰动很敏感，因此只比较图的原始输出。
+
+    python -m benchmarks.quantization_bench
+    python -m benchmarks.quantization_bench --input-size 1024 --pages 8 --repeat 5
+"""
+import argparse
+import copy
+import json
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+import torch
+
+from manga_translator.detection.ctd import preprocess_img
+from manga_translator.detection.ctd_utils.basemodel import DBHead, TextDetBase, UnetHead
+from manga_translator.detection.ctd_utils.yolov5.yolo import Model
+from manga_translator.ocr.model_48px_onnx import OCRDecoderStepOnnx, OCREncoderOnnx, _step_positions
+from manga_translator.utils.onnx_session import create_session
+from manga_translator.utils.quantization import (
+    OCR_ENCODER_STATIC_OP_TYPES, _ctd_samples, quantize_dynamic_model, quantize_onnx_dynamic,
+    quantize_onnx_static,
+)
+
+from .ocr_48px_onnx_bench import export, make_crops, make_model
+
+# yolov5s，out_indices=[1,3,5,7,9] 的通道数 64/128/256/512/512 与 UnetHead 一致
+CTD_CFG = {
+    'nc': 2,
+    'depth_multiple': 0.33,
+    'width_multiple': 0.5,
+    'anchors': [[10, 13, 16, 30, 33, 23], [30, 61, 62, 45, 59, 119], [116, 90, 156, 198, 373, 326]],
+    'backbone': [
+        [-1, 1, 'Conv', [64, 6, 2, 2]], [-1, 1, 'Conv', [128, 3, 2]], [-1, 3, 'C3', [128]],
+        [-1, 1, 'Conv', [256, 3, 2]], [-1, 6, 'C3', [256]], [-1, 1, 'Conv', [512, 3, 2]],
+        [-1, 9, 'C3', [512]], [-1, 1, 'Conv', [1024, 3, 2]], [-1, 3, 'C3', [1024]], [-1, 1, 'SPPF', [1024, 5]],
+    ],
+    'head': [
+        [-1, 1, 'Conv', [512, 1, 1]], [-1, 1, 'nn.Upsample', [None, 2, 'nearest']], [[-1, 6], 1, 'Concat', [1]],
+        [-1, 3, 'C3', [512, False]], [-1, 1, 'Conv', [256, 1, 1]], [-1, 1, 'nn.Upsample', [None, 2, 'nearest']],
+        [[-1, 4], 1, 'Concat', [1]], [-1, 3, 'C3', [256, False]], [-1, 1, 'Conv', [256, 3, 2]],
+        [[-1, 14], 1, 'Concat', [1]], [-1, 3, 'C3', [512, False]], [-1, 1, 'Conv', [512, 3, 2]],
+        [[-1, 10], 1, 'Concat', [1]], [-1, 3, 'C3', [1024, False]], [[17, 20, 23], 1, 'Detect', ['nc', 'anchors']],
+    ],
+}
+CTD_OUTPUTS = ('blk', 'seg', 'det')
+
+
+def relative_error(reference: np.ndarray, value: np.ndarray) -> float:
+    reference = np.asarray(reference, dtype=np.float64)
+    return float(np.linalg.norm(np.asarray(value, dtype=np.float64) - reference) / max(np.linalg.norm(reference), 1e-12))
+
+
+def make_pages(count: int, seed: int = 0, height: int = 700, width: int = 500) -> list:
+    """白底黑字的合成页面（RGB）"""
+    rng = np.random.default_rng(seed)
+    pages = []
+    for _ in range(count):
+        page = np.full((height, width, 3), 255, dtype=np.uint8)
+        for _ in range(30):
+            x, y = int(rng.integers(0, width - 60)), int(rng.integers(20, height))
+            cv2.putText(page, 'ABCDE', (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
+        pages.append(page)
+    return pages
+
+
+def make_ctd(directory: str, seed: int = 0, input_size: int = 512) -> str:
+    """按 comictextdetector.pt 的格式保存随机权重，经 TextDetBase 加载后导出 ONNX，返回 ONNX 路径"""
+    torch.manual_seed(seed)
+    blk_det = Model(copy.deepcopy(CTD_CFG))
+    ckpt_path = os.path.join(directory, 'comictextdetector.pt')
+    torch.save({
+        'blk_det': {'cfg': CTD_CFG, 'weights': blk_det.state_dict()},
+        'text_seg': UnetHead().state_dict(),
+        'text_det': DBHead(64).state_dict(),
+    }, ckpt_path)
+    model = TextDetBase(ckpt_path)
+    onnx_path = ckpt_path + '.onnx'
+    with torch.no_grad():
+        torch.onnx.export(model, torch.zeros(1, 3, input_size, input_size), onnx_path,
+                          input_names=['images'], output_names=list(CTD_OUTPUTS), opset_version=17, dynamo=False)
+    return onnx_path
+
+
+def _run_session(session, inputs: dict, repeat: int):
+    outputs = session.run(None, inputs)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        session.run(None, inputs)
+    return outputs, (time.perf_counter() - start) / max(repeat, 1)
+
+
+def _ctd_input(page: np.ndarray, input_size: int) -> np.ndarray:
+    img_in, _, _, _ = preprocess_img(page, input_size=(input_size, input_size), to_tensor=False)
+    return cv2.dnn.blobFromImage(img_in, scalefactor=1 / 255.0, size=(input_size, input_size))
+
+
+def evaluate_ctd(directory: str, pages: int = 4, input_size: int = 512, repeat: int = 1, seed: int = 0) -> dict:
+    """用 pages 页合成页面静态量化，在另一页上对比 FP32 与 INT8 的输出"""
+    fp32_path = make_ctd(directory, seed, input_size)
+    page_paths = []
+    for i, page in enumerate(make_pages(pages, seed=seed)):
+        page_paths.append(os.path.join(directory, f'page_{i}.png'))
+        cv2.imwrite(page_paths[-1], cv2.cvtColor(page, cv2.COLOR_RGB2BGR))
+    start = time.perf_counter()
+    int8_output = quantize_onnx_static(fp32_path, _ctd_samples(page_paths, 'images', input_size))
+    quantize_seconds = time.perf_counter() - start
+
+    inputs = {'images': _ctd_input(make_pages(1, seed=seed + 1000)[0], input_size)}
+    fp32, fp32_seconds = _run_session(create_session(fp32_path), inputs, repeat)
+    int8, int8_seconds = _run_session(create_session(int8_output), inputs, repeat)
+    report = {'input_size': input_size, 'calibration_pages': pages, 'quantize_s': round(quantize_seconds, 2)}
+    for name, a, b in zip(CTD_OUTPUTS, fp32, int8):
+        report[f'{name}_rel_err'] = relative_error(a, b)
+    report.update({'fp32_ms': round(fp32_seconds * 1000, 1), 'int8_ms': round(int8_seconds * 1000, 1)})
+    return report
+
+
+def _ocr_inputs(model, lines: int, seed: int):
+    """encoder 输入，以及用 FP32 encoder 输出构造的第 4 步 decoder 输入"""
+    image, widths = make_crops(lines, seed=seed)
+    encoder_inputs = {'image': image, 'feat_lengths': np.array([(w + 3) // 4 + 2 for w in widths], dtype=np.int64)}
+    with torch.no_grad():
+        cross_k, cross_v, memory_mask = OCREncoderOnnx(model)(*(torch.from_numpy(v) for v in encoder_inputs.values()))
+    steps = 3
+    rng = np.random.default_rng(seed)
+    decoder_inputs = {
+        'tokens': rng.integers(4, model.embd.num_embeddings, lines).astype(np.int64),
+        'cache': rng.normal(size=(lines, len(model.decoders), steps, model.embd.embedding_dim)).astype(np.float32),
+        'positions': _step_positions(steps),
+        'cross_k': cross_k.numpy(),
+        'cross_v': cross_v.numpy(),
+        'memory_mask': memory_mask.numpy(),
+    }
+    return encoder_inputs, decoder_inputs
+
+
+def _ocr_errors(prefix: str, fp32: tuple, int8: tuple) -> dict:
+    names = ('cross_k', 'cross_v', 'memory_mask', 'logprobs', 'layer_inputs', 'colors')
+    report = {}
+    for name, a, b in zip(names, fp32, int8):
+        if name == 'memory_mask':
+            continue
+        report[f'{prefix}_{name}_rel_err'] = relative_error(a, b)
+    return report
+
+
+def evaluate_ocr(directory: str, lines: int = 6, calibration: int = 4, repeat: int = 1, seed: int = 0) -> dict:
+    """48px OCR 的 ONNX（静态 / 动态 encoder + 动态 decoder）与 torch 动态量化输出误差"""
+    model = make_model(seed)
+    export(model, directory)
+    encoder_path = os.path.join(directory, 'encoder.onnx')
+    decoder_path = os.path.join(directory, 'decoder_step.onnx')
+    encoder_inputs, decoder_inputs = _ocr_inputs(model, lines, seed + 1)
+
+    def calibration_samples():
+        for i in range(calibration):
+            image, widths = make_crops(1, seed=seed + 100 + i)
+            yield {'image': image, 'feat_lengths': np.array([(w + 3) // 4 + 2 for w in widths], dtype=np.int64)}
+
+    static_encoder = quantize_onnx_static(encoder_path, calibration_samples(), os.path.join(directory, 'encoder.static.int8.onnx'),
+                                          op_types=OCR_ENCODER_STATIC_OP_TYPES)
+    dynamic_encoder = quantize_onnx_dynamic(encoder_path)
+    dynamic_decoder = quantize_onnx_dynamic(decoder_path)
+
+    def run_onnx(encoder, decoder):
+        enc, enc_seconds = _run_session(create_session(encoder), encoder_inputs, repeat)
+        dec, dec_seconds = _run_session(create_session(decoder), decoder_inputs, repeat)
+        return (*enc, *dec), enc_seconds + dec_seconds
+
+    def run_torch(ocr):
+        with torch.no_grad():
+            encoder, decoder = OCREncoderOnnx(ocr), OCRDecoderStepOnnx(ocr)
+            start = time.perf_counter()
+            for _ in range(repeat + 1):
+                enc = encoder(*(torch.from_numpy(v) for v in encoder_inputs.values()))
+                dec = decoder(*(torch.from_numpy(v) for v in decoder_inputs.values()))
+            seconds = (time.perf_counter() - start) / (repeat + 1)
+        return tuple(t.numpy() for t in (*enc, *dec)), seconds
+
+    onnx_fp32, onnx_fp32_seconds = run_onnx(encoder_path, decoder_path)
+    onnx_static, onnx_static_seconds = run_onnx(static_encoder, dynamic_decoder)
+    onnx_dynamic, onnx_dynamic_seconds = run_onnx(dynamic_encoder, dynamic_decoder)
+    torch_fp32, torch_fp32_seconds = run_torch(model)
+    qmodel, quantized_layers = quantize_dynamic_model(make_model(seed))
+    torch_int8, torch_int8_seconds = run_torch(qmodel)
+
+    report = {'lines': lines, 'torch_quantized_layers': quantized_layers}
+    report.update(_ocr_errors('onnx_static', onnx_fp32, onnx_static))
+    report.update(_ocr_errors('onnx_dynamic', onnx_fp32, onnx_dynamic))
+    report.update(_ocr_errors('torch', torch_fp32, torch_int8))
+    for name, seconds in (('onnx_fp32', onnx_fp32_seconds), ('onnx_static', onnx_static_seconds),
+                          ('onnx_dynamic', onnx_dynamic_seconds), ('torch_fp32', torch_fp32_seconds),
+                          ('torch_int8', torch_int8_seconds)):
+        report[f'{name}_ms'] = round(seconds * 1000, 1)
+    return report
+
+
+def run_benchmark(input_size: int = 512, pages: int = 4, lines: int = 16, repeat: int = 3) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        ctd = evaluate_ctd(directory, pages, input_size, repeat)
+    with tempfile.TemporaryDirectory() as directory:
+        ocr = evaluate_ocr(directory, lines, pages, repeat)
+    return {'torch_threads': torch.get_num_threads(), 'ctd': ctd, 'ocr_48px': ocr}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='INT8 vs FP32 output error for ctd / 48px OCR (random weights)')
+    parser.add_argument('--input-size', type=int, default=512)
+    parser.add_argument('--pages', type=int, default=4, help='Calibration pages / crops')
+    parser.add_argument('--lines', type=int, default=16)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.input_size, args.pages, args.lines, args.repeat), indent=2))
@@ -0,0 +1,123 @@
+"""
+共享内存图片通道基准测试
+
+客户端进程把一张大图发给服务端进程，服务端取出后原样返回，客户端再取出结果，对比两种传输方式：
+- pickle：整张图序列化后经管道发送（与 shared 模式 HTTP 请求体相同的序列化方式）
+- shm：图片放入 SharedImageRing 槽位，只发送 SharedFrame 句柄
+
+每种方式在新的进程中运行，报告往返耗时和客户端/服务端的峰值 RSS。
+
+    python -m benchmarks.shared_image_bench
+    python -m benchmarks.shared_image_bench --width 4000 --height 20000 --repeat 5
+"""
+import argparse
+import json
+import multiprocessing
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from manga_translator.utils.shared_image import SharedImageRing, pack_frames, release_frames, unpack_frames
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 单位为 KB，macOS 为字节
+        return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 / 1024
+
+
+def _server(conn, mode: str):
+    ring = SharedImageRing(2) if mode == 'shm' else None
+    try:
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+            if mode == 'shm':
+                # 上一次的结果客户端已经读完
+                ring.release_all()
+                mapped = []
+                image = unpack_frames(message, mapped)
+                conn.send(pack_frames(image, ring, [], min_bytes=0))
+                del image
+                release_frames(mapped)
+            else:
+                conn.send(message)
+        conn.send(_peak_rss_mb())
+    finally:
+        if ring is not None:
+            ring.close()
+
+
+def _client(mode: str, width: int, height: int, repeat: int, result_conn):
+    ctx = multiprocessing.get_context('spawn')
+    parent, child = ctx.Pipe()
+    server = ctx.Process(target=_server, args=(child, mode))
+    server.start()
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    ring = SharedImageRing(2) if mode == 'shm' else None
+    samples = []
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            if mode == 'shm':
+                frames = []
+                mapped = []
+                parent.send(pack_frames(image, ring, frames, min_bytes=0))
+                result = unpack_frames(parent.recv(), mapped)
+                for frame in frames:
+                    ring.release(frame)
+            else:
+                parent.send(image)
+                result = parent.recv()
+            samples.append(time.perf_counter() - start)
+            assert result.shape == image.shape and result[-1, -1, 0] == image[-1, -1, 0]
+            del result
+            if mode == 'shm':
+                release_frames(mapped)
+        parent.send(None)
+        server_peak = parent.recv()
+        server.join()
+    finally:
+        if ring is not None:
+            ring.close()
+    result_conn.send({
+        'mode': mode,
+        'page': f'{width}x{height}',
+        'page_mb': round(image.nbytes / 1024 / 1024, 1),
+        'repeat': repeat,
+        'round_trip_ms': round(statistics.median(samples) * 1000, 1),
+        'min_ms': round(min(samples) * 1000, 1),
+        'client_peak_rss_mb': round(_peak_rss_mb(), 1),
+        'server_peak_rss_mb': round(server_peak, 1),
+    })
+
+
+def run_benchmark(width: int = 4000, height: int = 20000, repeat: int = 5, modes=('pickle', 'shm')) -> list:
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+    for mode in modes:
+        parent, child = ctx.Pipe()
+        process = ctx.Process(target=_client, args=(mode, width, height, repeat, child))
+        process.start()
+        results.append(parent.recv())
+        process.join()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Shared-memory image channel benchmark')
+    parser.add_argument('--width', type=int, default=4000)
+    parser.add_argument('--height', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--modes', nargs='+', default=['pickle', 'shm'], choices=['pickle', 'shm'])
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.width, args.height, args.repeat, args.modes), indent=2))
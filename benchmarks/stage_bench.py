@@ -0,0 +1,458 @@
+"""
+离线阶段基准测试
+
+用固定随机种子生成合成页面（带描边的对话气泡、多种文字的横排/竖排文本、网点纸噪声、条漫长图），
+在 CPU 上分别计时检测（ctd）、文本行合并、mask 细化、MPE 预处理、渲染和保存，结果输出为 JSON，
+用于在不同提交之间对比，在本地发现 textline_merge / rendering / mask_refinement 的性能回退。
+
+- 每个阶段使用固定的输入（合成页面自带的文本行和文字 mask），不依赖上游阶段的结果
+- 检测默认使用桩模型：根据输入图片的暗像素生成 mask 和行概率图，只计时 ctd 的前后处理；
+  已下载 comictextdetector.pt.onnx 时可用 --real-detector 计时真实的 ONNX 推理
+- 页面哈希写入结果，对比时页面不一致会给出提示
+
+    python -m benchmarks.stage_bench --output bench.json
+    python -m benchmarks.stage_bench --pages manga_en_horizontal webtoon_strip --repeat 10
+    python -m benchmarks.stage_bench --output new.json --compare bench.json --threshold 0.15
+"""
+import argparse
+import asyncio
+import copy
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from manga_translator.utils.checkpoint import hash_array
+from manga_translator.utils.generic import BASE_PATH, Context, Quadrilateral
+
+BENCH_STAGES = ('detection', 'textline_merge', 'mask_refinement', 'mpe_preprocess', 'rendering', 'save_png', 'save_jpg')
+
+SAMPLES = {
+    'ja': 'どうしてここにいるの？もう帰ろうよ、みんな待ってるから',
+    'zh': '你到底想要做什么这里很危险我们快点离开吧',
+    'ko': '여기서 뭐 하는 거야 빨리 돌아가자 다들 기다리고 있어',
+    'en': "WHAT ARE YOU DOING HERE? LET'S GO BACK, EVERYONE IS WAITING!",
+}
+
+TRANSLATIONS = [
+    "What are you doing here? Let's go back, everyone is waiting for us.",
+    'This place is dangerous. We should leave right now!',
+    "I told you, I'm not going anywhere until I find it.",
+    'Wait... did you hear that?',
+    'Hurry up!',
+]
+
+# 名称 -> (宽, 高, 文字, 方向, 网点比例, 气泡数)
+PAGES = {
+    'manga_ja_vertical': (1200, 1700, ('ja',), ('v',), 0.3, 7),
+    'manga_en_horizontal': (1200, 1700, ('en',), ('h',), 0.3, 7),
+    'manga_mixed_screentone': (1400, 2000, ('ja', 'zh', 'ko', 'en'), ('h', 'v'), 0.8, 9),
+    'webtoon_strip': (800, 6400, ('ko', 'en'), ('h',), 0.2, 14),
+}
+
+SOURCE_FONTS = ('Arial-Unicode-Regular.ttf', 'msyh.ttc', 'msgothic.ttc', 'anime_ace_3.ttf')
+RENDER_FONT = 'anime_ace_3.ttf'
+
+
+def _find_font(names) -> Optional[str]:
+    for name in names:
+        path = os.path.join(BASE_PATH, 'fonts', name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def _screentone(h: int, w: int, rng: np.random.Generator) -> np.ndarray:
+    """网点纸：规则网点加高斯噪声"""
+    period = int(rng.integers(5, 10))
+    radius = period * rng.uniform(0.25, 0.45)
+    yy, xx = np.mgrid[0:h, 0:w]
+    dy = (yy % period) - period / 2
+    dx = (xx % period) - period / 2
+    tone = np.where(dx * dx + dy * dy < radius * radius, 60, 235).astype(np.float32)
+    tone += rng.normal(0, 18, size=(h, w))
+    return np.clip(tone, 0, 255).astype(np.uint8)
+
+
+def _panels(width: int, height: int, rng: np.random.Generator) -> List[tuple]:
+    if height > width * 2:
+        # 条漫：竖向排列的不等高分镜
+        rects, y = [], 40
+        while y < height - 200:
+            h = int(rng.integers(500, 1100))
+            rects.append((40, y, width - 40, min(y + h, height - 40)))
+            y += h + int(rng.integers(120, 400))
+        return rects
+    gutter = 20
+    rows = 3
+    rects = []
+    row_h = (height - gutter * (rows + 1)) // rows
+    for r in range(rows):
+        y0 = gutter + r * (row_h + gutter)
+        split = int(width * rng.uniform(0.35, 0.65))
+        rects.append((gutter, y0, split - gutter // 2, y0 + row_h))
+        rects.append((split + gutter // 2, y0, width - gutter, y0 + row_h))
+    return rects
+
+
+def _layout_text(text: str, script: str, direction: str, font, size: int, rng: np.random.Generator):
+    """把文本切成行/列，返回 [(字符串, 相对 x, 相对 y, 宽, 高)] 和整体宽高"""
+    if script == 'en':
+        words, chunks, line = text.split(), [], ''
+        limit = int(rng.integers(10, 18))
+        for word in words:
+            if line and len(line) + len(word) + 1 > limit:
+                chunks.append(line)
+                line = word
+            else:
+                line = f'{line} {word}' if line else word
+        chunks.append(line)
+    else:
+        step = int(rng.integers(4, 9))
+        chunks = [text[i:i + step] for i in range(0, len(text), step)]
+
+    items = []
+    if direction == 'h':
+        y = 0
+        for chunk in chunks:
+            x0, y0, x1, y1 = font.getbbox(chunk)
+            items.append((chunk, 0, y, x1, size))
+            y += int(size * 1.2)
+        width = max(item[3] for item in items)
+        height = y
+        # 居中
+        items = [(c, (width - w) // 2, y, w, h) for c, _, y, w, h in items]
+    else:
+        # 竖排：列从右往左
+        column_w = int(size * 1.2)
+        width = column_w * len(chunks)
+        height = int(size * 1.05) * max(len(chunk) for chunk in chunks)
+        for i, chunk in enumerate(chunks):
+            items.append((chunk, width - (i + 1) * column_w, 0, size, int(size * 1.05) * len(chunk)))
+    return items, width, height
+
+
+def make_page(name: str, seed: int = 0) -> SimpleNamespace:
+    """生成合成页面，返回图片、文字 mask、文本行（含原文）和页面哈希"""
+    from PIL import Image, ImageDraw, ImageFont
+
+    width, height, scripts, directions, tone_ratio, bubbles = PAGES[name]
+    rng = np.random.default_rng([seed, sum(map(ord, name))])
+    font_path = _find_font(SOURCE_FONTS)
+
+    page = np.full((height, width), 250, dtype=np.uint8)
+    for x0, y0, x1, y1 in _panels(width, height, rng):
+        if rng.random() < tone_ratio:
+            page[y0:y1, x0:x1] = _screentone(y1 - y0, x1 - x0, rng)
+        cv2.rectangle(page, (x0, y0), (x1, y1), 0, 4)
+
+    img = Image.fromarray(page).convert('RGB')
+    mask = Image.new('L', (width, height), 0)
+    draw = ImageDraw.Draw(img)
+    mask_draw = ImageDraw.Draw(mask)
+    placed, textlines = [], []
+    for _ in range(bubbles):
+        script = scripts[int(rng.integers(len(scripts)))]
+        direction = 'h' if script == 'en' else directions[int(rng.integers(len(directions)))]
+        size = int(rng.integers(22, 40))
+        font = ImageFont.truetype(font_path, size) if font_path else ImageFont.load_default()
+        items, block_w, block_h = _layout_text(SAMPLES[script], script, direction, font, size, rng)
+        pad_x, pad_y = int(block_w * 0.35) + 20, int(block_h * 0.35) + 20
+        bw, bh = block_w + 2 * pad_x, block_h + 2 * pad_y
+        if bw >= width - 20 or bh >= height - 20:
+            continue
+        for _attempt in range(60):
+            bx = int(rng.integers(10, width - bw - 10))
+            by = int(rng.integers(10, height - bh - 10))
+            if all(bx + bw < px or px + pw < bx or by + bh < py or py + ph < by for px, py, pw, ph in placed):
+                break
+        else:
+            continue
+        placed.append((bx, by, bw, bh))
+        draw.ellipse((bx, by, bx + bw, by + bh), fill=(255, 255, 255), outline=(0, 0, 0), width=3)
+        ox, oy = bx + pad_x, by + pad_y
+        for chunk, x, y, w, h in items:
+            if direction == 'h':
+                draw.text((ox + x, oy + y), chunk, font=font, fill=(0, 0, 0))
+                mask_draw.text((ox + x, oy + y), chunk, font=font, fill=255)
+            else:
+                for j, char in enumerate(chunk):
+                    pos = (ox + x, oy + y + int(size * 1.05) * j)
+                    draw.text(pos, char, font=font, fill=(0, 0, 0))
+                    mask_draw.text(pos, char, font=font, fill=255)
+            x0, y0, x1, y1 = ox + x, oy + y, ox + x + w, oy + y + h
+            pts = np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]])
+            textlines.append(Quadrilateral(pts, chunk, 0.95))
+
+    image = np.asarray(img).copy()
+    mask_raw = np.asarray(mask).copy()
+    return SimpleNamespace(name=name, image=image, mask_raw=mask_raw, textlines=textlines,
+                           hash=hash_array(image), width=width, height=height)
+
+
+def _stub_ctd_model():
+    """TextDetBaseDNN 接口的桩模型：由图片中亮背景上的暗像素生成 mask 和行概率图"""
+    from manga_translator.detection.ctd_utils.basemodel import TextDetBaseDNN
+
+    class StubCTDModel(TextDetBaseDNN):
+        def __init__(self):
+            pass
+
+        def __call__(self, im_in):
+            gray = cv2.cvtColor(np.ascontiguousarray(im_in), cv2.COLOR_RGB2GRAY)
+            bright = cv2.blur(gray, (15, 15)) > 170
+            text = ((gray < 128) & bright).astype(np.uint8)
+            lines = cv2.dilate(text, np.ones((7, 7), np.uint8)).astype(np.float32)
+            mask = text.astype(np.float32)[None, None]
+            lines_map = np.stack([lines, lines])[None]
+            return np.zeros((1, 0, 7), np.float32), mask, lines_map
+
+    return StubCTDModel()
+
+
+async def make_detector(real: bool = False, input_size: int = 1024):
+    from manga_translator.detection.ctd import ComicTextDetector
+    from manga_translator.detection.ctd_utils.utils.db_utils import SegDetectorRepresenter
+
+    detector = ComicTextDetector()
+    if real:
+        await detector.load('cpu', input_size=input_size)
+        return detector, getattr(detector, 'backend', 'opencv')
+    # 与 _load 设置相同的属性，只替换模型
+    detector.device = 'cpu'
+    detector.backend = 'opencv'
+    detector.model = _stub_ctd_model()
+    detector.input_size = (input_size, input_size)
+    detector.half = False
+    detector.conf_thresh = 0.4
+    detector.nms_thresh = 0.35
+    detector.seg_rep = SegDetectorRepresenter(thresh=0.3)
+    detector._loaded = True
+    return detector, 'stub'
+
+
+def _mpe_preprocess(mask: np.ndarray, inpainting_size: int):
+    """lama_mpe ONNX 推理前的 mask 缩放、补齐和 MPE 编码"""
+    from manga_translator.inpainting.inpainting_lama_mpe import load_masked_position_encoding
+    from manga_translator.utils.generic import resize_keep_aspect
+
+    if max(mask.shape[:2]) > inpainting_size:
+        mask = resize_keep_aspect(mask, inpainting_size)
+    h, w = mask.shape[:2]
+    mask = np.pad(mask, ((0, -h % 64), (0, -w % 64)), mode='constant', constant_values=0)
+    return load_masked_position_encoding(mask)
+
+
+def _time(func: Callable, setup: Callable, repeat: int, warmup: int) -> dict:
+    samples = []
+    for i in range(warmup + repeat):
+        args = setup()
+        start = time.perf_counter()
+        func(*args)
+        elapsed = (time.perf_counter() - start) * 1000
+        if i >= warmup:
+            samples.append(elapsed)
+    return {
+        'median_ms': round(statistics.median(samples), 3),
+        'mean_ms': round(statistics.fmean(samples), 3),
+        'min_ms': round(min(samples), 3),
+        'max_ms': round(max(samples), 3),
+        'repeat': repeat,
+    }
+
+
+def bench_page(page: SimpleNamespace, detector, stages, repeat: int = 5, warmup: int = 1,
+               inpainting_size: int = 2048) -> Dict[str, dict]:
+    from PIL import Image
+
+    from manga_translator.config import Config
+    from manga_translator.mask_refinement import dispatch as dispatch_mask_refinement
+    from manga_translator.rendering import dispatch as dispatch_rendering
+    from manga_translator.save import save_result
+    from manga_translator.textline_merge import dispatch as dispatch_textline_merge
+
+    loop = asyncio.new_event_loop()
+    run = loop.run_until_complete
+    config = Config()
+    config.translator.target_lang = 'ENG'
+    font_path = _find_font((RENDER_FONT,)) or ''
+    results = {}
+
+    # 各阶段的固定输入
+    text_regions = run(dispatch_textline_merge(copy.deepcopy(page.textlines), page.width, page.height, config))
+    for i, region in enumerate(text_regions):
+        region.translation = TRANSLATIONS[i % len(TRANSLATIONS)]
+        region.target_lang = 'ENG'
+    refined = run(dispatch_mask_refinement(text_regions, page.image, page.mask_raw, 'fit_text', config.mask_dilation_offset))
+    inpainted = page.image.copy()
+    inpainted[refined > 0] = 255
+    rendered = run(dispatch_rendering(inpainted.copy(), copy.deepcopy(text_regions), font_path, config, page.image))
+    rendered_pil = Image.fromarray(rendered)
+    ctx = Context(save_quality=100)
+
+    try:
+        if 'detection' in stages and detector is not None:
+            d = config.detector
+            results['detection'] = _time(
+                lambda img: run(detector.detect(img, d.detection_size, d.text_threshold, d.box_threshold, d.unclip_ratio,
+                                                d.det_invert, d.det_gamma_correct, d.det_rotate, d.det_auto_rotate)),
+                lambda: (page.image.copy(),), repeat, warmup)
+        if 'textline_merge' in stages:
+            results['textline_merge'] = _time(
+                lambda lines: run(dispatch_textline_merge(lines, page.width, page.height, config)),
+                lambda: (copy.deepcopy(page.textlines),), repeat, warmup)
+        if 'mask_refinement' in stages:
+            results['mask_refinement'] = _time(
+                lambda regions: run(dispatch_mask_refinement(regions, page.image, page.mask_raw, 'fit_text',
+                                                             config.mask_dilation_offset)),
+                lambda: (copy.deepcopy(text_regions),), repeat, warmup)
+        if 'mpe_preprocess' in stages:
+            results['mpe_preprocess'] = _time(lambda m: _mpe_preprocess(m, inpainting_size),
+                                              lambda: (refined.copy(),), repeat, warmup)
+        if 'rendering' in stages:
+            results['rendering'] = _time(
+                lambda img, regions: run(dispatch_rendering(img, regions, font_path, config, page.image)),
+                lambda: (inpainted.copy(), copy.deepcopy(text_regions)), repeat, warmup)
+        with tempfile.TemporaryDirectory() as tmp:
+            for stage, ext in (('save_png', 'png'), ('save_jpg', 'jpg')):
+                if stage in stages:
+                    dest = os.path.join(tmp, f'{page.name}.{ext}')
+                    results[stage] = _time(lambda: save_result(rendered_pil, dest, ctx), tuple, repeat, warmup)
+    finally:
+        loop.close()
+    results['_regions'] = len(text_regions)
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_PATH, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _environment(detector_backend: str, threads: int) -> dict:
+    import PIL
+    return {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'cv2_threads': threads,
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'pillow': PIL.__version__,
+        'detector': detector_backend,
+        'source_font': os.path.basename(_find_font(SOURCE_FONTS) or 'default'),
+    }
+
+
+def run_benchmark(pages: List[str], stages, repeat: int = 5, warmup: int = 1, seed: int = 0,
+                  real_detector: bool = False, threads: int = 0, inpainting_size: int = 2048) -> dict:
+    if threads:
+        cv2.setNumThreads(threads)
+    detector, backend = None, None
+    if 'detection' in stages:
+        detector, backend = asyncio.run(make_detector(real_detector))
+    results = {}
+    for name in pages:
+        page = make_page(name, seed)
+        timings = bench_page(page, detector, stages, repeat, warmup, inpainting_size)
+        results[name] = {
+            'size': [page.width, page.height],
+            'page_hash': page.hash,
+            'textlines': len(page.textlines),
+            'regions': timings.pop('_regions'),
+            'stages': timings,
+        }
+    return {
+        'env': _environment(backend, threads or cv2.getNumThreads()),
+        'seed': seed,
+        'repeat': repeat,
+        'warmup': warmup,
+        'pages': results,
+    }
+
+
+def compare(old: dict, new: dict, threshold: float = 0.15) -> List[dict]:
+    """按页面和阶段对比中位数耗时，ratio > 1 + threshold 视为回退"""
+    rows = []
+    for name, page in new['pages'].items():
+        old_page = old.get('pages', {}).get(name)
+        if old_page is None:
+            continue
+        for stage, timing in page['stages'].items():
+            old_timing = old_page['stages'].get(stage)
+            if old_timing is None or not old_timing['median_ms']:
+                continue
+            ratio = timing['median_ms'] / old_timing['median_ms']
+            rows.append({
+                'page': name,
+                'stage': stage,
+                'old_ms': old_timing['median_ms'],
+                'new_ms': timing['median_ms'],
+                'ratio': round(ratio, 3),
+                'regression': ratio > 1 + threshold,
+                'same_input': old_page.get('page_hash') == page.get('page_hash'),
+            })
+    return rows
+
+
+def format_comparison(rows: List[dict]) -> str:
+    lines = [f'{"page":<24} {"stage":<16} {"old ms":>10} {"new ms":>10} {"ratio":>7}']
+    for row in rows:
+        flag = '  REGRESSION' if row['regression'] else ''
+        if not row['same_input']:
+            flag += '  (page differs)'
+        lines.append(f'{row["page"]:<24} {row["stage"]:<16} {row["old_ms"]:>10.1f} {row["new_ms"]:>10.1f} '
+                     f'{row["ratio"]:>7.2f}{flag}')
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline stage benchmark on synthetic manga pages')
+    parser.add_argument('--pages', nargs='+', default=list(PAGES), choices=list(PAGES))
+    parser.add_argument('--stages', nargs='+', default=list(BENCH_STAGES), choices=list(BENCH_STAGES))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--threads', type=int, default=0, help='OpenCV 线程数，0 表示使用默认值')
+    parser.add_argument('--inpainting-size', type=int, default=2048, help='MPE 预处理的缩放尺寸')
+    parser.add_argument('--real-detector', action='store_true', help='使用已下载的 ctd ONNX 模型（CPU）代替桩模型')
+    parser.add_argument('--output', default=None, help='结果 JSON 路径（默认输出到标准输出）')
+    parser.add_argument('--compare', default=None, help='与之前保存的结果 JSON 对比')
+    parser.add_argument('--threshold', type=float, default=0.15, help='中位数变慢超过该比例视为回退')
+    parser.add_argument('--save-pages', default=None, help='把合成页面保存到该目录，便于检查')
+    args = parser.parse_args()
+
+    if args.save_pages:
+        os.makedirs(args.save_pages, exist_ok=True)
+        for name in args.pages:
+            page = make_page(name, args.seed)
+            cv2.imwrite(os.path.join(args.save_pages, f'{name}.png'), cv2.cvtColor(page.image, cv2.COLOR_RGB2BGR))
+            cv2.imwrite(os.path.join(args.save_pages, f'{name}_mask.png'), page.mask_raw)
+
+    result = run_benchmark(args.pages, set(args.stages), args.repeat, args.warmup, args.seed,
+                           args.real_detector, args.threads, args.inpainting_size)
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            rows = compare(json.load(f), result, args.threshold)
+        print(format_comparison(rows), file=sys.stderr)
+        sys.exit(1 if any(row['regression'] for row in rows) else 0)
@@ -0,0 +1,110 @@
+"""
+描边位图缓存基准测试
+
+用 put_text_horizontal / put_text_vertical 渲染一页文字（多个区域，字符大量重复），对比：
+- plain：无描边
+- stroked_uncached：有描边，每个字符重新描边（缓存前的行为）
+- stroked_cached：有描边，使用 get_char_border_bitmap 的缓存（首次运行和缓存预热后）
+并检查有无缓存时渲染结果逐像素相同。
+
+    python -m benchmarks.stroke_cache_bench
+    python -m benchmarks.stroke_cache_bench --font fonts/anime_ace_3.ttf --regions 30 --repeat 3
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from manga_translator.rendering import text_render
+
+from .common import CJK_CHARS, DEFAULT_FONT, WORDS, supported_chars
+
+
+def make_page(regions: int, seed: int = 0):
+    rng = random.Random(seed)
+    cjk = supported_chars(CJK_CHARS)
+    page = []
+    for i in range(regions):
+        font_size = rng.choice((24, 28, 32))
+        if cjk and i % 2:
+            page.append(('v', font_size, ''.join(rng.choice(cjk[:40]) for _ in range(rng.randint(20, 40)))))
+        else:
+            page.append(('h', font_size, ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 16)))))
+    return page
+
+
+def render_page(page: list, stroked: bool) -> list:
+    bg = (255, 255, 255) if stroked else None
+    canvases = []
+    for direction, font_size, text in page:
+        if direction == 'h':
+            canvas = text_render.put_text_horizontal(font_size, text, font_size * 12, font_size * 6, 'center', False,
+                                                     (0, 0, 0), bg, stroke_width=0.2)
+        else:
+            canvas = text_render.put_text_vertical(font_size, text, font_size * 12, 'center', (0, 0, 0), bg, 0,
+                                                   stroke_width=0.2)
+        canvases.append(canvas)
+    return canvases
+
+
+def _time(page: list, stroked: bool, repeat: int, cold_setup=None):
+    timings = []
+    canvases = None
+    for run in range(repeat + 1):
+        if run == 0:
+            text_render.clear_layout_caches()
+            if cold_setup:
+                cold_setup()
+        start = time.perf_counter()
+        canvases = render_page(page, stroked)
+        timings.append(time.perf_counter() - start)
+    return {
+        'cold_ms': round(timings[0] * 1000, 1),
+        'warm_ms': round(statistics.median(timings[1:]) * 1000, 1) if repeat else None,
+    }, canvases
+
+
+def run_benchmark(font_path: str, regions: int = 30, repeat: int = 3) -> dict:
+    text_render.set_font(font_path)
+    page = make_page(regions)
+    renderer = text_render.get_renderer()
+    cached = renderer.stroke_char_border
+
+    def clear():
+        cached.cache_clear()
+
+    plain, _ = _time(page, False, repeat)
+    try:
+        renderer.stroke_char_border = cached.__wrapped__
+        uncached, uncached_canvases = _time(page, True, repeat)
+    finally:
+        renderer.stroke_char_border = cached
+    stroked, cached_canvases = _time(page, True, repeat, cold_setup=clear)
+    identical = all((a is None and b is None) or (a is not None and b is not None and np.array_equal(a, b))
+                    for a, b in zip(uncached_canvases, cached_canvases))
+    info = cached.cache_info()
+    return {
+        'regions': len(page),
+        'characters': sum(len(text) for _, _, text in page),
+        'plain': plain,
+        'stroked_uncached': uncached,
+        'stroked_cached': stroked,
+        'speedup_warm': round(uncached['warm_ms'] / max(stroked['warm_ms'], 1e-3), 2) if repeat else None,
+        'cache': {'hits': info.hits, 'misses': info.misses, 'size': info.currsize},
+        'pixel_identical': identical,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stroke border cache benchmark')
+    parser.add_argument('--font', default=DEFAULT_FONT)
+    parser.add_argument('--regions', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    result = run_benchmark(args.font, args.regions, args.repeat)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    sys.exit(0 if result['pixel_identical'] else 1)
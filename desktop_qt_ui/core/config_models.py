@@ -74,6 +74,7 @@ class RenderSettings(BaseModel):
     optimize_line_breaks: bool = False
     check_br_and_retry: bool = False
     strict_smart_scaling: bool = False
+    render_workers: int = 0  # 并行渲染区域的线程数，0 为按 CPU 核数自动选择（最多 4），1 为逐个渲染
     stroke_width: float = 0.07
     enable_template_alignment: bool = False  # 启用模板匹配对齐（替换翻译模式）- 直接提取翻译图文字
     paste_mask_dilation_pixels: int = 10  # 粘贴模式蒙版膨胀大小（像素），设为0禁用膨胀
@@ -105,6 +106,12 @@ class CliSettings(BaseModel):
     save_quality: int = 100
     batch_size: int = 1
     batch_concurrent: bool = False
+    pipeline_queue_pages: int = 0  # 并发流水线每个阶段队列最多容纳的页数，0 为批量大小的 2 倍
+    pipeline_queue_mb: int = 0  # 并发流水线每个阶段队列最多容纳的图像内存（MB），0 为不限制
+    pipeline_inpaint_workers: int = 1  # 并发流水线修复线程数
+    pipeline_render_workers: int = 1  # 并发流水线渲染线程数
+    pipeline_process_workers: int = 0  # 渲染和 mask 细化使用的进程池大小，0 为在线程内执行
+    pipeline_serialize_render: bool = False  # 线程内渲染是否全部串行（manga2Eng 渲染器总是串行）
     generate_and_export: bool = False
     colorize_only: bool = False
     upscale_only: bool = False  # 仅超分模式
@@ -114,6 +121,9 @@ class CliSettings(BaseModel):
     psd_font: Optional[str] = None  # PSD导出使用的字体名称 (PostScript名称)
     psd_script_only: bool = False  # 仅生成JSX脚本而不执行Photoshop
     replace_translation: bool = False  # 替换翻译模式：将一张图的翻译应用到另一张生肉图上
+    checkpoint_dir: Optional[str] = None  # 页面级检查点目录，重跑时复用未变化阶段的结果
+    stage_cache_mb: int = 0  # 未设置检查点目录时，内存中保留阶段结果的上限（MB），默认 0 不启用；仅在同一翻译器改配置重跑同一页时开启
+    trace_file: Optional[str] = None  # 阶段追踪输出路径（Chrome trace JSON），为空时不记录
 
 class AppSection(BaseModel):
     last_open_dir: str = '.'
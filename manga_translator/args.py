@@ -2,6 +2,21 @@ import argparse
 import sys
 import os
 
+def add_pipeline_arguments(parser):
+    """并发流水线参数（local 子命令和 mode/local.py 的独立入口共用），未指定时使用配置文件中的值"""
+    parser.add_argument('--pipeline-queue-pages', type=int, default=None,
+                        help='并发流水线每个阶段队列最多容纳的页数，0 为批量大小的 2 倍（覆盖配置文件）')
+    parser.add_argument('--pipeline-queue-mb', type=int, default=None,
+                        help='并发流水线每个阶段队列最多容纳的图像内存（MB），0 为不限制（覆盖配置文件）')
+    parser.add_argument('--pipeline-inpaint-workers', type=int, default=None,
+                        help='并发流水线修复线程数（覆盖配置文件）')
+    parser.add_argument('--pipeline-render-workers', type=int, default=None,
+                        help='并发流水线渲染线程数（覆盖配置文件）')
+    parser.add_argument('--pipeline-process-workers', type=int, default=None,
+                        help='渲染和 mask 细化使用的进程池大小，0 为在线程内执行（覆盖配置文件）')
+    parser.add_argument('--pipeline-serialize-render', action='store_true', default=None,
+                        help='线程内渲染全部串行执行（manga2Eng 渲染器总是串行，覆盖配置文件）')
+
 def create_parser():
     """创建命令行参数解析器"""
     parser = argparse.ArgumentParser(
@@ -29,6 +44,14 @@ def create_parser():
                            default=int(os.getenv('MT_MODELS_TTL', '0')), 
                            type=int,
                            help='上次使用后将模型保留在内存中的时间（秒）（0 表示永远，环境变量：MT_MODELS_TTL）')
+    web_parser.add_argument('--models-ram-budget', 
+                           default=int(os.getenv('MT_MODELS_RAM_BUDGET', '0')), 
+                           type=int,
+                           help='模型可占用的内存上限（MB），超出时按 LRU 卸载空闲模型（0 表示不限制，环境变量：MT_MODELS_RAM_BUDGET）')
+    web_parser.add_argument('--models-vram-budget', 
+                           default=int(os.getenv('MT_MODELS_VRAM_BUDGET', '0')), 
+                           type=int,
+                           help='模型可占用的显存上限（MB），超出时按 LRU 卸载空闲模型（0 表示不限制，环境变量：MT_MODELS_VRAM_BUDGET）')
     web_parser.add_argument('--retry-attempts', 
                            default=int(os.getenv('MT_RETRY_ATTEMPTS', '-1')) if os.getenv('MT_RETRY_ATTEMPTS') else None, 
                            type=int,
@@ -58,6 +81,9 @@ def create_parser():
                              help='批量处理大小（覆盖配置文件）')
     local_parser.add_argument('--attempts', type=int, default=None,
                              help='翻译失败重试次数，-1表示无限重试（覆盖配置文件）')
+    local_parser.add_argument('--concurrent', action='store_true',
+                             help='启用并发流水线（检测+OCR、翻译、修复、渲染并行，覆盖配置文件）')
+    add_pipeline_arguments(local_parser)
     # 内存管理参数（子进程模式）
     local_parser.add_argument('--subprocess', action='store_true',
                              help='启用子进程模式（支持内存管理和断点续传）')
@@ -67,6 +93,12 @@ def create_parser():
                              help='内存百分比限制，超过系统总内存的这个百分比时重启，0表示不限制（默认：0）')
     local_parser.add_argument('--batch-per-restart', type=int, default=0,
                              help='每处理N张图片后重启子进程释放内存，0表示不限制（默认：0）')
+    local_parser.add_argument('--workers', type=int, default=1,
+                             help='子进程模式的常驻工作进程数，各进程预加载模型后按页领取任务，需要重启时错峰进行（默认：1）')
+    local_parser.add_argument('--checkpoint-dir', default=None,
+                             help='页面级检查点目录，重跑时复用输入和配置未变的阶段结果（覆盖配置文件）')
+    local_parser.add_argument('--trace', dest='trace_file', default=None, metavar='PATH',
+                             help='记录各阶段耗时和内存变化，写出 Chrome trace JSON 并在批次结束时输出汇总表')
     
     # ===== WebSocket 模式 =====
     ws_parser = subparsers.add_parser('ws', help='WebSocket 模式')
@@ -80,6 +112,10 @@ def create_parser():
                           help='WebSocket 模式的服务器 URL（默认：ws://localhost:5000）')
     ws_parser.add_argument('--models-ttl', default=0, type=int,
                           help='上次使用后将模型保留在内存中的时间（秒）（0 表示永远）')
+    ws_parser.add_argument('--models-ram-budget', default=0, type=int,
+                          help='模型可占用的内存上限（MB）（0 表示不限制）')
+    ws_parser.add_argument('--models-vram-budget', default=0, type=int,
+                          help='模型可占用的显存上限（MB）（0 表示不限制）')
     ws_parser.add_argument('--retry-attempts', default=None, type=int,
                           help='翻译失败时的重试次数（-1 表示无限重试，None 表示使用 API 传入的配置）')
     ws_parser.add_argument('-v', '--verbose', action='store_true',
@@ -97,6 +133,10 @@ def create_parser():
                               help='用于保护内部 API 服务器通信的 Nonce')
     shared_parser.add_argument('--models-ttl', default=0, type=int,
                               help='模型在内存中的 TTL（秒）（0 表示永远）')
+    shared_parser.add_argument('--models-ram-budget', default=0, type=int,
+                              help='模型可占用的内存上限（MB）（0 表示不限制）')
+    shared_parser.add_argument('--models-vram-budget', default=0, type=int,
+                              help='模型可占用的显存上限（MB）（0 表示不限制）')
     shared_parser.add_argument('--retry-attempts', default=None, type=int,
                               help='翻译失败时的重试次数（-1 表示无限重试，None 表示使用 API 传入的配置）')
     shared_parser.add_argument('-v', '--verbose', action='store_true',
@@ -1,12 +1,13 @@
 from PIL import Image
 
 from .common import CommonColorizer, OfflineColorizer
-from .manga_colorization_v2 import MangaColorizationV2
 from ..config import Colorizer
+from ..utils import LazyRegistry
 
-COLORIZERS = {
-    Colorizer.mc2: MangaColorizationV2,
-}
+# 上色实现在第一次使用时才导入
+COLORIZERS = LazyRegistry(__name__, {
+    Colorizer.mc2: '.manga_colorization_v2:MangaColorizationV2',
+})
 colorizer_cache = {}
 
 def get_colorizer(key: Colorizer, *args, **kwargs) -> CommonColorizer:
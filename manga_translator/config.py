@@ -1,7 +1,7 @@
 import argparse
 from enum import Enum
 
-from typing import Optional, Any, Union
+from typing import Optional, Any, Union, Literal
 
 from omegaconf import OmegaConf
 from pydantic import BaseModel, PrivateAttr
@@ -185,6 +185,8 @@ class RenderConfig(BaseModel):
     """Automatically rotate symbols like '!!' or '??' in vertical text"""
     layout_mode: str = 'smart_scaling'
     """The layout mode to use for rendering. Options: 'default', 'smart_scaling', 'strict', 'disable_all', 'balloon_fill'"""
+    render_workers: int = 0
+    """Number of threads rendering text regions in parallel. 0 uses the CPU count (at most 4), 1 renders sequentially. Results are composited in region order, so the output is identical to rendering one region at a time"""
     stroke_width: float = 0.07
     """Stroke/border width ratio relative to font size. Default is 0.07 (7%). Set to 0 to disable stroke."""
     enable_template_alignment: bool = False
@@ -328,6 +330,8 @@ class DetectorConfig(BaseModel):
     """How much to extend text skeleton to form bounding box"""
     min_box_area_ratio: float = 0.0009
     """Minimum detection box area ratio relative to total image pixels (default 0.0009 = 0.09%)"""
+    det_quantize: bool = False
+    """Use INT8 quantized detector on CPU (dynamic quantization for dbconvnext, calibrated static INT8 ONNX for ctd). The default DBNet detector has no quantizable layers and stays FP32"""
 
 class InpainterConfig(BaseModel):
     inpainter: Inpainter = Inpainter.lama_large
@@ -363,6 +367,18 @@ class CliConfig(BaseModel):
     """Batch size for processing"""
     batch_concurrent: bool = False
     """Enable concurrent pipeline (Detection, OCR, Inpainting, Translation in parallel)"""
+    pipeline_queue_pages: int = 0
+    """Concurrent pipeline: max pages held in each stage queue (0 uses twice the batch size)"""
+    pipeline_queue_mb: int = 0
+    """Concurrent pipeline: max image memory (MB) held in each stage queue (0 means unlimited)"""
+    pipeline_inpaint_workers: int = 1
+    """Concurrent pipeline: number of inpainting threads"""
+    pipeline_render_workers: int = 1
+    """Concurrent pipeline: number of rendering threads"""
+    pipeline_process_workers: int = 0
+    """Concurrent pipeline: size of the process pool used for rendering and mask refinement (0 runs them in threads)"""
+    pipeline_serialize_render: bool = False
+    """Concurrent pipeline: run all in-thread rendering one page at a time (manga2Eng renderers are always serialized)"""
     format: Optional[str] = None
     """Output format"""
     save_quality: int = 100
@@ -383,6 +399,12 @@ class CliConfig(BaseModel):
     """Only generate JSX script without executing Photoshop"""
     replace_translation: bool = False
     """Replace translation mode: apply translation from one image to another raw image"""
+    checkpoint_dir: Optional[str] = None
+    """Directory for per-page stage checkpoints. Re-runs reuse stages whose inputs and config are unchanged"""
+    stage_cache_mb: int = 0
+    """In-memory stage result cache (MB) used when checkpoint_dir is not set. Opt-in (0 disables it): enable it only for callers that keep one translator and re-run the same pages after a config change, so only the affected stages run again"""
+    trace_file: Optional[str] = None
+    """Record per-stage timings and memory deltas and write a Chrome trace JSON to this path (open in chrome://tracing or Perfetto)"""
 
 class OcrConfig(BaseModel):
     use_mocr_merge: bool = False
@@ -405,6 +427,28 @@ class OcrConfig(BaseModel):
     """Textline merge deviation tolerance, higher is more tolerant."""
     merge_edge_ratio_threshold: float = 0.0
     """If a box has two neighbors with edge distance ratio > this value, disconnect the larger distance edge. 0 means disabled."""
+    use_onnx_ocr: bool = False
+    """Run the 48px OCR with ONNX Runtime when on CPU. The ONNX graphs are exported from the checkpoint on first use."""
+    ocr_quantize: bool = False
+    """Use INT8 quantized 48px OCR on CPU (dynamic quantization for torch, INT8 ONNX graphs with use_onnx_ocr)"""
+
+class OnnxConfig(BaseModel):
+    intra_op_num_threads: int = 0
+    """ONNX Runtime intra-op thread count. 0 keeps the per-model default"""
+    inter_op_num_threads: int = 0
+    """ONNX Runtime inter-op thread count. 0 keeps the per-model default"""
+    execution_mode: Optional[Literal['sequential', 'parallel']] = None
+    """ONNX Runtime execution mode. None keeps the per-model default"""
+    graph_optimization_level: Optional[Literal['disable', 'basic', 'extended', 'all']] = None
+    """ONNX Runtime graph optimization level. None keeps the per-model default (all)"""
+    enable_cpu_mem_arena: Optional[bool] = None
+    """Enable the ONNX Runtime CPU memory arena. None keeps the per-model default"""
+    enable_mem_pattern: Optional[bool] = None
+    """Enable ONNX Runtime memory pattern planning. None keeps the per-model default"""
+    optimized_model_dir: Optional[str] = None
+    """Directory for caching offline-optimized ONNX graphs, skipping graph optimization on later loads"""
+    use_io_binding: bool = False
+    """Run ONNX models with IOBinding and reuse pre-allocated buffers for repeated input shapes"""
 
 class Config(BaseModel):
     # General
@@ -424,6 +468,8 @@ class Config(BaseModel):
     """Ocr configs"""
     cli: CliConfig = CliConfig()
     """CLI configs"""
+    onnx: OnnxConfig = OnnxConfig()
+    """ONNX Runtime session configs"""
     # ?
     force_simple_sort: bool = False
     """Don't use panel detection for sorting, use a simpler fallback logic instead"""
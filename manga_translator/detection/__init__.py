@@ -2,25 +2,19 @@ import numpy as np
 import cv2
 from typing import List
 
-from .default import DefaultDetector
-from .dbnet_convnext import DBConvNextDetector
-from .ctd import ComicTextDetector
-from .craft import CRAFTDetector
-# from .paddle_rust import PaddleDetector  # 已移除
-from .none import NoneDetector
-from .yolo_obb import YOLOOBBDetector
 from .common import CommonDetector, OfflineDetector
 from ..config import Detector
-from ..utils import Quadrilateral
+from ..utils import Quadrilateral, LazyRegistry
 
-DETECTORS = {
-    Detector.default: DefaultDetector,
-    Detector.dbconvnext: DBConvNextDetector,
-    Detector.ctd: ComicTextDetector,
-    Detector.craft: CRAFTDetector,
-    # Detector.paddle: PaddleDetector,  # 已移除
-    Detector.none: NoneDetector,
-}
+# 检测器实现在第一次使用时才导入
+DETECTORS = LazyRegistry(__name__, {
+    Detector.default: '.default:DefaultDetector',
+    Detector.dbconvnext: '.dbnet_convnext:DBConvNextDetector',
+    Detector.ctd: '.ctd:ComicTextDetector',
+    Detector.craft: '.craft:CRAFTDetector',
+    # Detector.paddle: '.paddle_rust:PaddleDetector',  # 已移除
+    Detector.none: '.none:NoneDetector',
+})
 detector_cache = {}
 
 def get_detector(key: Detector, *args, **kwargs) -> CommonDetector:
@@ -39,11 +33,12 @@ async def prepare(detector_key: Detector):
 async def dispatch(detector_key: Detector, image: np.ndarray, detect_size: int, text_threshold: float, box_threshold: float, unclip_ratio: float,
                    invert: bool, gamma_correct: bool, rotate: bool, auto_rotate: bool = False, device: str = 'cpu', verbose: bool = False,
                    use_yolo_obb: bool = False, yolo_obb_conf: float = 0.4, yolo_obb_iou: float = 0.6, yolo_obb_overlap_threshold: float = 0.1, min_box_area_ratio: float = 0.0009,
-                   result_path_fn=None):
+                   result_path_fn=None, quantize: bool = False):
     """
     检测调度函数，支持混合检测模式
     
     Args:
+        quantize: CPU 下是否使用 INT8 量化模型
         use_yolo_obb: 是否启用YOLO OBB辅助检测器
         yolo_obb_conf: YOLO OBB检测器的置信度阈值
         yolo_obb_iou: YOLO OBB检测器的IoU阈值（交叉比）
@@ -53,6 +48,9 @@ async def dispatch(detector_key: Detector, image: np.ndarray, detect_size: int,
     # 主检测器检测
     detector = get_detector(detector_key)
     if isinstance(detector, OfflineDetector):
+        if detector.is_loaded() and detector.quantize != quantize:
+            await detector.unload()
+        detector.quantize = quantize
         await detector.load(device)
     main_textlines, mask, raw_image = await detector.detect(image, detect_size, text_threshold, box_threshold, unclip_ratio, invert, gamma_correct, rotate, auto_rotate, verbose, min_box_area_ratio, result_path_fn)
     
@@ -62,6 +60,7 @@ async def dispatch(detector_key: Detector, image: np.ndarray, detect_size: int,
     
     # YOLO OBB辅助检测
     try:
+        from .yolo_obb import YOLOOBBDetector
         yolo_detector = get_detector_instance('yolo_obb', YOLOOBBDetector)
         await yolo_detector.load(device)
         
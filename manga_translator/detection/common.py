@@ -149,6 +149,8 @@ class CommonDetector(InfererModule):
 
 class OfflineDetector(CommonDetector, ModelWrapper):
     _MODEL_SUB_DIR = 'detection'
+    # CPU 下使用 INT8 量化模型（由 dispatch 根据 DetectorConfig.det_quantize 设置）
+    quantize = False
 
     async def _detect(self, *args, **kwargs):
         return await self.infer(*args, **kwargs)
@@ -6,7 +6,7 @@ from typing import Union, Tuple
 import cv2
 import torch
 
-from .ctd_utils.basemodel import TextDetBase, TextDetBaseDNN
+from .ctd_utils.basemodel import TextDetBase, TextDetBaseDNN, TextDetBaseORT
 from .ctd_utils.utils.yolov5_utils import non_max_suppression
 from .ctd_utils.utils.db_utils import SegDetectorRepresenter
 from .ctd_utils.utils.imgproc_utils import letterbox
@@ -95,9 +95,17 @@ class ComicTextDetector(OfflineDetector):
             self.backend = 'torch'
         else:
             model_path = self._get_file_path('comictextdetector.pt.onnx')
-            self.model = cv2.dnn.readNetFromONNX(model_path)
-            self.model = TextDetBaseDNN(input_size, model_path)
             self.backend = 'opencv'
+            if self.quantize:
+                from ..utils.quantization import int8_path
+                if os.path.exists(int8_path(model_path)):
+                    self.model = TextDetBaseORT(input_size, int8_path(model_path))
+                    self.backend = 'onnx'
+                    self.logger.info(f'使用INT8量化模型: {int8_path(model_path)}')
+                else:
+                    self.logger.warning('未找到INT8量化模型，请先运行 python -m manga_translator.utils.quantization calibrate')
+            if self.backend == 'opencv':
+                self.model = TextDetBaseDNN(input_size, model_path)
 
         if isinstance(input_size, int):
             input_size = (input_size, input_size)
@@ -125,8 +133,9 @@ class ComicTextDetector(OfflineDetector):
                     tmp = mask
                     mask = lines
                     lines = tmp
-                mask_lst.append(mask)
-                line_lst.append(lines)
+                # TextDetBaseORT 使用 IOBinding 时输出是绑定缓冲区的视图，下一次调用会覆盖
+                mask_lst.append(mask.copy())
+                line_lst.append(lines.copy())
             lines, mask = np.concatenate(line_lst, 0), np.concatenate(mask_lst, 0)
         else:
             raise NotImplementedError
@@ -147,7 +156,7 @@ class ComicTextDetector(OfflineDetector):
             img_in, ratio, dw, dh = preprocess_img(image, input_size=self.input_size, device=self.device, half=self.half, to_tensor=self.backend=='torch')
             blks, mask, lines_map = self.model(img_in)
 
-            if self.backend == 'opencv':
+            if self.backend in ('opencv', 'onnx'):
                 if mask.shape[1] == 2: # some version of opencv spit out reversed result
                     tmp = mask
                     mask = lines_map
@@ -247,4 +247,19 @@ class TextDetBaseDNN:
         blob = cv2.dnn.blobFromImage(im_in, scalefactor=1 / 255.0, size=(self.input_size, self.input_size))
         self.model.setInput(blob)
         blks, mask, lines_map  = self.model.forward(self.uoln)
-        return blks, mask, lines_map
\ No newline at end of file
+        return blks, mask, lines_map
+
+
+class TextDetBaseORT(TextDetBaseDNN):
+    """与 TextDetBaseDNN 接口相同，使用 onnxruntime 执行（用于 INT8 量化模型）"""
+    def __init__(self, input_size, model_path):
+        from ...utils.onnx_session import create_session, make_runner
+        self.input_size = input_size
+        self.model = create_session(model_path)
+        self.input_name = self.model.get_inputs()[0].name
+        self._run = make_runner(self.model)
+
+    def __call__(self, im_in):
+        blob = cv2.dnn.blobFromImage(im_in, scalefactor=1 / 255.0, size=(self.input_size, self.input_size))
+        blks, mask, lines_map = self._run({self.input_name: blob})
+        return blks, mask, lines_map
@@ -532,6 +532,10 @@ class DBConvNextDetector(OfflineDetector):
         self.device = device
         if device == 'cuda' or device == 'mps':
             self.model = self.model.to(self.device)
+        elif self.quantize:
+            from ..utils.quantization import quantize_dynamic_model
+            self.model, count = quantize_dynamic_model(self.model)
+            self.logger.info(f'INT8 动态量化: {count} 层')
         global MODEL
         MODEL = self.model
 
@@ -51,6 +51,9 @@ class DefaultDetector(OfflineDetector):
         self.device = device
         if device == 'cuda' or device == 'mps':
             self.model = self.model.to(self.device)
+        elif self.quantize:
+            # DBNet 推理只经过卷积层（backbone.fc 不参与 forward），动态量化不起作用
+            self.logger.warning('默认检测器（DBNet）不支持 INT8 动态量化，继续使用 FP32 模型')
         global MODEL
         MODEL = self.model
 
@@ -3,21 +3,18 @@ from typing import Optional
 import numpy as np
 
 from .common import CommonInpainter, OfflineInpainter
-from .inpainting_aot import AotInpainter
-from .inpainting_lama_mpe import LamaMPEInpainter, LamaLargeInpainter
-from .inpainting_sd import StableDiffusionInpainter
-from .none import NoneInpainter
-from .original import OriginalInpainter
 from ..config import Inpainter, InpainterConfig
+from ..utils import LazyRegistry
 
-INPAINTERS = {
-    Inpainter.default: AotInpainter,
-    Inpainter.lama_large: LamaLargeInpainter,
-    Inpainter.lama_mpe: LamaMPEInpainter,
-    Inpainter.sd: StableDiffusionInpainter,
-    Inpainter.none: NoneInpainter,
-    Inpainter.original: OriginalInpainter,
-}
+# 修复器实现在第一次使用时才导入
+INPAINTERS = LazyRegistry(__name__, {
+    Inpainter.default: '.inpainting_aot:AotInpainter',
+    Inpainter.lama_large: '.inpainting_lama_mpe:LamaLargeInpainter',
+    Inpainter.lama_mpe: '.inpainting_lama_mpe:LamaMPEInpainter',
+    Inpainter.sd: '.inpainting_sd:StableDiffusionInpainter',
+    Inpainter.none: '.none:NoneInpainter',
+    Inpainter.original: '.original:OriginalInpainter',
+})
 inpainter_cache = {}
 
 def get_inpainter(key: Inpainter, *args, **kwargs) -> CommonInpainter:
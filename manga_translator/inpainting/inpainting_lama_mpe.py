@@ -15,6 +15,7 @@ from typing import Tuple
 from .common import OfflineInpainter
 from ..config import InpainterConfig
 from ..utils import resize_keep_aspect
+from ..utils.onnx_session import create_session, make_runner
 
 
 TORCH_DTYPE_MAP = {
@@ -163,18 +164,12 @@ class LamaMPEInpainter(OfflineInpainter):
                 onnx_path = self._get_file_path('lamampe.onnx')
                 self.logger.info(f'使用ONNX模型（CPU优化）: {onnx_path}')
                 
-                # 🔧 内存优化配置
-                sess_options = ort.SessionOptions()
-                sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
-                sess_options.log_severity_level = 3  # 只显示 Error 级别
-                sess_options.enable_mem_pattern = False  # 禁用内存模式优化可以减少内存占用
-                sess_options.enable_cpu_mem_arena = False  # 禁用CPU内存池，按需分配
-                
-                self.session = ort.InferenceSession(
-                    onnx_path,
-                    sess_options=sess_options,
-                    providers=['CPUExecutionProvider']
-                )
+                # 🔧 内存优化配置（默认值，可被 OnnxConfig 覆盖）
+                self.session = create_session(onnx_path, defaults={
+                    'enable_mem_pattern': False,  # 禁用内存模式优化可以减少内存占用
+                    'enable_cpu_mem_arena': False,  # 禁用CPU内存池，按需分配
+                })
+                self._run_onnx = make_runner(self.session)
                 self.backend = 'onnx'
                 self.logger.info(f'ONNX Runtime版本: {ort.__version__}（内存优化模式）')
                 return
@@ -192,6 +187,7 @@ class LamaMPEInpainter(OfflineInpainter):
         if hasattr(self, 'backend'):
             if self.backend == 'onnx':
                 del self.session
+                self._run_onnx = None
             elif self.backend == 'torch':
                 del self.model
         elif hasattr(self, 'model'):
@@ -351,7 +347,7 @@ class LamaMPEInpainter(OfflineInpainter):
             'rel_pos': rel_pos_input,
             'direct': direct_input
         }
-        img_inpainted = self.session.run(None, ort_inputs)[0]
+        img_inpainted = self._run_onnx(ort_inputs)[0]
         
         # 后处理
         img_inpainted = np.transpose(img_inpainted[0], (1, 2, 0))
@@ -425,7 +421,7 @@ class LamaMPEInpainter(OfflineInpainter):
             'rel_pos': rel_pos_input,
             'direct': direct_input
         }
-        img_inpainted = self.session.run(None, ort_inputs)[0]
+        img_inpainted = self._run_onnx(ort_inputs)[0]
         
         # 后处理
         img_inpainted = np.transpose(img_inpainted[0], (1, 2, 0))  # [H, W, 3]
@@ -522,20 +518,13 @@ class LamaLargeInpainter(LamaMPEInpainter):
                 
                 self.logger.info(f'使用ONNX模型（CPU优化）: {onnx_path}')
                 
-                # 🔧 ONNX Runtime 配置
-                sess_options = ort.SessionOptions()
-                sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
-                sess_options.log_severity_level = 3  # 只显示 Error 级别
-                
+                # 🔧 ONNX Runtime 配置（默认值，可被 OnnxConfig 覆盖）
                 # ✅ 限制线程数，减少并发内存压力
-                sess_options.intra_op_num_threads = 4  # 单个操作内的并行度
-                sess_options.inter_op_num_threads = 1  # 操作间的并行度
-                
-                self.session = ort.InferenceSession(
-                    onnx_path,
-                    sess_options=sess_options,
-                    providers=['CPUExecutionProvider']
-                )
+                self.session = create_session(onnx_path, defaults={
+                    'intra_op_num_threads': 4,  # 单个操作内的并行度
+                    'inter_op_num_threads': 1,  # 操作间的并行度
+                })
+                self._run_onnx = make_runner(self.session)
                 self.backend = 'onnx'
                 self.logger.info(f'ONNX Runtime版本: {ort.__version__}')
                 return
@@ -567,6 +556,7 @@ class LamaLargeInpainter(LamaMPEInpainter):
         if hasattr(self, 'backend'):
             if self.backend == 'onnx':
                 del self.session
+                self._run_onnx = None
             elif self.backend == 'torch':
                 del self.model
     
@@ -657,7 +647,7 @@ class LamaLargeInpainter(LamaMPEInpainter):
                 'image': img,
                 'mask': mask_input
             }
-            img_inpainted = self.session.run(None, ort_inputs)[0]
+            img_inpainted = self._run_onnx(ort_inputs)[0]
             
             # 立即释放输入数据
             del img, mask_input, ort_inputs
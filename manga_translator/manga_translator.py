@@ -1,5 +1,6 @@
 
 import asyncio
+import functools
 import torch
 import cv2
 import json
@@ -29,10 +30,21 @@ from .utils import (
     TextBlock,
     imwrite_unicode
 )
+from .utils.tracing import tracer, traced_stage, traced_batch
 from .utils.text_filter import match_filter, ensure_filter_list_exists
-import matplotlib
-matplotlib.use('Agg')  # 使用非GUI后端
-from matplotlib import cm
+from .utils.onnx_session import configure as configure_onnx_runtime
+from .utils.model_manager import model_manager
+from .utils.checkpoint import (
+    PageCheckpointStore,
+    MemoryCheckpointStore,
+    MISS as CHECKPOINT_MISS,
+    affected_stages,
+    hash_array,
+    hash_env,
+    hash_file,
+    hash_parts,
+    stage_key,
+)
 from .utils.path_manager import (
     get_json_path,
     get_inpainted_path,
@@ -51,6 +63,7 @@ from .translators import (
     unload as unload_translation,
 )
 from .translators.common import ISO_639_1_TO_VALID_LANGUAGES
+from .translators import keys as translator_keys
 from .colorization import dispatch as dispatch_colorization, prepare as prepare_colorization, unload as unload_colorization
 from .rendering import dispatch as dispatch_rendering, dispatch_eng_render, dispatch_eng_render_pillow
 
@@ -134,6 +147,38 @@ def parse_upscale_ratio(upscale_ratio) -> float:
         logger.warning(f"无法解析超分倍率: {upscale_ratio}, 将忽略")
         return 0
 
+# 翻译器读取的环境变量（keys.py 中的常量与变量同名），参与翻译检查点 key
+_TRANSLATOR_ENV_NAMES = [name for name in vars(translator_keys) if name.isupper()] + ['GEMINI_API_BASE']
+
+def _checkpointed(stage: str, ctx_fields: tuple = ()):
+    """
+    阶段检查点：启用 checkpoint_dir 且阶段输入与配置都未变化时直接读取上次的结果。
+    ctx_fields 为阶段额外写到 ctx 上的结果（如调试用的 raw_mask_mask），与返回值一起保存，命中时恢复到 ctx
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, config: Config, ctx: Context, *args, **kwargs):
+            key = self._checkpoint_key(stage, config, ctx)
+            if key is None:
+                return await func(self, config, ctx, *args, **kwargs)
+            cached = self._checkpoints.load(stage, key)
+            if cached is CHECKPOINT_MISS:
+                result = await func(self, config, ctx, *args, **kwargs)
+                fields = {name: ctx.get(name) for name in ctx_fields}
+                self._checkpoints.save(stage, key, (result, fields) if ctx_fields else result)
+            elif ctx_fields:
+                result, fields = cached
+                for name, value in fields.items():
+                    if value is not None:
+                        setattr(ctx, name, value)
+            else:
+                result = cached
+            ctx.checkpoint_keys[stage] = key
+            return result
+        return wrapper
+    return decorator
+
+
 class MangaTranslator:
     verbose: bool
     ignore_errors: bool
@@ -170,6 +215,31 @@ class MangaTranslator:
         self._batch_configs = []   # 存储批量处理的配置
         # batch_concurrent 四并发模式（默认关闭，可通过配置开启）
         self.batch_concurrent = params.get('batch_concurrent', False)
+        # 并发流水线各阶段队列容量（0 表示使用默认值/不限制）
+        self.pipeline_queue_pages = params.get('pipeline_queue_pages', 0)
+        self.pipeline_queue_mb = params.get('pipeline_queue_mb', 0)
+        # 并发流水线修复/渲染线程数，以及渲染和 mask 细化的进程池大小（0 表示不使用进程池）
+        self.pipeline_inpaint_workers = params.get('pipeline_inpaint_workers', 1)
+        self.pipeline_render_workers = params.get('pipeline_render_workers', 1)
+        self.pipeline_process_workers = params.get('pipeline_process_workers', 0)
+        # 多个渲染线程是否全部串行调用渲染器（各线程使用自己的 TextRenderer，默认并行；
+        # manga2Eng/manga2EngPillow 渲染器使用共享的默认渲染器，总是串行）
+        self.pipeline_serialize_render = params.get('pipeline_serialize_render', False)
+        # 页面级检查点：指定目录时保存到磁盘；stage_cache_mb > 0 时在内存中保留最近的阶段结果（默认不启用，
+        # 只在复用同一翻译器、改配置后重跑同一页的场景开启）
+        checkpoint_dir = params.get('checkpoint_dir')
+        stage_cache_mb = params.get('stage_cache_mb', 0)
+        if checkpoint_dir:
+            self._checkpoints = PageCheckpointStore(checkpoint_dir)
+        elif stage_cache_mb and stage_cache_mb > 0:
+            self._checkpoints = MemoryCheckpointStore(int(stage_cache_mb) * 1024 * 1024)
+        else:
+            self._checkpoints = None
+        self._last_stage_config = None
+        # 阶段追踪：指定输出路径时记录各阶段 span，批次结束写出 Chrome trace
+        trace_file = params.get('trace_file')
+        if trace_file:
+            tracer.enable(trace_file)
         
         # 添加模型加载状态标志
         self._models_loaded = False
@@ -211,6 +281,7 @@ class MangaTranslator:
         # font_path 优先从配置文件读取，如果没有则使用命令行参数
         self.font_path = params.get('font_path', None)
         self.models_ttl = params.get('models_ttl', 0)
+        model_manager.configure(params.get('models_ram_budget', 0), params.get('models_vram_budget', 0))
         self.batch_size = params.get('batch_size', 3)  # 批量大小（翻译批次）
         
         # batch_concurrent 四并发流水线处理（可选功能）
@@ -409,7 +480,8 @@ class MangaTranslator:
                 image_to_save = image_to_save.convert('RGB')
             
             # 保存图片并应用save_quality设置
-            image_to_save.save(output_path, quality=self.save_quality)
+            with tracer.span('encode', 'io', page=os.path.basename(image_path)):
+                image_to_save.save(output_path, quality=self.save_quality)
             logger.info(f"  -> ✅ [{mode_label}] Saved successfully: {os.path.basename(output_path)}")
             
             # 更新翻译映射表
@@ -882,6 +954,7 @@ class MangaTranslator:
 
         return ctx
 
+    @traced_stage('colorization')
     async def _run_colorizer(self, config: Config, ctx: Context):
         current_time = time.time()
         self._model_usage_timestamps[("colorizer", config.colorizer.colorizer)] = current_time
@@ -895,6 +968,7 @@ class MangaTranslator:
             **ctx
         )
 
+    @traced_stage('upscaling')
     async def _run_upscaling(self, config: Config, ctx: Context):
         current_time = time.time()
         self._model_usage_timestamps[("upscaling", config.upscale.upscaler)] = current_time
@@ -955,6 +1029,71 @@ class MangaTranslator:
         
         return result
 
+    def _checkpoint_key(self, stage: str, config: Config, ctx: Context) -> Optional[str]:
+        """计算阶段检查点 key；未启用检查点或上游阶段没有 key 时返回 None"""
+        if self._checkpoints is None or ctx.img_rgb is None:
+            return None
+        if ctx.checkpoint_keys is None:
+            ctx.checkpoint_keys = {}
+        keys = ctx.checkpoint_keys
+        if 'image' not in keys:
+            keys['image'] = hash_array(ctx.img_rgb)
+        if stage == 'detection':
+            # verbose 时检测还会输出调试图和 raw_mask_mask
+            inputs = (keys['image'], self.verbose)
+        elif stage == 'ocr':
+            inputs = (keys.get('detection'),)
+        elif stage == 'textline_merge':
+            inputs = (keys.get('ocr'),)
+        elif stage == 'translation':
+            if not isinstance(ctx.text_regions, list) or not ctx.text_regions:
+                return None
+            # 术语提取会在翻译时改写提示词文件，无法由 key 覆盖，不缓存；
+            # 同批页面和前几页的译文由 _translation_checkpoint_keys 计入
+            if config.translator.extract_glossary:
+                return None
+            texts = [region.text for region in ctx.text_regions]
+            inputs = (keys['image'], texts, hash_file(self.pre_dict), hash_file(self.post_dict),
+                      hash_file(self._resolve_prompt_path(config)),
+                      [hash_file(path) for path in (translator_keys.OPENAI_GLOSSARY_PATH, translator_keys.SAKURA_DICT_PATH)],
+                      hash_env(_TRANSLATOR_ENV_NAMES))
+        elif stage == 'mask_refinement':
+            if ctx.mask_raw is None or not ctx.text_regions:
+                return None
+            lines = [np.asarray(region.lines).tolist() for region in ctx.text_regions]
+            inputs = (keys['image'], hash_array(ctx.mask_raw), lines, self.kernel_size)
+        elif stage == 'inpainting':
+            if ctx.mask is None:
+                return None
+            inputs = (keys['image'], hash_array(ctx.mask))
+        else:
+            return None
+        if inputs[0] is None:
+            return None
+        return stage_key(stage, config, *inputs)
+
+    def _translation_checkpoint_keys(self, contexts_with_configs: List[tuple]) -> List[Optional[str]]:
+        """
+        一批页面的翻译检查点 key。同一批页面一起发送给翻译器（HQ 翻译器还会带上各页图片），
+        context_size > 0 时还会带上前几页的译文，因此每页的 key 包含整批页面的图片和原文、页面在批次中的位置，
+        以及按当前上下文历史构建的上下文；有页面不能缓存时整批都不缓存
+        """
+        page_keys = [self._checkpoint_key('translation', config, ctx) for ctx, config in contexts_with_configs]
+        translatable = [key for (ctx, _), key in zip(contexts_with_configs, page_keys) if ctx.text_regions]
+        if not translatable or None in translatable:
+            return [None] * len(page_keys)
+        batch = hash_parts(page_keys, self._build_prev_context())
+        return [hash_parts(key, index, batch) if key else None for index, key in enumerate(page_keys)]
+
+    @staticmethod
+    def _resolve_prompt_path(config: Config) -> Optional[str]:
+        prompt_path = config.translator.high_quality_prompt_path
+        if prompt_path and not os.path.isabs(prompt_path):
+            prompt_path = os.path.join(BASE_PATH, prompt_path)
+        return prompt_path
+
+    @traced_stage('detection')
+    @_checkpointed('detection', ctx_fields=('raw_mask_mask',))
     async def _run_detection(self, config: Config, ctx: Context):
         # ✅ 检查停止标志
         await asyncio.sleep(0)
@@ -962,13 +1101,14 @@ class MangaTranslator:
         
         current_time = time.time()
         self._model_usage_timestamps[("detection", config.detector.detector)] = current_time
+        configure_onnx_runtime(config.onnx)
         result = await dispatch_detection(config.detector.detector, ctx.img_rgb, config.detector.detection_size, config.detector.text_threshold,
                                         config.detector.box_threshold,
                                         config.detector.unclip_ratio, config.detector.det_invert, config.detector.det_gamma_correct, config.detector.det_rotate,
                                         config.detector.det_auto_rotate,
                                         self.device, self.verbose,
                                         config.detector.use_yolo_obb, config.detector.yolo_obb_conf, config.detector.yolo_obb_iou, config.detector.yolo_obb_overlap_threshold,
-                                        config.detector.min_box_area_ratio, self._result_path)
+                                        config.detector.min_box_area_ratio, self._result_path, config.detector.det_quantize)
         
         # 处理bbox调试图（如果检测器返回了）
         if self.verbose and result and len(result) == 3 and result[2] is not None:
@@ -1279,6 +1419,8 @@ class MangaTranslator:
                     del self._model_usage_timestamps[(tool, model)]
             await asyncio.sleep(1)
 
+    @traced_stage('ocr')
+    @_checkpointed('ocr')
     async def _run_ocr(self, config: Config, ctx: Context):
         # ✅ 检查停止标志
         await asyncio.sleep(0)
@@ -1372,6 +1514,8 @@ class MangaTranslator:
                 new_textlines.append(textline)
         return new_textlines
 
+    @traced_stage('textline_merge')
+    @_checkpointed('textline_merge')
     async def _run_textline_merge(self, config: Config, ctx: Context):
         current_time = time.time()
         self._model_usage_timestamps[("textline_merge", "textline_merge")] = current_time
@@ -1746,9 +1890,7 @@ class MangaTranslator:
         ctx.custom_prompt_json = None
         if config.translator.high_quality_prompt_path:
             try:
-                prompt_path = config.translator.high_quality_prompt_path
-                if not os.path.isabs(prompt_path):
-                    prompt_path = os.path.join(BASE_PATH, prompt_path)
+                prompt_path = self._resolve_prompt_path(config)
                 
                 if os.path.exists(prompt_path):
                     with open(prompt_path, 'r', encoding='utf-8') as f:
@@ -1778,6 +1920,7 @@ class MangaTranslator:
                 logger.error(f"Failed to load line break prompt: {e}")
         return ctx
 
+    @traced_stage('translation')
     async def _run_text_translation(self, config: Config, ctx: Context):
         # ✅ 检查停止标志
         await asyncio.sleep(0)
@@ -2149,14 +2292,21 @@ class MangaTranslator:
 
         return new_text_regions
 
-    async def _run_mask_refinement(self, config: Config, ctx: Context):
+    @traced_stage('mask_refinement')
+    @_checkpointed('mask_refinement')
+    async def _run_mask_refinement(self, config: Config, ctx: Context, refine=None):
         # ✅ 检查停止标志
         await asyncio.sleep(0)
         self._check_cancelled()
         
+        # refine: 替代进程内细化的 async (config, ctx) -> mask（如并发流水线的进程池），检查点和 trace 不受影响
+        if refine is not None:
+            return await refine(config, ctx)
         return await dispatch_mask_refinement(ctx.text_regions, ctx.img_rgb, ctx.mask_raw, 'fit_text',
                                               config.mask_dilation_offset, config.ocr.ignore_bubble, self.verbose,self.kernel_size)
 
+    @traced_stage('inpainting')
+    @_checkpointed('inpainting')
     async def _run_inpainting(self, config: Config, ctx: Context):
         # ✅ 检查停止标志
         await asyncio.sleep(0)
@@ -2164,9 +2314,11 @@ class MangaTranslator:
         
         current_time = time.time()
         self._model_usage_timestamps[("inpainting", config.inpainter.inpainter)] = current_time
+        configure_onnx_runtime(config.onnx)
         return await dispatch_inpainting(config.inpainter.inpainter, ctx.img_rgb, ctx.mask, config.inpainter, config.inpainter.inpainting_size, self.device,
                                          self.verbose)
 
+    @traced_stage('rendering')
     async def _run_text_rendering(self, config: Config, ctx: Context):
         # ✅ 检查停止标志
         await asyncio.sleep(0)
@@ -2250,7 +2402,10 @@ class MangaTranslator:
         if vmin != 0.0 or vmax != 1.0:
             mask_normalized = np.clip((mask_normalized - vmin) / (vmax - vmin), 0, 1)
         
-        # 应用颜色映射（使用jet colormap）
+        # 应用颜色映射（使用jet colormap），matplotlib 只在生成调试图时导入
+        import matplotlib
+        matplotlib.use('Agg')  # 使用非GUI后端
+        from matplotlib import cm
         colormap = cm.get_cmap('jet')
         colored_mask = colormap(mask_normalized)
         
@@ -2398,6 +2553,7 @@ class MangaTranslator:
 
         self.add_progress_hook(ph)
 
+    @traced_batch
     async def translate_batch(self, images_with_configs: List[tuple], batch_size: int = None, image_names: List[str] = None, save_info: dict = None, global_offset: int = 0, global_total: int = None) -> List[Context]:
         """
         批量翻译多张图片，在翻译阶段进行批量处理以提高效率
@@ -2419,6 +2575,8 @@ class MangaTranslator:
             load_filter_list(force_reload=True)
         
         batch_size = batch_size or self.batch_size
+        if images_with_configs:
+            self._log_affected_stages(images_with_configs[0][1])
         
         # 如果提供了全局总数，使用它来计算总批次数；否则使用当前批次的图片数
         display_total = global_total if global_total is not None else len(images_with_configs)
@@ -2512,7 +2670,13 @@ class MangaTranslator:
             # 保存save_info供并发流水线使用
             self._current_save_info = save_info
             
-            pipeline = ConcurrentPipeline(self, batch_size)
+            pipeline = ConcurrentPipeline(self, batch_size,
+                                          max_queue_pages=self.pipeline_queue_pages,
+                                          max_queue_bytes=self.pipeline_queue_mb * 1024 * 1024,
+                                          inpaint_workers=self.pipeline_inpaint_workers,
+                                          render_workers=self.pipeline_render_workers,
+                                          process_workers=self.pipeline_process_workers,
+                                          serialize_render=self.pipeline_serialize_render)
             
             # 提取文件路径和配置
             file_paths = []
@@ -2569,7 +2733,7 @@ class MangaTranslator:
                     file_path, config = item
                     try:
                         # 加载图片
-                        with open(file_path, 'rb') as f:
+                        with tracer.span('decode', 'io', page=os.path.basename(file_path)), open(file_path, 'rb') as f:
                             image = PILImage.open(f)
                             image.load()  # 立即加载图片数据
                         image.name = file_path  # 保存文件路径
@@ -2977,6 +3141,48 @@ class MangaTranslator:
         logger.info(f"Batch translation completed: processed {len(results)} images")
         return results
 
+    async def _preload_models(self, config: Config):
+        """按配置下载并加载各阶段模型（子进程工作进程启动时也用它预热）"""
+        logger.info('Loading models')
+        
+        # ✅ 检查停止标志
+        await asyncio.sleep(0)
+        self._check_cancelled()
+        
+        if config.upscale.upscale_ratio:
+            # 传递超分配置参数
+            upscaler_kwargs = {}
+            if config.upscale.upscaler == 'realcugan':
+                if config.upscale.realcugan_model:
+                    upscaler_kwargs['model_name'] = config.upscale.realcugan_model
+                if config.upscale.tile_size is not None:
+                    upscaler_kwargs['tile_size'] = config.upscale.tile_size
+            elif config.upscale.upscaler == 'mangajanai':
+                # mangajanai 的 upscale_ratio 可以是字符串 (x2, x4, DAT2 x4) 或数字
+                ratio = config.upscale.upscale_ratio
+                if isinstance(ratio, str):
+                    upscaler_kwargs['model_name'] = ratio
+                elif ratio == 2:
+                    upscaler_kwargs['model_name'] = 'x2'
+                else:
+                    upscaler_kwargs['model_name'] = 'x4'
+                if config.upscale.tile_size is not None:
+                    upscaler_kwargs['tile_size'] = config.upscale.tile_size
+            await prepare_upscaling(config.upscale.upscaler, **upscaler_kwargs)
+        
+        await prepare_detection(config.detector.detector)
+        
+        await prepare_ocr(config.ocr.ocr, self.device)
+        
+        await prepare_inpainting(config.inpainter.inpainter, self.device)
+        
+        await prepare_translation(config.translator.translator_gen)
+        
+        if config.colorizer.colorizer != Colorizer.none:
+            await prepare_colorization(config.colorizer.colorizer)
+        
+        self._models_loaded = True  # 标记模型已加载
+
     async def _translate_until_translation(self, image: Image.Image, config: Config) -> Context:
         """
         执行翻译之前的所有步骤（彩色化、上采样、检测、OCR、文本行合并）
@@ -3004,45 +3210,7 @@ class MangaTranslator:
 
         # preload and download models (not strictly necessary, remove to lazy load)
         if self.models_ttl == 0 and not self._models_loaded:
-            logger.info('Loading models')
-            
-            # ✅ 检查停止标志
-            await asyncio.sleep(0)
-            self._check_cancelled()
-            
-            if config.upscale.upscale_ratio:
-                # 传递超分配置参数
-                upscaler_kwargs = {}
-                if config.upscale.upscaler == 'realcugan':
-                    if config.upscale.realcugan_model:
-                        upscaler_kwargs['model_name'] = config.upscale.realcugan_model
-                    if config.upscale.tile_size is not None:
-                        upscaler_kwargs['tile_size'] = config.upscale.tile_size
-                elif config.upscale.upscaler == 'mangajanai':
-                    # mangajanai 的 upscale_ratio 可以是字符串 (x2, x4, DAT2 x4) 或数字
-                    ratio = config.upscale.upscale_ratio
-                    if isinstance(ratio, str):
-                        upscaler_kwargs['model_name'] = ratio
-                    elif ratio == 2:
-                        upscaler_kwargs['model_name'] = 'x2'
-                    else:
-                        upscaler_kwargs['model_name'] = 'x4'
-                    if config.upscale.tile_size is not None:
-                        upscaler_kwargs['tile_size'] = config.upscale.tile_size
-                await prepare_upscaling(config.upscale.upscaler, **upscaler_kwargs)
-            
-            await prepare_detection(config.detector.detector)
-            
-            await prepare_ocr(config.ocr.ocr, self.device)
-            
-            await prepare_inpainting(config.inpainter.inpainter, self.device)
-            
-            await prepare_translation(config.translator.translator_gen)
-            
-            if config.colorizer.colorizer != Colorizer.none:
-                await prepare_colorization(config.colorizer.colorizer)
-            
-            self._models_loaded = True  # 标记模型已加载
+            await self._preload_models(config)
 
         # Start the background cleanup job once if not already started.
         if self._detector_cleanup_task is None:
@@ -3344,6 +3512,78 @@ class MangaTranslator:
         return ctx
 
     async def _batch_translate_contexts(self, contexts_with_configs: List[tuple], batch_size: int) -> List[tuple]:
+        """
+        批量处理翻译步骤；启用检查点时原文和翻译配置都未变化的页面直接读取上次的翻译结果
+        """
+        with tracer.span('translation', 'stage', pages=len(contexts_with_configs)):
+            if self._checkpoints is None:
+                return await self._translate_contexts_in_batches(contexts_with_configs, batch_size)
+
+            # 逐批读取/翻译：后一批的 key 包含前面批次的译文（上下文），需要在前一批翻译完成后计算
+            batch_size = max(1, batch_size)
+            for start in range(0, len(contexts_with_configs), batch_size):
+                pending = self._restore_translation_checkpoints(contexts_with_configs[start:start + batch_size])
+                if pending:
+                    await self._translate_contexts_in_batches(pending, batch_size)
+                    self._save_translation_checkpoints(pending)
+            return list(contexts_with_configs)
+
+    def _restore_translation_checkpoints(self, contexts_with_configs: List[tuple], save_original_texts: bool = False) -> List[tuple]:
+        """
+        读取一批页面（一起发送给翻译器的页面）的翻译检查点。整批都命中时恢复译文并加入上下文历史，返回空列表；
+        否则返回整批页面重新翻译，使批次组成和上下文与未命中时相同
+        """
+        if self._checkpoints is None:
+            return list(contexts_with_configs)
+        keys = self._translation_checkpoint_keys(contexts_with_configs)
+        cached_regions = []
+        for (ctx, config), key in zip(contexts_with_configs, keys):
+            if not ctx.text_regions:
+                cached_regions.append(None)
+                continue
+            cached = self._checkpoints.load('translation', key) if key else CHECKPOINT_MISS
+            if cached is CHECKPOINT_MISS:
+                for (page_ctx, _), page_key in zip(contexts_with_configs, keys):
+                    if page_key:
+                        page_ctx.checkpoint_keys['translation'] = page_key
+                return list(contexts_with_configs)
+            cached_regions.append(cached)
+
+        for (ctx, config), cached in zip(contexts_with_configs, cached_regions):
+            if cached is None:
+                continue
+            # 排版参数不参与翻译 key，按当前配置重新设置
+            for region in cached:
+                region._alignment = config.render.alignment
+                region._direction = config.render.direction
+            ctx.text_regions = cached
+            self.all_page_translations.append({region.text: region.translation for region in cached if region.translation})
+            if save_original_texts:
+                self._original_page_texts.append({i: (r.text_raw if hasattr(r, "text_raw") else r.text)
+                                                  for i, r in enumerate(cached)})
+        self._prune_context_history()
+        return []
+
+    def _save_translation_checkpoints(self, contexts_with_configs: List[tuple]):
+        if self._checkpoints is None:
+            return
+        for ctx, config in contexts_with_configs:
+            key = (ctx.checkpoint_keys or {}).get('translation')
+            if key and not ctx.translation_failed and isinstance(ctx.text_regions, list):
+                self._checkpoints.save('translation', key, ctx.text_regions)
+
+    def _log_affected_stages(self, config: Config):
+        """与上一次任务的配置比较，记录需要重新执行的阶段（其余阶段会从检查点读取）"""
+        if self._checkpoints is None or config is None:
+            return
+        last_config, self._last_stage_config = self._last_stage_config, config.model_copy(deep=True)
+        if last_config is None:
+            return
+        stages = affected_stages(last_config, config)
+        if stages:
+            logger.info(f'[阶段] 配置变化，需要重新执行: {", ".join(stages)}')
+
+    async def _translate_contexts_in_batches(self, contexts_with_configs: List[tuple], batch_size: int) -> List[tuple]:
         """
         批量处理翻译步骤，防止内存溢出
         """
@@ -3649,6 +3889,7 @@ class MangaTranslator:
                 for ctx, config in batch:
                     if not ctx.text_regions:  # 检查text_regions是否为None或空
                         continue
+                    ctx.translation_failed = True
                     for region in ctx.text_regions:
                         region.translation = region.text
                         region.target_lang = config.translator.target_lang
@@ -4580,10 +4821,11 @@ class MangaTranslator:
                         ctx.image_name = image.name
                     preprocessed_contexts.append((ctx, config))
 
-            # 阶段二：翻译当前批次
+            # 阶段二：翻译当前批次（命中翻译检查点的页面不再发送）
+            translate_contexts = self._restore_translation_checkpoints(preprocessed_contexts, save_original_texts=True)
             batch_data = []
             global_text_index = 1  # 全局文本编号从1开始（与提示词中的编号一致）
-            for ctx, config in preprocessed_contexts:
+            for ctx, config in translate_contexts:
                 num_regions = len(ctx.text_regions) if ctx.text_regions else 0
                 # 为当前图片生成全局连续的文本编号
                 text_order = list(range(global_text_index, global_text_index + num_regions))
@@ -4605,13 +4847,13 @@ class MangaTranslator:
 
             if any(data['original_texts'] for data in batch_data):
                 try:
-                    sample_config = preprocessed_contexts[0][1] if preprocessed_contexts else None
+                    sample_config = translate_contexts[0][1] if translate_contexts else None
                     if sample_config:
                         # ✅ 创建新的Context用于enhanced_ctx，避免污染第一张图片的context
                         enhanced_ctx = Context()
                         # 复制第一张图片的必要属性
-                        if preprocessed_contexts:
-                            first_ctx = preprocessed_contexts[0][0]
+                        if translate_contexts:
+                            first_ctx = translate_contexts[0][0]
                             if hasattr(first_ctx, 'input'):
                                 enhanced_ctx.input = first_ctx.input
                             if hasattr(first_ctx, 'img_rgb'):
@@ -4621,11 +4863,11 @@ class MangaTranslator:
 
                         # ✅ 合并所有页面的text_regions到enhanced_ctx（用于AI断句）
                         all_regions = []
-                        for ctx, _ in preprocessed_contexts:
+                        for ctx, _ in translate_contexts:
                             if ctx.text_regions:
                                 all_regions.extend(ctx.text_regions)
                         enhanced_ctx.text_regions = all_regions
-                        logger.debug(f"[HQ Batch] Merged {len(all_regions)} text regions from {len(preprocessed_contexts)} pages")
+                        logger.debug(f"[HQ Batch] Merged {len(all_regions)} text regions from {len(translate_contexts)} pages")
 
                         # Centralized prompt loading logic
                         enhanced_ctx = await self._load_and_prepare_prompts(sample_config, enhanced_ctx)
@@ -4633,7 +4875,7 @@ class MangaTranslator:
                         all_texts = [text for data in batch_data for text in data['original_texts']]
                         text_mapping = [(img_idx, region_idx) for img_idx, data in enumerate(batch_data) for region_idx, _ in enumerate(data['original_texts'])]
                         
-                        logger.info(f"Sending batch data with {len(preprocessed_contexts)} images, {len(all_texts)} text regions to high quality translator")
+                        logger.info(f"Sending batch data with {len(translate_contexts)} images, {len(all_texts)} text regions to high quality translator")
                         
                         # 计算当前批次在所有页面中的索引（用于上下文）
                         # batch_start 是当前批次的起始索引（相对于本次translate_batch调用的所有图片）
@@ -4652,7 +4894,7 @@ class MangaTranslator:
                         
                         for text_idx, (img_idx, region_idx) in enumerate(text_mapping):
                             if text_idx < len(translated_texts):
-                                ctx, config = preprocessed_contexts[img_idx]
+                                ctx, config = translate_contexts[img_idx]
                                 if ctx.text_regions and region_idx < len(ctx.text_regions):
                                     region = ctx.text_regions[region_idx]
                                     region.translation = translated_texts[text_idx]
@@ -4660,12 +4902,12 @@ class MangaTranslator:
                                     region._alignment = config.render.alignment
                                     region._direction = config.render.direction
                         
-                        for ctx, config in preprocessed_contexts:
+                        for ctx, config in translate_contexts:
                             if ctx.text_regions:
                                 ctx.text_regions = await self._apply_post_translation_processing(ctx, config)
                         
                         # ✅ 立即保存当前批次的翻译结果到all_page_translations，供下一个批次使用上下文
-                        for ctx, config in preprocessed_contexts:
+                        for ctx, config in translate_contexts:
                             if ctx.text_regions:
                                 # 保存译文
                                 page_trans = {}
@@ -4688,6 +4930,7 @@ class MangaTranslator:
                     logger.error(f"Error in high quality batch translation: {e}")
                     # 重新抛出异常，终止翻译流程
                     raise
+                self._save_translation_checkpoints(translate_contexts)
             # --- NEW: Handle Generate and Export for High-Quality Mode ---
             if self.generate_and_export:
                 logger.info("'Generate and Export' mode enabled for high-quality translation. Skipping rendering.")
@@ -23,6 +23,8 @@ DEFAULT_BATCH_SIZE_PER_RESTART = 50  # 每处理N张图片后检查
 
 def parse_args():
     """解析命令行参数"""
+    from manga_translator.args import add_pipeline_arguments
+
     parser = argparse.ArgumentParser(
         description='漫画翻译命令行工具 - 使用与 UI 相同的翻译逻辑',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -77,10 +79,23 @@ def parse_args():
     # 并发模式参数
     parser.add_argument('--concurrent', action='store_true',
                         help='启用并发流水线模式（检测、OCR、翻译、渲染并行处理）')
+    add_pipeline_arguments(parser)
     
     return parser.parse_args()
 
 
+PIPELINE_ARGS = ('pipeline_queue_pages', 'pipeline_queue_mb', 'pipeline_inpaint_workers',
+                 'pipeline_render_workers', 'pipeline_process_workers', 'pipeline_serialize_render')
+
+
+def _apply_pipeline_args(args, cli_config: dict):
+    """并发流水线参数：命令行参数优先，未指定时保留配置文件中的值"""
+    for key in PIPELINE_ARGS:
+        value = getattr(args, key, None)
+        if value is not None:
+            cli_config[key] = value
+
+
 async def translate_files(input_paths, output_dir, config_service, verbose=False, overwrite=False, args=None):
     """翻译文件（使用 UI 层的逻辑）"""
     
@@ -88,6 +103,7 @@ async def translate_files(input_paths, output_dir, config_service, verbose=False
     from desktop_qt_ui.services.file_service import FileService
     from manga_translator import MangaTranslator, Config
     from manga_translator.utils import init_logging, set_log_level, get_logger
+    from manga_translator.utils.tracing import tracer
     from PIL import Image
     import logging
     import logging.handlers
@@ -176,10 +192,19 @@ async def translate_files(input_paths, output_dir, config_service, verbose=False
     if hasattr(args, 'attempts') and args.attempts is not None:
         cli_config['attempts'] = args.attempts
     
+    # checkpoint_dir: 命令行参数优先
+    if getattr(args, 'checkpoint_dir', None):
+        cli_config['checkpoint_dir'] = args.checkpoint_dir
+    
+    # trace_file: 命令行参数优先
+    if getattr(args, 'trace_file', None):
+        cli_config['trace_file'] = args.trace_file
+    
     # concurrent: 命令行参数优先，否则使用配置文件中的值
     if hasattr(args, 'concurrent') and args.concurrent:
         cli_config['batch_concurrent'] = True
     # 如果命令行没有指定，保留配置文件中的 batch_concurrent 值（已在 cli_config 中）
+    _apply_pipeline_args(args, cli_config)
     
     config_dict['cli'] = cli_config
     
@@ -530,7 +555,7 @@ async def translate_files(input_paths, output_dir, config_service, verbose=False
                 images_with_configs = []
                 for file_path, config in current_batch_paths:
                     try:
-                        with open(file_path, 'rb') as f:
+                        with tracer.span('decode', 'io', page=os.path.basename(file_path)), open(file_path, 'rb') as f:
                             image = Image.open(f)
                             image.load()  # 加载图片数据
                         image.name = file_path
@@ -776,6 +801,11 @@ async def run_local_mode(args):
         
         try:
             config_dict = config_service.get_config().model_dump()
+            if getattr(args, 'checkpoint_dir', None):
+                config_dict['cli']['checkpoint_dir'] = args.checkpoint_dir
+            if getattr(args, 'trace_file', None):
+                config_dict['cli']['trace_file'] = args.trace_file
+            _apply_pipeline_args(args, config_dict['cli'])
             
             success_count, failed_count = await translate_with_subprocess(
                 all_files=all_files,
@@ -786,7 +816,8 @@ async def run_local_mode(args):
                 overwrite=overwrite,
                 memory_limit_mb=getattr(args, 'memory_limit', DEFAULT_MEMORY_THRESHOLD_MB),
                 memory_limit_percent=getattr(args, 'memory_percent', 80),
-                batch_per_restart=getattr(args, 'batch_per_restart', DEFAULT_BATCH_SIZE_PER_RESTART)
+                batch_per_restart=getattr(args, 'batch_per_restart', DEFAULT_BATCH_SIZE_PER_RESTART),
+                workers=getattr(args, 'workers', 1) or 1
             )
             
             print(f"\n{'='*60}")
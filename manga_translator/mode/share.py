@@ -1,4 +1,5 @@
 import asyncio
+import atexit
 import pickle
 from threading import Lock
 
@@ -9,6 +10,7 @@ from pydantic import BaseModel
 from starlette.responses import StreamingResponse
 
 from manga_translator import MangaTranslator
+from manga_translator.utils.shared_image import SharedImageRing, pack_frames, release_frames, unpack_frames
 
 class MethodCall(BaseModel):
     method_name: str
@@ -30,6 +32,11 @@ class MangaShare:
         self.progress_queue = asyncio.Queue()
         self.lock = Lock()
 
+        # 本机客户端请求头带 X-Shared-Frames 时，结果中的大图通过共享内存槽位返回，
+        # 槽位保留到下一个请求开始（客户端收到结果后立即复制）
+        self.frame_ring = SharedImageRing(int(params.get('shared_frame_slots', 8)))
+        atexit.register(self.frame_ring.close)
+
         async def hook(state: str, finished: bool):
             state_data = state.encode("utf-8")
             progress_data = b'\x01' + len(state_data).to_bytes(4, 'big') + state_data
@@ -48,7 +55,24 @@ class MangaShare:
             if progress[0] != 1:
                 break
 
-    async def run_method(self, method, **attributes):
+    def dumps_result(self, result, shared: bool) -> bytes:
+        if shared:
+            result = pack_frames(result, self.frame_ring, [])
+        return pickle.dumps(result)
+
+    def loads_attributes(self, request: Request, body: bytes):
+        """
+        读取请求参数，返回 (参数, shared, 映射的帧)。共享内存中的输入图片直接映射、不复制，
+        客户端在收到响应后才释放槽位，请求处理完后用 release_frames 关闭映射
+        """
+        shared = request.headers.get('X-Shared-Frames') == '1'
+        frames = []
+        if shared:
+            # 上一个请求的结果已被客户端复制，槽位可以复用
+            self.frame_ring.release_all()
+        return unpack_frames(pickle.loads(body), frames), shared, frames
+
+    async def run_method(self, method, shared: bool = False, frames: list = (), **attributes):
         try:
             if asyncio.iscoroutinefunction(method):
                 result = await method(**attributes)
@@ -65,7 +89,7 @@ class MangaShare:
                 minimal_result.use_placeholder = True
                 result_bytes = pickle.dumps(minimal_result)
             else:
-                result_bytes = pickle.dumps(result)
+                result_bytes = self.dumps_result(result, shared)
 
             encoded_result = b'\x00' + len(result_bytes).to_bytes(4, 'big') + result_bytes
             await self.progress_queue.put(encoded_result)
@@ -74,6 +98,8 @@ class MangaShare:
             encoded_result = b'\x02' + len(err_bytes).to_bytes(4, 'big') + err_bytes
             await self.progress_queue.put(encoded_result)
         finally:
+            attributes.clear()
+            release_frames(frames)
             self.lock.release()
 
 
@@ -109,16 +135,20 @@ class MangaShare:
             self.check_nonce(request)
             self.check_lock()
             method = self.get_fn(method_name)
-            attr = pickle.loads(await request.body())
+            attr, shared, frames = self.loads_attributes(request, await request.body())
             try:
                 if asyncio.iscoroutinefunction(method):
                     result = await method(**attr)
                 else:
                     result = method(**attr)
+                attr.clear()
+                release_frames(frames)
                 self.lock.release()
-                result_bytes = pickle.dumps(result)
+                result_bytes = self.dumps_result(result, shared)
                 return Response(content=result_bytes, media_type="application/octet-stream")
             except Exception as e:
+                attr.clear()
+                release_frames(frames)
                 self.lock.release()
                 raise HTTPException(status_code=500, detail=str(e))
 
@@ -127,11 +157,11 @@ class MangaShare:
             self.check_nonce(request)
             self.check_lock()
             method = self.get_fn(method_name)
-            attr = pickle.loads(await request.body())
+            attr, shared, frames = self.loads_attributes(request, await request.body())
 
             # streaming response
             streaming_response = StreamingResponse(self.progress_stream(), media_type="application/octet-stream")
-            asyncio.create_task(self.run_method(method, **attr))
+            asyncio.create_task(self.run_method(method, shared, frames, **attr))
             return streaming_response
 
         config = uvicorn.Config(
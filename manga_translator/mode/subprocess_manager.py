@@ -1,12 +1,15 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """
-子进程管理器 - 支持内存管理和断点续传
+子进程管理器 - 常驻预热工作进程池，支持内存管理和断点续传
 """
 import os
 import sys
+import time
 # import json
 import multiprocessing
+from multiprocessing.connection import Connection, wait as wait_connections
+from collections import deque
 from pathlib import Path
 from datetime import datetime, timezone
 from typing import List, Dict, Optional, Tuple
@@ -17,6 +20,9 @@ ROOT_DIR = Path(__file__).parent.parent.parent
 DEFAULT_MEMORY_THRESHOLD_MB = 0  # 默认不限制绝对内存
 DEFAULT_MEMORY_THRESHOLD_PERCENT = 80  # 默认达到系统总内存80%时重启
 DEFAULT_BATCH_SIZE_PER_RESTART = 50
+DEFAULT_PAGE_TIMEOUT = 600  # 单页超时（秒），超时视为工作进程卡死
+DEFAULT_WARMUP_TIMEOUT = 900  # 启动预热超时（秒），超时视为启动失败
+STOP_TIMEOUT = 60  # 回收时等待旧进程退出的时间（秒）
 
 
 def get_memory_usage_mb() -> float:
@@ -47,132 +53,152 @@ def get_system_memory_percent() -> float:
         return 0
 
 
+def _setup_translator(config_dict: dict, verbose: bool, overwrite: bool, output_dir: str):
+    """在子进程中创建 MangaTranslator、Config 和保存信息"""
+    sys.path.insert(0, str(ROOT_DIR))
+    sys.path.insert(0, str(ROOT_DIR / 'desktop_qt_ui'))
 
+    from manga_translator import MangaTranslator, Config
+    from manga_translator.utils import init_logging, set_log_level
+    import logging
 
+    init_logging()
+    set_log_level(logging.DEBUG if verbose else logging.INFO)
 
-def worker_translate_batch(
-    file_paths: List[str],
+    # 应用命令行参数
+    cli_config = config_dict.get('cli', {})
+    cli_config['verbose'] = verbose
+    cli_config['overwrite'] = overwrite
+    config_dict['cli'] = cli_config
+
+    # 处理 font_path
+    font_filename = config_dict.get('render', {}).get('font_path')
+    if font_filename and not os.path.isabs(font_filename):
+        font_full_path = os.path.join(ROOT_DIR, 'fonts', font_filename)
+        if os.path.exists(font_full_path):
+            config_dict['render']['font_path'] = font_full_path
+
+    # 创建翻译器
+    translator_params = cli_config.copy()
+    translator_params.update(config_dict)
+    translator = MangaTranslator(params=translator_params)
+
+    # 创建 Config 对象
+    explicit_keys = {'render', 'upscale', 'translator', 'detector', 'colorizer', 'inpainter', 'ocr'}
+    config_for_translate = {k: v for k, v in config_dict.items() if k in explicit_keys}
+    for key in ['kernel_size', 'mask_dilation_offset', 'force_simple_sort']:
+        if key in config_dict:
+            config_for_translate[key] = config_dict[key]
+
+    if 'translator' in config_for_translate:
+        translator_config = config_for_translate['translator'].copy()
+        translator_config['attempts'] = cli_config.get('attempts', -1)
+        config_for_translate['translator'] = translator_config
+
+    manga_config = Config(**config_for_translate)
+
+    # 准备保存信息
+    output_format = cli_config.get('format')
+    if not output_format or output_format == "不指定":
+        output_format = None
+
+    save_info = {
+        'output_folder': output_dir,
+        'format': output_format,
+        'overwrite': overwrite,
+        'input_folders': set()
+    }
+    return translator, manga_config, save_info
+
+
+async def _warm_up(translator, manga_config):
+    """预加载模型，并在空白图上跑一次检测，让检测模型和推理会话在处理第一页之前就绪"""
+    import numpy as np
+    from manga_translator.utils import Context
+
+    await translator._preload_models(manga_config)
+    try:
+        ctx = Context()
+        ctx.img_rgb = np.full((512, 512, 3), 255, dtype=np.uint8)
+        await translator._run_detection(manga_config, ctx)
+    except Exception as e:
+        print(f"⚠️ 检测模型预热失败，将在处理第一页时加载: {e}")
+
+
+async def _translate_one(translator, manga_config, save_info, file_path: str, index: int, total_files: int) -> Optional[str]:
+    """翻译单个文件，成功返回 None，否则返回错误信息"""
+    from PIL import Image
+
+    with open(file_path, 'rb') as f:
+        image = Image.open(f)
+        image.load()
+    image.name = file_path
+
+    try:
+        contexts = await translator.translate_batch(
+            [(image, manga_config)],
+            save_info=save_info,
+            global_offset=index,
+            global_total=total_files
+        )
+    finally:
+        if hasattr(image, 'close'):
+            image.close()
+
+    if not contexts:
+        return '无返回结果'
+    ctx = contexts[0]
+    if getattr(ctx, 'success', False) or getattr(ctx, 'result', None):
+        return None
+    return getattr(ctx, 'translation_error', None) or '未知错误'
+
+
+def worker_main(
+    worker_id: int,
     output_dir: str,
-    config_path: Optional[str],
     verbose: bool,
     overwrite: bool,
-    start_index: int,
     total_files: int,
     config_dict: dict,
-    memory_limit_mb: int,
-    memory_limit_percent: int,
-    result_queue: multiprocessing.Queue
+    inbox: multiprocessing.Queue,
+    outbox: Connection
 ):
     """
-    子进程工作函数：翻译一批图片
+    常驻工作进程：启动时预加载模型，之后从 inbox 逐页领取任务，直到收到 None
+
+    outbox 是该进程独占的管道写端，发送的消息：ready（预热完成）、done（一页完成，附带进程内存）、error（进程级异常）
     """
     import asyncio
-    
-    async def _do_translate():
-        # 添加路径
-        sys.path.insert(0, str(ROOT_DIR))
-        sys.path.insert(0, str(ROOT_DIR / 'desktop_qt_ui'))
-        
-        from manga_translator import MangaTranslator, Config
-        from manga_translator.utils import init_logging, set_log_level, get_logger
-        from PIL import Image
-        import logging
+
+    async def _serve():
         import gc
-        
-        init_logging()
-        set_log_level(logging.DEBUG if verbose else logging.INFO)
-        
-        _logger = get_logger('local_worker')
-        
-        # 应用命令行参数
-        cli_config = config_dict.get('cli', {})
-        cli_config['verbose'] = verbose
-        cli_config['overwrite'] = overwrite
-        config_dict['cli'] = cli_config
-        
-        # 处理 font_path
-        font_filename = config_dict.get('render', {}).get('font_path')
-        if font_filename and not os.path.isabs(font_filename):
-            font_full_path = os.path.join(ROOT_DIR, 'fonts', font_filename)
-            if os.path.exists(font_full_path):
-                config_dict['render']['font_path'] = font_full_path
-        
-        # 创建翻译器
-        translator_params = cli_config.copy()
-        translator_params.update(config_dict)
-        translator = MangaTranslator(params=translator_params)
-        
-        # 创建 Config 对象
-        explicit_keys = {'render', 'upscale', 'translator', 'detector', 'colorizer', 'inpainter', 'ocr'}
-        config_for_translate = {k: v for k, v in config_dict.items() if k in explicit_keys}
-        for key in ['kernel_size', 'mask_dilation_offset', 'force_simple_sort']:
-            if key in config_dict:
-                config_for_translate[key] = config_dict[key]
-        
-        if 'translator' in config_for_translate:
-            translator_config = config_for_translate['translator'].copy()
-            translator_config['attempts'] = cli_config.get('attempts', -1)
-            config_for_translate['translator'] = translator_config
-        
-        manga_config = Config(**config_for_translate)
-        
-        # 准备保存信息
-        output_format = cli_config.get('format')
-        if not output_format or output_format == "不指定":
-            output_format = None
-        
-        save_info = {
-            'output_folder': output_dir,
-            'format': output_format,
-            'overwrite': overwrite,
-            'input_folders': set()
-        }
-        
-        # 处理图片
-        completed = []
-        failed = []
-        
-        for i, file_path in enumerate(file_paths):
-            current_index = start_index + i + 1
-            print(f"\n[{current_index}/{total_files}] 处理: {os.path.basename(file_path)}")
-            
+
+        translator, manga_config, save_info = _setup_translator(config_dict, verbose, overwrite, output_dir)
+        await _warm_up(translator, manga_config)
+        outbox.send({'type': 'ready', 'worker': worker_id, 'rss_mb': get_memory_usage_mb()})
+
+        pages = 0
+        while True:
+            # 在线程中阻塞等待，保持事件循环（模型清理任务等）可以运行
+            task = await asyncio.to_thread(inbox.get)
+            if task is None:
+                break
+            index, file_path = task
+            print(f"\n[{index + 1}/{total_files}] 工作进程 {worker_id} 处理: {os.path.basename(file_path)}")
             try:
-                with open(file_path, 'rb') as f:
-                    image = Image.open(f)
-                    image.load()
-                image.name = file_path
-                
-                contexts = await translator.translate_batch(
-                    [(image, manga_config)],
-                    save_info=save_info,
-                    global_offset=current_index - 1,
-                    global_total=total_files
-                )
-                
-                if contexts and len(contexts) > 0:
-                    ctx = contexts[0]
-                    if getattr(ctx, 'success', False) or getattr(ctx, 'result', None):
-                        completed.append(file_path)
-                        print(f"✅ 完成: {os.path.basename(file_path)}")
-                    else:
-                        failed.append(file_path)
-                        error_msg = getattr(ctx, 'translation_error', '未知错误')
-                        print(f"❌ 失败: {os.path.basename(file_path)} - {error_msg}")
-                else:
-                    failed.append(file_path)
-                    print(f"❌ 失败: {os.path.basename(file_path)} - 无返回结果")
-                
-                if hasattr(image, 'close'):
-                    image.close()
-                
+                error = await _translate_one(translator, manga_config, save_info, file_path, index, total_files)
             except Exception as e:
-                failed.append(file_path)
-                print(f"❌ 异常: {os.path.basename(file_path)} - {e}")
+                error = str(e)
                 if verbose:
                     import traceback
                     traceback.print_exc()
-            
-            if (i + 1) % 5 == 0:
+            if error is None:
+                print(f"✅ 完成: {os.path.basename(file_path)}")
+            else:
+                print(f"❌ 失败: {os.path.basename(file_path)} - {error}")
+
+            pages += 1
+            if pages % 5 == 0:
                 gc.collect()
                 try:
                     import torch
@@ -180,48 +206,290 @@ def worker_translate_batch(
                         torch.cuda.empty_cache()
                 except:
                     pass
-            
-            # 检查内存使用
-            mem_mb = get_memory_usage_mb()
-            sys_mem_percent = get_system_memory_percent()
-            
-            if mem_mb > 0:
-                print(f"📊 进程内存: {mem_mb:.0f} MB | 系统内存: {sys_mem_percent:.1f}%")
-                
-                # 检查是否超过绝对内存限制
-                if memory_limit_mb > 0 and mem_mb > memory_limit_mb:
-                    print(f"⚠️ 进程内存超过限制 ({mem_mb:.0f} MB > {memory_limit_mb} MB)，提前退出")
-                    print(f"📊 已完成 {len(completed)} 个文件，剩余文件将在新子进程中处理")
-                    return completed, failed
-                
-                # 检查是否超过系统内存百分比限制
-                if memory_limit_percent > 0 and sys_mem_percent > memory_limit_percent:
-                    print(f"⚠️ 系统内存超过限制 ({sys_mem_percent:.1f}% > {memory_limit_percent}%)，提前退出")
-                    print(f"📊 已完成 {len(completed)} 个文件，剩余文件将在新子进程中处理")
-                    return completed, failed
-        
-        return completed, failed
-    
+
+            outbox.send({
+                'type': 'done',
+                'worker': worker_id,
+                'file': file_path,
+                'error': error,
+                'pages': pages,
+                'rss_mb': get_memory_usage_mb(),
+            })
+
     try:
-        completed, failed = asyncio.run(_do_translate())
-        print(f"\n📤 子进程发送结果: 成功 {len(completed)}, 失败 {len(failed)}")
-        result_queue.put({
-            'status': 'success',
-            'completed': completed,
-            'failed': failed
-        })
+        asyncio.run(_serve())
     except Exception as e:
         import traceback
-        print(f"\n❌ 子进程异常: {e}")
-        result_queue.put({
-            'status': 'error',
+        print(f"\n❌ 工作进程 {worker_id} 异常: {e}")
+        outbox.send({
+            'type': 'error',
+            'worker': worker_id,
             'error': str(e),
             'traceback': traceback.format_exc(),
-            'completed': [],
-            'failed': []
         })
 
 
+class _PoolWorker:
+    """主进程中对一个工作进程的记录"""
+
+    def __init__(self, worker_id: int, process: multiprocessing.Process, inbox: multiprocessing.Queue,
+                 conn: Connection):
+        self.id = worker_id
+        self.process = process
+        self.inbox = inbox
+        # 该进程独占的结果管道读端；进程被终止时只会损坏自己的管道
+        self.conn: Optional[Connection] = conn
+        self.state = 'starting'  # starting / idle / busy / stopping
+        self.task: Optional[Tuple[int, str]] = None
+        self.task_started = 0.0
+        self.started = time.monotonic()
+        self.pages = 0
+        self.rss_mb = 0.0
+        self.recycle_reason: Optional[str] = None
+        self.stop_requested = 0.0
+
+    def send(self, task):
+        self.inbox.put(task)
+        if task is None:
+            self.state = 'stopping'
+        else:
+            self.state = 'busy'
+            self.task = task
+            self.task_started = time.monotonic()
+
+    def recv(self) -> Optional[dict]:
+        """读取一条消息；管道已关闭或消息不完整（进程在写入时退出）时关闭管道并返回 None"""
+        try:
+            return self.conn.recv()
+        except Exception:
+            self.close_conn()
+            return None
+
+    def close_conn(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.kill()
+        self.process.join(timeout=5)
+        self.close_conn()
+
+
+class WorkerPool:
+    """
+    常驻的预热工作进程池
+
+    - 每个工作进程启动时加载一次模型，之后持续处理页面，不再每批重新导入 torch 和加载模型
+    - 页面按需分派：空闲的工作进程立即领取下一页，处理快的进程自然多处理（work stealing）
+    - 健康检查：进程退出或单页超时会被终止并重启，正在处理的页面重新排队（最多 MAX_PAGE_ATTEMPTS 次）；
+      预热超过 warmup_timeout 的进程会被终止，计为一次启动失败
+    - 每个进程通过各自的管道回传结果，终止一个进程不会影响其他进程的消息
+    - 回收：处理满 pages_per_worker 页、进程内存超过 memory_limit_mb 或系统内存超过 memory_limit_percent 时重启；
+      同一时间只有一个进程在重启/预热，其余进程继续处理
+    """
+
+    MAX_PAGE_ATTEMPTS = 2
+    MAX_START_FAILURES = 3
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, num_workers: int, output_dir: str, config_dict: dict, verbose: bool, overwrite: bool,
+                 total_files: int, pages_per_worker: int = 0, memory_limit_mb: int = 0,
+                 memory_limit_percent: int = 0, page_timeout: float = DEFAULT_PAGE_TIMEOUT,
+                 warmup_timeout: float = DEFAULT_WARMUP_TIMEOUT):
+        self.num_workers = max(1, num_workers)
+        self.output_dir = output_dir
+        self.config_dict = config_dict
+        self.verbose = verbose
+        self.overwrite = overwrite
+        self.total_files = total_files
+        self.pages_per_worker = pages_per_worker
+        self.memory_limit_mb = memory_limit_mb
+        self.memory_limit_percent = memory_limit_percent
+        self.page_timeout = page_timeout
+        self.warmup_timeout = warmup_timeout
+        self.workers: Dict[int, _PoolWorker] = {}
+        self._next_id = 0
+        self.restarts = 0
+        self._start_failures = 0
+
+    def _spawn(self) -> _PoolWorker:
+        worker_id = self._next_id
+        self._next_id += 1
+        inbox = multiprocessing.Queue()
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(
+            target=worker_main,
+            args=(worker_id, self.output_dir, self.verbose, self.overwrite, self.total_files,
+                  self.config_dict, inbox, writer)
+        )
+        process.start()
+        # 写端只保留在子进程中，子进程退出后读端才能收到 EOF
+        writer.close()
+        worker = _PoolWorker(worker_id, process, inbox, reader)
+        self.workers[worker_id] = worker
+        return worker
+
+    def _retire(self, worker: _PoolWorker, graceful: bool = True):
+        """graceful 时只发送退出信号，进程退出后在健康检查中回收，不阻塞其余进程的分派"""
+        if graceful and worker.process.is_alive():
+            worker.send(None)
+            worker.stop_requested = time.monotonic()
+            return
+        worker.kill()
+        self.workers.pop(worker.id, None)
+
+    def _active(self) -> List[_PoolWorker]:
+        return [w for w in self.workers.values() if w.state != 'stopping']
+
+    def _needs_recycle(self, worker: _PoolWorker) -> Optional[str]:
+        if self.pages_per_worker > 0 and worker.pages >= self.pages_per_worker:
+            return f"已处理 {worker.pages} 页"
+        if self.memory_limit_mb > 0 and worker.rss_mb > self.memory_limit_mb:
+            return f"进程内存 {worker.rss_mb:.0f} MB > {self.memory_limit_mb} MB"
+        if self.memory_limit_percent > 0:
+            percent = get_system_memory_percent()
+            if percent > self.memory_limit_percent:
+                return f"系统内存 {percent:.1f}% > {self.memory_limit_percent}%"
+        return None
+
+    def run(self, files: List[str]) -> Tuple[int, int]:
+        pending = deque(enumerate(files))
+        attempts: Dict[int, int] = {}
+        success_count = 0
+        failed_count = 0
+        finished = 0
+
+        def requeue(worker: _PoolWorker, reason: str):
+            nonlocal failed_count, finished
+            if worker.task is None:
+                return
+            index, file_path = worker.task
+            worker.task = None
+            attempts[index] = attempts.get(index, 0) + 1
+            if attempts[index] < self.MAX_PAGE_ATTEMPTS:
+                print(f"🔁 {os.path.basename(file_path)} 重新排队（{reason}）")
+                pending.appendleft((index, file_path))
+            else:
+                print(f"❌ 失败: {os.path.basename(file_path)} - {reason}")
+                failed_count += 1
+                finished += 1
+
+        for _ in range(self.num_workers):
+            self._spawn()
+
+        try:
+            while finished < len(files):
+                # 健康检查
+                now = time.monotonic()
+                for worker in list(self.workers.values()):
+                    if worker.state == 'stopping':
+                        # 正在退出的旧进程：退出后回收，长时间不退出则强制终止
+                        if not worker.process.is_alive() or now - worker.stop_requested > STOP_TIMEOUT:
+                            self._retire(worker, graceful=False)
+                    elif not worker.process.is_alive():
+                        print(f"⚠️ 工作进程 {worker.id} 意外退出（exitcode={worker.process.exitcode}），重新启动")
+                        if worker.state == 'starting':
+                            self._start_failures += 1
+                        requeue(worker, '工作进程退出')
+                        self._retire(worker, graceful=False)
+                        self.restarts += 1
+                    elif worker.state == 'busy' and self.page_timeout > 0 and now - worker.task_started > self.page_timeout:
+                        print(f"⚠️ 工作进程 {worker.id} 单页超过 {self.page_timeout:.0f} 秒无响应，终止并重启")
+                        requeue(worker, '处理超时')
+                        self._retire(worker, graceful=False)
+                        self.restarts += 1
+                    elif worker.state == 'starting' and self.warmup_timeout > 0 and now - worker.started > self.warmup_timeout:
+                        print(f"⚠️ 工作进程 {worker.id} 预热超过 {self.warmup_timeout:.0f} 秒未就绪，终止并重启")
+                        self._start_failures += 1
+                        self._retire(worker, graceful=False)
+                        self.restarts += 1
+
+                if pending and self._start_failures >= self.MAX_START_FAILURES:
+                    print(f"❌ 工作进程连续 {self._start_failures} 次启动失败，放弃剩余 {len(pending)} 个文件")
+                    failed_count += len(pending)
+                    finished += len(pending)
+                    pending.clear()
+
+                # 错峰回收：同一时间只允许一个进程在预热
+                warming = any(w.state == 'starting' for w in self.workers.values())
+                if pending and not warming:
+                    for worker in self._active():
+                        if worker.state == 'idle' and worker.recycle_reason:
+                            print(f"♻️ 回收工作进程 {worker.id}（{worker.recycle_reason}），其余进程继续处理")
+                            self._retire(worker)
+                            self.restarts += 1
+                            break
+
+                # 补足进程数（进程退出、超时或回收之后）
+                while pending and len(self._active()) < self.num_workers and self._start_failures < self.MAX_START_FAILURES:
+                    self._spawn()
+
+                # 分派：空闲进程领取下一页
+                for worker in self.workers.values():
+                    if worker.state == 'idle' and pending:
+                        worker.send(pending.popleft())
+
+                messages = []
+                readers = {w.conn: w for w in self.workers.values() if w.conn is not None}
+                if not readers:
+                    time.sleep(self.POLL_INTERVAL)
+                    continue
+                for conn in wait_connections(list(readers), timeout=self.POLL_INTERVAL):
+                    message = readers[conn].recv()
+                    if message is not None:
+                        messages.append((readers[conn], message))
+
+                for worker, message in messages:
+                    if self.workers.get(worker.id) is not worker:
+                        continue
+                    kind = message['type']
+                    if kind == 'ready':
+                        worker.state = 'idle'
+                        worker.rss_mb = message.get('rss_mb', 0.0)
+                        self._start_failures = 0
+                        print(f"🔥 工作进程 {worker.id} 已就绪（预热 {time.monotonic() - worker.started:.1f} 秒，内存 {worker.rss_mb:.0f} MB）")
+                    elif kind == 'done':
+                        worker.state = 'idle'
+                        worker.task = None
+                        worker.pages = message.get('pages', worker.pages + 1)
+                        worker.rss_mb = message.get('rss_mb', 0.0)
+                        finished += 1
+                        if message.get('error') is None:
+                            success_count += 1
+                        else:
+                            failed_count += 1
+                        if worker.recycle_reason is None:
+                            worker.recycle_reason = self._needs_recycle(worker)
+                        print(f"📊 进度: {finished}/{len(files)} | 工作进程 {worker.id} 内存: {worker.rss_mb:.0f} MB")
+                    elif kind == 'error':
+                        print(f"\n❌ 工作进程 {worker.id} 错误: {message.get('error', '未知错误')}")
+                        if self.verbose and 'traceback' in message:
+                            print(message['traceback'])
+                        if worker.state == 'starting':
+                            self._start_failures += 1
+                        requeue(worker, '工作进程异常')
+                        self._retire(worker, graceful=False)
+                        self.restarts += 1
+        finally:
+            self.shutdown()
+
+        return success_count, failed_count
+
+    def shutdown(self):
+        for worker in list(self.workers.values()):
+            if worker.process.is_alive() and worker.state in ('idle', 'starting'):
+                worker.inbox.put(None)
+        for worker in list(self.workers.values()):
+            worker.process.join(timeout=10)
+            worker.kill()
+        self.workers.clear()
+
+
 async def translate_with_subprocess(
     all_files: List[str],
     output_dir: str,
@@ -232,29 +500,34 @@ async def translate_with_subprocess(
     memory_limit_mb: int = DEFAULT_MEMORY_THRESHOLD_MB,
     memory_limit_percent: int = DEFAULT_MEMORY_THRESHOLD_PERCENT,
     batch_per_restart: int = DEFAULT_BATCH_SIZE_PER_RESTART,
-    resume: bool = False
+    resume: bool = False,
+    workers: int = 1,
+    page_timeout: float = DEFAULT_PAGE_TIMEOUT,
+    warmup_timeout: float = DEFAULT_WARMUP_TIMEOUT
 ) -> Tuple[int, int]:
     """
-    使用子进程模式翻译，支持内存管理
-    
+    使用常驻子进程池翻译，支持内存管理
+
     Args:
-        memory_limit_mb: 绝对内存限制（MB），0表示不限制
-        memory_limit_percent: 内存百分比限制，超过系统总内存的这个百分比时重启
-    
+        memory_limit_mb: 工作进程内存限制（MB），超过后回收该进程，0表示不限制
+        memory_limit_percent: 系统内存百分比限制，超过时回收工作进程
+        batch_per_restart: 每个工作进程处理N页后回收，0表示不限制
+        workers: 工作进程数
+        page_timeout: 单页超时（秒），超时的工作进程会被终止并重启
+        warmup_timeout: 启动预热超时（秒），超时的工作进程会被终止，计为一次启动失败
+
     Returns:
         (success_count, failed_count)
     """
-    completed_files = set()
     total_files = len(all_files)
-    success_count = 0
-    failed_count = 0
-    
+
     # 获取系统总内存用于显示
     total_mem = get_total_memory_mb()
-    
+
     print(f"\n{'='*60}")
     print("🚀 子进程翻译模式")
     print(f"📊 总文件数: {total_files}")
+    print(f"📊 工作进程: {workers}")
     # 如果设置了绝对内存限制，只显示绝对限制；否则显示百分比限制
     if memory_limit_mb > 0:
         print(f"📊 内存限制: {memory_limit_mb} MB")
@@ -262,102 +535,36 @@ async def translate_with_subprocess(
         limit_mb = total_mem * memory_limit_percent / 100
         print(f"📊 内存限制: {memory_limit_percent}% (约 {limit_mb:.0f} MB)")
     if batch_per_restart > 0:
-        print(f"📊 每批处理: {batch_per_restart} 张")
+        print(f"📊 每个工作进程处理 {batch_per_restart} 张后回收")
     print(f"{'='*60}\n")
-    
-    restart_count = 0
-    
-    while True:
-        # 每次循环开始时，过滤掉已完成的文件
-        pending_files = [f for f in all_files if f not in completed_files]
-        
-        if not pending_files:
-            break
-        
-        # 取一批文件处理（0 表示不限制，一次处理所有）
-        if batch_per_restart > 0:
-            batch_files = pending_files[:batch_per_restart]
-        else:
-            batch_files = pending_files
-        
-        print(f"\n{'='*40}")
-        print(f"🔄 批次 {restart_count + 1}: 处理 {len(batch_files)} 个文件")
-        print(f"📊 进度: {len(completed_files)}/{total_files}")
-        print(f"{'='*40}")
-        
-        result_queue = multiprocessing.Queue()
-        
-        process = multiprocessing.Process(
-            target=worker_translate_batch,
-            args=(
-                batch_files,
-                output_dir,
-                config_path,
-                verbose,
-                overwrite,
-                len(completed_files),
-                total_files,
-                config_dict,
-                memory_limit_mb,
-                memory_limit_percent,
-                result_queue
-            )
-        )
-        
-        process.start()
-        
-        try:
-            # 先尝试从队列获取结果（子进程会在发送结果后退出）
-            timeout = len(batch_files) * 600
-            try:
-                result = result_queue.get(timeout=timeout)
-                
-                if result['status'] == 'success':
-                    batch_completed = result.get('completed', [])
-                    batch_failed = result.get('failed', [])
-                    
-                    success_count += len(batch_completed)
-                    failed_count += len(batch_failed)
-                    completed_files.update(batch_completed)
-                    
-                    print(f"\n📊 批次完成: 成功 {len(batch_completed)}, 失败 {len(batch_failed)}")
-                else:
-                    print(f"\n❌ 批次错误: {result.get('error', '未知错误')}")
-                    if verbose and 'traceback' in result:
-                        print(result['traceback'])
-                    
-            except Exception as e:
-                print(f"\n⚠️ 无法获取子进程结果: {e}")
-                # 如果无法获取结果，将这批文件标记为失败
-                failed_count += len(batch_files)
-            
-            # 等待子进程退出
-            process.join(timeout=30)
-            if process.is_alive():
-                print("⚠️ 子进程未正常退出，强制终止")
-                process.terminate()
-                process.join(timeout=5)
-                if process.is_alive():
-                    process.kill()
-                    process.join()
-        
-        except KeyboardInterrupt:
-            print("\n\n⚠️ 用户中断")
-            process.terminate()
-            process.join(timeout=5)
-            if process.is_alive():
-                process.kill()
-            raise
-        
-        main_mem = get_memory_usage_mb()
-        if main_mem > 0:
-            print(f"📊 主进程内存: {main_mem:.0f} MB")
-        
-        restart_count += 1
-    
+
+    pool = WorkerPool(
+        num_workers=min(workers, total_files) if total_files else 1,
+        output_dir=output_dir,
+        config_dict=config_dict,
+        verbose=verbose,
+        overwrite=overwrite,
+        total_files=total_files,
+        pages_per_worker=batch_per_restart,
+        memory_limit_mb=memory_limit_mb,
+        memory_limit_percent=memory_limit_percent,
+        page_timeout=page_timeout,
+        warmup_timeout=warmup_timeout,
+    )
+    try:
+        success_count, failed_count = pool.run(all_files)
+    except KeyboardInterrupt:
+        print("\n\n⚠️ 用户中断")
+        pool.shutdown()
+        raise
+
+    main_mem = get_memory_usage_mb()
+    if main_mem > 0:
+        print(f"📊 主进程内存: {main_mem:.0f} MB | 工作进程重启 {pool.restarts} 次")
+
     if failed_count == 0:
         print("\n✅ 所有文件处理完成")
     else:
         print(f"\n⚠️ 有 {failed_count} 个文件失败")
-    
+
     return success_count, failed_count
@@ -1,38 +1,21 @@
 import numpy as np
 from typing import List, Optional
 from .common import CommonOCR, OfflineOCR
-from .model_32px import Model32pxOCR
-from .model_48px import Model48pxOCR
-from .model_48px_ctc import Model48pxCTCOCR
-# ModelMangaOCR 延迟导入，避免未使用时下载模型
-from .model_paddleocr import ModelPaddleOCR, ModelPaddleOCRKorean, ModelPaddleOCRLatin, ModelPaddleOCRThai
 from ..config import Ocr, OcrConfig
-from ..utils import Quadrilateral
-
-
-def _get_manga_ocr_class():
-    """延迟导入 ModelMangaOCR，只有在真正使用 mocr 时才导入"""
-    from .model_manga_ocr import ModelMangaOCR
-    return ModelMangaOCR
-
-
-def _get_paddleocr_vl_class():
-    """延迟导入 ModelPaddleOCRVL，只有在真正使用 paddleocr_vl 时才导入"""
-    from .model_paddleocr_vl import ModelPaddleOCRVL
-    return ModelPaddleOCRVL
-
-
-OCRS = {
-    Ocr.ocr32px: Model32pxOCR,
-    Ocr.ocr48px: Model48pxOCR,
-    Ocr.ocr48px_ctc: Model48pxCTCOCR,
-    Ocr.mocr: _get_manga_ocr_class,  # 延迟导入
-    Ocr.paddleocr: ModelPaddleOCR,
-    Ocr.paddleocr_korean: ModelPaddleOCRKorean,
-    Ocr.paddleocr_latin: ModelPaddleOCRLatin,
-    Ocr.paddleocr_thai: ModelPaddleOCRThai,
-    Ocr.paddleocr_vl: _get_paddleocr_vl_class,  # 延迟导入 PaddleOCR-VL
-}
+from ..utils import Quadrilateral, LazyRegistry
+
+# OCR 实现在第一次使用时才导入（mocr、paddleocr_vl 等未使用时也不会触发下载）
+OCRS = LazyRegistry(__name__, {
+    Ocr.ocr32px: '.model_32px:Model32pxOCR',
+    Ocr.ocr48px: '.model_48px:Model48pxOCR',
+    Ocr.ocr48px_ctc: '.model_48px_ctc:Model48pxCTCOCR',
+    Ocr.mocr: '.model_manga_ocr:ModelMangaOCR',
+    Ocr.paddleocr: '.model_paddleocr:ModelPaddleOCR',
+    Ocr.paddleocr_korean: '.model_paddleocr:ModelPaddleOCRKorean',
+    Ocr.paddleocr_latin: '.model_paddleocr:ModelPaddleOCRLatin',
+    Ocr.paddleocr_thai: '.model_paddleocr:ModelPaddleOCRThai',
+    Ocr.paddleocr_vl: '.model_paddleocr_vl:ModelPaddleOCRVL',
+})
 ocr_cache = {}
 
 def get_ocr(key: Ocr, *args, **kwargs) -> CommonOCR:
@@ -41,9 +24,6 @@ def get_ocr(key: Ocr, *args, **kwargs) -> CommonOCR:
     # Use cache to avoid reloading models in the same translation session
     if key not in ocr_cache:
         ocr_class = OCRS[key]
-        # 处理延迟导入的情况（mocr, paddleocr_vl）
-        if callable(ocr_class) and key in (Ocr.mocr, Ocr.paddleocr_vl):
-            ocr_class = ocr_class()  # 调用函数获取真正的类
         ocr_cache[key] = ocr_class(*args, **kwargs)
     return ocr_cache[key]
 
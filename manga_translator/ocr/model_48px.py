@@ -1,3 +1,4 @@
+import copy
 import math
 from typing import Callable, List, Optional, Tuple, Union
 from collections import defaultdict
@@ -18,7 +19,6 @@ from .xpos_relative_position import XPOS
 
 from .common import OfflineOCR
 from ..utils import TextBlock, Quadrilateral, chunks, imwrite_unicode
-from ..utils.generic import AvgMeter
 from ..utils.bubble import is_ignore
 
 # Roformer with Xpos
@@ -76,11 +76,49 @@ class Model48pxOCR(OfflineOCR):
             self.use_gpu = False
         if self.use_gpu:
             self.model = self.model.to(device)
+        self._onnx_runners = {}
+        self._quantized_model = None
 
 
     async def _unload(self):
         del self.model
-    
+        self._onnx_runners = {}
+        self._quantized_model = None
+
+    def _get_quantized_model(self):
+        """CPU 下的 INT8 动态量化模型（Linear 层），首次使用时生成"""
+        if self._quantized_model is None:
+            from ..utils.quantization import quantize_dynamic_model
+            self._quantized_model, count = quantize_dynamic_model(copy.deepcopy(self.model))
+            self.logger.info(f'48px OCR INT8 动态量化: {count} 层')
+        return self._quantized_model
+
+    def _get_onnx_runner(self, quantize: bool = False):
+        """CPU 下获取 ONNX Runtime 推理器，首次使用时从 checkpoint 导出 ONNX 图"""
+        if quantize in self._onnx_runners:
+            return self._onnx_runners[quantize]
+        from .model_48px_onnx import Model48pxOnnxRunner, export_48px_onnx, ENCODER_ONNX_FILE, DECODER_STEP_ONNX_FILE
+        encoder_path = self._get_file_path(ENCODER_ONNX_FILE)
+        decoder_path = self._get_file_path(DECODER_STEP_ONNX_FILE)
+        runner = None
+        try:
+            if not (os.path.exists(encoder_path) and os.path.exists(decoder_path)):
+                self.logger.info('正在导出 48px OCR 的 ONNX 模型...')
+                export_48px_onnx(self.model, encoder_path, decoder_path)
+            if quantize:
+                from ..utils.quantization import int8_path, quantize_onnx_dynamic
+                # 校准脚本生成的静态量化模型优先，没有时使用动态量化
+                for path in (encoder_path, decoder_path):
+                    if not os.path.exists(int8_path(path)):
+                        quantize_onnx_dynamic(path)
+                encoder_path, decoder_path = int8_path(encoder_path), int8_path(decoder_path)
+            runner = Model48pxOnnxRunner(encoder_path, decoder_path)
+            self.logger.info(f'48px OCR 使用 ONNX Runtime（CPU{", INT8" if quantize else ""}）推理')
+        except Exception as e:
+            self.logger.warning(f'48px OCR ONNX 初始化失败，回退到PyTorch: {e}')
+        self._onnx_runners[quantize] = runner
+        return runner
+
     async def _infer(self, image: np.ndarray, textlines: List[Quadrilateral], config: OcrConfig, verbose: bool = False, ignore_bubble: int = 0) -> List[TextBlock]:
         text_height = 48
         max_chunk_size = 16
@@ -152,10 +190,17 @@ class Model48pxOCR(OfflineOCR):
                     imwrite_unicode(os.path.join(ocr_result_dir, f'{ix-N+i}.png'), img_data, self.logger, compression_params)
             image_tensor = (torch.from_numpy(region).float() - 127.5) / 127.5
             image_tensor = einops.rearrange(image_tensor, 'N H W C -> N C H W')
-            if self.use_gpu:
-                image_tensor = image_tensor.to(self.device)
-            with torch.no_grad():
-                ret = self.model.infer_beam_batch_tensor(image_tensor, valid_widths, beams_k = 5, max_seq_length = 255)
+            quantize = config.ocr_quantize and not self.use_gpu
+            onnx_runner = self._get_onnx_runner(quantize) if config.use_onnx_ocr and not self.use_gpu else None
+            if onnx_runner is not None:
+                ret = onnx_runner.infer_beam_batch(image_tensor.numpy(), valid_widths, beams_k = 5, max_seq_length = 255)
+            else:
+                model = self._get_quantized_model() if quantize else self.model
+                if self.use_gpu:
+                    image_tensor = image_tensor.to(self.device)
+                with torch.no_grad():
+                    ret = model.infer_beam_batch_tensor(image_tensor, valid_widths, beams_k = 5, max_seq_length = 255)
+            colors = estimate_colors_batch(ret, self.model.dictionary)
             for i, (pred_chars_index, prob, fg_pred, bg_pred, fg_ind_pred, bg_ind_pred) in enumerate(ret):
                 if prob < threshold:
                     # Decode text first to log it
@@ -187,16 +232,8 @@ class Model48pxOCR(OfflineOCR):
                         cur_region.update_font_colors(np.array([0, 0, 0]), np.array([255, 255, 255]))
                     out_regions.append(cur_region)
                     continue
-                has_fg = (fg_ind_pred[:, 1] > fg_ind_pred[:, 0])
-                has_bg = (bg_ind_pred[:, 1] > bg_ind_pred[:, 0])
                 seq = []
-                fr = AvgMeter()
-                fg = AvgMeter()
-                fb = AvgMeter()
-                br = AvgMeter()
-                bg = AvgMeter()
-                bb = AvgMeter()
-                for chid, c_fg, c_bg, h_fg, h_bg in zip(pred_chars_index, fg_pred, bg_pred, has_fg, has_bg) :
+                for chid in pred_chars_index:
                     ch = self.model.dictionary[chid]
                     if ch == '<S>':
                         continue
@@ -205,25 +242,8 @@ class Model48pxOCR(OfflineOCR):
                     if ch == '<SP>':
                         ch = ' '
                     seq.append(ch)
-                    if h_fg.item() :
-                        fr(int(c_fg[0] * 255))
-                        fg(int(c_fg[1] * 255))
-                        fb(int(c_fg[2] * 255))
-                    if h_bg.item() :
-                        br(int(c_bg[0] * 255))
-                        bg(int(c_bg[1] * 255))
-                        bb(int(c_bg[2] * 255))
-                    else :
-                        br(int(c_fg[0] * 255))
-                        bg(int(c_fg[1] * 255))
-                        bb(int(c_fg[2] * 255))
                 txt = ''.join(seq)
-                fr = min(max(int(fr()), 0), 255)
-                fg = min(max(int(fg()), 0), 255)
-                fb = min(max(int(fb()), 0), 255)
-                br = min(max(int(br()), 0), 255)
-                bg = min(max(int(bg()), 0), 255)
-                bb = min(max(int(bb()), 0), 255)
+                fr, fg, fb, br, bg, bb = colors[i]
                 self.logger.info(f'prob: {prob} {txt} fg: ({fr}, {fg}, {fb}) bg: ({br}, {bg}, {bb})')
                 cur_region = quadrilaterals[valid_indices[i]][0]
                 if isinstance(cur_region, Quadrilateral):
@@ -248,6 +268,69 @@ class Model48pxOCR(OfflineOCR):
             return out_regions
         return out_regions
 
+
+def estimate_colors_batch(ret, dictionary: List[str]) -> List[Tuple[int, int, int, int, int, int]]:
+    """
+    根据 infer_beam_batch(_tensor) 的输出批量计算每个区域的前景色和背景色
+
+    与逐字符 AvgMeter 累加的结果完全一致：跳过 <S>，遇到 </S> 停止，
+    没有背景色预测的字符使用前景色代替。所有区域的逐字符预测被堆叠成
+    [N, L] 的数组，再通过按区域的 bincount 一次性求和，避免 Python 逐字符循环。
+
+    Returns:
+        每个区域一个 (fr, fg, fb, br, bg, bb) 元组，顺序与 ret 相同
+    """
+    N = len(ret)
+    if N == 0:
+        return []
+
+    # zip(pred_chars_index, fg_pred, ...) 按最短序列截断，这里保持一致
+    lengths = [min(len(r[0]), r[2].shape[0]) for r in ret]
+    max_len = max(lengths)
+    if max_len == 0:
+        return [(0, 0, 0, 0, 0, 0)] * N
+
+    def _stack(col: int) -> np.ndarray:
+        seqs = [torch.as_tensor(r[col])[:l] for r, l in zip(ret, lengths)]
+        return torch.nn.utils.rnn.pad_sequence(seqs, batch_first = True).cpu().numpy()
+
+    chars = _stack(0).astype(np.int64)
+    fg_pred = _stack(2)
+    bg_pred = _stack(3)
+    fg_ind_pred = _stack(4)
+    bg_ind_pred = _stack(5)
+
+    start_tok = dictionary.index('<S>') if '<S>' in dictionary else -1
+    end_tok = dictionary.index('</S>') if '</S>' in dictionary else -1
+
+    in_range = np.arange(max_len)[None, :] < np.asarray(lengths)[:, None]
+    ended = np.cumsum((chars == end_tok) & in_range, axis = 1) > 0
+    valid = in_range & ~ended & (chars != start_tok)
+
+    has_fg = fg_ind_pred[..., 1] > fg_ind_pred[..., 0]
+    has_bg = bg_ind_pred[..., 1] > bg_ind_pred[..., 0]
+
+    # int(c * 255) 在 float32 下计算后向零截断
+    fg_vals = np.trunc(fg_pred.astype(np.float32) * np.float32(255)).astype(np.float64)
+    bg_vals = np.trunc(bg_pred.astype(np.float32) * np.float32(255)).astype(np.float64)
+    bg_vals = np.where(has_bg[..., None], bg_vals, fg_vals)
+
+    region_ids = np.broadcast_to(np.arange(N)[:, None], (N, max_len))
+
+    def _mean(mask: np.ndarray, vals: np.ndarray) -> np.ndarray:
+        ids = region_ids[mask]
+        count = np.bincount(ids, minlength = N)
+        out = np.zeros((N, 3), dtype = np.float64)
+        for c in range(3):
+            sums = np.bincount(ids, weights = vals[..., c][mask], minlength = N)
+            np.divide(sums, count, out = out[:, c], where = count > 0)
+        return np.clip(np.trunc(out), 0, 255).astype(np.int64)
+
+    fg_mean = _mean(valid & has_fg, fg_vals)
+    bg_mean = _mean(valid, bg_vals)
+    return [tuple(int(v) for v in (*f, *b)) for f, b in zip(fg_mean, bg_mean)]
+
+
 class ConvNeXtBlock(nn.Module):
     r""" ConvNeXt Block. There are two equivalent implementations:
     (1) DwConv -> LayerNorm (channels_first) -> 1x1 Conv -> GELU -> 1x1 Conv; all in (N, C, H, W)
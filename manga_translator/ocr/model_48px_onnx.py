@@ -0,0 +1,501 @@
+"""
+48px OCR 的 ONNX 导出与 ONNX Runtime（CPU）推理
+
+把 `model_48px.OCR` 拆成两张图：
+
+- encoder：backbone + transformer encoder，同时为每个 decoder 层预先算好
+  cross-attention 的 K/V（与解码步数无关，整段解码只算一次）
+- decoder_step：单步解码，输入上一 token、各层历史激活（self-attention 的缓存）、
+  cross-attention K/V，输出 logprob、本步各层输入激活（追加到缓存）和颜色预测
+
+XPOS 位置由宿主侧按步数计算后作为输入传入，避免导出时把形状写死。
+解码循环（greedy / beam）在宿主侧用 numpy 实现，beam 逻辑与
+`OCR.infer_beam_batch_tensor` 保持一致，结果格式也相同，可直接交给
+`estimate_colors_batch` 处理。
+
+命令行：
+    python -m manga_translator.ocr.model_48px_onnx export
+    python -m manga_translator.ocr.model_48px_onnx compare --crops <目录>
+"""
+
+import os
+import time
+from collections import defaultdict
+from typing import List, Optional, Tuple
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from .model_48px import OCR, XposMultiheadAttention
+from .xpos_relative_position import XPOS
+from ..utils.onnx_session import create_session, make_runner
+
+ENCODER_ONNX_FILE = 'ocr_ar_48px_encoder.onnx'
+DECODER_STEP_ONNX_FILE = 'ocr_ar_48px_decoder_step.onnx'
+ONNX_OPSET = 17
+
+
+def _interleave(m: torch.Tensor) -> torch.Tensor:
+    # 等价于 duplicate_interleave，但不依赖具体的行数
+    return torch.stack((m, m), dim = -1).flatten(-2)
+
+
+def _rotate_every_two(x: torch.Tensor) -> torch.Tensor:
+    # 等价于 rotate_every_two，作用在最后一维，支持 [N, H, L, D]
+    x1 = x[..., ::2]
+    x2 = x[..., 1::2]
+    return torch.stack((-x2, x1), dim = -1).flatten(-2)
+
+
+def _xpos_tables(xpos: XPOS, positions: torch.Tensor, last_only: bool, downscale: bool):
+    """
+    按给定位置计算 XPOS 的 sin/cos 表，结果与 XPOS.forward 一致
+
+    Args:
+        positions: [L] float，对应 XPOS.forward 中 arange(min_pos, max_pos)
+        last_only: 只取最后一行（query 长度为 1 的情况）
+    """
+    index = torch.cumsum(torch.ones_like(positions), dim = 0) - 1
+    scale = xpos.scale ** (positions / xpos.scale_base)[:, None]
+    dim = xpos.head_dim // 2
+    inv_freq = 1.0 / (10000 ** (torch.arange(0, dim) / dim))
+    sinusoid = index[:, None] * inv_freq.to(scale)[None, :]
+    sin, cos = torch.sin(sinusoid), torch.cos(sinusoid)
+    if last_only:
+        scale, sin, cos = scale[-1:], sin[-1:], cos[-1:]
+    if downscale:
+        scale = 1 / scale
+    return _interleave(sin * scale), _interleave(cos * scale)
+
+
+def _apply_xpos(x: torch.Tensor, tables) -> torch.Tensor:
+    sin, cos = tables
+    return (x * cos) + (_rotate_every_two(x) * sin)
+
+
+def _heads(attn: XposMultiheadAttention, x: torch.Tensor) -> torch.Tensor:
+    # [N, L, E] -> [N, H, L, D]
+    return x.unflatten(-1, (attn.num_heads, attn.head_dim)).transpose(1, 2)
+
+
+def _attend(attn: XposMultiheadAttention, q, k, v, key_padding_mask = None) -> torch.Tensor:
+    weights = torch.matmul(q, k.transpose(-1, -2))
+    if key_padding_mask is not None:
+        weights = weights.masked_fill(key_padding_mask[:, None, None, :], float('-inf'))
+    weights = F.softmax(weights, dim = -1)
+    out = torch.matmul(weights, v).transpose(1, 2).flatten(2)
+    return attn.out_proj(out)
+
+
+class OCREncoderOnnx(nn.Module):
+    """backbone + encoder，并输出所有 decoder 层的 cross-attention K/V"""
+
+    def __init__(self, model: OCR):
+        super().__init__()
+        self.model = model
+
+    def forward(self, image: torch.Tensor, feat_lengths: torch.Tensor):
+        model = self.model
+        memory = model.backbone(image).squeeze(2).transpose(1, 2)  # N, W, C
+        ones = torch.ones_like(memory[0, :, 0])
+        index = torch.cumsum(ones, dim = 0) - 1
+        memory_mask = index[None, :] >= feat_lengths[:, None].to(index)
+        positions = index + torch.floor(-ones.sum() / 2)
+
+        for layer in model.encoders:
+            attn: XposMultiheadAttention = layer.self_attn
+            x = layer.norm1(memory)
+            q = _heads(attn, attn.q_proj(x) * attn.scaling)
+            k = _heads(attn, attn.k_proj(x))
+            v = _heads(attn, attn.v_proj(x))
+            k = _apply_xpos(k, _xpos_tables(attn.xpos, positions, False, True))
+            q = _apply_xpos(q, _xpos_tables(attn.xpos, positions, False, False))
+            memory = memory + _attend(attn, q, k, v, memory_mask)
+            memory = memory + layer._ff_block(layer.norm2(memory))
+
+        cross_k, cross_v = [], []
+        for layer in model.decoders:
+            attn: XposMultiheadAttention = layer.multihead_attn
+            k = _heads(attn, attn.k_proj(memory))
+            cross_k.append(_apply_xpos(k, _xpos_tables(attn.xpos, positions, False, True)))
+            cross_v.append(_heads(attn, attn.v_proj(memory)))
+        return torch.stack(cross_k, dim = 1), torch.stack(cross_v, dim = 1), memory_mask
+
+
+class OCRDecoderStepOnnx(nn.Module):
+    """单步解码，等价于 OCR.decoder_forward 加上预测头"""
+
+    def __init__(self, model: OCR):
+        super().__init__()
+        self.model = model
+
+    def forward(self, tokens, cache, positions, cross_k, cross_v, memory_mask):
+        model = self.model
+        tgt = model.embd(tokens)[:, None, :]  # N, 1, E
+        layer_inputs = []
+        for l, layer in enumerate(model.decoders):
+            layer_inputs.append(tgt)
+            combined = layer.norm1(torch.cat([cache[:, l], tgt], dim = 1))
+
+            attn: XposMultiheadAttention = layer.self_attn
+            q = _heads(attn, attn.q_proj(layer.norm1(tgt)) * attn.scaling)
+            k = _heads(attn, attn.k_proj(combined))
+            v = _heads(attn, attn.v_proj(combined))
+            k = _apply_xpos(k, _xpos_tables(attn.xpos, positions, False, True))
+            q = _apply_xpos(q, _xpos_tables(attn.xpos, positions, True, False))
+            tgt = tgt + _attend(attn, q, k, v)
+
+            attn = layer.multihead_attn
+            q = _heads(attn, attn.q_proj(layer.norm2(tgt)) * attn.scaling)
+            q = _apply_xpos(q, _xpos_tables(attn.xpos, positions, True, False))
+            tgt = tgt + _attend(attn, q, cross_k[:, l], cross_v[:, l], memory_mask)
+
+            tgt = tgt + layer._ff_block(layer.norm3(tgt))
+
+        decoded = tgt[:, 0, :]
+        logprobs = model.pred(model.pred1(decoded)).log_softmax(-1)
+        color_feats = model.color_pred1(decoded)
+        colors = torch.cat([
+            model.color_pred_fg(color_feats),
+            model.color_pred_bg(color_feats),
+            model.color_pred_fg_ind(color_feats),
+            model.color_pred_bg_ind(color_feats),
+        ], dim = -1)
+        return logprobs, torch.cat(layer_inputs, dim = 1), colors
+
+
+def export_48px_onnx(model: OCR, encoder_path: str, decoder_path: str, opset: int = ONNX_OPSET):
+    """把已加载权重的 OCR 模型导出为 encoder / decoder_step 两个 ONNX 文件"""
+    model = model.float().cpu().eval()
+    encoder = OCREncoderOnnx(model).eval()
+    decoder = OCRDecoderStepOnnx(model).eval()
+    num_layers = len(model.decoders)
+    embd_dim = model.embd.embedding_dim
+    nhead = model.decoders[0].multihead_attn.num_heads
+    head_dim = embd_dim // nhead
+
+    image = torch.randn(2, 3, 48, 64)
+    feat_lengths = torch.tensor([18, 12], dtype = torch.long)
+    with torch.no_grad():
+        torch.onnx.export(
+            encoder, (image, feat_lengths), encoder_path,
+            input_names = ['image', 'feat_lengths'],
+            output_names = ['cross_k', 'cross_v', 'memory_mask'],
+            dynamic_axes = {
+                'image': {0: 'batch', 3: 'width'},
+                'feat_lengths': {0: 'batch'},
+                'cross_k': {0: 'batch', 3: 'memory'},
+                'cross_v': {0: 'batch', 3: 'memory'},
+                'memory_mask': {0: 'batch', 1: 'memory'},
+            },
+            opset_version = opset,
+            dynamo = False,
+        )
+
+        steps, memory_len = 3, 16
+        tokens = torch.ones(2, dtype = torch.long)
+        cache = torch.randn(2, num_layers, steps, embd_dim)
+        positions = torch.from_numpy(_step_positions(steps))
+        cross_k = torch.randn(2, num_layers, nhead, memory_len, head_dim)
+        cross_v = torch.randn(2, num_layers, nhead, memory_len, head_dim)
+        memory_mask = torch.zeros(2, memory_len, dtype = torch.bool)
+        torch.onnx.export(
+            decoder, (tokens, cache, positions, cross_k, cross_v, memory_mask), decoder_path,
+            input_names = ['tokens', 'cache', 'positions', 'cross_k', 'cross_v', 'memory_mask'],
+            output_names = ['logprobs', 'layer_inputs', 'colors'],
+            dynamic_axes = {
+                'tokens': {0: 'batch'},
+                'cache': {0: 'batch', 2: 'steps'},
+                'positions': {0: 'positions'},
+                'cross_k': {0: 'batch', 3: 'memory'},
+                'cross_v': {0: 'batch', 3: 'memory'},
+                'memory_mask': {0: 'batch', 1: 'memory'},
+                'logprobs': {0: 'batch'},
+                'layer_inputs': {0: 'batch'},
+                'colors': {0: 'batch'},
+            },
+            opset_version = opset,
+            dynamo = False,
+        )
+
+
+def _step_positions(step: int) -> np.ndarray:
+    length = step + 1
+    min_pos = -length // 2
+    return np.arange(min_pos, length + min_pos, dtype = np.float32)
+
+
+def _topk(values: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    # 与 torch.topk 一样按值降序返回
+    index = np.argpartition(-values, k - 1, axis = 1)[:, :k]
+    top = np.take_along_axis(values, index, axis = 1)
+    order = np.argsort(-top, axis = 1, kind = 'stable')
+    return np.take_along_axis(top, order, axis = 1), np.take_along_axis(index, order, axis = 1)
+
+
+class Model48pxOnnxRunner:
+    """
+    用 ONNX Runtime 执行导出的 48px OCR 图
+
+    infer_* 的输入是已经归一化的 [N, 3, 48, W] float32 图像，返回值与
+    OCR.infer_beam_batch_tensor 相同：(字符索引, prob, fg, bg, fg_ind, bg_ind)
+    """
+
+    def __init__(self, encoder_path: str, decoder_path: str, num_threads: Optional[int] = None):
+        # SessionOptions 和 IOBinding 由全局 OnnxConfig 决定，num_threads 仅作为该模型的默认值
+        defaults = {'intra_op_num_threads': num_threads} if num_threads else {}
+        self.encoder = create_session(encoder_path, defaults = defaults)
+        self.decoder = create_session(decoder_path, defaults = defaults)
+        self._run_encoder = make_runner(self.encoder)
+        self._run_decoder = make_runner(self.decoder)
+
+    def _encode(self, image: np.ndarray, img_widths: List[int]):
+        feat_lengths = np.array([(x + 3) // 4 + 2 for x in img_widths], dtype = np.int64)
+        return self._run_encoder({
+            'image': np.ascontiguousarray(image, dtype = np.float32),
+            'feat_lengths': feat_lengths,
+        })
+
+    def _step(self, tokens, cache, step, cross_k, cross_v, memory_mask):
+        # 使用 IOBinding 时输出在下一次 _step 之前有效，需要保留的部分都经过 concatenate/repeat 复制
+        return self._run_decoder({
+            'tokens': tokens.astype(np.int64),
+            'cache': cache,
+            'positions': _step_positions(step),
+            'cross_k': cross_k,
+            'cross_v': cross_v,
+            'memory_mask': memory_mask,
+        })
+
+    @staticmethod
+    def _result(out_idx: np.ndarray, prob: float, colors: np.ndarray):
+        return out_idx[1:], prob, colors[:, 0:3], colors[:, 3:6], colors[:, 6:8], colors[:, 8:10]
+
+    def infer_greedy_batch(self, image: np.ndarray, img_widths: List[int], start_tok = 1, end_tok = 2, max_seq_length = 255):
+        cross_k, cross_v, memory_mask = self._encode(image, img_widths)
+        N = image.shape[0]
+        num_layers = cross_k.shape[1]
+        embd_dim = cross_k.shape[2] * cross_k.shape[4]
+
+        out_idx = np.full((N, 1), start_tok, dtype = np.int64)
+        log_probs = np.zeros(N, dtype = np.float32)
+        cache = np.zeros((N, num_layers, 0, embd_dim), dtype = np.float32)
+        colors = np.zeros((N, 0, 10), dtype = np.float32)
+        done = np.zeros(N, dtype = bool)
+        for step in range(max_seq_length):
+            logprobs, layer_inputs, step_colors = self._step(out_idx[:, -1], cache, step, cross_k, cross_v, memory_mask)
+            cache = np.concatenate([cache, layer_inputs[:, :, None, :]], axis = 2)
+            colors = np.concatenate([colors, step_colors[:, None, :]], axis = 1)
+            next_tok = logprobs.argmax(-1)
+            next_tok[done] = end_tok
+            log_probs += np.where(done, 0, logprobs[np.arange(N), next_tok])
+            out_idx = np.concatenate([out_idx, next_tok[:, None]], axis = 1)
+            done |= next_tok == end_tok
+            if done.all():
+                break
+
+        result = []
+        for i in range(N):
+            ends = np.flatnonzero(out_idx[i, 1:] == end_tok)
+            length = ends[0] + 2 if len(ends) else out_idx.shape[1]
+            result.append(self._result(out_idx[i, :length], float(np.exp(log_probs[i])), colors[i, :length - 1]))
+        return result
+
+    def infer_beam_batch(self, image: np.ndarray, img_widths: List[int], beams_k: int = 5, start_tok = 1, end_tok = 2, max_finished_hypos: int = 2, max_seq_length = 255):
+        cross_k, cross_v, memory_mask = self._encode(image, img_widths)
+        N = image.shape[0]
+        num_layers = cross_k.shape[1]
+        embd_dim = cross_k.shape[2] * cross_k.shape[4]
+
+        tokens = np.full(N, start_tok, dtype = np.int64)
+        cache = np.zeros((N, num_layers, 0, embd_dim), dtype = np.float32)
+        logprobs, layer_inputs, step_colors = self._step(tokens, cache, 0, cross_k, cross_v, memory_mask)
+        cache = layer_inputs[:, :, None, :]
+        colors = step_colors[:, None, :]
+        pred_chars_values, pred_chars_index = _topk(logprobs, beams_k)
+
+        out_idx = np.concatenate([np.full((N * beams_k, 1), start_tok, dtype = np.int64), pred_chars_index.reshape(-1, 1)], axis = 1)
+        log_probs = pred_chars_values.reshape(-1, 1)
+        cross_k = np.repeat(cross_k, beams_k, axis = 0)
+        cross_v = np.repeat(cross_v, beams_k, axis = 0)
+        memory_mask = np.repeat(memory_mask, beams_k, axis = 0)
+        cache = np.repeat(cache, beams_k, axis = 0)
+        colors = np.repeat(colors, beams_k, axis = 0)
+        batch_index = np.repeat(np.arange(N), beams_k)
+
+        finished_hypos = defaultdict(list)
+        N_remaining = N
+        for step in range(1, max_seq_length):
+            logprobs, layer_inputs, step_colors = self._step(out_idx[:, -1], cache, step, cross_k, cross_v, memory_mask)
+            # 与 infer_beam_batch_tensor 一致：缓存按 beam 槽位累积，不随 beam 重排
+            cache = np.concatenate([cache, layer_inputs[:, :, None, :]], axis = 2)
+            colors = np.concatenate([colors, step_colors[:, None, :]], axis = 1)
+            pred_chars_values, pred_chars_index = _topk(logprobs, beams_k)
+
+            finished = out_idx[:, -1] == end_tok
+            pred_chars_values[finished] = 0
+            pred_chars_index[finished] = end_tok
+
+            new_out_idx = np.concatenate([np.repeat(out_idx, beams_k, axis = 0), pred_chars_index.reshape(-1, 1)], axis = 1)
+            new_log_probs = (log_probs[:, None, :] + pred_chars_values[:, :, None]).reshape(N_remaining, -1)
+            new_out_idx = new_out_idx.reshape(N_remaining, -1, step + 2)
+            batch_topk_log_probs, batch_topk_indices = _topk(new_log_probs, beams_k)
+
+            out_idx = np.take_along_axis(new_out_idx, batch_topk_indices[:, :, None], axis = 1).reshape(-1, step + 2)
+            log_probs = batch_topk_log_probs.reshape(-1, 1)
+
+            finished = (out_idx[:, -1] == end_tok).reshape(N_remaining, beams_k)
+            finished_batch_indices = np.flatnonzero(finished.sum(axis = 1) >= max_finished_hypos)
+            if len(finished_batch_indices) == 0:
+                continue
+
+            for idx in finished_batch_indices:
+                best_beam_idx = batch_topk_log_probs[idx].argmax()
+                row = idx * beams_k + best_beam_idx
+                finished_hypos[int(batch_index[beams_k * idx])] = \
+                    out_idx[row], float(np.exp(batch_topk_log_probs[idx, best_beam_idx])), colors[row]
+
+            keep = np.ones(N_remaining, dtype = bool)
+            keep[finished_batch_indices] = False
+            if not keep.any():
+                break
+            remaining = np.repeat(keep, beams_k)
+            N_remaining = int(keep.sum())
+
+            out_idx = out_idx[remaining]
+            log_probs = log_probs[remaining]
+            cross_k = cross_k[remaining]
+            cross_v = cross_v[remaining]
+            memory_mask = memory_mask[remaining]
+            cache = cache[remaining]
+            colors = colors[remaining]
+            batch_index = batch_index[remaining]
+
+        for i in range(N):
+            if i not in finished_hypos:
+                rows = np.flatnonzero(batch_index == i)
+                if len(rows) > 0:
+                    row = rows[0]
+                    finished_hypos[i] = out_idx[row], float(np.exp(log_probs[row, 0])), colors[row]
+                else:
+                    finished_hypos[i] = np.array([end_tok], dtype = np.int64), 0.0, np.zeros((0, 10), dtype = np.float32)
+
+        return [self._result(*finished_hypos[i]) for i in range(N)]
+
+
+def _load_torch_model(model_dir: str) -> OCR:
+    with open(os.path.join(model_dir, 'alphabet-all-v7.txt'), 'r', encoding = 'utf-8') as fp:
+        dictionary = [s[:-1] for s in fp.readlines()]
+    model = OCR(dictionary, 768)
+    sd = torch.load(os.path.join(model_dir, 'ocr_ar_48px.ckpt'), map_location = 'cpu', weights_only = False)
+    if 'state_dict' in sd:
+        sd = sd['state_dict']
+    model.load_state_dict({k.removeprefix('model.'): v for k, v in sd.items()})
+    model.eval()
+    return model
+
+
+def _load_crops(crop_dir: str) -> Tuple[np.ndarray, List[int]]:
+    import cv2
+    crops = []
+    for name in sorted(os.listdir(crop_dir)):
+        if not name.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')):
+            continue
+        img = cv2.imdecode(np.fromfile(os.path.join(crop_dir, name), dtype = np.uint8), cv2.IMREAD_COLOR)
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        new_w = max(1, int(round(img.shape[1] / float(img.shape[0]) * 48)))
+        crops.append(cv2.resize(img, (new_w, 48), interpolation = cv2.INTER_AREA))
+    widths = [c.shape[1] for c in crops]
+    batch = np.zeros((len(crops), 48, 4 * (max(widths) + 7) // 4, 3), dtype = np.uint8)
+    for i, c in enumerate(crops):
+        batch[i, :, :c.shape[1]] = c
+    image = (batch.astype(np.float32) - 127.5) / 127.5
+    return np.ascontiguousarray(image.transpose(0, 3, 1, 2)), widths
+
+
+def _decode_text(dictionary: List[str], chars) -> str:
+    seq = []
+    for chid in chars:
+        ch = dictionary[int(chid)]
+        if ch == '<S>':
+            continue
+        if ch == '</S>':
+            break
+        seq.append(' ' if ch == '<SP>' else ch)
+    return ''.join(seq)
+
+
+def compare_with_torch(model_dir: str, crop_dir: str, repeat: int = 3):
+    """在一组固定的文本行切片上对比 torch 与 ONNX 的识别结果和吞吐"""
+    from .model_48px import estimate_colors_batch
+
+    model = _load_torch_model(model_dir)
+    encoder_path = os.path.join(model_dir, ENCODER_ONNX_FILE)
+    decoder_path = os.path.join(model_dir, DECODER_STEP_ONNX_FILE)
+    if not (os.path.exists(encoder_path) and os.path.exists(decoder_path)):
+        export_48px_onnx(model, encoder_path, decoder_path)
+    runner = Model48pxOnnxRunner(encoder_path, decoder_path)
+    image, widths = _load_crops(crop_dir)
+    if len(widths) == 0:
+        print(f'No crops found in {crop_dir}')
+        return
+
+    def run_torch():
+        with torch.no_grad():
+            return model.infer_beam_batch_tensor(torch.from_numpy(image), widths, beams_k = 5, max_seq_length = 255)
+
+    def run_onnx():
+        return runner.infer_beam_batch(image, widths, beams_k = 5, max_seq_length = 255)
+
+    timings = {}
+    results = {}
+    for name, fn in (('torch', run_torch), ('onnx', run_onnx)):
+        results[name] = fn()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        timings[name] = (time.perf_counter() - start) / repeat
+
+    torch_colors = estimate_colors_batch(results['torch'], model.dictionary)
+    onnx_colors = estimate_colors_batch(results['onnx'], model.dictionary)
+    text_matches = 0
+    max_color_diff = 0
+    max_prob_diff = 0.0
+    for i in range(len(widths)):
+        t_txt = _decode_text(model.dictionary, results['torch'][i][0])
+        o_txt = _decode_text(model.dictionary, results['onnx'][i][0])
+        if t_txt == o_txt:
+            text_matches += 1
+            max_color_diff = max(max_color_diff, max(abs(a - b) for a, b in zip(torch_colors[i], onnx_colors[i])))
+        else:
+            print(f'[{i}] mismatch: torch="{t_txt}" onnx="{o_txt}"')
+        max_prob_diff = max(max_prob_diff, abs(results['torch'][i][1] - results['onnx'][i][1]))
+
+    n = len(widths)
+    print(f'crops: {n}')
+    print(f'text match: {text_matches}/{n}, max color diff: {max_color_diff}, max prob diff: {max_prob_diff:.5f}')
+    for name, t in timings.items():
+        print(f'{name:>5}: {t * 1000:.1f} ms/batch, {n / t:.1f} lines/s')
+
+
+if __name__ == '__main__':
+    import argparse
+    from ..utils import BASE_PATH
+
+    parser = argparse.ArgumentParser(description = 'Export / verify the ONNX graphs of the 48px OCR model')
+    parser.add_argument('action', choices = ['export', 'compare'])
+    parser.add_argument('--model-dir', default = os.path.join(BASE_PATH, 'models', 'ocr'))
+    parser.add_argument('--crops', help = 'Directory of text line crops used by "compare"')
+    parser.add_argument('--repeat', type = int, default = 3)
+    args = parser.parse_args()
+
+    if args.action == 'export':
+        export_48px_onnx(_load_torch_model(args.model_dir),
+                         os.path.join(args.model_dir, ENCODER_ONNX_FILE),
+                         os.path.join(args.model_dir, DECODER_STEP_ONNX_FILE))
+    else:
+        if not args.crops:
+            parser.error('--crops is required for compare')
+        compare_with_torch(args.model_dir, args.crops, args.repeat)
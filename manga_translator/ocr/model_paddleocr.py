@@ -460,8 +460,8 @@ class ModelPaddleOCR(OfflineOCR):
 
     def _estimate_colors_batch(self, regions: List[np.ndarray]) -> List[tuple]:
         """批量预测前景色和背景色（复用 mocr 的批量处理逻辑）"""
-        from ..utils.generic import AvgMeter
         from ..utils import chunks
+        from .model_48px import estimate_colors_batch
         
         try:
             if not regions:
@@ -518,48 +518,9 @@ class ModelPaddleOCR(OfflineOCR):
                 with torch.no_grad():
                     ret = self.color_model.infer_beam_batch(image_tensor, widths, beams_k=5, max_seq_length=255)
                 
-                # 处理结果（与 mocr 完全相同的逻辑）
-                for i, (pred_chars_index, prob, fg_pred, bg_pred, fg_ind_pred, bg_ind_pred) in enumerate(ret):
-                    has_fg = (fg_ind_pred[:, 1] > fg_ind_pred[:, 0])
-                    has_bg = (bg_ind_pred[:, 1] > bg_ind_pred[:, 0])
-                    
-                    fr = AvgMeter()
-                    fg = AvgMeter()
-                    fb = AvgMeter()
-                    br = AvgMeter()
-                    bg = AvgMeter()
-                    bb = AvgMeter()
-                    
-                    for chid, c_fg, c_bg, h_fg, h_bg in zip(pred_chars_index, fg_pred, bg_pred, has_fg, has_bg):
-                        ch = self.color_model.dictionary[chid]
-                        if ch == '<S>':
-                            continue
-                        if ch == '</S>':
-                            break
-                        # 处理前景色
-                        if h_fg.item():
-                            fr(int(c_fg[0] * 255))
-                            fg(int(c_fg[1] * 255))
-                            fb(int(c_fg[2] * 255))
-                        # 处理背景色
-                        if h_bg.item():
-                            br(int(c_bg[0] * 255))
-                            bg(int(c_bg[1] * 255))
-                            bb(int(c_bg[2] * 255))
-                        else:
-                            # 如果没有背景色，使用前景色作为背景色
-                            br(int(c_fg[0] * 255))
-                            bg(int(c_fg[1] * 255))
-                            bb(int(c_fg[2] * 255))
-                    
-                    fr = min(max(int(fr()), 0), 255)
-                    fg = min(max(int(fg()), 0), 255)
-                    fb = min(max(int(fb()), 0), 255)
-                    br = min(max(int(br()), 0), 255)
-                    bg = min(max(int(bg()), 0), 255)
-                    bb = min(max(int(bb()), 0), 255)
-                    
-                    results[indices[i]] = (fr, fg, fb, br, bg, bb)
+                # 向量化计算整批区域的颜色（与 mocr 的逐字符平均结果一致）
+                for i, color in enumerate(estimate_colors_batch(ret, self.color_model.dictionary)):
+                    results[indices[i]] = color
             
             return results
             
@@ -570,7 +531,7 @@ class ModelPaddleOCR(OfflineOCR):
 
     def _estimate_colors_48px(self, region: np.ndarray, textline: Quadrilateral):
         """使用 48px 模型预测前景色和背景色"""
-        from ..utils.generic import AvgMeter
+        from .model_48px import estimate_colors_batch
         
         try:
             # 如果 48px 模型未加载，使用默认颜色
@@ -609,47 +570,13 @@ class ModelPaddleOCR(OfflineOCR):
                 ret = self.color_model.infer_beam_batch(image_tensor, [new_w], beams_k=5, max_seq_length=255)
             
             if ret and len(ret) > 0:
-                pred_chars_index, prob, fg_pred, bg_pred, fg_ind_pred, bg_ind_pred = ret[0]
-                
-                # 计算颜色 - 与 mocr 保持一致的逻辑
-                has_fg = (fg_ind_pred[:, 1] > fg_ind_pred[:, 0])
-                has_bg = (bg_ind_pred[:, 1] > bg_ind_pred[:, 0])
-                
-                fr = AvgMeter()
-                fg = AvgMeter()
-                fb = AvgMeter()
-                br = AvgMeter()
-                bg = AvgMeter()
-                bb = AvgMeter()
-                
-                for chid, c_fg, c_bg, h_fg, h_bg in zip(pred_chars_index, fg_pred, bg_pred, has_fg, has_bg):
-                    ch = self.color_model.dictionary[chid]
-                    if ch == '<S>':
-                        continue
-                    if ch == '</S>':
-                        break
-                    # 处理前景色
-                    if h_fg.item():
-                        fr(int(c_fg[0] * 255))
-                        fg(int(c_fg[1] * 255))
-                        fb(int(c_fg[2] * 255))
-                    # 处理背景色
-                    if h_bg.item():
-                        br(int(c_bg[0] * 255))
-                        bg(int(c_bg[1] * 255))
-                        bb(int(c_bg[2] * 255))
-                    else:
-                        # 如果没有背景色，使用前景色作为背景色
-                        br(int(c_fg[0] * 255))
-                        bg(int(c_fg[1] * 255))
-                        bb(int(c_fg[2] * 255))
-                
-                textline.fg_r = min(max(int(fr()), 0), 255)
-                textline.fg_g = min(max(int(fg()), 0), 255)
-                textline.fg_b = min(max(int(fb()), 0), 255)
-                textline.bg_r = min(max(int(br()), 0), 255)
-                textline.bg_g = min(max(int(bg()), 0), 255)
-                textline.bg_b = min(max(int(bb()), 0), 255)
+                fr, fg, fb, br, bg, bb = estimate_colors_batch(ret[:1], self.color_model.dictionary)[0]
+                textline.fg_r = fr
+                textline.fg_g = fg
+                textline.fg_b = fb
+                textline.bg_r = br
+                textline.bg_g = bg
+                textline.bg_b = bb
             else:
                 # 如果推理失败，设置默认颜色
                 textline.fg_r = textline.fg_g = textline.fg_b = 0
@@ -1,8 +1,13 @@
+import copy
 import os
 import re
+import threading
+from collections import deque
+from itertools import islice
 import cv2
 # import logging
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 from shapely import affinity
 from shapely.geometry import Polygon
@@ -26,8 +31,28 @@ from ..config import Config
 
 logger = get_logger('render')
 
-# Global variable to store default font path for regions without specific fonts
-_global_default_font_path = ''
+# 并行渲染区域的线程池，工作线程各自持有渲染器，字体和字形缓存在多次 dispatch 之间复用。
+# 线程池只在第一次使用时按 render_workers 创建，之后不调整大小也不关闭，每次 dispatch 只限制同时提交的任务数
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+def _get_render_pool(workers: int) -> ThreadPoolExecutor:
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='render',
+                                              initializer=text_render.bind_thread_renderer)
+        return _render_pool
+
+def _map_bounded(pool: ThreadPoolExecutor, fn, items, limit: int):
+    """按顺序返回 fn(item)，同一时刻在 pool 中的任务不超过 limit 个"""
+    items = iter(items)
+    pending = deque(pool.submit(fn, item) for item in islice(items, limit))
+    while pending:
+        result = pending.popleft().result()
+        for item in islice(items, 1):
+            pending.append(pool.submit(fn, item))
+        yield result
 
 def find_largest_inscribed_rect(mask: np.ndarray) -> tuple:
     """
@@ -204,16 +229,10 @@ def generate_line_break_combinations(text: str):
                     continue
             
             modified_text = text
+            # Remove the later break first so the earlier position stays valid
             for idx in [i+1, i]:
                 start, end = breaks[idx]
-                if idx == i+1:
-                    modified_text = modified_text[:start] + modified_text[end:]
-                else:
-                    # Recalculate position after first removal
-                    offset = breaks[i+1][1] - breaks[i+1][0]
-                    start -= offset
-                    end -= offset
-                    modified_text = modified_text[:start] + modified_text[end:]
+                modified_text = modified_text[:start] + modified_text[end:]
             
             combinations.append((modified_text, f"remove_({i},{i+1})", None))
         
@@ -269,15 +288,10 @@ def generate_line_break_combinations(text: str):
                     continue
             
             modified_text = text
+            # Remove the later break first so the earlier position stays valid
             for idx in [i+1, i]:
                 start, end = breaks[idx]
-                if idx == i+1:
-                    modified_text = modified_text[:start] + modified_text[end:]
-                else:
-                    offset = breaks[i+1][1] - breaks[i+1][0]
-                    start -= offset
-                    end -= offset
-                    modified_text = modified_text[:start] + modified_text[end:]
+                modified_text = modified_text[:start] + modified_text[end:]
             
             combinations.append((modified_text, f"remove_({i},{i+1})", None))
         
@@ -307,21 +321,201 @@ def calculate_uniformity(lines: List[str]) -> float:
     cv = std_length / mean_length if mean_length > 0 else float('inf')
     return cv
 
-def optimize_line_breaks_for_region(region: TextBlock, config: Config, target_font_size: int, bubble_width: float, bubble_height: float):
+def _pick_line_break_candidate(candidates: list):
     """
-    Optimize line breaks for a single region by testing all combinations.
-    Returns the best text variant and the font size it achieves.
+    candidates: [(text, effective_font_size, uniformity, line_count), ...]，按优先顺序排列
+    有效字号在最大值 0.5px 以内的方案中取行长最均匀的；再相同时取字号较大、行数较多（保留断句较多）、排在前面的
     """
-    original_translation = region.translation
-    combinations = generate_line_break_combinations(original_translation)
-    
-    best_text = original_translation
-    best_font_size = 0
-    best_uniformity = float('inf')
-    
-    layout_mode = config.render.layout_mode if config and hasattr(config.render, 'layout_mode') else 'default'
-    logger.debug(f"[OPTIMIZE_LINE_BREAKS] Testing {len(combinations)} combinations, layout_mode={layout_mode}")
-    
+    if not candidates:
+        return None
+    best_font_size = max(candidate[1] for candidate in candidates)
+    pool = [candidate for candidate in candidates if candidate[1] >= best_font_size - 0.5]
+    return min(pool, key=lambda candidate: (candidate[2], -candidate[1], -candidate[3]))
+
+def search_line_breaks(segment_count: int, measure, font_size: int, extent_limit: float, cross_limit: float,
+                       line_spacing: int, keep_first_break: bool = False, require_break: bool = False):
+    """
+    用动态规划选择保留哪些断句（Knuth-Plass 式），目标与逐个组合排版相同：
+    先使有效字号最大（行宽/列高受 extent_limit 限制，行数受 cross_limit 限制），0.5px 以内再使行长最均匀。
+
+    第 k 个断句位于第 k 段之后。measure(a, b) 返回去掉第 a~b 段之间的断句、合成一行时的 (行文本列表, 行宽/列高列表)，
+    每个 (a, b) 只调用一次，且行宽超出可行范围后不再向后延伸。
+    1. 按行数求最宽行的最小值，得到能达到的最大有效字号
+    2. 在有效字号不低于最大值 0.5px 的方案中，按 (行数, 总字数) 求行长平方和的最小值，即行长变异系数最小
+
+    keep_first_break: 第一段太短时必须保留第一个断句；require_break: 不允许去掉所有断句。
+    返回 (保留的断句下标, 有效字号, 均匀度)，没有可行方案时返回 None。
+    """
+    last = segment_count - 1
+    runs = {}
+
+    def ratios(extent: float, line_count: int):
+        cross = font_size * line_count + line_spacing * max(0, line_count - 1)
+        extent_ratio = extent_limit / extent if extent > 0 else 1.0
+        cross_ratio = cross_limit / cross if cross > 0 else 1.0
+        return extent_ratio, cross_ratio
+
+    def effective_font_size(extent: float, line_count: int) -> float:
+        return font_size * min(ratios(extent, line_count))
+
+    def fits(extent: float, threshold: float) -> bool:
+        return extent <= 0 or font_size * (extent_limit / extent) >= threshold
+
+    def run(a: int, b: int):
+        if (a, b) not in runs:
+            lines, extents = measure(a, b)
+            lengths = [len(line.strip()) for line in lines]
+            runs[(a, b)] = (lines, len(lines), max(extents, default=0), sum(lengths), sum(l * l for l in lengths))
+        return runs[(a, b)]
+
+    def allowed(a: int, b: int) -> bool:
+        if keep_first_break and a == 0 and b > 0:
+            return False
+        return not (require_break and a == 0 and b == last)
+
+    def greedy(cap: float):
+        # 每行放尽量多的段，行宽不超过 cap；返回 (最宽行, 行数)
+        width, line_count, a = 0, 0, 0
+        while a < segment_count:
+            b = a
+            while b < last and allowed(a, b + 1) and run(a, b + 1)[2] <= cap:
+                b += 1
+            if not allowed(a, b):
+                return None
+            width, line_count, a = max(width, run(a, b)[2]), line_count + run(a, b)[1], b + 1
+        return width, line_count
+
+    # 先用贪心分行得到可达字号的下限：有效字号低于下限 0.5px 的行宽不可能出现在结果中，
+    # 向后合并段时超过该行宽即停止，通常只需排版 O(n) 个连续段
+    floor = 0
+    low, high = max(run(k, k)[2] for k in range(segment_count)), run(0, last)[2]
+    while True:
+        cap = high if high - low <= 1 else (low + high) // 2
+        result = greedy(cap)
+        if not result or not result[1]:
+            break
+        floor = max(floor, effective_font_size(*result) - 0.5)
+        if high - low <= 1:
+            break
+        # 受行宽限制时缩小行宽，受行数限制时放宽行宽
+        extent_ratio, cross_ratio = ratios(*result)
+        if extent_ratio < cross_ratio:
+            high = cap
+        else:
+            low = cap
+
+    ends = [[] for _ in range(segment_count)]
+    for a in range(segment_count):
+        for b in range(a, segment_count):
+            if not allowed(a, b):
+                continue
+            if not fits(run(a, b)[2], floor):
+                # 合并更多的段只会更宽
+                break
+            ends[b].append(a)
+
+    # 1. widest[j]: 前 j 段按行数 -> 最宽行的最小值
+    widest = [{} for _ in range(segment_count + 1)]
+    widest[0][0] = 0
+    for b in range(segment_count):
+        for a in ends[b]:
+            _, count, extent, _, _ = runs[(a, b)]
+            for line_count, width in widest[a].items():
+                key = line_count + count
+                width = max(width, extent)
+                if width < widest[b + 1].get(key, float('inf')):
+                    widest[b + 1][key] = width
+    reachable = [(line_count, width) for line_count, width in widest[-1].items() if line_count > 0]
+    if not reachable:
+        return None
+    threshold = max(effective_font_size(width, line_count) for line_count, width in reachable) - 0.5
+
+    # 2. states[j]: 前 j 段按 (行数, 总字数) -> (行长平方和, 最宽行, 上一行起点, 上一状态)
+    states = [{} for _ in range(segment_count + 1)]
+    states[0][(0, 0)] = (0, 0, None, None)
+    for b in range(segment_count):
+        for a in ends[b]:
+            _, count, extent, length, square = runs[(a, b)]
+            if not fits(extent, threshold):
+                continue
+            for (line_count, total), (squares, width, _, _) in states[a].items():
+                key = (line_count + count, total + length)
+                value = (squares + square, max(width, extent), a, (line_count, total))
+                current = states[b + 1].get(key)
+                if current is None or value[:2] < current[:2]:
+                    states[b + 1][key] = value
+
+    candidates = []
+    for key, (_, width, _, _) in states[-1].items():
+        line_count = key[0]
+        if line_count == 0 or effective_font_size(width, line_count) < threshold:
+            continue
+        kept, lines = [], []
+        b, state = segment_count, key
+        while b > 0:
+            a, previous = states[b][state][2:]
+            lines[:0] = runs[(a, b - 1)][0]
+            if b - 1 < last:
+                kept.append(b - 1)
+            b, state = a, previous
+        candidates.append((sorted(kept), effective_font_size(width, line_count), calculate_uniformity(lines), line_count))
+    best = _pick_line_break_candidate(candidates)
+    return best[:3] if best else None
+
+def _optimize_line_breaks_dp(region: TextBlock, config: Config, text: str, target_font_size: int,
+                             bubble_width: float, bubble_height: float, require_break: bool):
+    segments = re.split(r'\[BR\]', text, flags=re.IGNORECASE)
+    breaks = [match.span() for match in re.finditer(r'\[BR\]', text, flags=re.IGNORECASE)]
+    last = len(segments) - 1
+    # auto_add_horizontal_tags 在整段文本已有<H>标签时不做处理
+    auto_tags = config.render.auto_rotate_symbols and '<h>' not in text.lower()
+
+    def measure(a: int, b: int):
+        # 与整段文本中 '\s*\[BR\]\s*' -> '\n' 后该段的内容相同
+        line = ''.join(segments[a:b + 1])
+        if a > 0:
+            line = line.lstrip()
+        if b < last:
+            line = line.rstrip()
+        if region.horizontal:
+            if not line.strip():
+                # calc_horizontal 会保留中间的空行，去掉结尾的空行
+                return ([''], [0]) if b < last else ([], [])
+            return text_render.calc_horizontal(target_font_size, line, max_width=99999, max_height=99999,
+                                               language=region.target_lang)
+        if auto_tags:
+            line = text_render.auto_add_horizontal_tags(line)
+        return text_render.calc_vertical(target_font_size, line, max_height=99999)
+
+    if region.horizontal:
+        spacing = int(target_font_size * 0.01 * (config.render.line_spacing or 1.0))
+        extent_limit, cross_limit = bubble_width, bubble_height
+    else:
+        spacing = int(target_font_size * 0.2 * (config.render.line_spacing or 1.0))
+        extent_limit, cross_limit = bubble_height, bubble_width
+
+    result = search_line_breaks(len(segments), measure, target_font_size, extent_limit, cross_limit, spacing,
+                                keep_first_break=bool(breaks) and len(segments[0].strip()) <= 2,
+                                require_break=require_break)
+    if result is None:
+        return None, 0
+    kept, best_font_size, uniformity = result
+    logger.debug(f"[OPTIMIZE_LINE_BREAKS] DP: keep {kept} of {len(breaks)} breaks, "
+                 f"font_size={best_font_size:.1f}, uniformity={uniformity:.3f}")
+    kept = set(kept)
+    best_text = text
+    for idx in reversed(range(len(breaks))):
+        if idx not in kept:
+            start, end = breaks[idx]
+            best_text = best_text[:start] + best_text[end:]
+    return best_text, best_font_size
+
+def _optimize_line_breaks_exhaustive(region: TextBlock, config: Config, text: str, target_font_size: int,
+                                     bubble_width: float, bubble_height: float, require_break: bool):
+    combinations = generate_line_break_combinations(text)
+    logger.debug(f"[OPTIMIZE_LINE_BREAKS] Testing {len(combinations)} combinations")
+
+    candidates = []
     for text_variant, combo_desc, skip_reason in combinations:
         if skip_reason:
             logger.debug(f"[OPTIMIZE_LINE_BREAKS] Skipping {combo_desc}: {skip_reason}")
@@ -331,11 +525,9 @@ def optimize_line_breaks_for_region(region: TextBlock, config: Config, target_fo
         text_for_calc = re.sub(r'\s*\[BR\]\s*', '\n', text_variant, flags=re.IGNORECASE)
         
         # 严格智能缩放模式：如果去掉所有断句（无\n），会导致文本框扩大，淘汰此方案
-        strict_smart_scaling = getattr(config.render, 'strict_smart_scaling', False) if config and hasattr(config, 'render') else False
-        if layout_mode == 'smart_scaling' and strict_smart_scaling:
-            if '\n' not in text_for_calc:
-                logger.debug(f"[OPTIMIZE_LINE_BREAKS] Skipping {combo_desc}: 严格智能缩放模式下无断句会扩大文本框")
-                continue
+        if require_break and '\n' not in text_for_calc:
+            logger.debug(f"[OPTIMIZE_LINE_BREAKS] Skipping {combo_desc}: 严格智能缩放模式下无断句会扩大文本框")
+            continue
         
         try:
             # Calculate required dimensions
@@ -376,24 +568,42 @@ def optimize_line_breaks_for_region(region: TextBlock, config: Config, target_fo
             uniformity = calculate_uniformity(lines)
             
             logger.debug(f"[OPTIMIZE_LINE_BREAKS] {combo_desc}: font_size={effective_font_size:.1f}, uniformity={uniformity:.3f}")
-            
-            # Choose the best: prioritize font size, then uniformity
-            is_better = False
-            if effective_font_size > best_font_size + 0.5:  # Significantly larger font
-                is_better = True
-            elif abs(effective_font_size - best_font_size) <= 0.5:  # Similar font size
-                if uniformity < best_uniformity:  # Better uniformity
-                    is_better = True
-            
-            if is_better:
-                best_text = text_variant
-                best_font_size = effective_font_size
-                best_uniformity = uniformity
-                logger.debug(f"[OPTIMIZE_LINE_BREAKS] New best: {combo_desc}")
+            candidates.append((text_variant, effective_font_size, uniformity, len(lines)))
         
         except Exception as e:
             logger.warning(f"[OPTIMIZE_LINE_BREAKS] Error evaluating {combo_desc}: {e}")
             continue
+
+    best = _pick_line_break_candidate(candidates)
+    if best is None:
+        return None, 0
+    return best[0], best[1]
+
+def optimize_line_breaks_for_region(region: TextBlock, config: Config, target_font_size: int, bubble_width: float, bubble_height: float,
+                                    method: str = 'dp'):
+    """
+    Optimize line breaks for a single region.
+    Returns the best text variant and the font size it achieves.
+
+    method='dp': search_line_breaks 动态规划，每段连续文本只排版一次，O(n²) 次排版，断句数量不受限制
+    method='exhaustive': 逐个排版 generate_line_break_combinations 的组合（断句超过 10 个时为抽样）
+    两种方式的选择规则相同：先比较有效字号，相差 0.5px 以内时取行长更均匀的
+    """
+    original_translation = region.translation
+    # Standardize all break markers to [BR] (including full-width brackets)
+    text = re.sub(r'\s*(<br>|【BR】)\s*', '[BR]', original_translation, flags=re.IGNORECASE)
+    
+    layout_mode = config.render.layout_mode if config and hasattr(config.render, 'layout_mode') else 'default'
+    strict_smart_scaling = getattr(config.render, 'strict_smart_scaling', False) if config and hasattr(config, 'render') else False
+    # 严格智能缩放模式：去掉所有断句（无\n）会导致文本框扩大，不考虑此方案
+    require_break = (layout_mode == 'smart_scaling' and strict_smart_scaling
+                     and '\n' not in re.sub(r'\[BR\]', '', text, flags=re.IGNORECASE))
+    logger.debug(f"[OPTIMIZE_LINE_BREAKS] method={method}, layout_mode={layout_mode}")
+    
+    optimize = _optimize_line_breaks_exhaustive if method == 'exhaustive' else _optimize_line_breaks_dp
+    best_text, best_font_size = optimize(region, config, text, target_font_size, bubble_width, bubble_height, require_break)
+    if best_text is None:
+        best_text = original_translation
     
     # Compare and log optimization results
     # 使用统一的正则匹配所有BR变体进行统计
@@ -701,40 +911,11 @@ def resize_regions_to_font_size(img: np.ndarray, text_regions: List['TextBlock']
                 calc_max_width = region.unrotated_size[0]
                 calc_max_height = region.unrotated_size[1]
 
-            # Step 1: 先缩小字体直到文本能放进文本框
-            iteration_count = 0
-            while font_size >= min_shrink_font_size:
-                iteration_count += 1
-                if region.horizontal:
-                    lines, _ = text_render.calc_horizontal(font_size, region.translation, max_width=calc_max_width, max_height=calc_max_height, language=region.target_lang)
-                    if len(lines) <= len(region.texts):
-                        break
-                else:
-                    lines, _ = text_render.calc_vertical(font_size, region.translation, max_height=calc_max_height)
-                    if len(lines) <= len(region.texts):
-                        break
-                font_size -= 1
-
-            # Step 2: 尝试扩大字体以更好地填充空间（但不超过初始大小）
-            # 从当前能放下的字体大小开始，逐步增加
-            max_fitting_font_size = font_size
-            test_font_size = font_size + 1
-
-            while test_font_size <= target_font_size:
-                if region.horizontal:
-                    test_lines, _ = text_render.calc_horizontal(test_font_size, region.translation, max_width=calc_max_width, max_height=calc_max_height, language=region.target_lang)
-                    if len(test_lines) <= len(region.texts):
-                        max_fitting_font_size = test_font_size
-                        test_font_size += 1
-                    else:
-                        break
-                else:
-                    test_lines, _ = text_render.calc_vertical(test_font_size, region.translation, max_height=calc_max_height)
-                    if len(test_lines) <= len(region.texts):
-                        max_fitting_font_size = test_font_size
-                        test_font_size += 1
-                    else:
-                        break
+            # 在 [min_shrink_font_size, target_font_size] 中找行数不超过原文行数的最大字号
+            max_fitting_font_size = text_render.fit_font_size(
+                region.translation, region.horizontal, calc_max_width, calc_max_height, len(region.texts),
+                min_shrink_font_size, font_size, language=region.target_lang,
+            )
 
             # Calculate total font scale (font_scale_ratio + max_font_size limit)
             final_font_size = int(max(max_fitting_font_size, min_shrink_font_size) * config.render.font_scale_ratio)
@@ -1258,10 +1439,18 @@ async def dispatch(
         from ..config import Config
         config = Config()
 
-    # Save global default font path for regions without specific fonts
-    global _global_default_font_path
-    _global_default_font_path = font_path
-    
+    # 字体和字形缓存属于调用线程自己的渲染器，多个流水线线程同时渲染时互不干扰
+    with text_render.use_renderer(text_render.thread_renderer()):
+        return _dispatch(img, text_regions, font_path, config, original_img, return_debug_img)
+
+def _dispatch(
+    img: np.ndarray,
+    text_regions: List[TextBlock],
+    font_path: str,
+    config: Config,
+    original_img: np.ndarray,
+    return_debug_img: bool
+    ):
     text_render.set_font(font_path)
     text_regions = list(filter(lambda region: region.translation, text_regions))
 
@@ -1274,7 +1463,8 @@ async def dispatch(
         dst_points_list = result
         debug_img = None
 
-    for region, dst_points in tqdm(zip(text_regions, dst_points_list), '[render]', total=len(text_regions)):
+    jobs = []
+    for region, dst_points in zip(text_regions, dst_points_list):
         # 保存缩放算法计算的 dst_points 到 region，供 PSD 导出使用
         # 注意：这是缩放后的真实文本区域，不是 render 函数中扩展后的区域
         region.dst_points = dst_points
@@ -1288,7 +1478,24 @@ async def dispatch(
         line_spacing_multiplier = getattr(region, 'line_spacing', 1.0)
         base_spacing = 0.01 if region.horizontal else 0.2
         line_spacing = base_spacing * line_spacing_multiplier
-        img = render(img, region, dst_points, not config.render.no_hyphenation, line_spacing, config.render.disable_font_border, config)
+        jobs.append((region, dst_points, line_spacing))
+
+    img_shape = img.shape
+
+    def render_job(job):
+        region, dst_points, line_spacing = job
+        return render_patch(img_shape, region, dst_points, not config.render.no_hyphenation, line_spacing,
+                            config.render.disable_font_border, config, font_path)
+
+    # 各区域的文字块并行渲染，再按区域顺序合成，重叠区域的结果与逐个渲染相同
+    workers = config.render.render_workers or min(os.cpu_count() or 1, 4)
+    if min(workers, len(jobs)) > 1:
+        patches = _map_bounded(_get_render_pool(workers), render_job, jobs, min(workers, len(jobs)))
+    else:
+        patches = map(render_job, jobs)
+    for patch in tqdm(patches, '[render]', total=len(jobs)):
+        img = composite_patch(img, patch)
+    text_render.log_layout_cache_stats()
     
     if return_debug_img and debug_img is not None:
         return img, debug_img
@@ -1301,11 +1508,42 @@ def render(
     hyphenate,
     line_spacing,
     disable_font_border,
-    config: Config
+    config: Config,
+    default_font_path: str = ''
 ):
-    global _global_default_font_path
-    
-    # Set region-specific font if specified, otherwise use global default
+    patch = render_patch(img.shape, region, dst_points, hyphenate, line_spacing, disable_font_border, config,
+                         default_font_path)
+    return composite_patch(img, patch)
+
+def composite_patch(img: np.ndarray, patch) -> np.ndarray:
+    """把 render_patch 的结果按透明度合成到 img 上（原地修改）"""
+    if patch is None:
+        return img
+    y1, y2, x1, x2, weighted_color, inverse_mask = patch
+    target_region = img[y1:y2, x1:x2]
+    if weighted_color.shape[:2] == target_region.shape[:2]:
+        # 与 target * (1 - mask) + canvas * mask 的 float32 运算逐位相同，只是 canvas * mask 已在渲染线程中算好
+        target_region[:] = np.clip(target_region.astype(np.float32) * inverse_mask + weighted_color, 0, 255).astype(np.uint8)
+    else:
+        logger.warning(f"Text region size mismatch: canvas={weighted_color.shape[:2]}, target={target_region.shape[:2]}, skipping region")
+    return img
+
+def render_patch(
+    img_shape,
+    region: TextBlock,
+    dst_points,
+    hyphenate,
+    line_spacing,
+    disable_font_border,
+    config: Config,
+    default_font_path: str = ''
+):
+    """
+    渲染单个区域的文字，返回 warp_text_box 的结果，或 None（跳过该区域）。
+    只读取图片尺寸，不修改图片，可以在多个线程中并行调用。
+    default_font_path：区域没有指定字体（或指定的字体不存在）时使用的字体，即 dispatch 的 font_path
+    """
+    # Set region-specific font if specified, otherwise use the default font
     if hasattr(region, 'font_path') and region.font_path:
         font_path = region.font_path
         
@@ -1334,11 +1572,11 @@ def render(
             text_render.set_font(font_path)
         else:
             logger.warning(f"Font path not found for region: {region.font_path}, using default font")
-            # Fall back to global default font
-            text_render.set_font(_global_default_font_path)
+            # Fall back to the default font
+            text_render.set_font(default_font_path)
     else:
-        # No region-specific font, use global default font (from UI config)
-        text_render.set_font(_global_default_font_path)
+        # No region-specific font, use the default font (from UI config)
+        text_render.set_font(default_font_path)
     
     # --- START BRUTEFORCE COLOR FIX ---
     fg = (0, 0, 0) # Default to black
@@ -1452,14 +1690,16 @@ def render(
         text_to_render = re.sub(r'<H>(.*?)</H>', r'\1', text_to_render, flags=re.IGNORECASE | re.DOTALL)
 
     # 将当前region传递给config，用于方向不匹配检测
+    # 并行渲染时每个区域使用 config 的浅拷贝，避免线程之间互相覆盖
     if config:
+        config = copy.copy(config)
         config._current_region = region
 
     # 使用 freetype 渲染器（稳定可靠）
     # 检测是否需要使用高质量渲染（针对低分辨率优化）
     use_hq_render = text_render_hq.should_use_hq_rendering(
         region.font_size, 
-        (img.shape[1], img.shape[0])
+        (img_shape[1], img_shape[0])
     )
     
     if use_hq_render:
@@ -1516,12 +1756,12 @@ def render(
     
     if temp_box is None:
         logger.warning(f"[RENDER SKIPPED] Text rendering returned None. Text: '{region.translation[:100]}...'")
-        return img
+        return None
     
     h, w, _ = temp_box.shape
     if h == 0 or w == 0:
         logger.warning(f"Skipping rendering for region with invalid dimensions (w={w}, h={h}). Text: '{region.translation}'")
-        return img
+        return None
     r_temp = w / h
 
     box = None
@@ -1570,10 +1810,17 @@ def render(
             else:
                 box = temp_box.copy()
 
+    return warp_text_box(img_shape, box, dst_points, region.translation or '')
+
+def warp_text_box(img_shape, box: np.ndarray, dst_points: np.ndarray, text: str = ''):
+    """
+    把 RGBA 文字块透视变换到 dst_points，返回 (y1, y2, x1, x2, 颜色 * 透明度, 1 - 透明度) 或 None，透明度为 0~1 的 float32。
+    只在目标四边形的外接矩形（与图片求交）内变换和合成，开销与文字区域大小成正比，与页面大小无关。
+    """
     src_points = np.array([[0, 0], [box.shape[1], 0], [box.shape[1], box.shape[0]], [0, box.shape[0]]]).astype(np.float32)
 
     # 智能边界调整：检查文本是否超出图片边界
-    img_h, img_w = img.shape[:2]
+    img_h, img_w = img_shape[:2]
     x, y, w, h = cv2.boundingRect(np.round(dst_points[0]).astype(np.int32))
     
     adjusted = False
@@ -1620,80 +1867,42 @@ def render(
         new_x, new_y, new_w, new_h = cv2.boundingRect(np.round(pts).astype(np.int32))
         logger.info(f"Text box adjusted to fit image: ({x}, {y}, {w}, {h}) -> ({new_x}, {new_y}, {new_w}, {new_h})")
 
-    M, _ = cv2.findHomography(src_points, adjusted_dst_points[0], cv2.RANSAC, 5.0)
-    
-    # 统一使用局部区域渲染，避免 OpenCV warpPerspective 的 32767 像素限制
+    # 避免 OpenCV warpPerspective 的 32767 像素限制
     SHRT_MAX = 32767
     if box.shape[0] > SHRT_MAX or box.shape[1] > SHRT_MAX:
         logger.error(f"[RENDER SKIPPED] Text box size exceeds OpenCV limit (32767). "
-                     f"box={box.shape[:2]}, text='{region.translation[:50] if hasattr(region, 'translation') else 'N/A'}...'")
-        return img
+                     f"box={box.shape[:2]}, text='{text[:50]}...'")
+        return None
     
-    # 计算文字区域的边界框，添加边距
+    # 合成区域：文字区域的外接矩形与图片的交集，变换结果只在这个范围内使用
     x_adj, y_adj, w_adj, h_adj = cv2.boundingRect(np.round(adjusted_dst_points[0]).astype(np.int32))
-    margin = max(w_adj, h_adj) // 2 + 100  # 添加足够的边距
-    
-    # 计算局部区域边界
-    local_x1 = max(0, x_adj - margin)
-    local_y1 = max(0, y_adj - margin)
-    local_x2 = min(img_w, x_adj + w_adj + margin)
-    local_y2 = min(img_h, y_adj + h_adj + margin)
-    local_w = local_x2 - local_x1
-    local_h = local_y2 - local_y1
-    
-    # 检查局部区域是否仍然超限
-    if local_w > SHRT_MAX or local_h > SHRT_MAX:
-        logger.error(f"[RENDER SKIPPED] Local region still exceeds OpenCV limit. "
-                     f"local_size=({local_w}, {local_h}), text='{region.translation[:50] if hasattr(region, 'translation') else 'N/A'}...'")
-        return img
+    y1, y2 = max(0, y_adj), min(img_h, y_adj + h_adj)
+    x1, x2 = max(0, x_adj), min(img_w, x_adj + w_adj)
+    if y2 <= y1 or x2 <= x1:
+        logger.warning(f"Text region completely outside image bounds: x={x_adj}, y={y_adj}, w={w_adj}, h={h_adj}, image_size=({img_w}, {img_h}). Text: '{text[:50]}...'")
+        return None
+    if x2 - x1 > SHRT_MAX or y2 - y1 > SHRT_MAX:
+        logger.error(f"[RENDER SKIPPED] Text region exceeds OpenCV limit. "
+                     f"size=({x2 - x1}, {y2 - y1}), text='{text[:50]}...'")
+        return None
     
-    # 调整目标点到局部坐标系
-    local_dst_points = adjusted_dst_points.copy()
-    local_dst_points[0, :, 0] -= local_x1
-    local_dst_points[0, :, 1] -= local_y1
-    
-    # 重新计算变换矩阵
-    M_local, _ = cv2.findHomography(src_points, local_dst_points[0], cv2.RANSAC, 5.0)
+    # 调整目标点到合成区域的坐标系
+    roi_dst_points = adjusted_dst_points[0].astype(np.float32)
+    roi_dst_points[:, 0] -= x1
+    roi_dst_points[:, 1] -= y1
+    M_roi, _ = cv2.findHomography(src_points, roi_dst_points, cv2.RANSAC, 5.0)
 
     # 检查变换矩阵是否有效
-    if M_local is None:
-        logger.warning(f"[RENDER SKIPPED] Failed to compute homography matrix for text: "
-                      f"'{region.translation[:50] if hasattr(region, 'translation') else 'N/A'}...'")
-        return img
+    if M_roi is None:
+        logger.warning(f"[RENDER SKIPPED] Failed to compute homography matrix for text: '{text[:50]}...'")
+        return None
 
-    # 在局部区域进行变换
-    rgba_region = cv2.warpPerspective(box, M_local, (local_w, local_h), flags=cv2.INTER_LANCZOS4, borderMode=cv2.BORDER_CONSTANT, borderValue=0)
-    
-    # 计算在局部区域中的有效范围
-    local_text_x = x_adj - local_x1
-    local_text_y = y_adj - local_y1
-    valid_y1 = max(0, local_text_y)
-    valid_y2 = min(local_h, local_text_y + h_adj)
-    valid_x1 = max(0, local_text_x)
-    valid_x2 = min(local_w, local_text_x + w_adj)
-    
-    if valid_y2 > valid_y1 and valid_x2 > valid_x1:
-        canvas_region = rgba_region[valid_y1:valid_y2, valid_x1:valid_x2, :3]
-        mask_region = rgba_region[valid_y1:valid_y2, valid_x1:valid_x2, 3:4].astype(np.float32) / 255.0
-        
-        # 计算在原图中的对应位置
-        img_target_y1 = local_y1 + valid_y1
-        img_target_y2 = local_y1 + valid_y2
-        img_target_x1 = local_x1 + valid_x1
-        img_target_x2 = local_x1 + valid_x2
-        
-        target_region = img[img_target_y1:img_target_y2, img_target_x1:img_target_x2]
-        if canvas_region.shape[:2] == target_region.shape[:2]:
-            img[img_target_y1:img_target_y2, img_target_x1:img_target_x2] = np.clip(
-                (target_region.astype(np.float32) * (1 - mask_region) + canvas_region.astype(np.float32) * mask_region), 
-                0, 255
-            ).astype(np.uint8)
-        else:
-            logger.warning(f"Text region size mismatch: canvas={canvas_region.shape[:2]}, target={target_region.shape[:2]}, skipping region")
-    else:
-        logger.warning(f"Text region completely outside image bounds: x={x_adj}, y={y_adj}, w={w_adj}, h={h_adj}, image_size=({img_w}, {img_h}). Text: '{region.translation[:50] if hasattr(region, 'translation') else 'N/A'}...'")
-    
-    return img
+    rgba_region = cv2.warpPerspective(box, M_roi, (x2 - x1, y2 - y1), flags=cv2.INTER_LANCZOS4, borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+
+    # 颜色乘透明度在这里（并行渲染时在工作线程中）算好，合成时只剩 target * (1 - mask) 和加法
+    mask = rgba_region[:, :, 3:4].astype(np.float32) / 255.0
+    weighted_color = rgba_region[:, :, :3].astype(np.float32) * mask
+    return y1, y2, x1, x2, weighted_color, 1 - mask
 
 async def dispatch_eng_render(img_canvas: np.ndarray, original_img: np.ndarray, text_regions: List[TextBlock], font_path: str = '', line_spacing: int = 0, disable_font_border: bool = False) -> np.ndarray:
     if len(text_regions) == 0:
@@ -3,8 +3,12 @@ import re
 import cv2
 import numpy as np
 import freetype
+import contextlib
 import functools
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Tuple, Optional, List
 from hyphen import Hyphenator
@@ -116,11 +120,6 @@ logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())  
 
 DEFAULT_FONT = os.path.join(BASE_PATH, 'fonts', 'Arial-Unicode-Regular.ttf')
-try:
-    FONT = freetype.Face(Path(DEFAULT_FONT).open('rb'))
-except Exception as e:
-    logger.error(f"Failed to initialize default font: {e}")
-    FONT = None  
 
 def CJK_Compatibility_Forms_translate(cdpt: str, direction: int):
     """direction: 0 - horizontal, 1 - vertical"""
@@ -232,9 +231,9 @@ def auto_add_horizontal_tags(text: str) -> str:
         return text
 
     # 步骤1：为多词英文词组添加<H>标签（至少2个单词，用空格分隔）
-    # 匹配：字母/数字 + 空格 + 字母/数字（可以重复多次）
+    # 匹配：字母/数字 + 空格 + 字母/数字（可以重复多次）；不跨越换行，否则标签会被拆到两列
     # 注意：移除了点号(.)以避免匹配省略号
-    multi_word_pattern = r'[a-zA-Z0-9\uff21-\uff3a\uff41-\uff5a\uff10-\uff19_-]+(?:\s+[a-zA-Z0-9\uff21-\uff3a\uff41-\uff5a\uff10-\uff19_-]+)+'
+    multi_word_pattern = r'[a-zA-Z0-9\uff21-\uff3a\uff41-\uff5a\uff10-\uff19_-]+(?:[^\S\n]+[a-zA-Z0-9\uff21-\uff3a\uff41-\uff5a\uff10-\uff19_-]+)+'
     text = re.sub(multi_word_pattern, r'<H>\g<0></H>', text)
 
     # 步骤2：对剩余的独立英文单词添加<H>标签
@@ -318,36 +317,65 @@ FALLBACK_FONTS = [
     os.path.join(BASE_PATH, 'fonts/msyh.ttc'),
     os.path.join(BASE_PATH, 'fonts/msgothic.ttc'),
 ]
-FONT_SELECTION: List[freetype.Face] = []
-font_cache = {}
-_font_file_handles = {}  # 保存文件句柄，防止被垃圾回收
 
-def get_cached_font(path: str) -> freetype.Face:
-    path = path.replace('\\', '/')
-    if not font_cache.get(path):
-        # 保存文件句柄引用，防止被关闭
-        file_handle = Path(path).open('rb')
-        _font_file_handles[path] = file_handle
-        font_cache[path] = freetype.Face(file_handle)
-    return font_cache[path]
+# 字体覆盖范围（cmap 中的码位）的磁盘缓存，按字体文件内容的哈希命名，字体更新后自动失效；
+# 与下载的模型放在一起，随程序目录迁移或删除
+FONT_COVERAGE_CACHE_DIR = os.path.join(BASE_PATH, 'models', 'font_coverage')
 
-def update_font_selection():
-    global FONT_SELECTION
-    FONT_SELECTION = []
-    if FONT:
-        FONT_SELECTION.append(FONT)
-    for font_path in FALLBACK_FONTS:
-        try:
-            face = get_cached_font(font_path)
-            if face and face not in FONT_SELECTION:
-                FONT_SELECTION.append(face)
-        except Exception as e:
-            logger.error(f"Failed to load fallback font: {font_path} - {e}")
+_font_coverage = {}  # (path, size, mtime) -> frozenset
+_font_coverage_lock = threading.Lock()
 
+def _font_file_hash(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-def set_font(path: str):
-    global FONT
-    
+def _load_font_coverage(path: str) -> frozenset:
+    cache_file = os.path.join(FONT_COVERAGE_CACHE_DIR, _font_file_hash(path) + '.npy')
+    try:
+        return frozenset(np.load(cache_file).tolist())
+    except (OSError, ValueError):
+        pass
+    # 只有首次遇到该字体时才需要打开字体读取 cmap
+    with open(path, 'rb') as f:
+        face = freetype.Face(f)
+        codepoints = np.array([code for code, glyph_index in face.get_chars() if glyph_index], dtype=np.uint32)
+    try:
+        os.makedirs(FONT_COVERAGE_CACHE_DIR, exist_ok=True)
+        tmp_file = f'{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_file, 'wb') as f:
+            np.save(f, codepoints)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        logger.debug(f'Failed to write font coverage cache for {path}: {e}')
+    return frozenset(codepoints.tolist())
+
+def get_font_coverage(path: str) -> frozenset:
+    """
+    字体包含的码位集合，字体文件不存在或无法读取时为空集合。
+    进程内按 (路径, 大小, 修改时间) 缓存，跨进程通过 FONT_COVERAGE_CACHE_DIR 下的缓存文件复用。
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return frozenset()
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    coverage = _font_coverage.get(key)
+    if coverage is None:
+        with _font_coverage_lock:
+            coverage = _font_coverage.get(key)
+            if coverage is None:
+                try:
+                    coverage = _load_font_coverage(path)
+                except Exception as e:
+                    logger.error(f"Failed to read font coverage: {path} - {e}")
+                    coverage = frozenset()
+                _font_coverage[key] = coverage
+    return coverage
+
+def _resolve_font_path(path: str) -> str:
     # 处理相对路径：尝试在 BASE_PATH 下查找
     resolved_path = path
     if path and not os.path.isabs(path) and not os.path.exists(path):
@@ -360,40 +388,48 @@ def set_font(path: str):
             if os.path.exists(p):
                 resolved_path = p
                 break
-    
+
     if not resolved_path or not os.path.exists(resolved_path):
         if path:
             logger.error(f'Could not load font: {path}')
-        try:
-            FONT = freetype.Face(Path(DEFAULT_FONT).open('rb'))
-        except (freetype.ft_errors.FT_Exception, FileNotFoundError):
-            logger.critical("Default font could not be loaded. Please check your installation.")
-            FONT = None
-        update_font_selection()
-        get_char_glyph.cache_clear()
-        return
-
-    try:
-        FONT = freetype.Face(Path(resolved_path).open('rb'))
-    except (freetype.ft_errors.FT_Exception, FileNotFoundError):
-        logger.error(f'Could not load font: {resolved_path}')
-        try:
-            FONT = freetype.Face(Path(DEFAULT_FONT).open('rb'))
-        except (freetype.ft_errors.FT_Exception, FileNotFoundError):
-            logger.critical("Default font could not be loaded. Please check your installation.")
-            FONT = None
-    update_font_selection()
-    get_char_glyph.cache_clear()
+        resolved_path = DEFAULT_FONT
+    return resolved_path
 
 class namespace:
     pass
 
+def bitmap_to_array(bitmap: freetype.Bitmap) -> Optional[np.ndarray]:
+    """
+    把 FreeType 位图一次性复制为 (rows, width) 的只读 uint8 数组，位图为空或格式不支持时返回 None。
+    直接读取 FreeType 的缓冲区并按 pitch 取每行，不经过 bitmap.buffer 的 Python 列表；
+    灰度位图原样复制，单色位图（内嵌点阵）展开为 0 / 255。
+    """
+    ft_bitmap = bitmap._FT_Bitmap
+    rows, width, pitch = ft_bitmap.rows, ft_bitmap.width, ft_bitmap.pitch
+    if rows * width == 0 or pitch == 0 or not ft_bitmap.buffer:
+        return None
+    data = np.ctypeslib.as_array(ft_bitmap.buffer, shape=(rows * abs(pitch),)).reshape(rows, abs(pitch))
+    if pitch < 0:
+        # pitch 为负时缓冲区从最下面一行开始
+        data = data[::-1]
+    # 缓冲区属于字形槽，加载下一个字符时会被覆盖，所以必须复制
+    if ft_bitmap.pixel_mode == freetype.FT_PIXEL_MODE_GRAY and abs(pitch) >= width:
+        array = data[:, :width].copy()
+    elif ft_bitmap.pixel_mode == freetype.FT_PIXEL_MODE_MONO:
+        array = np.unpackbits(data, axis=1)[:, :width] * np.uint8(255)
+    else:
+        return None
+    # 数组会被缓存并在多个字符之间共享，禁止原地修改
+    array.flags.writeable = False
+    return array
+
 class Glyph:
     def __init__(self, glyph):
         self.bitmap = namespace()
-        self.bitmap.buffer = glyph.bitmap.buffer
         self.bitmap.rows = glyph.bitmap.rows
         self.bitmap.width = glyph.bitmap.width
+        # 字形位图（只读 uint8 数组），为空时为 None
+        self.bitmap.array = bitmap_to_array(glyph.bitmap)
         self.advance = namespace()
         self.advance.x = glyph.advance.x
         self.advance.y = glyph.advance.y
@@ -407,59 +443,147 @@ class Glyph:
         self.metrics.horiAdvance = glyph.metrics.horiAdvance
         self.metrics.vertAdvance = glyph.metrics.vertAdvance
 
-@functools.lru_cache(maxsize = 1024, typed = True)
-def get_char_glyph(cdpt: str, font_size: int, direction: int) -> Glyph:
-    global FONT_SELECTION
-    for i, face in enumerate(FONT_SELECTION):
-        char_index = face.get_char_index(cdpt)
-        if char_index != 0:
-            # Character found, load and return glyph
+class TextRenderer:
+    """
+    持有字体（freetype.Face）和字形、描边、参考前进量缓存。
+    freetype.Face 在 set_pixel_sizes / load_char 时会修改自身状态，不能在线程间共享，
+    并行渲染时每个线程使用自己的 TextRenderer（见 use_renderer），模块级函数总是作用于当前线程的渲染器。
+    """
+
+    def __init__(self, font_path: str = DEFAULT_FONT):
+        self.font: Optional[freetype.Face] = None
+        self.font_path: Optional[str] = None
+        self.fallback_font_paths: List[str] = []
+        self.font_cache = {}
+        self._font_file_handles = {}  # 保存文件句柄，防止被垃圾回收
+        # 缓存绑定在实例上，不同渲染器的缓存互不影响
+        self.get_char_glyph = functools.lru_cache(maxsize = 1024, typed = True)(self._load_char_glyph)
+        self.stroke_char_border = functools.lru_cache(maxsize = 2048, typed = True)(self._stroke_char_border)
+        try:
+            self.font = freetype.Face(Path(font_path).open('rb'))
+            self.font_path = font_path
+        except Exception as e:
+            logger.error(f"Failed to initialize default font: {e}")
+        self.update_font_selection()
+
+    def get_cached_font(self, path: str) -> freetype.Face:
+        path = path.replace('\\', '/')
+        if not self.font_cache.get(path):
+            # 保存文件句柄引用，防止被关闭
+            file_handle = Path(path).open('rb')
+            self._font_file_handles[path] = file_handle
+            self.font_cache[path] = freetype.Face(file_handle)
+        return self.font_cache[path]
+
+    def update_font_selection(self):
+        # 后备字体只记录路径，第一次需要其中的字符时才打开
+        self.fallback_font_paths = []
+        for font_path in FALLBACK_FONTS:
+            font_path = font_path.replace('\\', '/')
+            if font_path in self.fallback_font_paths or font_path == (self.font_path or '').replace('\\', '/'):
+                continue
+            if not os.path.exists(font_path):
+                logger.error(f"Failed to load fallback font: {font_path} - file not found")
+                continue
+            self.fallback_font_paths.append(font_path)
+
+    def _open_fallback_font(self, font_path: str) -> Optional[freetype.Face]:
+        try:
+            return self.get_cached_font(font_path)
+        except Exception as e:
+            logger.error(f"Failed to load fallback font: {font_path} - {e}")
+            return None
+
+    def select_face(self, cdpt: str) -> Optional[freetype.Face]:
+        """包含该字符的第一个字体（主字体优先，然后按顺序查找后备字体），都不包含时返回 None"""
+        if self.font is not None and self.font.get_char_index(cdpt) != 0:
+            return self.font
+        codepoint = ord(cdpt)
+        for font_path in self.fallback_font_paths:
+            if codepoint in get_font_coverage(font_path):
+                face = self._open_fallback_font(font_path)
+                if face is not None and face.get_char_index(cdpt) != 0:
+                    return face
+        return None
+
+    def last_face(self) -> Optional[freetype.Face]:
+        """字体选择中的最后一个字体，所有字体都不包含某字符时用它的 .notdef 字形"""
+        for font_path in reversed(self.fallback_font_paths):
+            face = self._open_fallback_font(font_path)
+            if face is not None:
+                return face
+        return self.font
+
+    def set_font(self, path: str):
+        resolved_path = _resolve_font_path(path)
+
+        # 每个区域渲染前都会调用 set_font，字体未变化时保留已加载的字体和字形缓存
+        if self.font is not None and resolved_path == self.font_path:
+            return
+
+        try:
+            self.font = freetype.Face(Path(resolved_path).open('rb'))
+            self.font_path = resolved_path
+        except (freetype.ft_errors.FT_Exception, FileNotFoundError):
+            if resolved_path != DEFAULT_FONT:
+                logger.error(f'Could not load font: {resolved_path}')
+            try:
+                self.font = freetype.Face(Path(DEFAULT_FONT).open('rb'))
+                self.font_path = DEFAULT_FONT
+            except (freetype.ft_errors.FT_Exception, FileNotFoundError):
+                logger.critical("Default font could not be loaded. Please check your installation.")
+                self.font = None
+                self.font_path = None
+        self.update_font_selection()
+        self.get_char_glyph.cache_clear()
+
+    def clear_caches(self):
+        """清空字形和描边缓存"""
+        self.get_char_glyph.cache_clear()
+        self.stroke_char_border.cache_clear()
+
+    def _load_char_glyph(self, cdpt: str, font_size: int, direction: int) -> Glyph:
+        face = self.select_face(cdpt)
+        if face is not None:
+            if face is not self.font and self.font is not None:
+                try:
+                    font_name = self.font.family_name.decode('utf-8') if self.font.family_name else 'Unknown'
+                    logger.debug(f"Character '{cdpt}' not found in primary font '{font_name}'. Using fallback.")
+                except Exception:
+                    pass # Avoid logging errors within logging
             if direction == 0:
                 face.set_pixel_sizes(0, font_size)
             elif direction == 1:
                 face.set_pixel_sizes(font_size, 0)
             face.load_char(cdpt)
             return Glyph(face.glyph)
-        
-        # Log fallback attempt only on the primary font for clarity
-        if i == 0:
-            try:
-                font_name = face.family_name.decode('utf-8') if face.family_name else 'Unknown'
-                logger.debug(f"Character '{cdpt}' not found in primary font '{font_name}'. Trying fallbacks.")
-            except Exception:
-                pass # Avoid logging errors within logging
 
-    # If the loop completes, the character was not found in any font.
-    logger.error(f"FATAL: Character '{cdpt}' (U+{ord(cdpt):04X}) not found in any of the available fonts. Substituting with a placeholder.")
-    
-    # To prevent a crash, recursively call with a placeholder that is guaranteed to exist.
-    # Use '?' as placeholder instead of space - it's visible and indicates missing character
-    # Avoid infinite recursion if placeholder itself is not found
-    if cdpt in (' ', '?', '□'):
-        # This should never happen with valid fonts, but as a safeguard:
-        # We can't return a glyph, so we must raise an exception.
-        raise RuntimeError(f"Catastrophic failure: Placeholder character '{cdpt}' not found in any font.")
-    
-    # Try '?' first (visible placeholder), then '□' (replacement character), then space
-    for placeholder in ('?', '□', ' '):
-        if placeholder != cdpt:
-            try:
-                return get_char_glyph(placeholder, font_size, direction)
-            except RuntimeError:
-                continue
-    
-    # Last resort - should never reach here
-    raise RuntimeError("Catastrophic failure: No placeholder character found in any font.")
+        # If the loop completes, the character was not found in any font.
+        logger.error(f"FATAL: Character '{cdpt}' (U+{ord(cdpt):04X}) not found in any of the available fonts. Substituting with a placeholder.")
+
+        # To prevent a crash, recursively call with a placeholder that is guaranteed to exist.
+        # Use '?' as placeholder instead of space - it's visible and indicates missing character
+        # Avoid infinite recursion if placeholder itself is not found
+        if cdpt in (' ', '?', '□'):
+            # This should never happen with valid fonts, but as a safeguard:
+            # We can't return a glyph, so we must raise an exception.
+            raise RuntimeError(f"Catastrophic failure: Placeholder character '{cdpt}' not found in any font.")
+
+        # Try '?' first (visible placeholder), then '□' (replacement character), then space
+        for placeholder in ('?', '□', ' '):
+            if placeholder != cdpt:
+                try:
+                    return self.get_char_glyph(placeholder, font_size, direction)
+                except RuntimeError:
+                    continue
 
-# 缓存 glyph border 对象，避免重复创建导致内存泄漏
-# 注意：由于 stroke() 会修改 glyph，这里不缓存 glyph，而是直接返回新对象
-# 真正的优化在 _stroke_border_cache 中缓存最终的 bitmap 结果
-#@functools.lru_cache(maxsize = 1024, typed = True)
-def get_char_border(cdpt: str, font_size: int, direction: int):
-    global FONT_SELECTION
-    for i, face in enumerate(FONT_SELECTION):
-        if face.get_char_index(cdpt) == 0 and i != len(FONT_SELECTION) - 1:
-            continue
+        # Last resort - should never reach here
+        raise RuntimeError("Catastrophic failure: No placeholder character found in any font.")
+
+    def get_char_border(self, cdpt: str, font_size: int, direction: int):
+        face = self.select_face(cdpt) or self.last_face()
+        if face is None:
+            return None
         if direction == 0:
             face.set_pixel_sizes(0, font_size)
         elif direction == 1:
@@ -468,6 +592,136 @@ def get_char_border(cdpt: str, font_size: int, direction: int):
         slot_border = face.glyph
         return slot_border.get_glyph()
 
+    def _stroke_char_border(self, font_path: str, cdpt: str, font_size: int, stroke_radius: int, direction: int) -> Optional[np.ndarray]:
+        # font_path 只作为缓存键：字体选择由主字体决定，切换字体后不需要清空缓存
+        glyph_border = self.get_char_border(cdpt, font_size, direction)
+        stroker = freetype.Stroker()
+        stroker.set(stroke_radius, freetype.FT_STROKER_LINEJOIN_ROUND, freetype.FT_STROKER_LINECAP_ROUND, 0)
+        # stroke() 会修改 glyph，所以每次都重新加载 glyph，只缓存最终的位图
+        glyph_border.stroke(stroker, destroy=True)
+        blyph = glyph_border.to_bitmap(freetype.FT_RENDER_MODE_NORMAL, freetype.Vector(0, 0), True)
+        # 缓存的位图被多个字符共享，bitmap_to_array 返回的数组是只读的
+        return bitmap_to_array(blyph.bitmap)
+
+    def get_char_border_bitmap(self, cdpt: str, font_size: int, stroke_radius: int, direction: int) -> Optional[np.ndarray]:
+        """
+        字符的描边位图（只读），描边为空时返回 None。
+        描边是字形渲染中最耗时的部分，按 (字体, 字符, 字号, 描边半径, 方向) 缓存，重复的字符只描边一次。
+        """
+        return self.stroke_char_border(self.font_path, cdpt, font_size, stroke_radius, direction)
+
+# 未绑定渲染器的线程（单线程渲染、编辑器）共用默认渲染器，行为与之前的模块级全局字体相同
+_default_renderer = TextRenderer()
+_thread_state = threading.local()
+
+def get_renderer() -> TextRenderer:
+    """当前线程使用的渲染器"""
+    return getattr(_thread_state, 'renderer', None) or _default_renderer
+
+@contextlib.contextmanager
+def use_renderer(renderer: TextRenderer):
+    """在当前线程中临时使用指定的渲染器，退出时恢复"""
+    previous = getattr(_thread_state, 'renderer', None)
+    _thread_state.renderer = renderer
+    try:
+        yield renderer
+    finally:
+        _thread_state.renderer = previous
+
+def thread_renderer() -> TextRenderer:
+    """当前线程独占的渲染器，首次调用时创建，字体和缓存在线程的生命周期内保留"""
+    renderer = getattr(_thread_state, 'owned_renderer', None)
+    if renderer is None:
+        renderer = _thread_state.owned_renderer = TextRenderer()
+    return renderer
+
+def bind_thread_renderer() -> TextRenderer:
+    """让当前线程之后都使用自己独占的渲染器，可用作线程池的 initializer"""
+    _thread_state.renderer = thread_renderer()
+    return _thread_state.renderer
+
+def get_cached_font(path: str) -> freetype.Face:
+    return get_renderer().get_cached_font(path)
+
+def update_font_selection():
+    get_renderer().update_font_selection()
+
+def set_font(path: str):
+    get_renderer().set_font(path)
+
+def get_char_glyph(cdpt: str, font_size: int, direction: int) -> Glyph:
+    return get_renderer().get_char_glyph(cdpt, font_size, direction)
+
+def get_char_border(cdpt: str, font_size: int, direction: int):
+    return get_renderer().get_char_border(cdpt, font_size, direction)
+
+def get_char_border_bitmap(cdpt: str, font_size: int, stroke_radius: int, direction: int) -> Optional[np.ndarray]:
+    """字符的描边位图（只读），见 TextRenderer.get_char_border_bitmap"""
+    return get_renderer().get_char_border_bitmap(cdpt, font_size, stroke_radius, direction)
+
+class LayoutCache:
+    """
+    calc_horizontal / calc_vertical 的排版结果缓存（每行文字和行宽/列高）。
+    漫画中人名、“……”、“！？”、拟声词等短文本会反复出现，命中时只需光栅化和合成。
+    结果只是字符串和整数，所有渲染器（线程）共享同一个缓存，键中包含主字体路径（回退字体链由主字体决定）。
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[tuple, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, key: tuple, compute):
+        """返回缓存的结果，没有时调用 compute() 计算并缓存；缓存的结果必须是不可变的"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        entry = compute()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def lookup_layout(self, key: tuple, compute) -> Tuple[List[str], List[int]]:
+        lines, extents = self.lookup(key, lambda: tuple(map(tuple, compute())))
+        # 返回新的列表，调用方修改结果不会影响缓存
+        return list(lines), list(extents)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def log_stats(self, name: str):
+        with self._lock:
+            hits, misses, size = self.hits, self.misses, len(self._entries)
+        total = hits + misses
+        if total:
+            logger.debug(f"[{name}] hits={hits}, misses={misses}, hit_rate={hits / total:.1%}, entries={size}")
+
+# 完整排版结果；未命中时 calc_horizontal 还可以复用与宽度无关的分词和音节（SHAPING_CACHE）
+LAYOUT_CACHE = LayoutCache()
+SHAPING_CACHE = LayoutCache()
+
+def clear_layout_caches():
+    LAYOUT_CACHE.clear()
+    SHAPING_CACHE.clear()
+
+def log_layout_cache_stats():
+    LAYOUT_CACHE.log_stats('LAYOUT CACHE')
+    SHAPING_CACHE.log_stats('SHAPING CACHE')
+
+def _layout_key(kind: str, font_size: int, text: str, *limits) -> tuple:
+    return (kind, get_renderer().font_path, font_size, text) + limits
+
 def calc_horizontal_block_height(font_size: int, content: str) -> int:
     """
     预先计算横排块在竖排文本中的实际渲染高度
@@ -511,8 +765,8 @@ def calc_horizontal_block_height(font_size: int, content: str) -> int:
                 slot = get_char_glyph(cdpt, h_font_size, 0)
                 bitmap = slot.bitmap
 
-                if bitmap.rows * bitmap.width > 0 and len(bitmap.buffer) == bitmap.rows * bitmap.width:
-                    bitmap_char = np.array(bitmap.buffer, dtype=np.uint8).reshape((bitmap.rows, bitmap.width))
+                if bitmap.array is not None:
+                    bitmap_char = bitmap.array
                     char_place_x = pen_h[0] + slot.bitmap_left
                     char_place_y = pen_h[1] - slot.bitmap_top
 
@@ -543,7 +797,12 @@ def calc_vertical(font_size: int, text: str, max_height: int, config=None):
     """
     Line breaking logic for vertical text.
     Handles forced newlines (\\n) and is aware of <H> horizontal blocks.
+    Results are cached in LAYOUT_CACHE.
     """
+    return LAYOUT_CACHE.lookup_layout(_layout_key('v', font_size, text, max_height),
+                               lambda: _calc_vertical(font_size, text, max_height))
+
+def _calc_vertical(font_size: int, text: str, max_height: int):
     # 统一处理所有类型的AI换行符，确保后续逻辑的正确性
     text = re.sub(r'\s*(\[BR\]|<br>|【BR】)\s*', '\n', text, flags=re.IGNORECASE)
 
@@ -594,7 +853,7 @@ def calc_vertical(font_size: int, text: str, max_height: int, config=None):
                     ckpt = get_char_glyph(cdpt_trans, font_size, 1)
                     bitmap = ckpt.bitmap
 
-                    if bitmap.rows * bitmap.width == 0 or len(bitmap.buffer) != bitmap.rows * bitmap.width:
+                    if bitmap.array is None:
                         char_offset_y = ckpt.metrics.vertAdvance >> 6 if hasattr(ckpt.metrics, 'vertAdvance') and ckpt.metrics.vertAdvance != 0 else font_size
                     else:
                         char_offset_y = ckpt.metrics.vertAdvance >> 6 if hasattr(ckpt.metrics, 'vertAdvance') and ckpt.metrics.vertAdvance != 0 else font_size
@@ -654,9 +913,9 @@ def put_char_vertical(font_size: int, cdpt: str, pen_l: Tuple[int, int], canvas_
             char_offset_y = slot.advance.y >> 6
     
     # 如果bitmap为空，直接返回计算好的offset
-    if char_bitmap_rows * char_bitmap_width == 0 or len(bitmap.buffer) != char_bitmap_rows * char_bitmap_width:
+    if bitmap.array is None:
         return char_offset_y
-    bitmap_char = np.array(bitmap.buffer, dtype=np.uint8).reshape((char_bitmap_rows, char_bitmap_width))
+    bitmap_char = bitmap.array
 
     # 保存原始尺寸用于位置补偿计算
     _original_bitmap_rows = char_bitmap_rows
@@ -696,22 +955,15 @@ def put_char_vertical(font_size: int, cdpt: str, pen_l: Tuple[int, int], canvas_
         if bitmap_char_slice.size > 0:
             canvas_text[paste_y_start:paste_y_end, paste_x_start:paste_x_end] = bitmap_char_slice
     if border_size > 0:
-        glyph_border = get_char_border(cdpt, font_size, 1)
-        stroker = freetype.Stroker()
         # Use passed stroke_width, fallback to config or default
         if stroke_width is None:
             stroke_ratio = config.render.stroke_width if (config and hasattr(config.render, 'stroke_width')) else 0.07
         else:
             stroke_ratio = stroke_width
         stroke_radius = 64 * max(int(stroke_ratio * font_size), 1)
-        stroker.set(stroke_radius, freetype.FT_STROKER_LINEJOIN_ROUND, freetype.FT_STROKER_LINECAP_ROUND, 0)
-        glyph_border.stroke(stroker, destroy=True)
-        blyph = glyph_border.to_bitmap(freetype.FT_RENDER_MODE_NORMAL, freetype.Vector(0, 0), True)
-        bitmap_b = blyph.bitmap
-        border_bitmap_rows = bitmap_b.rows
-        border_bitmap_width = bitmap_b.width
-        if border_bitmap_rows * border_bitmap_width > 0 and len(bitmap_b.buffer) == border_bitmap_rows * border_bitmap_width:
-            bitmap_border = np.array(bitmap_b.buffer, dtype=np.uint8).reshape((border_bitmap_rows, border_bitmap_width))
+        bitmap_border = get_char_border_bitmap(cdpt, font_size, stroke_radius, 1)
+        if bitmap_border is not None:
+            border_bitmap_rows, border_bitmap_width = bitmap_border.shape
 
             # 如果需要旋转90度，边框也要旋转
             if force_rotate_90:
@@ -1083,7 +1335,7 @@ def get_char_offset_x(font_size: int, cdpt: str):
     c, rot_degree = CJK_Compatibility_Forms_translate(cdpt, 0)
     glyph = get_char_glyph(c, font_size, 0)
     bitmap = glyph.bitmap
-    if bitmap.rows * bitmap.width == 0 or len(bitmap.buffer) != bitmap.rows * bitmap.width:
+    if bitmap.array is None:
         char_offset_x = glyph.advance.x >> 6
     else:
         char_offset_x = glyph.metrics.horiAdvance >> 6
@@ -1096,7 +1348,12 @@ def calc_horizontal_cjk(font_size: int, text: str, max_width: int) -> Tuple[List
     """
     Line breaking logic for CJK languages with punctuation rules.
     Handles forced newlines (\n) and invisible placeholders (＿).
+    Results are cached in LAYOUT_CACHE.
     """
+    return LAYOUT_CACHE.lookup_layout(_layout_key('h_cjk', font_size, text, max_width),
+                               lambda: _calc_horizontal_cjk(font_size, text, max_width))
+
+def _calc_horizontal_cjk(font_size: int, text: str, max_width: int) -> Tuple[List[str], List[int]]:
     # 统一处理所有类型的AI换行符
     text = re.sub(r'\s*(\[BR\]|<br>|【BR】)\s*', '\n', text, flags=re.IGNORECASE)
 
@@ -1146,15 +1403,18 @@ def calc_horizontal_cjk(font_size: int, text: str, max_width: int) -> Tuple[List
     return line_text_list, line_width_list
 
 def calc_horizontal(font_size: int, text: str, max_width: int, max_height: int, language: str = 'en_US', hyphenate: bool = True) -> Tuple[List[str], List[int]]:
+    """排版横排文本，返回 (每行文字, 每行宽度)；结果缓存在 LAYOUT_CACHE 中"""
+    return LAYOUT_CACHE.lookup_layout(_layout_key('h', font_size, text, max_width, max_height, language, hyphenate),
+                               lambda: _calc_horizontal(font_size, text, max_width, max_height, language, hyphenate))
 
+def _shape_horizontal(font_size: int, text: str, language: str):
+    """
+    calc_horizontal 中与排版宽度无关的部分：分词、词宽和连字符音节（及音节宽度）。
+    返回 (words, newline_positions, word_widths, syllables, 是否有连字符词典)，都是不可变对象，可以缓存。
+    """
     # 统一处理所有类型的AI换行符
     text = re.sub(r'\s*(\[BR\]|<br>|【BR】)\s*', '\n', text, flags=re.IGNORECASE)
 
-    max_width = max(max_width, 2 * font_size)
-
-    whitespace_offset_x = get_char_offset_x(font_size, ' ')
-    hyphen_offset_x = get_char_offset_x(font_size, '-')
-
     # 先按换行符分割段落，然后对每段分割单词
     # 使用特殊标记来保留换行位置
     paragraphs = text.split('\n')
@@ -1172,27 +1432,11 @@ def calc_horizontal(font_size: int, text: str, max_width: int, max_height: int,
             words.append('')
             newline_positions.add(len(words) - 1)
 
-    # 如果没有单词，返回空结果
-    if not words:
-        return [], []
-
     word_widths = []
     for i, word in enumerate(words):
         width = get_string_width(font_size, word)
         word_widths.append(width)
 
-    while True:
-        max_lines = max_height // font_size + 1
-        expected_size = sum(word_widths) + max((len(word_widths) - 1) * whitespace_offset_x - (max_lines - 1) * hyphen_offset_x, 0)
-        max_size = max_width * max_lines
-
-        if max_size < expected_size:
-            multiplier = np.sqrt(expected_size / max_size)
-            max_width *= max(multiplier, 1.05)
-            max_height *= multiplier
-        else:
-            break
-
     syllables = []
     hyphenator = select_hyphenator(language)
 
@@ -1209,10 +1453,39 @@ def calc_horizontal(font_size: int, text: str, max_width: int, max_height: int,
                 new_syls = [word]
             else:
                 new_syls = list(word)
+        syllables.append(tuple((syl, get_string_width(font_size, syl)) for syl in new_syls))
+
+    return tuple(words), frozenset(newline_positions), tuple(word_widths), tuple(syllables), hyphenator is not None
+
+def _calc_horizontal(font_size: int, text: str, max_width: int, max_height: int, language: str = 'en_US', hyphenate: bool = True) -> Tuple[List[str], List[int]]:
+    words, newline_positions, word_widths, shaped_syllables, has_hyphenator = SHAPING_CACHE.lookup(
+        _layout_key('shape', font_size, text, language), lambda: _shape_horizontal(font_size, text, language))
+
+    # 如果没有单词，返回空结果
+    if not words:
+        return [], []
+
+    max_width = max(max_width, 2 * font_size)
+
+    whitespace_offset_x = get_char_offset_x(font_size, ' ')
+    hyphen_offset_x = get_char_offset_x(font_size, '-')
+
+    while True:
+        max_lines = max_height // font_size + 1
+        expected_size = sum(word_widths) + max((len(word_widths) - 1) * whitespace_offset_x - (max_lines - 1) * hyphen_offset_x, 0)
+        max_size = max_width * max_lines
+
+        if max_size < expected_size:
+            multiplier = np.sqrt(expected_size / max_size)
+            max_width *= max(multiplier, 1.05)
+            max_height *= multiplier
+        else:
+            break
 
+    syllables = []
+    for word_syllables in shaped_syllables:
         normalized_syls = []
-        for syl in new_syls:
-            syl_width = get_string_width(font_size, syl)
+        for syl, syl_width in word_syllables:
             if syl_width > max_width:
                 normalized_syls.extend(list(syl))
             else:
@@ -1381,7 +1654,7 @@ def calc_horizontal(font_size: int, text: str, max_width: int, max_height: int,
         elif line_idx >= len(line_words_list) - 1 or line_words_list[line_idx + 1] != merged_word_idx:
             line_idx += 1
 
-    use_hyphen_chars = hyphenate and hyphenator and max_width > 1.5 * font_size and len(words) > 1
+    use_hyphen_chars = hyphenate and has_hyphenator and max_width > 1.5 * font_size and len(words) > 1
 
     line_text_list = []
     for i, line in enumerate(line_words_list):
@@ -1405,6 +1678,23 @@ def calc_horizontal(font_size: int, text: str, max_width: int, max_height: int,
 
     return line_text_list, line_width_list
 
+def fit_font_size(text: str, horizontal: bool, max_width: int, max_height: int, max_lines: int,
+                  min_size: int, max_size: int, language: str = 'en_US') -> int:
+    """
+    从 max_size 起逐号缩小，返回第一个排版行数不超过 max_lines 的字号，都放不下时返回 min_size。
+
+    行数对字号并不单调（换行位置随字号变化，calc_horizontal 放不下时还会放宽宽度），
+    二分或估算都可能跳过逐号扫描会选中的字号，因此每个字号都完整排版一次。
+    """
+    for size in range(max_size, min_size - 1, -1):
+        if horizontal:
+            lines, _ = calc_horizontal(size, text, max_width=max_width, max_height=max_height, language=language)
+        else:
+            lines, _ = calc_vertical(size, text, max_height=max_height)
+        if len(lines) <= max_lines:
+            return size
+    return min_size
+
 def put_char_horizontal(font_size: int, cdpt: str, pen_l: Tuple[int, int], canvas_text: np.ndarray, canvas_border: np.ndarray, border_size: int, config=None, stroke_width: float = None):
     if cdpt == '＿':
         # For the placeholder, just advance the pen and do nothing else.
@@ -1436,9 +1726,9 @@ def put_char_horizontal(font_size: int, cdpt: str, pen_l: Tuple[int, int], canva
             char_offset_x = slot.bitmap_left + bitmap.width
         else:
             char_offset_x = bitmap.width
-    if bitmap.rows * bitmap.width == 0 or len(bitmap.buffer) != bitmap.rows * bitmap.width:
+    if bitmap.array is None:
         return char_offset_x
-    bitmap_char = np.array(bitmap.buffer, dtype=np.uint8).reshape((bitmap.rows, bitmap.width))
+    bitmap_char = bitmap.array
     char_place_x = pen[0] + slot.bitmap_left
     char_place_y = pen[1] - slot.bitmap_top
     paste_y_start = max(0, char_place_y)
@@ -1459,28 +1749,15 @@ def put_char_horizontal(font_size: int, cdpt: str, pen_l: Tuple[int, int], canva
         canvas_text[paste_y_start:paste_y_end, 
                     paste_x_start:paste_x_end] = bitmap_char_slice
     if border_size > 0:
-        glyph_border = get_char_border(cdpt, font_size, 0)
-        stroker = freetype.Stroker()
         # Use passed stroke_width, fallback to config or default
         if stroke_width is None:
             stroke_ratio = config.render.stroke_width if (config and hasattr(config.render, 'stroke_width')) else 0.07
         else:
             stroke_ratio = stroke_width
         stroke_radius = 64 * max(int(stroke_ratio * font_size), 1)
-        stroker.set(stroke_radius, 
-                   freetype.FT_STROKER_LINEJOIN_ROUND,
-                   freetype.FT_STROKER_LINECAP_ROUND,
-                   0)
-        glyph_border.stroke(stroker, destroy=True)
-        blyph = glyph_border.to_bitmap(freetype.FT_RENDER_MODE_NORMAL, 
-                                      freetype.Vector(0, 0), True)
-        bitmap_b = blyph.bitmap
-        border_bitmap_rows = bitmap_b.rows
-        border_bitmap_width = bitmap_b.width
-        if (border_bitmap_rows * border_bitmap_width > 0 and 
-            len(bitmap_b.buffer) == border_bitmap_rows * border_bitmap_width):
-            bitmap_border = np.array(bitmap_b.buffer, dtype=np.uint8
-                                   ).reshape((border_bitmap_rows, border_bitmap_width))
+        bitmap_border = get_char_border_bitmap(cdpt, font_size, stroke_radius, 0)
+        if bitmap_border is not None:
+            border_bitmap_rows, border_bitmap_width = bitmap_border.shape
             char_bitmap_rows = bitmap.rows
             char_bitmap_width = bitmap.width
             
@@ -1649,8 +1926,5 @@ def test():
     canvas = put_text_horizontal(64, 1.0, '因为不同‼ [这"真的是普]通的》肉！那个"姑娘"的恶作剧！是吗？咲夜⁉', 400, (0, 0, 0), (255, 128, 128))
     imwrite_unicode('text_render_combined.png', canvas, logger)
 
-# Initialize font selection on module load
-update_font_selection()
-
 if __name__ == '__main__':
     test()
@@ -1,4 +1,6 @@
 # import re
+import functools
+import math
 import cv2
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
@@ -6,18 +8,45 @@ from typing import List
 
 from .ballon_extractor import extract_ballon_region
 from ..utils import TextBlock
+from .text_render import LayoutCache
 from .text_render_eng import PUNSET_RIGHT_ENG, seg_eng
 
+# 文字测量结果缓存，键为 (字体路径, 字号, 测量方式, 文本, ...)，分行时同一前缀会被反复测量
+MEASURE_CACHE = LayoutCache()
+
+@functools.lru_cache(maxsize=64)
+def _load_font(font_path: str, font_size: int) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(font_path, font_size)
+
+def _measure_key(font, kind: str, text: str, *args) -> tuple:
+    return (getattr(font, 'path', None), font.size, kind, text, *args)
+
+def _text_width(font, text: str) -> int:
+    def compute():
+        bbox = font.getbbox(text)
+        return bbox[2] - bbox[0]
+    return MEASURE_CACHE.lookup(_measure_key(font, 'bbox_width', text), compute)
+
+def _text_length(font, text: str) -> int:
+    return MEASURE_CACHE.lookup(_measure_key(font, 'length', text), lambda: int(font.getlength(text)))
+
+def _textbbox(font, text: str, spacing: int, xy=(0, 0), anchor=None, multiline=True) -> tuple:
+    def compute():
+        draw = ImageDraw.Draw(Image.new('RGBA', (1, 1)))
+        measure = draw.multiline_textbbox if multiline else draw.textbbox
+        return tuple(measure(xy, text, font=font, spacing=spacing, align="center", anchor=anchor))
+    return MEASURE_CACHE.lookup(_measure_key(font, 'textbbox', text, spacing, tuple(xy), anchor, multiline), compute)
+
 def merge_seg_eng(text: str, font, bbox_width, size_ratio=1.2) -> List[str]:
     """Segments text into words that fit within bbox_width"""
     grouped = seg_eng(text)
     lines = []
     current_line = ''
-    text_max_width = max([font.getbbox(word)[2] - font.getbbox(word)[0] for word in grouped])
+    text_max_width = max([_text_width(font, word) for word in grouped])
     max_width = max(bbox_width, text_max_width) * size_ratio
     for word in grouped:
         test_line = f"{current_line} {word}" if current_line else word
-        width = font.getbbox(test_line)[2] - font.getbbox(test_line)[0]
+        width = _text_width(font, test_line)
         if width <= max_width:
             current_line = test_line
         else:
@@ -40,41 +69,96 @@ def _check_bbox_collision(b1, b2):
     """Check if two bboxes collide"""
     return not (b1[2] <= b2[0] or b1[0] >= b2[2] or b1[3] <= b2[1] or b1[1] >= b2[3])
 
-def _spiral_points_generator(anchor_x, anchor_y, limit):
-    """Generate spiral search points"""
-    yield anchor_x, anchor_y
+class _BoxGrid:
+    """
+    均匀网格索引，每个格子记录与之相交的 bbox 序号。
+    碰撞检测只需检查候选框所在格子里的 bbox，而不是全部 bbox。
+    """
+
+    def __init__(self, bboxes, cell_size):
+        self.cell_size = max(1, cell_size)
+        self.cells = {}
+        self.bbox_cells = []
+        for idx, bbox in enumerate(bboxes):
+            self.bbox_cells.append(self._cells_of(bbox))
+            for cell in self.bbox_cells[idx]:
+                self.cells.setdefault(cell, []).append(idx)
+
+    def _cells_of(self, bbox):
+        c = self.cell_size
+        xs = range(math.floor(bbox[0] / c), math.floor(bbox[2] / c) + 1)
+        ys = range(math.floor(bbox[1] / c), math.floor(bbox[3] / c) + 1)
+        return [(cx, cy) for cx in xs for cy in ys]
+
+    def move(self, idx, bbox):
+        for cell in self.bbox_cells[idx]:
+            self.cells[cell].remove(idx)
+        self.bbox_cells[idx] = self._cells_of(bbox)
+        for cell in self.bbox_cells[idx]:
+            self.cells.setdefault(cell, []).append(idx)
+
+    def candidates(self, bbox):
+        found = set()
+        for cell in self._cells_of(bbox):
+            found.update(self.cells.get(cell, ()))
+        return found
+
+def _spiral_rings(anchor_x, anchor_y, limit, bounds):
+    """
+    Generate spiral search points, one ring (xs, ys) at a time
+
+    点的顺序与逐点生成螺旋时相同，但只保留 bounds (min_x, min_y, max_x, max_y) 内的点；
+    整圈都落在范围外之后停止，因为更大的圈也不会再有范围内的点。
+    """
+    min_x, min_y, max_x, max_y = bounds
+    if min_x > max_x or min_y > max_y:
+        return
+    if min_x <= anchor_x <= max_x and min_y <= anchor_y <= max_y:
+        yield 0, np.array([anchor_x]), np.array([anchor_y])
+    # 超过该半径后整圈都在范围外
+    last_radius = max(anchor_x - min_x, max_x - anchor_x, anchor_y - min_y, max_y - anchor_y)
     for radius in range(1, int(limit**0.5)):
+        if radius > last_radius:
+            break
+        xs, ys = [], []
         # Top and bottom edges
-        for dx in range(-radius, radius+1):
-            yield anchor_x + dx, anchor_y - radius
-            yield anchor_x + dx, anchor_y + radius
+        rows = [y for y in (anchor_y - radius, anchor_y + radius) if min_y <= y <= max_y]
+        if rows:
+            dx = np.arange(max(-radius, math.ceil(min_x - anchor_x)), min(radius, math.floor(max_x - anchor_x)) + 1)
+            xs.append(np.repeat(anchor_x + dx, len(rows)))
+            ys.append(np.tile(rows, len(dx)))
         # Left and right edges (excluding corners)
-        for dy in range(-radius+1, radius):
-            yield anchor_x - radius, anchor_y + dy
-            yield anchor_x + radius, anchor_y + dy
-
-def _find_collision_free_position(bbox_idx, bboxes, anchors, image_bounds, spiral_limit):
+        cols = [x for x in (anchor_x - radius, anchor_x + radius) if min_x <= x <= max_x]
+        if cols:
+            dy = np.arange(max(-radius + 1, math.ceil(min_y - anchor_y)), min(radius - 1, math.floor(max_y - anchor_y)) + 1)
+            xs.append(np.tile(cols, len(dy)))
+            ys.append(np.repeat(anchor_y + dy, len(cols)))
+        if xs and sum(len(a) for a in xs):
+            yield radius, np.concatenate(xs), np.concatenate(ys)
+
+def _find_collision_free_position(bbox_idx, bboxes, anchors, image_bounds, spiral_limit, grid):
     """Find a collision-free position for a bbox"""
     max_x, max_y = image_bounds
     w = bboxes[bbox_idx][2] - bboxes[bbox_idx][0]
     h = bboxes[bbox_idx][3] - bboxes[bbox_idx][1]
-
-    for x, y in _spiral_points_generator(anchors[bbox_idx][0], anchors[bbox_idx][1], spiral_limit):
-        candidate = [x, y, x+w, y+h]
-
-        # Check bounds
-        if not (0 <= x and 0 <= y and x+w <= max_x and y+h <= max_y):
-            continue
-
-        # Check collisions with other boxes
-        has_collision = False
-        for k, other_bbox in enumerate(bboxes):
-            if k != bbox_idx and _check_bbox_collision(candidate, other_bbox):
-                has_collision = True
-                break
-
-        if not has_collision:
-            return candidate
+    anchor_x, anchor_y = anchors[bbox_idx]
+
+    # 只搜索整个框都在图片内的位置，每一圈的点一起与附近的 bbox 比较
+    for radius, xs, ys in _spiral_rings(anchor_x, anchor_y, spiral_limit, (0, 0, max_x - w, max_y - h)):
+        ring_area = [anchor_x - radius, anchor_y - radius, anchor_x + radius + w, anchor_y + radius + h]
+        others = [bboxes[k] for k in grid.candidates(ring_area) if k != bbox_idx]
+        if others:
+            b = np.array(others)
+            collides = ((xs[:, None] + w > b[:, 0]) & (xs[:, None] < b[:, 2]) &
+                        (ys[:, None] + h > b[:, 1]) & (ys[:, None] < b[:, 3])).any(axis=1)
+            free = np.flatnonzero(~collides)
+            if len(free) == 0:
+                continue
+            first = free[0]
+        else:
+            first = 0
+        x, y = xs[first].item(), ys[first].item()
+        return [x, y, x+w, y+h]
 
     return None
 
@@ -87,18 +171,23 @@ def solve_collisions_spiral_xyxy(image_shape, initial_bboxes_xyxy, max_iteration
         return bboxes
 
     anchors = [(b[0], b[1]) for b in bboxes]
+    # 网格边长取 bbox 尺寸的中位数，每个 bbox 大约占 1~4 个格子
+    sizes = sorted(max(b[2] - b[0], b[3] - b[1]) for b in bboxes)
+    grid = _BoxGrid(bboxes, int(sizes[len(sizes) // 2]))
 
     for _ in range(max_iterations):
         collision_found = False
 
         for i in range(len(bboxes)):
-            for j in range(i+1, len(bboxes)):
-                if _check_bbox_collision(bboxes[i], bboxes[j]):
-                    collision_found = True
-                    new_position = _find_collision_free_position(j, bboxes, anchors, image_shape, spiral_limit)
-                    if new_position:
-                        bboxes[j] = new_position
-                    break
+            # 与 bbox i 碰撞的序号最小的 j > i
+            colliding = [j for j in grid.candidates(bboxes[i]) if j > i and _check_bbox_collision(bboxes[i], bboxes[j])]
+            if colliding:
+                j = min(colliding)
+                collision_found = True
+                new_position = _find_collision_free_position(j, bboxes, anchors, image_shape, spiral_limit, grid)
+                if new_position:
+                    bboxes[j] = new_position
+                    grid.move(j, new_position)
 
         if not collision_found:
             break
@@ -122,8 +211,8 @@ def render_textblock_list_eng(
     def calculate_font_values(font, words, delimiter=' '):
         sw = max(font.size // 4, 1)
         line_height = font.getmetrics()[0] - font.getmetrics()[1]
-        delimiter_len = int(font.getlength(delimiter))
-        word_lengths = [int(font.getlength(w)) for w in words]
+        delimiter_len = _text_length(font, delimiter)
+        word_lengths = [_text_length(font, w) for w in words]
         base_length = max(word_lengths, default=-1)
         return sw, line_height, delimiter_len, base_length, word_lengths
 
@@ -148,7 +237,7 @@ def render_textblock_list_eng(
         ballon_mask, xyxy = extract_ballon_region(original_img, region.xywh, enlarge_ratio=getattr(region, 'enlarge_ratio', 1))
         if isinstance(xyxy, tuple):
             xyxy = list(xyxy)
-        font = ImageFont.truetype(font_path, font_size)
+        font = _load_font(font_path, font_size)
         words = merge_seg_eng(region.translation, font, region.xywh[2])
         if not words:
             continue
@@ -195,7 +284,7 @@ def render_textblock_list_eng(
 
                 if font_size_multiplier < 1:
                     font_size = int(font_size * font_size_multiplier)
-                    font = ImageFont.truetype(font_path, font_size)
+                    font = _load_font(font_path, font_size)
                     words = merge_seg_eng(region.translation, font, region.xywh[2])
                     sw, line_height, delimiter_len, base_length, word_lengths = calculate_font_values(font, words)
 
@@ -205,10 +294,8 @@ def render_textblock_list_eng(
         line_spacing_px = int(font.size * 0.01)
         padding = (font.size + sw) * 4
 
-        # Create temporary layer to measure text size
-        temp_img = Image.new('RGBA', (1, 1))
-        temp_draw = ImageDraw.Draw(temp_img)
-        text_bbox = temp_draw.multiline_textbbox((0, 0), words_text, font=font, spacing=line_spacing_px, align="center")
+        # Measure text size
+        text_bbox = _textbbox(font, words_text, line_spacing_px)
         text_width = text_bbox[2] - text_bbox[0] + padding
         text_height = text_bbox[3] - text_bbox[1] + padding
 
@@ -219,10 +306,8 @@ def render_textblock_list_eng(
             fill=font_color, align="center", spacing=line_spacing_px, anchor="mm"
         )
 
-        tx1, ty1, tx2, ty2 = draw_text.textbbox(
-            (text_width // 2, text_height // 2), words_text, font=font,
-            align="center", spacing=line_spacing_px, anchor="mm"
-        )
+        tx1, ty1, tx2, ty2 = _textbbox(font, words_text, line_spacing_px, (text_width // 2, text_height // 2),
+                                       anchor="mm", multiline=False)
 
         rotated_text_layer = text_layer.rotate(region.angle, expand=True, fillcolor=(0, 0, 0, 0), resample=Image.LANCZOS)
         rotated_width, rotated_height = rotated_text_layer.size
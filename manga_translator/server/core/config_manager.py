@@ -56,6 +56,12 @@ DEFAULT_ADMIN_SETTINGS = {
         'cli.context_size',
         'cli.batch_size',
         'cli.batch_concurrent',
+        'cli.pipeline_queue_pages',
+        'cli.pipeline_queue_mb',
+        'cli.pipeline_inpaint_workers',
+        'cli.pipeline_render_workers',
+        'cli.pipeline_process_workers',
+        'cli.pipeline_serialize_render',
         'cli.use_gpu',
         'cli.verbose',
         'cli.psd_script_only',  # Web UI隐藏PSD脚本模式参数
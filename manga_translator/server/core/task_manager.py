@@ -35,6 +35,8 @@ server_config = {
     'use_gpu': False,
     'verbose': False,
     'models_ttl': 0,
+    'models_ram_budget': 0,
+    'models_vram_budget': 0,
     'retry_attempts': None,
     'admin_password': None,
     'max_concurrent_tasks': 3,
@@ -224,10 +226,15 @@ def update_server_config(config: dict):
             init_semaphore()
             logger.info(f"并发数已更新: {old_value} -> {new_value}")
     
-    for key in ['use_gpu', 'verbose', 'models_ttl', 'retry_attempts', 'admin_password']:
+    for key in ['use_gpu', 'verbose', 'models_ttl', 'models_ram_budget', 'models_vram_budget', 'retry_attempts', 'admin_password']:
         if key in config:
             server_config[key] = config[key]
     
+    # 内存预算即时生效，无需重建翻译器
+    if 'models_ram_budget' in config or 'models_vram_budget' in config:
+        from manga_translator.utils.model_manager import model_manager
+        model_manager.configure(server_config.get('models_ram_budget', 0), server_config.get('models_vram_budget', 0))
+    
     # 如果关键参数变化，重置全局翻译器
     if rebuild_translator and _global_translator is not None:
         with _translator_lock:
@@ -312,6 +319,8 @@ def get_global_translator(params: dict = None):
             'use_gpu': server_config.get('use_gpu', False),
             'verbose': server_config.get('verbose', False),
             'models_ttl': server_config.get('models_ttl', 0),
+            'models_ram_budget': server_config.get('models_ram_budget', 0),
+            'models_vram_budget': server_config.get('models_vram_budget', 0),
         }
         retry_attempts = server_config.get('retry_attempts')
         if retry_attempts is not None:
@@ -375,11 +384,14 @@ def get_translator_status() -> dict:
     """
     获取翻译器状态
     """
+    from manga_translator.utils.model_manager import model_manager
+    
     with _translator_lock:
         if _global_translator is None:
             return {
                 "initialized": False,
-                "models_loaded": []
+                "models_loaded": [],
+                "model_memory": model_manager.stats()
             }
         
         # 获取已加载的模型信息
@@ -396,7 +408,8 @@ def get_translator_status() -> dict:
             "initialized": True,
             "models_loaded": models_loaded,
             "models_ttl": server_config.get('models_ttl', 0),
-            "use_gpu": server_config.get('use_gpu', False)
+            "use_gpu": server_config.get('use_gpu', False),
+            "model_memory": model_manager.stats()
         }
 
 
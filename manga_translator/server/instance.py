@@ -1,3 +1,4 @@
+import os
 from asyncio import Event, Lock
 from typing import List
 
@@ -15,21 +16,26 @@ class ExecutorInstance(BaseModel):
     def free_executor(self):
         self.busy = False
 
+    @property
+    def shared(self) -> bool:
+        """本机实例通过共享内存传递图片（MT_SHARED_FRAMES=0 关闭）"""
+        return self.ip in ('127.0.0.1', 'localhost', '::1') and os.getenv('MT_SHARED_FRAMES', '1') != '0'
+
     async def sent(self, image: Image, config: Config):
-        return await fetch_data("http://"+self.ip+":"+str(self.port)+"/simple_execute/translate", image, config)
+        return await fetch_data("http://"+self.ip+":"+str(self.port)+"/simple_execute/translate", image, config, shared=self.shared)
 
     async def sent_stream(self, image: Image, config: Config, sender: NotifyType):
-        await fetch_data_stream("http://"+self.ip+":"+str(self.port)+"/execute/translate", image, config, sender)
+        await fetch_data_stream("http://"+self.ip+":"+str(self.port)+"/execute/translate", image, config, sender, shared=self.shared)
 
     async def sent_batch(self, images: List[Image.Image], config: Config, batch_size: int):
         """发送批量翻译请求"""
         return await fetch_data("http://"+self.ip+":"+str(self.port)+"/simple_execute/translate_batch", 
-                               {"images": images, "config": config, "batch_size": batch_size})
+                               {"images": images, "config": config, "batch_size": batch_size}, shared=self.shared)
 
     async def sent_batch_stream(self, images: List[Image.Image], config: Config, batch_size: int, sender: NotifyType):
         """发送批量翻译流式请求"""
         await fetch_data_stream("http://"+self.ip+":"+str(self.port)+"/execute/translate_batch",
-                               {"images": images, "config": config, "batch_size": batch_size}, config, sender)
+                               {"images": images, "config": config, "batch_size": batch_size}, config, sender, shared=self.shared)
 
 class Executors:
     def __init__(self):
@@ -300,6 +300,10 @@ def start_translator_client_proc(host: str, port: int, nonce: str, params: Names
         cmds.append('--verbose')
     if params.models_ttl:
         cmds.append('--models-ttl=%s' % params.models_ttl)
+    if getattr(params, 'models_ram_budget', 0):
+        cmds.append('--models-ram-budget=%s' % params.models_ram_budget)
+    if getattr(params, 'models_vram_budget', 0):
+        cmds.append('--models-vram-budget=%s' % params.models_vram_budget)
     if getattr(params, 'pre_dict', None):
         cmds.extend(['--pre-dict', params.pre_dict])
     if getattr(params, 'post_dict', None):
@@ -351,6 +355,8 @@ def run_server(args):
     task_manager.server_config['use_gpu'] = getattr(args, 'use_gpu', False)
     task_manager.server_config['verbose'] = getattr(args, 'verbose', False)
     task_manager.server_config['models_ttl'] = getattr(args, 'models_ttl', 0)
+    task_manager.server_config['models_ram_budget'] = getattr(args, 'models_ram_budget', 0)
+    task_manager.server_config['models_vram_budget'] = getattr(args, 'models_vram_budget', 0)
     task_manager.server_config['retry_attempts'] = getattr(args, 'retry_attempts', None)
     
     # 从 admin_settings 加载管理员密码和并发设置
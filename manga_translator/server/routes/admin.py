@@ -239,6 +239,18 @@ async def get_server_config(
     }
 
 
+@router.get("/models")
+async def get_model_memory_stats(
+    session: Session = Depends(require_admin),
+    token: str = Header(alias="X-Admin-Token", default=None)
+):
+    """
+    Get loaded models, their measured memory footprint and load/unload counters
+    """
+    from manga_translator.utils.model_manager import model_manager
+    return model_manager.stats()
+
+
 @router.post("/server-config")
 async def update_server_config(
     config: dict,
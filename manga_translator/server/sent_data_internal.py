@@ -1,3 +1,4 @@
+import atexit
 import pickle
 from typing import Mapping, Optional, Callable
 
@@ -6,30 +7,63 @@ from PIL.Image import Image
 from fastapi import HTTPException
 
 from manga_translator import Config
+from manga_translator.utils.shared_image import SharedImageRing, pack_frames, unpack_frames
 
 NotifyType = Optional[Callable[[int, Optional[bytes]], None]]
 
-async def fetch_data_stream(url, image: Image, config: Config, sender: NotifyType, headers: Mapping[str, str] = {}):
-    attributes = {"image": image, "config": config}
-    data = pickle.dumps(attributes)
+# 发往本机翻译实例的输入图片所用的共享内存槽位（首次使用时创建）
+_frame_ring: Optional[SharedImageRing] = None
+
+
+def _get_frame_ring() -> SharedImageRing:
+    global _frame_ring
+    if _frame_ring is None:
+        _frame_ring = SharedImageRing(8)
+        atexit.register(_frame_ring.close)
+    return _frame_ring
+
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, data=data, headers=headers) as response:
-            if response.status == 200:
-                await process_stream(response, sender)
-            else:
-                raise HTTPException(response.status, detail=await response.text())
+def _encode_attributes(attributes: dict, headers: Mapping[str, str], shared: bool):
+    """序列化请求参数；shared 时大图放入共享内存，只 pickle 句柄，返回 (数据, 请求头, 占用的槽位)"""
+    frames = []
+    if shared:
+        attributes = pack_frames(attributes, _get_frame_ring(), frames)
+        headers = {**headers, 'X-Shared-Frames': '1'}
+    return pickle.dumps(attributes), headers, frames
 
-async def fetch_data(url, image: Image, config: Config, headers: Mapping[str, str] = {}):
+
+def _release_frames(frames):
+    for frame in frames:
+        _frame_ring.release(frame)
+
+
+async def fetch_data_stream(url, image: Image, config: Config, sender: NotifyType, headers: Mapping[str, str] = {}, shared: bool = False):
+    attributes = {"image": image, "config": config}
+    data, headers, frames = _encode_attributes(attributes, headers, shared)
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.post(url, data=data, headers=headers) as response:
+                if response.status == 200:
+                    await process_stream(response, sender)
+                else:
+                    raise HTTPException(response.status, detail=await response.text())
+    finally:
+        _release_frames(frames)
+
+async def fetch_data(url, image: Image, config: Config, headers: Mapping[str, str] = {}, shared: bool = False):
     attributes = {"image": image, "config": config}
-    data = pickle.dumps(attributes)
-
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, data=data, headers=headers) as response:
-            if response.status == 200:
-                return pickle.loads(await response.read())
-            else:
-                raise HTTPException(response.status, detail=await response.text())
+    data, headers, frames = _encode_attributes(attributes, headers, shared)
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.post(url, data=data, headers=headers) as response:
+                if response.status == 200:
+                    return unpack_frames(pickle.loads(await response.read()))
+                else:
+                    raise HTTPException(response.status, detail=await response.text())
+    finally:
+        _release_frames(frames)
 
 async def process_stream(response, sender: NotifyType):
     buffer = b''
@@ -1,6 +1,8 @@
 import asyncio
 import pickle
 
+from manga_translator.utils.shared_image import unpack_frames
+
 async def stream(messages):
     while True:
         message = await messages.get()
@@ -10,7 +12,7 @@ async def stream(messages):
 
 def notify(code: int, data: bytes, transform_to_bytes, messages: asyncio.Queue):
     if code == 0:
-        result_bytes = transform_to_bytes(pickle.loads(data))
+        result_bytes = transform_to_bytes(unpack_frames(pickle.loads(data)))
         encoded_result = b'\x00' + len(result_bytes).to_bytes(4, 'big') + result_bytes
         messages.put_nowait(encoded_result)
     else:
@@ -3,29 +3,25 @@ from typing import Optional, List
 import py3langid as langid
 
 from .common import *
-from .openai import OpenAITranslator
-from .openai_hq import OpenAIHighQualityTranslator
-from .gemini import GeminiTranslator
-from .gemini_hq import GeminiHighQualityTranslator
-from .sakura import SakuraTranslator
-from .none import NoneTranslator
-from .original import OriginalTranslator
 from ..config import Config, Translator, TranslatorConfig, TranslatorChain
-from ..utils import Context
+from ..utils import Context, LazyRegistry
 
-GPT_TRANSLATORS = {
-    Translator.openai: OpenAITranslator,
-    Translator.openai_hq: OpenAIHighQualityTranslator,
-    Translator.gemini: GeminiTranslator,
-    Translator.gemini_hq: GeminiHighQualityTranslator,
+# 翻译器实现在第一次使用时才导入（openai、google-genai 等客户端库只在用到时加载）
+_GPT_TRANSLATOR_PATHS = {
+    Translator.openai: '.openai:OpenAITranslator',
+    Translator.openai_hq: '.openai_hq:OpenAIHighQualityTranslator',
+    Translator.gemini: '.gemini:GeminiTranslator',
+    Translator.gemini_hq: '.gemini_hq:GeminiHighQualityTranslator',
 }
 
-TRANSLATORS = {
-    Translator.none: NoneTranslator,
-    Translator.original: OriginalTranslator,
-    Translator.sakura: SakuraTranslator,
-    **GPT_TRANSLATORS,
-}
+GPT_TRANSLATORS = LazyRegistry(__name__, _GPT_TRANSLATOR_PATHS)
+
+TRANSLATORS = LazyRegistry(__name__, {
+    Translator.none: '.none:NoneTranslator',
+    Translator.original: '.original:OriginalTranslator',
+    Translator.sakura: '.sakura:SakuraTranslator',
+    **_GPT_TRANSLATOR_PATHS,
+})
 translator_cache = {}
 
 def get_translator(key: Translator, *args, **kwargs) -> CommonTranslator:
@@ -8,6 +8,7 @@ import numpy as np
 import cv2
 
 from ..utils import InfererModule, ModelWrapper, repeating_sequence, is_valuable_text
+from ..utils.tracing import tracer
 
 try:
     import readline
@@ -1513,7 +1514,8 @@ class CommonTranslator(InfererModule):
             await self._ratelimit_sleep()
 
             # Translate
-            _translations = await self._translate(*self.parse_language_codes(from_lang, to_lang, fatal=True), queries, ctx=ctx)
+            with tracer.span(type(self).__name__, 'network', queries=len(queries), attempt=i + 1):
+                _translations = await self._translate(*self.parse_language_codes(from_lang, to_lang, fatal=True), queries, ctx=ctx)
 
             # Strict validation: translation count must match query count
             if len(_translations) != len(queries):
@@ -2,20 +2,17 @@ from typing import List
 from PIL import Image
 
 from .common import CommonUpscaler, OfflineUpscaler
-from .waifu2x import Waifu2xUpscaler
-from .esrgan import ESRGANUpscaler
-from .esrgan_pytorch import ESRGANUpscalerPytorch
-from .realcugan import RealCUGANUpscaler
-from .mangajanai import MangaJaNaiUpscaler
 from ..config import Upscaler
+from ..utils import LazyRegistry
 
-UPSCALERS = {
-    Upscaler.waifu2x: Waifu2xUpscaler,
-    Upscaler.esrgan: ESRGANUpscaler,
-    Upscaler.upscler4xultrasharp: ESRGANUpscalerPytorch,
-    Upscaler.realcugan: RealCUGANUpscaler,
-    Upscaler.mangajanai: MangaJaNaiUpscaler,
-}
+# 超分实现在第一次使用时才导入
+UPSCALERS = LazyRegistry(__name__, {
+    Upscaler.waifu2x: '.waifu2x:Waifu2xUpscaler',
+    Upscaler.esrgan: '.esrgan:ESRGANUpscaler',
+    Upscaler.upscler4xultrasharp: '.esrgan_pytorch:ESRGANUpscalerPytorch',
+    Upscaler.realcugan: '.realcugan:RealCUGANUpscaler',
+    Upscaler.mangajanai: '.mangajanai:MangaJaNaiUpscaler',
+})
 upscaler_cache = {}
 
 def get_upscaler(key: Upscaler, *args, **kwargs) -> CommonUpscaler:
@@ -0,0 +1,292 @@
+"""
+页面级检查点
+
+按阶段保存中间结果：检测（textlines、mask_raw）、OCR、文本行合并、翻译、细化后的 mask、修复后的图片。
+每个阶段的 key 由该阶段的实际输入（图片哈希、上游阶段 key、region 的文本或几何信息）加上它用到的配置片段哈希得到，
+输入不变时重跑会直接读取结果，因此崩溃或子进程被重启后可以从中断处继续，只改渲染参数时也只需重新渲染。
+
+- PageCheckpointStore 保存到磁盘，用于断点续传
+- MemoryCheckpointStore 按内存预算保留最近的结果，用于同一张图改配置后重新翻译
+
+STAGE_CONFIG / STAGE_UPSTREAM 描述配置项与阶段、阶段与阶段之间的依赖，affected_stages() 据此给出配置变化后需要重跑的阶段。
+渲染结果不缓存，渲染总是重新执行。
+"""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .log import get_logger
+
+logger = get_logger('Checkpoint')
+
+# 可缓存的阶段
+STAGES = ('detection', 'ocr', 'textline_merge', 'translation', 'mask_refinement', 'inpainting')
+# 完整流程的阶段顺序（渲染不缓存）
+PIPELINE_STAGES = STAGES + ('rendering',)
+
+# 每个阶段用到的配置项（Config 上的属性路径，可以是整个配置段或单个字段）
+STAGE_CONFIG: Dict[str, tuple] = {
+    'detection': ('detector',),
+    'ocr': ('ocr', 'render.font_color'),
+    'textline_merge': (
+        'ocr', 'force_simple_sort', 'render.rtl', 'render.font_color',
+        'translator.skip_lang', 'translator.no_text_lang_skip', 'translator.target_lang',
+        'detector.detection_size', 'detector.min_box_area_ratio',
+    ),
+    'translation': ('translator', 'render.disable_auto_wrap', 'render.uppercase', 'render.lowercase'),
+    'mask_refinement': ('mask_dilation_offset', 'ocr.ignore_bubble'),
+    'inpainting': ('inpainter',),
+    'rendering': ('render', 'upscale.revert_upscaling'),
+}
+
+# 上色、超分改变的是送入检测的图片，不计入检测的配置片段（图片哈希已经覆盖），但会影响检测及之后的阶段
+IMAGE_CONFIG = ('colorizer', 'upscale.upscaler', 'upscale.upscale_ratio', 'upscale.realcugan_model', 'upscale.tile_size')
+
+# 每个阶段的上游阶段：上游重跑后下游也要重跑
+STAGE_UPSTREAM: Dict[str, tuple] = {
+    'detection': (),
+    'ocr': ('detection',),
+    'textline_merge': ('ocr',),
+    'translation': ('textline_merge',),
+    'mask_refinement': ('textline_merge',),
+    'inpainting': ('mask_refinement',),
+    'rendering': ('translation', 'inpainting'),
+}
+
+# 读取结果时用于区分“未命中”和值为 None 的结果
+MISS = object()
+
+
+def _to_jsonable(value):
+    if hasattr(value, 'model_dump'):
+        return value.model_dump(mode='json')
+    return value
+
+
+def config_slice(config, paths: Iterable[str]) -> dict:
+    """按属性路径取出配置片段"""
+    result = {}
+    for path in paths:
+        value = config
+        for name in path.split('.'):
+            value = getattr(value, name, None)
+        result[path] = _to_jsonable(value)
+    return result
+
+
+def hash_array(arr: Optional[np.ndarray]) -> str:
+    if arr is None:
+        return 'none'
+    arr = np.ascontiguousarray(arr)
+    h = hashlib.sha1(f'{arr.shape}|{arr.dtype.str}|'.encode('utf-8'))
+    h.update(memoryview(arr).cast('B'))
+    return h.hexdigest()
+
+
+def hash_parts(*parts) -> str:
+    h = hashlib.sha1()
+    for part in parts:
+        if not isinstance(part, str):
+            part = json.dumps(part, sort_keys=True, ensure_ascii=False, default=str)
+        h.update(part.encode('utf-8'))
+        h.update(b'\x00')
+    return h.hexdigest()
+
+
+def hash_file(path: Optional[str]) -> Optional[str]:
+    """文件内容哈希，用于词典等外部输入；文件不存在时返回 None"""
+    if not path or not os.path.isfile(path):
+        return None
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def hash_env(names: Iterable[str]) -> str:
+    """环境变量取值的哈希（翻译器的 API key、地址、模型等），key 中不保留原值"""
+    return hash_parts(*(f'{name}={os.environ.get(name, "")}' for name in sorted(set(names))))
+
+
+def stage_key(stage: str, config, *inputs) -> str:
+    """由阶段名、阶段输入和该阶段的配置片段计算 key"""
+    return hash_parts(stage, config_slice(config, STAGE_CONFIG.get(stage, ())), *inputs)
+
+
+def _flatten(value, prefix: str, out: dict):
+    if isinstance(value, dict):
+        for name, item in value.items():
+            _flatten(item, f'{prefix}.{name}' if prefix else name, out)
+    else:
+        out[prefix] = value
+
+
+def changed_config_paths(old_config, new_config) -> List[str]:
+    """两份配置之间取值不同的字段路径，如 render.font_size_offset"""
+    old_values, new_values = {}, {}
+    _flatten(old_config.model_dump(mode='json'), '', old_values)
+    _flatten(new_config.model_dump(mode='json'), '', new_values)
+    return sorted(path for path in old_values.keys() | new_values.keys()
+                  if old_values.get(path) != new_values.get(path))
+
+
+def _covers(dependency: str, path: str) -> bool:
+    return path == dependency or path.startswith(dependency + '.') or dependency.startswith(path + '.')
+
+
+def stages_for_path(path: str) -> List[str]:
+    """直接读取该配置项的阶段"""
+    if any(_covers(dependency, path) for dependency in IMAGE_CONFIG):
+        stages = {'detection'}
+    else:
+        stages = set()
+    for stage, dependencies in STAGE_CONFIG.items():
+        if any(_covers(dependency, path) for dependency in dependencies):
+            stages.add(stage)
+    return [stage for stage in PIPELINE_STAGES if stage in stages]
+
+
+def downstream_stages(stages: Iterable[str]) -> List[str]:
+    """给定阶段及其所有下游阶段，按流程顺序返回"""
+    result = set(stages)
+    for stage in PIPELINE_STAGES:
+        if any(upstream in result for upstream in STAGE_UPSTREAM[stage]):
+            result.add(stage)
+    return [stage for stage in PIPELINE_STAGES if stage in result]
+
+
+def affected_stages(old_config, new_config) -> List[str]:
+    """配置从 old_config 改为 new_config 后需要重新执行的阶段"""
+    direct = set()
+    for path in changed_config_paths(old_config, new_config):
+        direct.update(stages_for_path(path))
+    return downstream_stages(direct)
+
+
+def section_stages(config) -> Dict[str, List[str]]:
+    """每个配置段直接影响的阶段（不含下游）"""
+    result = {}
+    for section in config.model_dump(mode='json'):
+        result[section] = stages_for_path(section)
+    return result
+
+
+class _CheckpointStore:
+    """检查点存储基类：值以 pickle 字节保存，读取时得到新的对象，调用方修改结果不会影响缓存"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = {stage: 0 for stage in STAGES}
+        self.misses = {stage: 0 for stage in STAGES}
+
+    def _read(self, stage: str, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def _write(self, stage: str, key: str, data: bytes):
+        raise NotImplementedError
+
+    def load(self, stage: str, key: str) -> Any:
+        value = MISS
+        try:
+            data = self._read(stage, key)
+            if data is not None:
+                value = pickle.loads(data)
+        except Exception as e:
+            logger.warning(f'[检查点] 读取失败，将重新计算 {stage}: {e}')
+            value = MISS
+        with self._lock:
+            if value is MISS:
+                self.misses[stage] = self.misses.get(stage, 0) + 1
+            else:
+                self.hits[stage] = self.hits.get(stage, 0) + 1
+        if value is not MISS:
+            logger.info(f'[检查点] 复用 {stage} 结果 ({key[:8]})')
+        return value
+
+    def save(self, stage: str, key: str, value: Any):
+        try:
+            self._write(stage, key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception as e:
+            logger.warning(f'[检查点] 保存 {stage} 失败: {e}')
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': dict(self.hits), 'misses': dict(self.misses)}
+
+
+class PageCheckpointStore(_CheckpointStore):
+    """检查点目录：<root>/<stage>/<key 前两位>/<key>.pkl"""
+
+    def __init__(self, root_dir: str):
+        super().__init__()
+        self.root_dir = os.path.abspath(root_dir)
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.root_dir, stage, key[:2], f'{key}.pkl')
+
+    def _read(self, stage: str, key: str) -> Optional[bytes]:
+        path = self._path(stage, key)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def _write(self, stage: str, key: str, data: bytes):
+        path = self._path(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先写临时文件再替换，进程中途被杀也不会留下损坏的检查点
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+class MemoryCheckpointStore(_CheckpointStore):
+    """内存中的检查点，超过 max_bytes 时淘汰最久未使用的结果"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries: 'OrderedDict[tuple, bytes]' = OrderedDict()
+
+    def _read(self, stage: str, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get((stage, key))
+            if data is not None:
+                self._entries.move_to_end((stage, key))
+            return data
+
+    def _write(self, stage: str, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop((stage, key), None)
+            if old is not None:
+                self.nbytes -= len(old)
+            self._entries[(stage, key)] = data
+            self.nbytes += len(data)
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
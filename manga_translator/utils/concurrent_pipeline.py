@@ -2,6 +2,9 @@
 并发流水线处理模块 - 真正的并行架构
 实现流水线并发：检测+OCR、翻译、修复、渲染 四个步骤在独立线程中运行
 每个线程拥有独立的事件循环，互不阻塞
+
+阶段之间通过有界阻塞队列（StageQueue）交接：队列满时上游阻塞，空时下游阻塞，
+上游结束后关闭队列，下游取完剩余项后退出，整个流水线中没有轮询和 sleep。
 """
 import asyncio
 import logging
@@ -9,15 +12,143 @@ import traceback
 import os
 import queue
 import threading
-from typing import List
+from collections import deque
+from typing import List, Optional
 from datetime import datetime, timezone
-from concurrent.futures import ThreadPoolExecutor, wait
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait
+import multiprocessing
 
 from . import Context, load_image
+from .shared_image import SharedImage
+from .tracing import tracer
 
 # 使用 manga_translator 的主 logger，确保日志能被UI捕获
 logger = logging.getLogger('manga_translator')
 
+# StageQueue.get 的特殊返回值
+CLOSED = object()  # 所有上游已结束且队列已取空，或流水线已中止
+EMPTY = object()   # 非阻塞获取时队列为空
+
+
+class StageQueue:
+    """
+    阶段间的有界阻塞队列
+
+    容量按页数（max_items）和字节数（max_bytes）限制，0 表示不限制。
+    队列为空时总能放入一项，避免单张超大图片永远放不进去。
+    producers 为上游数量，每个上游结束时调用一次 close()，全部关闭后下游取完即结束。
+    """
+
+    def __init__(self, name: str, max_items: int = 0, max_bytes: int = 0, producers: int = 1):
+        self.name = name
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._cond = threading.Condition()
+        self._items = deque()
+        self._bytes = 0
+        self._open_producers = producers
+        self._aborted = False
+
+    def _full(self, nbytes: int) -> bool:
+        if not self._items:
+            return False
+        if self.max_items and len(self._items) >= self.max_items:
+            return True
+        return bool(self.max_bytes) and self._bytes + nbytes > self.max_bytes
+
+    def put(self, item, nbytes: int = 0) -> bool:
+        """放入一项，队列满时阻塞；流水线中止时返回 False"""
+        with self._cond:
+            if self._full(nbytes) and not self._aborted:
+                with tracer.span(f'put {self.name}', 'queue'):
+                    while self._full(nbytes) and not self._aborted:
+                        self._cond.wait()
+            if self._aborted:
+                return False
+            self._items.append((item, nbytes))
+            self._bytes += nbytes
+            self._cond.notify_all()
+            return True
+
+    def get(self, block: bool = True):
+        """取出一项，队列空时阻塞；返回 CLOSED 表示不会再有新项"""
+        with self._cond:
+            if not self._items and self._open_producers > 0 and not self._aborted:
+                if not block:
+                    return EMPTY
+                with tracer.span(f'get {self.name}', 'queue'):
+                    while not self._items and self._open_producers > 0 and not self._aborted:
+                        self._cond.wait()
+            if self._aborted or not self._items:
+                return CLOSED
+            item, nbytes = self._items.popleft()
+            self._bytes -= nbytes
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        with self._cond:
+            self._open_producers = max(0, self._open_producers - 1)
+            self._cond.notify_all()
+
+    def abort(self):
+        with self._cond:
+            self._aborted = True
+            self._items.clear()
+            self._bytes = 0
+            self._cond.notify_all()
+
+    def qsize(self) -> int:
+        with self._cond:
+            return len(self._items)
+
+    def nbytes(self) -> int:
+        with self._cond:
+            return self._bytes
+
+
+def _ctx_nbytes(ctx) -> int:
+    """估算一个页面上下文占用的图像内存（用于按字节限制队列）"""
+    total = 0
+    for attr in ('img_rgb', 'img_alpha', 'mask', 'mask_raw', 'img_inpainted'):
+        value = getattr(ctx, attr, None)
+        total += getattr(value, 'nbytes', 0) or 0
+    return total
+
+
+def _refine_mask_worker(img: SharedImage, mask_raw: SharedImage, text_regions, dilation_offset: int,
+                        ignore_bubble: float, kernel_size: int, out: SharedImage):
+    """子进程：mask 细化，结果写入共享内存 out"""
+    from ..mask_refinement import dispatch as dispatch_mask_refinement
+    try:
+        mask = asyncio.run(dispatch_mask_refinement(text_regions, img.array, mask_raw.array, 'fit_text',
+                                                    dilation_offset, ignore_bubble, False, kernel_size))
+        out.array[...] = mask
+    finally:
+        img.close()
+        mask_raw.close()
+        out.close()
+
+
+def _render_worker(img: SharedImage, original: SharedImage, text_regions, font_path: str, config,
+                   out: SharedImage):
+    """
+    子进程：渲染一页，结果写入共享内存 out。
+    渲染会在 text_regions 上记录排版结果（PSD 导出用），因此把 text_regions 返回给主进程；
+    若输出尺寸与输入不同则直接返回数组。
+    """
+    from ..rendering import dispatch as dispatch_rendering
+    try:
+        output = asyncio.run(dispatch_rendering(img.array, text_regions, font_path, config, original.array))
+        if output.shape == out.shape and output.dtype == out.dtype:
+            out.array[...] = output
+            output = None
+        return output, text_regions
+    finally:
+        img.close()
+        original.close()
+        out.close()
+
 
 class ConcurrentPipeline:
     """
@@ -31,10 +162,13 @@ class ConcurrentPipeline:
     
     batch_size 控制翻译批量大小（一次翻译多少个文本块）
     
-    使用 queue.Queue 和 threading.Lock 进行线程间通信和同步。
+    使用 StageQueue 和 threading.Lock 进行线程间通信和同步。
     """
     
-    def __init__(self, translator_instance, batch_size: int = 3, max_workers: int = 4):
+    def __init__(self, translator_instance, batch_size: int = 3, max_workers: int = 4,
+                 max_queue_pages: int = 0, max_queue_bytes: int = 0,
+                 inpaint_workers: int = 1, render_workers: int = 1, process_workers: int = 0,
+                 serialize_render: bool = False):
         """
         初始化并发流水线
         
@@ -42,21 +176,36 @@ class ConcurrentPipeline:
             translator_instance: MangaTranslator实例
             batch_size: 批量大小（一次翻译多少个文本块）
             max_workers: 每个步骤的线程池大小
+            max_queue_pages: 每个阶段队列最多容纳的页数（0 表示 batch_size 的 2 倍）
+            max_queue_bytes: 每个阶段队列最多容纳的图像字节数（0 表示不限制）
+            inpaint_workers: 修复线程数（ONNX/torch 推理会释放 GIL）
+            render_workers: 渲染线程数
+            process_workers: 渲染和 mask 细化使用的进程池大小（0 表示在线程内执行）
+            serialize_render: 线程内渲染时是否全部串行（对应 pipeline_serialize_render 参数）。
+                              每个渲染线程使用自己的 TextRenderer，只有 manga2Eng/manga2EngPillow 渲染器
+                              仍使用共享的默认渲染器，这两种渲染器总是串行
         """
         self.translator = translator_instance
         self.batch_size = batch_size
+        self.max_queue_pages = max_queue_pages or max(2, batch_size * 2)
+        self.max_queue_bytes = max_queue_bytes
+        self.inpaint_workers = max(1, inpaint_workers)
+        self.render_workers = max(1, render_workers)
+        self.process_workers = max(0, process_workers)
+        self._process_pool = None
+        # manga2Eng/manga2EngPillow 使用共享的默认渲染器，线程内渲染时需要串行
+        self.serialize_render = serialize_render
+        self._render_lock = threading.Lock()
         
         # ✅ 为每个步骤创建独立的线程池，实现真正的并行处理
         # 每个线程拥有独立的事件循环，互不阻塞
         self._detection_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='DetectionThread')
         self._translation_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='TranslationThread')
-        self._inpaint_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='InpaintThread')
-        self._render_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='RenderThread')
+        self._inpaint_executor = ThreadPoolExecutor(max_workers=self.inpaint_workers, thread_name_prefix='InpaintThread')
+        self._render_executor = ThreadPoolExecutor(max_workers=self.render_workers, thread_name_prefix='RenderThread')
         
-        # 线程安全的队列
-        self.translation_queue = queue.Queue()  # 翻译队列
-        self.inpaint_queue = queue.Queue()      # 修复队列
-        self.render_queue = queue.Queue()       # 渲染队列
+        # 有界阻塞队列（在 process_batch 中按批次重建）
+        self._create_queues()
         
         # 结果存储 {image_name: ctx}
         # 使用线程锁保护共享数据
@@ -83,6 +232,8 @@ class ConcurrentPipeline:
             'inpaint': 0,
             'rendering': 0
         }
+        # 每个阶段正在处理的页数
+        self.in_flight = {key: 0 for key in self.stats}
         
         # 结果列表（线程安全）
         self._results = []
@@ -90,10 +241,137 @@ class ConcurrentPipeline:
         
         # ✅ 线程安全的状态消息队列（用于向主线程报告关键日志）
         self._status_queue = queue.Queue()
+        
+        # 主线程事件循环及唤醒事件（工作线程有状态更新或结束时唤醒主线程）
+        self._main_loop = None
+        self._wakeup = None
+    
+    def _create_queues(self):
+        pages, nbytes = self.max_queue_pages, self.max_queue_bytes
+        self.translation_queue = StageQueue('translation', pages, nbytes)  # 翻译队列
+        self.inpaint_queue = StageQueue('inpaint', pages, nbytes)          # 修复队列
+        # 渲染队列的上游：检测+OCR（无文本页面）、翻译、每个修复线程
+        self.render_queue = StageQueue('render', pages, nbytes, producers=2 + self.inpaint_workers)
+    
+    def _abort(self):
+        """中止流水线：唤醒所有阻塞在队列上的线程"""
+        self.stop_workers = True
+        for q in (self.translation_queue, self.inpaint_queue, self.render_queue):
+            q.abort()
+        self._notify_main()
+    
+    def _fail(self, message: str, exc: Exception):
+        self.has_critical_error = True
+        self.critical_error_msg = message
+        self.critical_error_exception = exc
+        self._abort()
+    
+    def _stage_enter(self, stage: str, count: int = 1):
+        with self._lock:
+            self.in_flight[stage] += count
+    
+    def _stage_exit(self, stage: str, count: int = 1):
+        with self._lock:
+            self.in_flight[stage] -= count
+    
+    def _stage_done(self, stage: str, count: int = 1) -> int:
+        with self._lock:
+            self.stats[stage] += count
+            return self.stats[stage]
+    
+    async def _refine_mask(self, config, ctx):
+        """mask 细化；配置了进程池时在子进程中执行（仍经过 _run_mask_refinement 的检查点和 trace）"""
+        if self._process_pool is None or self.translator.verbose:
+            return await self.translator._run_mask_refinement(config, ctx)
+        return await self.translator._run_mask_refinement(config, ctx, refine=self._refine_mask_in_process)
+    
+    async def _refine_mask_in_process(self, config, ctx):
+        """在子进程中细化 mask，图像经共享内存传递"""
+        img = SharedImage.from_array(ctx.img_rgb)
+        mask_raw = SharedImage.from_array(ctx.mask_raw)
+        out = SharedImage(ctx.img_rgb.shape[:2], 'uint8')
+        try:
+            future = self._process_pool.submit(
+                _refine_mask_worker, img, mask_raw, ctx.text_regions, config.mask_dilation_offset,
+                config.ocr.ignore_bubble, self.translator.kernel_size, out)
+            await asyncio.wrap_future(future)
+            return out.copy()
+        finally:
+            for shared in (img, mask_raw, out):
+                shared.release()
+    
+    def _can_render_in_process(self, config) -> bool:
+        from ..config import Renderer
+        if self._process_pool is None or self.translator.verbose:
+            return False
+        return config.render.renderer not in (Renderer.none, Renderer.manga2Eng, Renderer.manga2EngPillow)
+    
+    async def _render(self, config, ctx):
+        """渲染一页；配置了进程池时在子进程中执行，否则在当前线程调用 _run_text_rendering"""
+        if not self._can_render_in_process(config):
+            from ..config import Renderer
+            if not self.serialize_render and config.render.renderer not in (Renderer.manga2Eng, Renderer.manga2EngPillow):
+                return await self.translator._run_text_rendering(config, ctx)
+            with self._render_lock:
+                return await self.translator._run_text_rendering(config, ctx)
+        self.translator._check_cancelled()
+        font_path = config.render.font_path or self.translator.font_path
+        img = SharedImage.from_array(ctx.img_inpainted)
+        original = SharedImage.from_array(ctx.img_rgb)
+        out = SharedImage(ctx.img_inpainted.shape, ctx.img_inpainted.dtype)
+        try:
+            future = self._process_pool.submit(_render_worker, img, original, ctx.text_regions, font_path, config, out)
+            output, text_regions = await asyncio.wrap_future(future)
+            ctx.text_regions = text_regions
+            if output is None:
+                output = out.copy()
+        finally:
+            for shared in (img, original, out):
+                shared.release()
+        # 与 _run_text_rendering 一致：渲染后释放不再需要的图像
+        ctx.img_rgb = None
+        ctx.img_inpainted = None
+        return output
+    
+    def get_status(self) -> dict:
+        """各阶段的完成数、在途数和队列积压（页数/字节数）"""
+        with self._lock:
+            in_flight = dict(self.in_flight)
+        queues = {
+            'translation': self.translation_queue,
+            'inpaint': self.inpaint_queue,
+            'rendering': self.render_queue,
+        }
+        status = {}
+        for stage, done in self.stats.items():
+            entry = {'done': done, 'in_flight': in_flight[stage]}
+            if stage in queues:
+                entry['queued'] = queues[stage].qsize()
+                entry['queued_bytes'] = queues[stage].nbytes()
+            status[stage] = entry
+        return status
+    
+    def _format_status(self) -> str:
+        status = self.get_status()
+        names = {'detection_ocr': '检测+OCR', 'translation': '翻译', 'inpaint': '修复', 'rendering': '渲染'}
+        in_flight = ' '.join(f"{names[k]}={v['in_flight']}" for k, v in status.items())
+        queued = ' '.join(f"{names[k]}={v['queued']}" for k, v in status.items() if 'queued' in v)
+        return f"在途: {in_flight} | 队列: {queued}"
+    
+    def _notify_main(self):
+        loop, event = self._main_loop, self._wakeup
+        if loop is None or event is None:
+            return
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            # 主事件循环已关闭
+            pass
     
     def _emit_status(self, message: str):
         """向主线程发送状态消息（线程安全）"""
         self._status_queue.put(message)
+        self._notify_main()
     
     def _flush_status_to_logger(self):
         """将队列中的状态消息输出到 logger（在主线程调用）"""
@@ -146,10 +424,11 @@ class ConcurrentPipeline:
                 logger.warning(f"[检测+OCR] 收到停止信号，已处理 {idx}/{len(file_paths)} 张图片")
                 break
             
+            self._stage_enter('detection_ocr')
             try:
                 # 分批加载：只在需要时加载图片
                 logger.debug(f"[检测+OCR] 加载图片: {file_path}")
-                with open(file_path, 'rb') as f:
+                with tracer.span('decode', 'io', page=os.path.basename(file_path)), open(file_path, 'rb') as f:
                     image = Image.open(f)
                     image.load()  # 立即加载图片数据
                 image.name = file_path
@@ -161,6 +440,7 @@ class ConcurrentPipeline:
                 ctx.verbose = self.translator.verbose
                 ctx.save_quality = self.translator.save_quality
                 ctx.config = config
+                ctx.page_index = idx
                 
                 logger.info(f"[检测+OCR] 处理 {idx+1}/{self.total_images}: {ctx.image_name}")
                 
@@ -168,7 +448,7 @@ class ConcurrentPipeline:
                 try:
                     self.translator._check_cancelled()
                 except:
-                    self.stop_workers = True
+                    self._abort()
                     logger.warning(f"[检测+OCR] 用户取消，已处理 {idx}/{len(file_paths)} 张图片")
                     break
                 
@@ -182,7 +462,7 @@ class ConcurrentPipeline:
                 try:
                     self.translator._check_cancelled()
                 except:
-                    self.stop_workers = True
+                    self._abort()
                     logger.warning(f"[检测+OCR] 用户取消，已处理 {idx}/{len(file_paths)} 张图片")
                     break
 
@@ -198,7 +478,7 @@ class ConcurrentPipeline:
                 try:
                     self.translator._check_cancelled()
                 except:
-                    self.stop_workers = True
+                    self._abort()
                     logger.warning(f"[检测+OCR] 用户取消，已处理 {idx}/{len(file_paths)} 张图片")
                     break
                 
@@ -209,7 +489,7 @@ class ConcurrentPipeline:
                 try:
                     self.translator._check_cancelled()
                 except:
-                    self.stop_workers = True
+                    self._abort()
                     logger.warning(f"[检测+OCR] 用户取消，已处理 {idx}/{len(file_paths)} 张图片")
                     break
                 
@@ -220,7 +500,7 @@ class ConcurrentPipeline:
                 try:
                     self.translator._check_cancelled()
                 except:
-                    self.stop_workers = True
+                    self._abort()
                     logger.warning(f"[检测+OCR] 用户取消，已处理 {idx}/{len(file_paths)} 张图片")
                     break
                 
@@ -228,10 +508,10 @@ class ConcurrentPipeline:
                 if ctx.textlines:
                     ctx.text_regions = await self.translator._run_textline_merge(config, ctx)
                 
-                self.stats['detection_ocr'] += 1
+                self._stage_done('detection_ocr')
                 # ✅ 发送状态日志（每完成一张图）
                 text_count = len(ctx.text_regions) if ctx.text_regions else 0
-                self._emit_status(f"[检测+OCR] 完成 {idx+1}/{self.total_images}: {os.path.basename(file_path)} ({text_count} 个文本块)")
+                self._emit_status(f"[检测+OCR] 完成 {idx+1}/{self.total_images}: {os.path.basename(file_path)} ({text_count} 个文本块) | {self._format_status()}")
                 
                 # 保存图片尺寸
                 if hasattr(image, 'size'):
@@ -243,10 +523,12 @@ class ConcurrentPipeline:
                 with self._lock:
                     self.base_contexts[ctx.image_name] = ctx
                 
-                # 放入翻译队列和修复队列
+                # 放入翻译队列和修复队列（队列满时阻塞，形成背压）
+                nbytes = _ctx_nbytes(ctx)
                 if ctx.text_regions:
-                    self.translation_queue.put((ctx.image_name, config))
-                    self.inpaint_queue.put((ctx.image_name, config))
+                    if not (self.translation_queue.put((ctx.image_name, config), nbytes)
+                            and self.inpaint_queue.put((ctx.image_name, config), nbytes)):
+                        break
                     logger.info(f"[检测+OCR] {ctx.image_name} 已加入翻译队列和修复队列 (翻译队列大小: {self.translation_queue.qsize()})")
                 else:
                     # 无文本，直接标记完成并放入渲染队列
@@ -254,7 +536,8 @@ class ConcurrentPipeline:
                         self.translation_done[ctx.image_name] = []
                         self.inpaint_done[ctx.image_name] = True
                     ctx.text_regions = []
-                    self.render_queue.put((ctx, config))
+                    if not self.render_queue.put((ctx, config), nbytes):
+                        break
                     logger.debug(f"[检测+OCR] {ctx.image_name} 无文本，直接进入渲染队列")
                 
             except Exception as e:
@@ -265,14 +548,16 @@ class ConcurrentPipeline:
                 
                 logger.error(f"[检测+OCR] 失败: {error_msg}")
                 logger.error(traceback.format_exc())
-                self.has_critical_error = True
-                self.critical_error_msg = f"检测+OCR失败: {error_msg}"
-                self.critical_error_exception = e
-                self.stop_workers = True
+                self._fail(f"检测+OCR失败: {error_msg}", e)
                 break
+            finally:
+                self._stage_exit('detection_ocr')
         
-        # 标记检测+OCR全部完成
+        # 标记检测+OCR全部完成，关闭下游队列
         self.detection_ocr_done = True
+        self.translation_queue.close()
+        self.inpaint_queue.close()
+        self.render_queue.close()
         logger.info("[检测+OCR线程] 处理完成")
     
     def _translation_thread(self):
@@ -294,110 +579,112 @@ class ConcurrentPipeline:
         
         batch = []
         
-        while not self.stop_workers:
-            try:
-                if self.has_critical_error:
-                    logger.warning(f"[翻译] 检测到严重错误，停止翻译 (已完成 {self.stats['translation']}/{self.total_images})")
+        def _add_to_batch(image_name, config):
+            with self._lock:
+                ctx = self.base_contexts.get(image_name)
+            if ctx:
+                batch.append((ctx, config))
+            else:
+                logger.error(f"[翻译] 找不到 {image_name} 的基础上下文")
+        
+        try:
+            while True:
+                # 阻塞等待下一张图片；上游结束且队列取空时返回 CLOSED
+                item = self.translation_queue.get()
+                if item is CLOSED:
                     break
+                image_name, config = item
+                _add_to_batch(image_name, config)
                 
-                # 从队列获取任务（非阻塞）
-                try:
-                    image_name, config = self.translation_queue.get(timeout=0.1)
-                    with self._lock:
-                        ctx = self.base_contexts.get(image_name)
-                    if ctx:
-                        batch.append((ctx, config))
-                    else:
-                        logger.error(f"[翻译] 找不到 {image_name} 的基础上下文")
-                except queue.Empty:
-                    if not batch:
-                        if self.detection_ocr_done and self.translation_queue.empty():
-                            break
-                        if self.has_critical_error:
-                            logger.warning("[翻译] 检测到严重错误，停止等待")
-                            break
-                        continue
-                
-                # 收集更多图片直到达到batch_size
+                # 取出已就绪的图片凑满批次（不等待）
                 while len(batch) < self.batch_size:
-                    try:
-                        image_name, config = self.translation_queue.get(timeout=0.05)
-                        with self._lock:
-                            ctx = self.base_contexts.get(image_name)
-                        if ctx:
-                            batch.append((ctx, config))
-                        else:
-                            logger.error(f"[翻译] 找不到 {image_name} 的基础上下文")
-                    except queue.Empty:
+                    item = self.translation_queue.get(block=False)
+                    if item is EMPTY or item is CLOSED:
                         break
-                
-                # 判断是否应该翻译当前批次
-                should_translate = False
-                reason = ""
+                    image_name, config = item
+                    _add_to_batch(image_name, config)
                 
                 if len(batch) >= self.batch_size:
-                    should_translate = True
-                    reason = f"批次已满 ({len(batch)}/{self.batch_size})"
-                elif batch and self.detection_ocr_done:
-                    should_translate = True
-                    reason = f"OCR完成，翻译剩余 {len(batch)} 张图片"
-                
-                if should_translate:
-                    logger.info(f"[翻译] {reason}，开始翻译")
+                    logger.info(f"[翻译] 批次已满 ({len(batch)}/{self.batch_size})，开始翻译")
                     await self._process_translation_batch(batch)
                     batch = []
-                
-            except Exception as e:
-                try:
-                    error_msg = str(e)
-                except Exception:
-                    error_msg = f"无法获取异常信息 (异常类型: {type(e).__name__})"
-                
-                logger.error(f"[翻译线程] 错误: {error_msg}")
-                logger.error(traceback.format_exc())
-                self.has_critical_error = True
-                self.critical_error_msg = f"翻译线程错误: {error_msg}"
-                self.critical_error_exception = e
-                self.stop_workers = True
-                break
-        
-        # 处理剩余批次
-        if batch and not self.stop_workers:
-            logger.info(f"[翻译] 翻译剩余 {len(batch)} 张图片")
-            await self._process_translation_batch(batch)
+            
+            # 处理剩余批次
+            if batch and not self.stop_workers:
+                logger.info(f"[翻译] OCR完成，翻译剩余 {len(batch)} 张图片")
+                await self._process_translation_batch(batch)
+            elif self.has_critical_error:
+                logger.warning(f"[翻译] 检测到严重错误，停止翻译 (已完成 {self.stats['translation']}/{self.total_images})")
+        except Exception as e:
+            try:
+                error_msg = str(e)
+            except Exception:
+                error_msg = f"无法获取异常信息 (异常类型: {type(e).__name__})"
+            
+            logger.error(f"[翻译线程] 错误: {error_msg}")
+            logger.error(traceback.format_exc())
+            self._fail(f"翻译线程错误: {error_msg}", e)
+        finally:
+            self.render_queue.close()
         
         if self.stats['translation'] >= self.total_images:
             logger.info(f"[翻译线程] 所有图片已翻译 ({self.stats['translation']}/{self.total_images})")
         
         logger.info("[翻译线程] 停止")
     
+    def _mark_stage_done(self, image_name: str, translated_regions=None, inpainted: bool = False):
+        """
+        记录翻译/修复完成，两者都完成时返回待渲染的 ctx，否则返回 None。
+        入队在锁外进行，避免渲染队列满时持锁阻塞。
+        """
+        with self._lock:
+            if inpainted:
+                self.inpaint_done[image_name] = True
+            else:
+                self.translation_done[image_name] = translated_regions
+                if image_name in self.base_contexts:
+                    self.base_contexts[image_name].text_regions = translated_regions
+            if image_name not in self.inpaint_done or image_name not in self.translation_done:
+                return None
+            render_ctx = self.base_contexts.get(image_name)
+            if render_ctx is None:
+                logger.error(f"[流水线] 找不到 {image_name} 的基础上下文")
+                return None
+            regions = self.translation_done.get(image_name)
+            if isinstance(regions, (list, tuple)):
+                render_ctx.text_regions = regions
+            else:
+                if regions:
+                    logger.warning(f"[流水线] {image_name} 的翻译结果类型异常: {type(regions)}, 使用空列表")
+                render_ctx.text_regions = []
+            return render_ctx
+    
     async def _process_translation_batch(self, batch: List[tuple]):
         """处理一个翻译批次"""
         if not batch:
             return
         
         logger.info(f"[翻译] 批量翻译 {len(batch)} 张图片")
+        self._stage_enter('translation', len(batch))
         
         try:
             # 直接调用翻译（已经在独立线程的事件循环中）
             translated_batch = await self.translator._batch_translate_contexts(batch, len(batch))
             
-            self.stats['translation'] += len(batch)
-            # ✅ 发送状态日志
-            self._emit_status(f"[翻译] 批次完成 ({self.stats['translation']}/{self.total_images})")
+            self._stage_done('translation', len(batch))
             
             ready_to_render = 0
             for ctx, config in translated_batch:
-                with self._lock:
-                    self.translation_done[ctx.image_name] = ctx.text_regions
-                    if ctx.image_name in self.base_contexts:
-                        self.base_contexts[ctx.image_name].text_regions = ctx.text_regions
-                    
-                    # 检查修复是否也完成
-                    if ctx.image_name in self.inpaint_done:
-                        self.render_queue.put((ctx, config))
-                        ready_to_render += 1
-                        logger.info(f"[翻译] {ctx.image_name} 翻译+修复都完成，立即加入渲染队列")
+                render_ctx = self._mark_stage_done(ctx.image_name, translated_regions=ctx.text_regions)
+                if render_ctx is not None:
+                    # 修复也已完成，立即加入渲染队列
+                    if not self.render_queue.put((render_ctx, config), _ctx_nbytes(render_ctx)):
+                        break
+                    ready_to_render += 1
+                    logger.info(f"[翻译] {ctx.image_name} 翻译+修复都完成，立即加入渲染队列")
+            
+            # ✅ 发送状态日志
+            self._emit_status(f"[翻译] 批次完成 ({self.stats['translation']}/{self.total_images}) | {self._format_status()}")
             
             if ready_to_render > 0:
                 logger.info(f"[翻译] 批次中 {ready_to_render}/{len(batch)} 张图片立即加入渲染队列")
@@ -415,16 +702,15 @@ class ConcurrentPipeline:
             logger.error(f"[翻译] 异常类型: {type(e).__name__}")
             logger.error(traceback.format_exc())
             
-            self.has_critical_error = True
-            self.critical_error_msg = f"翻译批次失败: {error_msg}"
-            self.critical_error_exception = e
-            self.stop_workers = True
-            
             for ctx, config in batch:
                 ctx.translation_error = error_msg
                 with self._lock:
                     self.translation_done[ctx.image_name] = []
                 ctx.text_regions = []
+            
+            self._fail(f"翻译批次失败: {error_msg}", e)
+        finally:
+            self._stage_exit('translation', len(batch))
     
     def _inpaint_thread(self):
         """修复工作线程（在独立线程中运行）"""
@@ -443,30 +729,17 @@ class ConcurrentPipeline:
         
         logger.info("[修复线程] 启动")
         
-        inpaint_count = 0
-        
-        while not self.stop_workers:
-            try:
-                if self.has_critical_error:
-                    logger.warning(f"[修复] 检测到严重错误，停止修复 (已完成 {inpaint_count}/{self.total_images})")
-                    break
-                
-                # 检查是否完成所有任务
-                if self.detection_ocr_done and self.inpaint_queue.empty():
-                    import time
-                    time.sleep(0.5)
-                    if self.inpaint_queue.empty():
-                        logger.info(f"[修复线程] 所有任务已完成 ({inpaint_count}/{self.total_images})")
-                        break
-                
-                # 尝试获取任务
-                try:
-                    image_name, config = self.inpaint_queue.get(timeout=1.0)
-                except queue.Empty:
+        try:
+            while True:
+                # 阻塞等待任务；上游结束且队列取空时返回 CLOSED
+                item = self.inpaint_queue.get()
+                if item is CLOSED:
                     if self.has_critical_error:
-                        logger.warning("[修复] 检测到严重错误，停止等待")
-                        break
-                    continue
+                        logger.warning(f"[修复] 检测到严重错误，停止修复 (已完成 {self.stats['inpaint']}/{self.total_images})")
+                    else:
+                        logger.info(f"[修复线程] 所有任务已完成 ({self.stats['inpaint']}/{self.total_images})")
+                    break
+                image_name, config = item
                 
                 with self._lock:
                     ctx = self.base_contexts.get(image_name)
@@ -475,54 +748,40 @@ class ConcurrentPipeline:
                     continue
                 
                 logger.info(f"[修复] 处理: {ctx.image_name}")
+                self._stage_enter('inpaint')
+                try:
+                    # Mask refinement
+                    if ctx.mask is None and ctx.text_regions:
+                        ctx.mask = await self._refine_mask(config, ctx)
+                    
+                    # Inpainting
+                    if ctx.text_regions:
+                        ctx.img_inpainted = await self.translator._run_inpainting(config, ctx)
+                finally:
+                    self._stage_exit('inpaint')
                 
-                # Mask refinement
-                if ctx.mask is None and ctx.text_regions:
-                    ctx.mask = await self.translator._run_mask_refinement(config, ctx)
-                
-                # Inpainting
-                if ctx.text_regions:
-                    ctx.img_inpainted = await self.translator._run_inpainting(config, ctx)
-                
-                self.stats['inpaint'] += 1
-                inpaint_count += 1
+                inpaint_count = self._stage_done('inpaint')
                 # ✅ 发送状态日志
-                self._emit_status(f"[修复] 完成 {inpaint_count}/{self.total_images}: {os.path.basename(ctx.image_name)}")
+                self._emit_status(f"[修复] 完成 {inpaint_count}/{self.total_images}: {os.path.basename(ctx.image_name)} | {self._format_status()}")
                 
-                # 标记修复完成
-                with self._lock:
-                    self.inpaint_done[ctx.image_name] = True
-                    
-                    # 如果翻译也完成了，放入渲染队列
-                    if ctx.image_name in self.translation_done:
-                        render_ctx = self.base_contexts.get(ctx.image_name)
-                        if render_ctx:
-                            translated_regions = self.translation_done.get(ctx.image_name)
-                            if isinstance(translated_regions, (list, tuple)):
-                                render_ctx.text_regions = translated_regions
-                            elif translated_regions:
-                                logger.warning(f"[修复] {ctx.image_name} 的翻译结果类型异常: {type(translated_regions)}, 使用空列表")
-                                render_ctx.text_regions = []
-                            else:
-                                render_ctx.text_regions = []
-                            self.render_queue.put((render_ctx, config))
-                            logger.info(f"[修复] {ctx.image_name} 翻译+修复都完成，加入渲染队列")
-                        else:
-                            logger.error(f"[修复] 找不到 {ctx.image_name} 的基础上下文")
-                
-            except Exception as e:
-                try:
-                    error_msg = str(e)
-                except Exception:
-                    error_msg = f"无法获取异常信息 (异常类型: {type(e).__name__})"
+                # 标记修复完成，如果翻译也完成了，放入渲染队列
+                render_ctx = self._mark_stage_done(ctx.image_name, inpainted=True)
+                if render_ctx is not None:
+                    if not self.render_queue.put((render_ctx, config), _ctx_nbytes(render_ctx)):
+                        break
+                    logger.info(f"[修复] {ctx.image_name} 翻译+修复都完成，加入渲染队列")
                 
-                logger.error(f"[修复线程] 错误: {error_msg}")
-                logger.error(traceback.format_exc())
-                self.has_critical_error = True
-                self.critical_error_msg = f"修复线程错误: {error_msg}"
-                self.critical_error_exception = e
-                self.stop_workers = True
-                break
+        except Exception as e:
+            try:
+                error_msg = str(e)
+            except Exception:
+                error_msg = f"无法获取异常信息 (异常类型: {type(e).__name__})"
+            
+            logger.error(f"[修复线程] 错误: {error_msg}")
+            logger.error(traceback.format_exc())
+            self._fail(f"修复线程错误: {error_msg}", e)
+        finally:
+            self.render_queue.close()
         
         logger.info("[修复线程] 停止")
     
@@ -543,29 +802,19 @@ class ConcurrentPipeline:
         
         logger.info("[渲染线程] 启动")
         
-        rendered_count = 0
-        
-        while not self.stop_workers or rendered_count < self.total_images:
-            try:
+        while True:
+            # 阻塞等待任务；所有上游结束且队列取空时返回 CLOSED
+            item = self.render_queue.get()
+            if item is CLOSED:
                 if self.has_critical_error:
-                    logger.warning(f"[渲染] 检测到严重错误，停止渲染 (已完成 {rendered_count}/{self.total_images})")
-                    break
-                
-                # 尝试获取任务
-                try:
-                    ctx, config = self.render_queue.get(timeout=1.0)
-                except queue.Empty:
-                    # 检查是否应该退出
-                    if self.stop_workers:
-                        logger.info(f"[渲染] 收到停止信号，已渲染 {rendered_count}/{self.total_images} 张图片")
-                        break
-                    if rendered_count >= self.total_images:
-                        break
-                    if self.has_critical_error:
-                        logger.warning("[渲染] 检测到严重错误，停止等待")
-                        break
-                    continue
-                
+                    logger.warning(f"[渲染] 检测到严重错误，停止渲染 (已完成 {self.stats['rendering']}/{self.total_images})")
+                elif self.stop_workers:
+                    logger.info(f"[渲染] 收到停止信号，已渲染 {self.stats['rendering']}/{self.total_images} 张图片")
+                break
+            ctx, config = item
+            
+            self._stage_enter('rendering')
+            try:
                 logger.info(f"[渲染] 从队列获取任务: {ctx.image_name} (队列剩余: {self.render_queue.qsize()})")
                 
                 # 验证ctx
@@ -595,15 +844,14 @@ class ConcurrentPipeline:
                     from .generic import dump_image
                     ctx.result = dump_image(ctx.input, ctx.img_rgb, ctx.img_alpha)
                 else:
-                    ctx.img_rendered = await self.translator._run_text_rendering(config, ctx)
+                    ctx.img_rendered = await self._render(config, ctx)
                     from .generic import dump_image
                     ctx.result = dump_image(ctx.input, ctx.img_rendered, ctx.img_alpha)
                 
-                self.stats['rendering'] += 1
-                rendered_count += 1
+                rendered_count = self._stage_done('rendering')
                 
                 # ✅ 发送状态日志（每完成一张图）
-                self._emit_status(f"[渲染] 完成 {rendered_count}/{self.total_images}: {os.path.basename(ctx.image_name)}")
+                self._emit_status(f"[渲染] 完成 {rendered_count}/{self.total_images}: {os.path.basename(ctx.image_name)} | {self._format_status()}")
                 
                 # 保存
                 if ctx.result is not None:
@@ -648,7 +896,7 @@ class ConcurrentPipeline:
                 
                 # 添加到结果列表
                 with self._results_lock:
-                    self._results.append(ctx)
+                    self._results.append((ctx.page_index, ctx))
 
                 # 清理内存 - 调用统一清理函数
                 logger.debug(f"[渲染] 清理内存: {ctx.image_name}")
@@ -668,11 +916,10 @@ class ConcurrentPipeline:
                 
                 logger.error(f"[渲染线程] 错误: {error_msg}")
                 logger.error(traceback.format_exc())
-                self.has_critical_error = True
-                self.critical_error_msg = f"渲染线程错误: {error_msg}"
-                self.critical_error_exception = e
-                self.stop_workers = True
+                self._fail(f"渲染线程错误: {error_msg}", e)
                 break
+            finally:
+                self._stage_exit('rendering')
         
         logger.info("[渲染线程] 停止")
     
@@ -692,10 +939,14 @@ class ConcurrentPipeline:
         
         logger.info(f"[并发流水线] 开始处理 {self.total_images} 张图片")
         logger.info(f"[并发流水线] 真正并行模式: 4个独立线程（检测+OCR / 翻译 / 修复 / 渲染）")
+        logger.info(f"[并发流水线] 队列容量: {self.max_queue_pages} 页"
+                    + (f" / {self.max_queue_bytes / 1024 / 1024:.0f}MB" if self.max_queue_bytes else ""))
         
         # 重置统计
         for key in self.stats:
             self.stats[key] = 0
+            self.in_flight[key] = 0
+        self._create_queues()
         self.translation_done.clear()
         self.inpaint_done.clear()
         self.base_contexts.clear()
@@ -706,19 +957,39 @@ class ConcurrentPipeline:
         self.critical_error_exception = None
         self._results = []
         
-        # 提交4个独立线程任务
+        # 工作线程有状态更新或结束时通过该事件唤醒主线程
+        self._main_loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        
+        # 渲染/mask 细化进程池（spawn 启动，避免 fork 带上线程和 CUDA 上下文）
+        if self.process_workers > 0 and self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self.process_workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            logger.info(f"[并发流水线] 渲染/mask细化进程池: {self.process_workers} 个进程")
+        
+        # 提交独立线程任务：检测+OCR、翻译各一个，修复、渲染按配置的线程数
         futures = [
             self._detection_executor.submit(self._detection_ocr_thread, file_paths, configs),
             self._translation_executor.submit(self._translation_thread),
-            self._inpaint_executor.submit(self._inpaint_thread),
-            self._render_executor.submit(self._render_thread),
         ]
+        thread_names = ["检测+OCR", "翻译"]
+        for i in range(self.inpaint_workers):
+            futures.append(self._inpaint_executor.submit(self._inpaint_thread))
+            thread_names.append(f"修复#{i + 1}")
+        for i in range(self.render_workers):
+            futures.append(self._render_executor.submit(self._render_thread))
+            thread_names.append(f"渲染#{i + 1}")
+        for future in futures:
+            future.add_done_callback(lambda _: self._notify_main())
         
         try:
-            # 等待所有线程完成（在外部循环中检查以便响应取消）
+            # 等待所有线程完成（事件驱动，等待期间可响应取消）
             last_rendered = 0
             while True:
-                done, not_done = wait(futures, timeout=0.5)
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                done = [f for f in futures if f.done()]
+                not_done = [f for f in futures if not f.done()]
                 
                 # ✅ 刷新子线程的状态日志到主线程
                 self._flush_status_to_logger()
@@ -738,39 +1009,38 @@ class ConcurrentPipeline:
                 for f in done:
                     if f.exception():
                         raise f.exception()
-                # 让出控制权，检查取消
-                await asyncio.sleep(0)
                 
         except asyncio.CancelledError:
             # 用户取消了任务
             logger.warning(f"[并发流水线] 用户取消任务")
-            self.stop_workers = True
+            self._abort()
             # 等待所有线程停止（最多等待10秒）
             logger.info("[并发流水线] 等待所有线程停止...")
             done, not_done = wait(futures, timeout=10.0)
             if not_done:
                 # 显示哪些线程没有停止
-                thread_names = []
-                for i, future in enumerate(futures):
-                    if future in not_done:
-                        names = ["检测+OCR", "翻译", "修复", "渲染"]
-                        thread_names.append(names[i])
-                logger.warning(f"[并发流水线] {len(not_done)} 个线程未能在10秒内停止: {', '.join(thread_names)}")
+                stuck = [name for name, future in zip(thread_names, futures) if future in not_done]
+                logger.warning(f"[并发流水线] {len(not_done)} 个线程未能在10秒内停止: {', '.join(stuck)}")
             else:
                 logger.info("[并发流水线] 所有线程已停止")
             raise
         except Exception as e:
             logger.error(f"[并发流水线] 错误: {e}")
             logger.error(traceback.format_exc())
-            self.stop_workers = True
+            self._abort()
             raise
         finally:
             self.stop_workers = True
+            self._main_loop = None
+            self._wakeup = None
             # 关闭所有线程池
             for executor in [self._detection_executor, self._translation_executor, 
                            self._inpaint_executor, self._render_executor]:
                 if executor:
                     executor.shutdown(wait=False)
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait=False, cancel_futures=True)
+                self._process_pool = None
         
         # 检查是否有严重错误
         if self.has_critical_error:
@@ -790,4 +1060,5 @@ class ConcurrentPipeline:
                    f"翻译={self.stats['translation']}, 修复={self.stats['inpaint']}, "
                    f"渲染={self.stats['rendering']}")
         
-        return self._results
+        # 按输入顺序返回，与各阶段的完成顺序无关
+        return [ctx for _, ctx in sorted(self._results, key=lambda item: item[0])]
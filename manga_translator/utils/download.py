@@ -0,0 +1,221 @@
+"""
+模型文件下载
+
+- 有多个备用链接时先并发探测（Range: bytes=0-0 请求的首字节耗时），按响应快慢依次尝试
+- 已有 .part 文件时通过 HTTP Range 续传，连接中断时从已写入的位置重试
+- 边下载边计算 sha256，下载完成即得到哈希，不需要再完整读一遍文件
+- download_files() 在同一个会话中并发下载多个文件
+
+    digest = await download_file(['https://a/model.pth', 'https://b/model.pth'], 'models/model.pth.part')
+"""
+import asyncio
+import hashlib
+import os
+import sys
+import time
+from typing import List, Optional, Sequence, Union
+
+import aiohttp
+import tqdm
+
+CHUNK_SIZE = 1 << 16
+# 同时下载的文件数
+DEFAULT_CONCURRENCY = 4
+# 连接中断后在同一链接上续传的次数（有进展时重新计数）
+DEFAULT_RETRIES = 3
+# 小于该大小的结果视为下载失败（例如返回了 404 页面）
+MIN_FILE_SIZE = 1024
+
+
+class DownloadError(Exception):
+    pass
+
+
+class SlowDownloadError(DownloadError):
+    pass
+
+
+class _PartFile:
+    """正在下载的文件：追加写入，同时记录已写入的字节数和增量 sha256"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    self.sha256.update(chunk)
+                    self.size += len(chunk)
+        self._file = open(path, 'ab')
+
+    def write(self, data: bytes):
+        self._file.write(data)
+        self.sha256.update(data)
+        self.size += len(data)
+
+    def restart(self):
+        self._file.seek(0)
+        self._file.truncate()
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def close(self):
+        self._file.close()
+
+
+def _as_list(urls: Union[str, Sequence[str]]) -> List[str]:
+    return [urls] if isinstance(urls, str) else list(urls)
+
+
+def _client_timeout(timeout: float) -> aiohttp.ClientTimeout:
+    # 大文件不限制总时长，只限制连接和两次读取之间的间隔；速度由 min_speed_kbps 检查
+    return aiohttp.ClientTimeout(total=None, sock_connect=timeout, sock_read=timeout)
+
+
+async def probe_mirror(session: aiohttp.ClientSession, url: str, timeout: float = 10) -> float:
+    """请求第一个字节，返回耗时（秒）"""
+    start = time.perf_counter()
+    async with session.get(url, headers={'Range': 'bytes=0-0'}, allow_redirects=True,
+                           timeout=aiohttp.ClientTimeout(total=timeout)) as r:
+        if r.status >= 400:
+            raise DownloadError(f'Couldn\'t resolve url: "{url}" (Error: {r.status})')
+        await r.content.read(1)
+    return time.perf_counter() - start
+
+
+async def rank_mirrors(session: aiohttp.ClientSession, urls: Sequence[str], timeout: float = 10) -> List[str]:
+    """并发探测所有链接，按响应快慢排序；探测失败的链接排在最后，仍会被尝试"""
+    urls = list(urls)
+    if len(urls) < 2:
+        return urls
+    results = await asyncio.gather(*(probe_mirror(session, url, timeout) for url in urls), return_exceptions=True)
+    reachable = sorted((elapsed, i) for i, elapsed in enumerate(results) if not isinstance(elapsed, BaseException))
+    failed = [i for i, elapsed in enumerate(results) if isinstance(elapsed, BaseException)]
+    return [urls[i] for _, i in reachable] + [urls[i] for i in failed]
+
+
+async def _stream(session: aiohttp.ClientSession, url: str, part: _PartFile, bar: tqdm.tqdm,
+                  min_speed_kbps: float, speed_check_interval: float, timeout: float):
+    headers = {'Range': f'bytes={part.size}-'} if part.size else {}
+    async with session.get(url, headers=headers, allow_redirects=True, timeout=_client_timeout(timeout)) as r:
+        if r.status == 416 and part.size:
+            # 请求范围超出文件大小：文件已经完整，由哈希校验决定是否可用
+            return
+        if r.status >= 400:
+            raise DownloadError(f'Couldn\'t resolve url: "{url}" (Error: {r.status})')
+        if part.size and r.status != 206:
+            print(f' -- Webserver does not support partial downloads, restarting "{os.path.basename(part.path)}" from the beginning')
+            part.restart()
+        bar.reset(total=part.size + int(r.headers.get('Content-Length', 0)) or None)
+        bar.update(part.size)
+
+        is_tty = sys.stdout.isatty()
+        chunks = 0
+        last_check_time = time.monotonic()
+        last_check_size = part.size
+        async for data in r.content.iter_chunked(CHUNK_SIZE):
+            part.write(data)
+            bar.update(len(data))
+
+            # 非 TTY 环境下进度条不会刷新，定期打印
+            chunks += 1
+            if not is_tty and chunks % 200 == 0:
+                print(bar)
+
+            # 速度检查：速度太慢时切换到下一个链接
+            elapsed = time.monotonic() - last_check_time
+            if elapsed >= speed_check_interval:
+                speed_kbps = (part.size - last_check_size) / 1024 / elapsed
+                if speed_kbps < min_speed_kbps:
+                    raise SlowDownloadError(f'Download speed too slow: {speed_kbps:.1f} KB/s '
+                                            f'(minimum required: {min_speed_kbps} KB/s)')
+                last_check_time = time.monotonic()
+                last_check_size = part.size
+
+
+async def _download_from(session: aiohttp.ClientSession, url: str, part: _PartFile, bar: tqdm.tqdm,
+                         retries: int, min_speed_kbps: float, speed_check_interval: float, timeout: float):
+    """从一个链接下载，连接中断时按已写入的位置续传"""
+    failures = 0
+    while True:
+        size_before = part.size
+        try:
+            await _stream(session, url, part, bar, min_speed_kbps, speed_check_interval, timeout)
+            return
+        except (aiohttp.ClientPayloadError, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            failures = 0 if part.size > size_before else failures + 1
+            if failures > retries:
+                raise DownloadError(f'Connection to "{url}" failed: {e!r}') from e
+            print(f' -- Connection interrupted at {part.size} bytes ({e.__class__.__name__}), resuming')
+
+
+async def download_file(urls: Union[str, Sequence[str]], path: str, sha256: Optional[str] = None,
+                        session: Optional[aiohttp.ClientSession] = None, retries: int = DEFAULT_RETRIES,
+                        min_speed_kbps: float = 100, speed_check_interval: float = 10, timeout: float = 30,
+                        position: Optional[int] = None) -> str:
+    """
+    下载文件到 path（已存在时续传），返回文件的 sha256
+
+    Args:
+        urls: 下载链接或备用链接列表，多个链接时先探测并优先使用响应最快的
+        path: 保存路径
+        sha256: 期望的哈希；给定时切换链接会保留已下载的部分（最终由调用方校验），否则切换链接时从头下载
+        retries: 连接中断后在同一链接上续传的次数
+        min_speed_kbps: 最低速度要求（KB/s），低于此速度切换到下一个链接
+        position: 并发下载时进度条的行号
+    """
+    if session is None:
+        # trust_env：与之前的 requests 一样使用 HTTP(S)_PROXY / NO_PROXY 等环境变量中的代理设置
+        async with aiohttp.ClientSession(trust_env=True) as session:
+            return await download_file(urls, path, sha256, session, retries, min_speed_kbps,
+                                       speed_check_interval, timeout, position)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    urls = await rank_mirrors(session, _as_list(urls), timeout)
+    # 已有部分文件较大时计算前缀哈希比较耗时，放到线程里
+    part = await asyncio.to_thread(_PartFile, path)
+    name = os.path.basename(path[:-5] if path.endswith('.part') else path)
+    try:
+        with tqdm.tqdm(desc=name, unit='iB', unit_scale=True, unit_divisor=1024,
+                       position=position, leave=position is None) as bar:
+            for i, url in enumerate(urls):
+                if i > 0:
+                    print(f' -- Trying fallback URL {i}: "{url}"')
+                    if sha256 is None and part.size:
+                        print(f' -- Removing incomplete download: "{path}"')
+                        part.restart()
+                else:
+                    print(f' -- Downloading: "{url}"')
+                try:
+                    await _download_from(session, url, part, bar, retries, min_speed_kbps, speed_check_interval, timeout)
+                    break
+                except DownloadError as e:
+                    if i == len(urls) - 1:
+                        raise
+                    print(f' -- Download failed: {e}')
+                    print(' -- Switching to fallback URL...')
+    finally:
+        part.close()
+
+    if part.size < MIN_FILE_SIZE:
+        os.remove(path)
+        raise DownloadError(f'Downloaded file is too small ({part.size} bytes), possibly a 404 page: "{urls[-1]}"')
+    return part.sha256.hexdigest()
+
+
+async def download_files(jobs: Sequence[dict], concurrency: int = DEFAULT_CONCURRENCY, **kwargs) -> list:
+    """
+    并发下载多个文件，jobs 中每项为 download_file 的参数（urls、path、sha256）
+
+    返回与 jobs 对应的列表：成功时为 sha256，失败时为异常对象；一个文件失败不会中断其他文件
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async with aiohttp.ClientSession(trust_env=True) as session:
+        async def run(position: int, job: dict):
+            async with semaphore:
+                return await download_file(session=session, position=position if len(jobs) > 1 else None,
+                                           **job, **kwargs)
+
+        return await asyncio.gather(*(run(i, job) for i, job in enumerate(jobs)), return_exceptions=True)
@@ -1,4 +1,5 @@
 import os
+import importlib
 from typing import List, Callable, Tuple, Optional
 import numpy as np
 import cv2
@@ -94,6 +95,32 @@ class Context(dict):
     def _get_args(self):
         return []
 
+
+class LazyRegistry(dict):
+    """
+    键到 'module:Class' 导入路径的注册表，取值时才导入对应模块并缓存类
+
+    启动时不再导入所有检测器/OCR/修复器/翻译器的实现，只加载实际用到的那个；
+    in、遍历键等操作与普通 dict 相同，相对模块路径按 package 解析
+    """
+
+    def __init__(self, package: str, entries: dict):
+        super().__init__(entries)
+        self._package = package
+        self._resolved = {}
+
+    def __getitem__(self, key):
+        cls = self._resolved.get(key)
+        if cls is None:
+            module_name, _, name = super().__getitem__(key).partition(':')
+            cls = getattr(importlib.import_module(module_name, self._package), name)
+            self._resolved[key] = cls
+        return cls
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+
 # TODO: Add TranslationContext for type linting
 
 def atoi(text: str) -> int | str:
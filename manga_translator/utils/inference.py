@@ -11,13 +11,15 @@ from functools import cached_property
 
 from .generic import (
     BASE_PATH,
-    download_url_with_progressbar,
     prompt_yes_no,
     replace_prefix,
     get_digest,
     get_filename_from_url,
 )
+from .download import DEFAULT_CONCURRENCY, download_file, download_files
 from .log import get_logger
+from .model_manager import model_manager
+from .tracing import tracer
 from ..config import TranslatorConfig
 
 
@@ -95,11 +97,15 @@ class ModelWrapper(ABC):
     _MODEL_SUB_DIR = ''
     _MODEL_MAPPING = {}
     _KEY = ''
+    # _MODEL_MAPPING 中同时下载的文件数
+    _DOWNLOAD_CONCURRENCY = DEFAULT_CONCURRENCY
 
     def __init__(self):
         os.makedirs(self.model_dir, exist_ok=True)
         self._key = self._KEY or self.__class__.__name__
         self._loaded = False
+        self._evicted = False
+        self._load_kwargs = None
         self._check_for_malformed_model_mapping()
         self._downloaded = self._check_downloaded()
 
@@ -140,39 +146,21 @@ class ModelWrapper(ABC):
             elif 'file' in mapping and 'archive' in mapping:
                 raise InvalidModelMappingException(self._key, map_key, 'Properties file and archive are mutually exclusive')
 
-    async def _download_file(self, url, path):
-        """Download file with fallback URL support"""
-        urls = url if isinstance(url, list) else [url]
-        
-        for i, current_url in enumerate(urls):
-            try:
-                if i > 0:
-                    print(f' -- Trying fallback URL {i}: "{current_url}"')
-                    # 切换到备用链接时，清除之前下载的残留文件
-                    if os.path.exists(path):
-                        print(f' -- Removing incomplete download: "{path}"')
-                        os.remove(path)
-                    if os.path.exists(path + '.part'):
-                        print(f' -- Removing incomplete download: "{path}.part"')
-                        os.remove(path + '.part')
-                else:
-                    print(f' -- Downloading: "{current_url}"')
-                download_url_with_progressbar(current_url, path)
-                return  # Success, exit
-            except Exception as e:
-                if i < len(urls) - 1:
-                    print(f' -- Download failed: {e}')
-                    print(' -- Switching to fallback URL...')
-                else:
-                    # Last URL failed, re-raise exception
-                    raise
-
-    async def _verify_file(self, sha256_pre_calculated: str, path: str):
+    async def _download_file(self, url, path, sha256: str = None) -> str:
+        """Download file with fallback URL support, returns the sha256 of the downloaded file"""
+        return await download_file(url, path, sha256)
+
+    async def _verify_file(self, sha256_pre_calculated: str, path: str, sha256_calculated: str = None):
         print(f' -- Verifying: "{path}"')
-        sha256_calculated = get_digest(path).lower()
+        if sha256_calculated is None:
+            sha256_calculated = get_digest(path)
+        sha256_calculated = sha256_calculated.lower()
         sha256_pre_calculated = sha256_pre_calculated.lower()
 
         if sha256_calculated != sha256_pre_calculated:
+            # 删除校验失败的文件，否则重新下载时会在错误的内容上续传
+            if os.path.isfile(path):
+                os.remove(path)
             self._on_verify_failure(sha256_calculated, sha256_pre_calculated)
         else:
             print(' -- Verifying: OK!')
@@ -194,7 +182,8 @@ class ModelWrapper(ABC):
         if force or not self.is_downloaded():
             while True:
                 try:
-                    await self._download()
+                    with tracer.span(f'download {self._key}', 'network'):
+                        await self._download()
                     self._downloaded = True
                     break
                 except ModelVerificationException:
@@ -208,39 +197,28 @@ class ModelWrapper(ABC):
         with `_check_downloaded`) to implement unconventional download logic.
         '''
         print(f'\nDownloading models into {self.model_dir}\n')
+        download_paths = {}
         for map_key, mapping in self._MODEL_MAPPING.items():
             if self._check_downloaded_map(map_key):
                 print(f' -- Skipping {map_key} as it\'s already downloaded')
                 continue
+            download_paths[map_key] = self._get_download_path(map_key, mapping)
 
-            is_archive = 'archive' in mapping
-            if is_archive:
-                download_path = os.path.join(self._temp_working_directory, map_key, '')
-            else:
-                download_path = self._get_file_path(mapping['file'])
-            if not os.path.basename(download_path):
-                os.makedirs(download_path, exist_ok=True)
-            if os.path.basename(download_path) in ('', '.'):
-                # Get URL (use first URL if it's a list)
-                url_for_filename = mapping['url'] if isinstance(mapping['url'], str) else mapping['url'][0]
-                download_path = os.path.join(download_path, get_filename_from_url(url_for_filename, map_key))
-            if not is_archive:
-                download_path += '.part'
+        # 所有文件并发下载（已有的部分文件续传），下载时同步计算哈希；解压、移动仍按顺序进行
+        jobs = [{'urls': self._MODEL_MAPPING[map_key]['url'], 'path': path, 'sha256': self._MODEL_MAPPING[map_key].get('hash')}
+                for map_key, path in download_paths.items()]
+        digests = await download_files(jobs, concurrency=self._DOWNLOAD_CONCURRENCY) if jobs else []
 
+        errors = []
+        for (map_key, download_path), digest in zip(download_paths.items(), digests):
+            mapping = self._MODEL_MAPPING[map_key]
+            is_archive = 'archive' in mapping
+            if isinstance(digest, BaseException):
+                print(f' -- Failed to download {map_key}: {digest}')
+                errors.append(digest)
+                continue
             if 'hash' in mapping:
-                downloaded = False
-                if os.path.isfile(download_path):
-                    try:
-                        print(' -- Found existing file')
-                        await self._verify_file(mapping['hash'], download_path)
-                        downloaded = True
-                    except ModelVerificationException:
-                        print(' -- Resuming interrupted download')
-                if not downloaded:
-                    await self._download_file(mapping['url'], download_path)
-                    await self._verify_file(mapping['hash'], download_path)
-            else:
-                await self._download_file(mapping['url'], download_path)
+                await self._verify_file(mapping['hash'], download_path, digest)
 
             if download_path.endswith('.part'):
                 p = download_path[:len(download_path)-5]
@@ -317,6 +295,25 @@ class ModelWrapper(ABC):
             print()
             self._on_download_finished(map_key)
 
+        if errors:
+            raise errors[0]
+
+    def _get_download_path(self, map_key: str, mapping: dict) -> str:
+        is_archive = 'archive' in mapping
+        if is_archive:
+            download_path = os.path.join(self._temp_working_directory, map_key, '')
+        else:
+            download_path = self._get_file_path(mapping['file'])
+        if not os.path.basename(download_path):
+            os.makedirs(download_path, exist_ok=True)
+        if os.path.basename(download_path) in ('', '.'):
+            # Get URL (use first URL if it's a list)
+            url_for_filename = mapping['url'] if isinstance(mapping['url'], str) else mapping['url'][0]
+            download_path = os.path.join(download_path, get_filename_from_url(url_for_filename, map_key))
+        if not is_archive:
+            download_path += '.part'
+        return download_path
+
     def _on_download_finished(self, map_key):
         '''
         Can be overwritten to further process the downloaded files
@@ -389,22 +386,31 @@ class ModelWrapper(ABC):
         if not self.is_downloaded():
             await self.download()
         if not self.is_loaded():
-            await self._load(device=device, **kwargs)
+            await model_manager.before_load(self, device)
+            with tracer.span(f'load {self._key}', 'model', device=device), model_manager.measure_load(self, device):
+                await self._load(device=device, **kwargs)
             self._loaded = True
+            self._evicted = False
+            self._load_kwargs = dict(device=device, **kwargs)
 
     async def unload(self):
         if self.is_loaded():
             await self._unload()
             self._loaded = False
+            model_manager.on_unload(self)
 
     async def infer(self, *args, **kwargs):
         '''
         Makes a forward pass through the network.
         '''
-        if not self.is_loaded():
-            raise Exception(f'{self._key}: Tried to forward pass without having loaded the model.')
-        
-        return await self._infer(*args, **kwargs)
+        async with model_manager.pinned(self):
+            if not self.is_loaded() and getattr(self, '_evicted', False) and getattr(self, '_load_kwargs', None) is not None:
+                # 因内存预算被 model_manager 卸载，按原参数重新加载
+                model_manager.on_reload()
+                await ModelWrapper.load(self, **self._load_kwargs)
+            if not self.is_loaded():
+                raise Exception(f'{self._key}: Tried to forward pass without having loaded the model.')
+            return await self._infer(*args, **kwargs)
 
     @abstractmethod
     async def _load(self, device: str, *args, **kwargs):
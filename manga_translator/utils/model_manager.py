@@ -0,0 +1,262 @@
+"""
+模型内存管理
+
+所有 ModelWrapper 的加载/卸载都会登记到全局 model_manager：
+- 加载时测量模型占用（RAM 取进程 RSS 增量与参数大小的较大值，显存取 torch.cuda.memory_allocated 增量）
+- 设置了内存预算时，加载前按 LRU 卸载其他模型腾出空间，正在推理（pinned）的模型不会被卸载；
+  正在被卸载的模型上的推理会等待卸载完成后重新加载
+- 被卸载的模型在下次 infer 时会按原参数自动重新加载
+- stats() 返回每个模型的占用与加载/卸载统计
+"""
+import asyncio
+import gc
+import time
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional
+
+from .log import get_logger
+
+logger = get_logger('ModelManager')
+
+MB = 1024 * 1024
+
+
+def _process_rss() -> int:
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return 0
+
+
+def _cuda_allocated(device: str) -> int:
+    if not device or not str(device).startswith('cuda'):
+        return 0
+    try:
+        import torch
+        if torch.cuda.is_available():
+            return torch.cuda.memory_allocated()
+    except Exception:
+        pass
+    return 0
+
+
+def _parameter_bytes(wrapper) -> int:
+    """统计 wrapper 上直接持有的 nn.Module 的参数与缓冲区大小"""
+    try:
+        import torch.nn as nn
+    except Exception:
+        return 0
+    total = 0
+    seen = set()
+    for value in vars(wrapper).values():
+        if isinstance(value, nn.Module) and id(value) not in seen:
+            seen.add(id(value))
+            for tensor in list(value.parameters()) + list(value.buffers()):
+                total += tensor.numel() * tensor.element_size()
+    return total
+
+
+class _Entry:
+    __slots__ = ('wrapper', 'key', 'device', 'ram', 'vram', 'evicting', 'last_used', 'loads', 'load_seconds')
+
+    def __init__(self, wrapper, key: str, device: str):
+        self.wrapper = wrapper
+        self.key = key
+        self.device = device
+        self.ram = 0
+        self.vram = 0
+        self.evicting = False
+        self.last_used = time.time()
+        self.loads = 0
+        self.load_seconds = 0.0
+
+
+class ModelManager:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries: 'OrderedDict[int, _Entry]' = OrderedDict()
+        # 按 id(wrapper) 记录推理中的固定次数；独立于 _entries，卸载后重新加载期间固定依然有效
+        self._pins: Dict[int, int] = {}
+        # 按模型 key 记录上次测量到的占用，用于加载前预估需要腾出的空间
+        self._footprints: Dict[str, tuple] = {}
+        self.ram_budget = 0
+        self.vram_budget = 0
+        self.counters = {'loads': 0, 'unloads': 0, 'evictions': 0, 'reloads': 0}
+
+    def configure(self, ram_budget_mb: int = 0, vram_budget_mb: int = 0):
+        """设置模型内存预算（MB），0 表示不限制"""
+        self.ram_budget = max(0, int(ram_budget_mb or 0)) * MB
+        self.vram_budget = max(0, int(vram_budget_mb or 0)) * MB
+        if self.ram_budget or self.vram_budget:
+            logger.info(f'Model memory budget: RAM={ram_budget_mb or "unlimited"}MB, VRAM={vram_budget_mb or "unlimited"}MB')
+
+    @staticmethod
+    def _is_gpu(device: str) -> bool:
+        return bool(device) and (str(device).startswith('cuda') or device == 'mps')
+
+    def _used(self, gpu: bool) -> int:
+        with self._lock:
+            if gpu:
+                return sum(e.vram for e in self._entries.values())
+            return sum(e.ram for e in self._entries.values())
+
+    async def before_load(self, wrapper, device: str):
+        """加载前按 LRU 卸载其他未使用的模型，使预估占用不超过预算"""
+        if not self.ram_budget and not self.vram_budget:
+            return
+        est_ram, est_vram = self._footprints.get(wrapper._key, (0, 0))
+        targets = []
+        if self.ram_budget:
+            targets.append((False, self.ram_budget, est_ram))
+        if self.vram_budget and self._is_gpu(device):
+            targets.append((True, self.vram_budget, est_vram))
+        evicted = False
+        for gpu, budget, needed in targets:
+            while self._used(gpu) + needed > budget:
+                victim = self._pick_victim(exclude=wrapper, gpu=gpu)
+                if victim is None:
+                    logger.warning(f'Cannot free enough memory for {wrapper._key}: all loaded models are in use')
+                    break
+                if await self._evict(victim):
+                    evicted = True
+        if evicted:
+            self._release_memory(device)
+
+    def _pick_victim(self, exclude, gpu: bool) -> Optional[_Entry]:
+        """选出最久未用的可卸载模型，并在锁内标记为 evicting"""
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.wrapper is exclude or entry.evicting or self._pins.get(id(entry.wrapper)):
+                    continue
+                if (entry.vram if gpu else entry.ram) <= 0:
+                    continue
+                entry.evicting = True
+                return entry
+        return None
+
+    async def _evict(self, entry: _Entry) -> bool:
+        wrapper = entry.wrapper
+        with self._lock:
+            # 选中后被固定则放弃卸载
+            if self._pins.get(id(wrapper)):
+                entry.evicting = False
+                return False
+            wrapper._evicted = True
+        logger.info(f'Evicting model {entry.key} (RAM {entry.ram / MB:.0f}MB, VRAM {entry.vram / MB:.0f}MB) to stay within budget')
+        try:
+            # 直接调用基类的 unload，避免子类改写的签名（如 OfflineTranslator.unload(device)）
+            from .inference import ModelWrapper
+            await ModelWrapper.unload(wrapper)
+        finally:
+            with self._lock:
+                entry.evicting = False
+        with self._lock:
+            self.counters['evictions'] += 1
+        return True
+
+    @staticmethod
+    def _release_memory(device: str):
+        gc.collect()
+        if str(device).startswith('cuda'):
+            try:
+                import torch
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+            except Exception:
+                pass
+
+    @contextmanager
+    def measure_load(self, wrapper, device: str):
+        """包裹 _load，测量并登记模型占用"""
+        rss_before = _process_rss()
+        vram_before = _cuda_allocated(device)
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        rss_delta = max(0, _process_rss() - rss_before)
+        vram = max(0, _cuda_allocated(device) - vram_before)
+        params = _parameter_bytes(wrapper)
+        if self._is_gpu(device):
+            vram = max(vram, params)
+            ram = rss_delta
+        else:
+            ram = max(rss_delta, params)
+        with self._lock:
+            entry = self._entries.get(id(wrapper))
+            if entry is None:
+                entry = _Entry(wrapper, wrapper._key, device)
+                self._entries[id(wrapper)] = entry
+            entry.device = device
+            entry.ram = ram
+            entry.vram = vram
+            entry.loads += 1
+            entry.load_seconds += elapsed
+            entry.last_used = time.time()
+            self._entries.move_to_end(id(wrapper))
+            self._footprints[wrapper._key] = (ram, vram)
+            self.counters['loads'] += 1
+        logger.debug(f'Loaded {wrapper._key} on {device} in {elapsed:.2f}s (RAM {ram / MB:.0f}MB, VRAM {vram / MB:.0f}MB)')
+
+    def on_unload(self, wrapper):
+        with self._lock:
+            if self._entries.pop(id(wrapper), None) is not None:
+                self.counters['unloads'] += 1
+
+    def on_reload(self):
+        with self._lock:
+            self.counters['reloads'] += 1
+
+    @asynccontextmanager
+    async def pinned(self, wrapper):
+        """
+        推理期间固定模型，防止被 LRU 卸载。
+
+        模型正在被卸载时先等待卸载完成，调用方再按需重新加载。
+        """
+        key = id(wrapper)
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None or not entry.evicting:
+                    self._pins[key] = self._pins.get(key, 0) + 1
+                    if entry is not None:
+                        entry.last_used = time.time()
+                        self._entries.move_to_end(key)
+                    break
+            await asyncio.sleep(0.01)
+        try:
+            yield
+        finally:
+            with self._lock:
+                pins = self._pins.get(key, 0) - 1
+                if pins > 0:
+                    self._pins[key] = pins
+                else:
+                    self._pins.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = [{
+                'key': e.key,
+                'device': e.device,
+                'ram_mb': round(e.ram / MB, 1),
+                'vram_mb': round(e.vram / MB, 1),
+                'pinned': self._pins.get(id(e.wrapper), 0) > 0,
+                'idle_seconds': round(time.time() - e.last_used, 1),
+                'loads': e.loads,
+                'load_seconds': round(e.load_seconds, 2),
+            } for e in self._entries.values()]
+            return {
+                'ram_budget_mb': self.ram_budget // MB,
+                'vram_budget_mb': self.vram_budget // MB,
+                'ram_used_mb': round(sum(e.ram for e in self._entries.values()) / MB, 1),
+                'vram_used_mb': round(sum(e.vram for e in self._entries.values()) / MB, 1),
+                'models': models,
+                **self.counters,
+            }
+
+
+model_manager = ModelManager()
@@ -0,0 +1,315 @@
+"""
+ONNX Runtime 会话工具
+
+- SessionOptions 统一由 OnnxConfig 覆盖（线程数、执行模式、图优化级别、内存池），
+  未设置的项保留各模型原有的默认值
+- 可选的离线优化模型缓存：首次加载时写出优化后的图，之后直接加载跳过图优化
+- IOBinding 运行器：按输入形状复用预分配的输入/输出缓冲区
+
+基准测试（CPU，对比各模型原有设置与当前设置）：
+    python -m manga_translator.utils.onnx_session bench model.onnx \
+        --input image:1x3x1024x1024:float32 --input mask:1x1x1024x1024:float32 \
+        --legacy-no-mem-pattern --legacy-no-arena --intra 8 --io-binding
+"""
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .log import get_logger
+
+logger = get_logger('OnnxSession')
+
+_GRAPH_OPT_LEVELS = {
+    'disable': 'ORT_DISABLE_ALL',
+    'basic': 'ORT_ENABLE_BASIC',
+    'extended': 'ORT_ENABLE_EXTENDED',
+    'all': 'ORT_ENABLE_ALL',
+}
+
+_EXECUTION_MODES = {
+    'sequential': 'ORT_SEQUENTIAL',
+    'parallel': 'ORT_PARALLEL',
+}
+
+# 当前生效的全局覆盖项，由 configure() 设置；None 表示沿用模型默认
+_overrides: Dict[str, object] = {}
+
+
+def configure(onnx_config) -> None:
+    """应用 OnnxConfig（或同名属性的对象）。已加载的会话在下次加载时生效。"""
+    global _overrides
+    if onnx_config is None:
+        _overrides = {}
+        return
+    _overrides = {
+        'intra_op_num_threads': onnx_config.intra_op_num_threads or None,
+        'inter_op_num_threads': onnx_config.inter_op_num_threads or None,
+        'execution_mode': onnx_config.execution_mode,
+        'graph_optimization_level': onnx_config.graph_optimization_level,
+        'enable_cpu_mem_arena': onnx_config.enable_cpu_mem_arena,
+        'enable_mem_pattern': onnx_config.enable_mem_pattern,
+        'optimized_model_dir': onnx_config.optimized_model_dir,
+        'use_io_binding': onnx_config.use_io_binding,
+    }
+
+
+def use_io_binding() -> bool:
+    return bool(_overrides.get('use_io_binding'))
+
+
+def _resolve(defaults: dict) -> dict:
+    options = {
+        'graph_optimization_level': 'all',
+        'execution_mode': None,
+        'intra_op_num_threads': None,
+        'inter_op_num_threads': None,
+        'enable_cpu_mem_arena': None,
+        'enable_mem_pattern': None,
+        'optimized_model_dir': None,
+    }
+    options.update(defaults)
+    for key, value in _overrides.items():
+        if key in options and value is not None:
+            options[key] = value
+    return options
+
+
+def build_session_options(defaults: Optional[dict] = None, log_severity_level: int = 3):
+    """根据模型默认值和全局覆盖项构建 SessionOptions，返回 (sess_options, 解析后的选项)"""
+    import onnxruntime as ort
+
+    options = _resolve(defaults or {})
+    sess_options = ort.SessionOptions()
+    sess_options.log_severity_level = log_severity_level
+    level = options['graph_optimization_level']
+    if level not in _GRAPH_OPT_LEVELS:
+        raise ValueError(f'Unknown graph optimization level: {level}')
+    sess_options.graph_optimization_level = getattr(ort.GraphOptimizationLevel, _GRAPH_OPT_LEVELS[level])
+    if options['execution_mode'] is not None:
+        mode = options['execution_mode']
+        if mode not in _EXECUTION_MODES:
+            raise ValueError(f'Unknown execution mode: {mode}')
+        sess_options.execution_mode = getattr(ort.ExecutionMode, _EXECUTION_MODES[mode])
+    if options['intra_op_num_threads'] is not None:
+        sess_options.intra_op_num_threads = int(options['intra_op_num_threads'])
+    if options['inter_op_num_threads'] is not None:
+        sess_options.inter_op_num_threads = int(options['inter_op_num_threads'])
+    if options['enable_cpu_mem_arena'] is not None:
+        sess_options.enable_cpu_mem_arena = bool(options['enable_cpu_mem_arena'])
+    if options['enable_mem_pattern'] is not None:
+        sess_options.enable_mem_pattern = bool(options['enable_mem_pattern'])
+    return sess_options, options
+
+
+def _optimized_model_path(cache_dir: str, model_path: str, level: str, providers: Sequence) -> str:
+    # 优化后的图与优化级别、EP 相关，文件名中带上这两项以免混用
+    provider_names = ','.join(p if isinstance(p, str) else p[0] for p in providers)
+    key = hashlib.sha1(f'{os.path.abspath(model_path)}|{level}|{provider_names}'.encode('utf-8')).hexdigest()[:12]
+    name = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(cache_dir, f'{name}.{level}.{key}.onnx')
+
+
+def create_session(model_path: str, providers: Optional[Sequence] = None, defaults: Optional[dict] = None,
+                   log_severity_level: int = 3):
+    """
+    创建 InferenceSession。
+
+    defaults 为该模型原有的选项（如 {'enable_mem_pattern': False}），全局 OnnxConfig 中设置的项会覆盖它们。
+    设置了 optimized_model_dir 时，首次加载写出优化后的模型，之后加载缓存并关闭图优化。
+    """
+    import onnxruntime as ort
+
+    providers = list(providers or ['CPUExecutionProvider'])
+    sess_options, options = build_session_options(defaults, log_severity_level)
+    cache_dir = options['optimized_model_dir']
+    load_path = model_path
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        cached = _optimized_model_path(cache_dir, model_path, options['graph_optimization_level'], providers)
+        if os.path.isfile(cached) and os.path.getmtime(cached) >= os.path.getmtime(model_path):
+            load_path = cached
+            sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+            logger.debug(f'Loading optimized ONNX model from cache: {cached}')
+        else:
+            sess_options.optimized_model_filepath = cached
+    try:
+        return ort.InferenceSession(load_path, sess_options=sess_options, providers=providers)
+    except Exception:
+        if load_path == model_path:
+            raise
+        # 缓存损坏或 ORT 版本不兼容时重新优化原模型
+        logger.warning(f'Failed to load cached optimized model, rebuilding: {load_path}')
+        try:
+            os.remove(load_path)
+        except OSError:
+            pass
+        return create_session(model_path, providers, defaults, log_severity_level)
+
+
+class IOBindingRunner:
+    """
+    使用 IOBinding 运行会话，按输入形状缓存预分配的输入/输出 OrtValue。
+
+    每个线程使用各自的绑定和缓冲区（多个修复线程可共用同一会话）；
+    返回的输出数组直接引用该线程的输出缓冲区，不复制，在同一线程下一次 run 之前有效，
+    需要跨调用保留时由调用方复制。
+    """
+
+    def __init__(self, session, max_cached_shapes: int = 4):
+        import onnxruntime as ort
+        self._ort = ort
+        self.session = session
+        self.input_names = [i.name for i in session.get_inputs()]
+        self.output_names = [o.name for o in session.get_outputs()]
+        self.max_cached_shapes = max_cached_shapes
+        self._local = threading.local()
+
+    @property
+    def _bindings(self) -> 'OrderedDict[Tuple, tuple]':
+        bindings = getattr(self._local, 'bindings', None)
+        if bindings is None:
+            bindings = self._local.bindings = OrderedDict()
+        return bindings
+
+    def _create_binding(self, feeds: Dict[str, np.ndarray], key: Tuple):
+        ort = self._ort
+        # 首次遇到该形状时先常规运行一次以得到输出形状和类型
+        outputs = self.session.run(self.output_names, feeds)
+        binding = self.session.io_binding()
+        inputs = {}
+        for name in self.input_names:
+            value = ort.OrtValue.ortvalue_from_numpy(np.ascontiguousarray(feeds[name]), 'cpu', 0)
+            binding.bind_ortvalue_input(name, value)
+            inputs[name] = value
+        out_values = []
+        for name, out in zip(self.output_names, outputs):
+            value = ort.OrtValue.ortvalue_from_shape_and_type(out.shape, out.dtype, 'cpu', 0)
+            binding.bind_ortvalue_output(name, value)
+            out_values.append(value)
+        bindings = self._bindings
+        bindings[key] = (binding, inputs, out_values)
+        while len(bindings) > self.max_cached_shapes:
+            bindings.popitem(last=False)
+        return outputs
+
+    def run(self, feeds: Dict[str, np.ndarray]) -> List[np.ndarray]:
+        key = tuple((name, feeds[name].shape, feeds[name].dtype.str) for name in self.input_names)
+        bindings = self._bindings
+        entry = bindings.get(key)
+        if entry is None:
+            return self._create_binding(feeds, key)
+        bindings.move_to_end(key)
+        binding, inputs, out_values = entry
+        for name in self.input_names:
+            value = inputs[name]
+            if hasattr(value, 'update_inplace'):
+                value.update_inplace(np.ascontiguousarray(feeds[name]))
+            else:
+                binding.bind_cpu_input(name, np.ascontiguousarray(feeds[name]))
+        self.session.run_with_iobinding(binding)
+        return [value.numpy() for value in out_values]
+
+
+def make_runner(session):
+    """
+    根据全局配置返回 run(feeds) -> outputs 可调用对象；
+    使用 IOBinding 时输出在同一线程下一次调用之前有效（见 IOBindingRunner）
+    """
+    if use_io_binding():
+        return IOBindingRunner(session).run
+    return lambda feeds: session.run(None, feeds)
+
+
+def _parse_input_spec(spec: str) -> Tuple[str, Tuple[int, ...], np.dtype]:
+    name, shape, dtype = spec.split(':')
+    return name, tuple(int(s) for s in shape.split('x')), np.dtype(dtype)
+
+
+def _random_feed(shape, dtype: np.dtype, rng: np.random.Generator) -> np.ndarray:
+    if np.issubdtype(dtype, np.integer):
+        return rng.integers(0, 4, size=shape).astype(dtype)
+    return rng.random(shape, dtype=np.float32).astype(dtype)
+
+
+def benchmark(model_path: str, input_specs: List[str], defaults: dict, repeat: int = 10, warmup: int = 2) -> dict:
+    """分别以模型原有设置（defaults）和当前全局设置运行，返回平均耗时（毫秒）"""
+    global _overrides
+    rng = np.random.default_rng(0)
+    feeds = {}
+    for spec in input_specs:
+        name, shape, dtype = _parse_input_spec(spec)
+        feeds[name] = _random_feed(shape, dtype, rng)
+
+    def _time(run) -> float:
+        for _ in range(warmup):
+            run(feeds)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            run(feeds)
+        return (time.perf_counter() - start) / repeat * 1000
+
+    tuned_overrides = _overrides
+    results = {}
+    try:
+        _overrides = {}
+        session = create_session(model_path, defaults=defaults)
+        results['legacy_ms'] = _time(lambda f: session.run(None, f))
+        del session
+    finally:
+        _overrides = tuned_overrides
+    session = create_session(model_path, defaults=defaults)
+    results['tuned_ms'] = _time(make_runner(session))
+    results['speedup'] = results['legacy_ms'] / results['tuned_ms'] if results['tuned_ms'] > 0 else 0.0
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    from types import SimpleNamespace
+
+    parser = argparse.ArgumentParser(description='ONNX Runtime CPU session benchmark')
+    parser.add_argument('action', choices=['bench'])
+    parser.add_argument('model')
+    parser.add_argument('--input', action='append', required=True, help='name:1x3x512x512:float32')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--legacy-no-mem-pattern', action='store_true', help='模型原有设置: enable_mem_pattern=False')
+    parser.add_argument('--legacy-no-arena', action='store_true', help='模型原有设置: enable_cpu_mem_arena=False')
+    parser.add_argument('--legacy-intra', type=int, default=None)
+    parser.add_argument('--legacy-inter', type=int, default=None)
+    parser.add_argument('--intra', type=int, default=0)
+    parser.add_argument('--inter', type=int, default=0)
+    parser.add_argument('--execution-mode', choices=list(_EXECUTION_MODES), default=None)
+    parser.add_argument('--opt-level', choices=list(_GRAPH_OPT_LEVELS), default=None)
+    parser.add_argument('--mem-arena', choices=['on', 'off'], default=None)
+    parser.add_argument('--mem-pattern', choices=['on', 'off'], default=None)
+    parser.add_argument('--optimized-model-dir', default=None)
+    parser.add_argument('--io-binding', action='store_true')
+    args = parser.parse_args()
+
+    legacy = {}
+    if args.legacy_no_mem_pattern:
+        legacy['enable_mem_pattern'] = False
+    if args.legacy_no_arena:
+        legacy['enable_cpu_mem_arena'] = False
+    if args.legacy_intra is not None:
+        legacy['intra_op_num_threads'] = args.legacy_intra
+    if args.legacy_inter is not None:
+        legacy['inter_op_num_threads'] = args.legacy_inter
+
+    configure(SimpleNamespace(
+        intra_op_num_threads=args.intra,
+        inter_op_num_threads=args.inter,
+        execution_mode=args.execution_mode,
+        graph_optimization_level=args.opt_level,
+        enable_cpu_mem_arena=None if args.mem_arena is None else args.mem_arena == 'on',
+        enable_mem_pattern=None if args.mem_pattern is None else args.mem_pattern == 'on',
+        optimized_model_dir=args.optimized_model_dir,
+        use_io_binding=args.io_binding,
+    ))
+    print(json.dumps(benchmark(args.model, args.input, legacy, repeat=args.repeat), indent=2))
@@ -0,0 +1,396 @@
+"""
+CPU 推理的 INT8 量化
+
+- torch 模型：对 Linear / LSTM 做动态量化（DBConvNext、48px OCR 的 torch 路径）；
+  默认检测器 DBNet 只有卷积层，动态量化无效，保持 FP32
+- ONNX 模型：用本地样本页静态量化（ctd、48px OCR encoder），
+  48px OCR 的单步 decoder 输入依赖解码过程，使用动态量化
+
+量化模型与原模型放在同一目录，文件名为 `<原文件名>.int8.onnx`。
+
+命令行：
+    # 用本地样本页 / 文本行切片校准并生成 INT8 ONNX
+    python -m manga_translator.utils.quantization calibrate --pages <页目录> --crops <切片目录>
+    # 对比 INT8 与 FP32 的检测 F1、OCR CER 和速度，--output 另存为 JSON 报告
+    python -m manga_translator.utils.quantization evaluate --pages <页目录> --crops <切片目录> --output int8_report.json
+
+切片目录中可放一个 labels.txt（每行 `文件名<TAB>文本`）作为 OCR 的参考文本，
+没有时以 FP32 模型的输出作为参考。
+"""
+
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .log import get_logger
+
+logger = get_logger('Quantization')
+
+INT8_SUFFIX = '.int8.onnx'
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp')
+# 动态量化只处理 MatMul / LSTM（与 torch 路径的 Linear / LSTM 对应）：
+# 动态量化的 Conv 在 CPU 上走 ConvInteger，比 FP32 慢数倍
+DYNAMIC_OP_TYPES = ('MatMul', 'LSTM')
+# 48px OCR encoder 静态量化只处理带权重的算子：默认还会量化 CumSum（位置索引）和 Where（注意力掩码的 -inf），
+# 位置被取整、被掩码的位置仍分到注意力权重
+OCR_ENCODER_STATIC_OP_TYPES = ('Conv', 'MatMul')
+
+
+def int8_path(onnx_path: str) -> str:
+    return os.path.splitext(onnx_path)[0] + INT8_SUFFIX
+
+
+def quantize_dynamic_model(model):
+    """
+    对 torch 模型的 Linear / LSTM 做 INT8 动态量化（仅 CPU）
+
+    Returns:
+        (量化后的模型副本, 被量化的层数)
+    """
+    import torch
+    import torch.nn as nn
+    from torch.ao.quantization import quantize_dynamic
+
+    qmodel = quantize_dynamic(model.cpu(), {nn.Linear, nn.LSTM}, dtype=torch.qint8)
+    count = sum(1 for m in qmodel.modules() if '.quantized.dynamic' in type(m).__module__)
+    return qmodel, count
+
+
+def _untie_initializers(model) -> int:
+    """
+    让被多个节点共用的权重各有一份副本，返回复制的次数
+
+    48px OCR decoder 的 pred 与 embd 共用权重（Gemm + Gather），动态量化会为 Gemm 原地转置
+    该权重，Gather 随之得到错误的形状，会话无法创建
+    """
+    import onnx
+
+    initializers = {init.name: init for init in model.graph.initializer}
+    seen = set()
+    copies = 0
+    for node in model.graph.node:
+        for i, name in enumerate(node.input):
+            if name not in initializers:
+                continue
+            if name in seen:
+                copy = onnx.TensorProto()
+                copy.CopyFrom(initializers[name])
+                copy.name = f'{name}_{node.name or copies}_untied'
+                model.graph.initializer.append(copy)
+                node.input[i] = copy.name
+                copies += 1
+            else:
+                seen.add(name)
+    return copies
+
+
+def quantize_onnx_dynamic(fp32_path: str, int8_output: Optional[str] = None,
+                          op_types: Sequence[str] = DYNAMIC_OP_TYPES) -> str:
+    """ONNX 动态量化（权重 INT8，激活运行时量化），不需要校准数据"""
+    import onnx
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8_output = int8_output or int8_path(fp32_path)
+    model_input = fp32_path
+    untied = os.path.splitext(int8_output)[0] + '.untied.onnx'
+    model = onnx.load(fp32_path)
+    if _untie_initializers(model):
+        onnx.save(model, untied)
+        model_input = untied
+    del model
+
+    try:
+        quantize_dynamic(model_input, int8_output, weight_type=QuantType.QInt8, op_types_to_quantize=list(op_types))
+    finally:
+        if model_input == untied and os.path.exists(untied):
+            os.remove(untied)
+    return int8_output
+
+
+def quantize_onnx_static(fp32_path: str, samples: Iterable[Dict[str, np.ndarray]], int8_output: Optional[str] = None,
+                         op_types: Optional[Sequence[str]] = None) -> str:
+    """
+    ONNX 静态量化（QDQ，权重按通道 INT8，激活 UINT8）
+
+    Args:
+        samples: 校准输入，每个元素是 {输入名: 数组}
+        op_types: 要量化的算子类型，None 为 onnxruntime 支持的全部算子
+    """
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    class _Reader(CalibrationDataReader):
+        def __init__(self, it):
+            self._it = iter(it)
+
+        def get_next(self):
+            return next(self._it, None)
+
+    int8_output = int8_output or int8_path(fp32_path)
+    model_input = fp32_path
+    preprocessed = os.path.splitext(int8_output)[0] + '.pre.onnx'
+    try:
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+        quant_pre_process(fp32_path, preprocessed)
+        model_input = preprocessed
+    except Exception as e:
+        logger.warning(f'quant_pre_process 失败，直接量化原模型: {e}')
+
+    try:
+        quantize_static(
+            model_input, int8_output, _Reader(samples),
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            op_types_to_quantize=list(op_types) if op_types else None,
+        )
+    finally:
+        if model_input == preprocessed and os.path.exists(preprocessed):
+            os.remove(preprocessed)
+    return int8_output
+
+
+def list_images(directory: str) -> List[str]:
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+            if name.lower().endswith(IMAGE_EXTENSIONS)]
+
+
+def _read_rgb(path: str) -> np.ndarray:
+    img = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR)
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+
+def _ctd_samples(pages: List[str], input_name: str, input_size: int = 1024):
+    from ..detection.ctd import preprocess_img
+    for path in pages:
+        img_in, _, _, _ = preprocess_img(_read_rgb(path), input_size=(input_size, input_size), to_tensor=False)
+        yield {input_name: cv2.dnn.blobFromImage(img_in, scalefactor=1 / 255.0, size=(input_size, input_size))}
+
+
+def _ocr_crop_batch(paths: List[str]) -> Tuple[np.ndarray, List[int]]:
+    crops = []
+    for path in paths:
+        img = _read_rgb(path)
+        new_w = max(1, int(round(img.shape[1] / float(img.shape[0]) * 48)))
+        crops.append(cv2.resize(img, (new_w, 48), interpolation=cv2.INTER_AREA))
+    widths = [c.shape[1] for c in crops]
+    batch = np.zeros((len(crops), 48, 4 * (max(widths) + 7) // 4, 3), dtype=np.uint8)
+    for i, c in enumerate(crops):
+        batch[i, :, :c.shape[1]] = c
+    image = (batch.astype(np.float32) - 127.5) / 127.5
+    return np.ascontiguousarray(image.transpose(0, 3, 1, 2)), widths
+
+
+def _ocr_encoder_samples(crops: List[str]):
+    for path in crops:
+        image, widths = _ocr_crop_batch([path])
+        yield {
+            'image': image,
+            'feat_lengths': np.array([(x + 3) // 4 + 2 for x in widths], dtype=np.int64),
+        }
+
+
+def _model_dir(sub_dir: str) -> str:
+    from .generic import BASE_PATH
+    return os.path.join(BASE_PATH, 'models', sub_dir)
+
+
+def calibrate(pages_dir: Optional[str], crops_dir: Optional[str], max_samples: int = 64):
+    """用本地样本生成 ctd 与 48px OCR 的 INT8 ONNX 模型"""
+    import onnxruntime as ort
+
+    if pages_dir:
+        ctd_path = os.path.join(_model_dir('detection'), 'comictextdetector.pt.onnx')
+        if os.path.exists(ctd_path):
+            input_name = ort.InferenceSession(ctd_path, providers=['CPUExecutionProvider']).get_inputs()[0].name
+            pages = list_images(pages_dir)[:max_samples]
+            out = quantize_onnx_static(ctd_path, _ctd_samples(pages, input_name))
+            logger.info(f'ctd INT8 模型已生成（{len(pages)} 页校准）: {out}')
+        else:
+            logger.warning(f'未找到 ctd ONNX 模型: {ctd_path}')
+
+    if crops_dir:
+        from ..ocr.model_48px_onnx import ENCODER_ONNX_FILE, DECODER_STEP_ONNX_FILE, export_48px_onnx, _load_torch_model
+        ocr_dir = _model_dir('ocr')
+        encoder_path = os.path.join(ocr_dir, ENCODER_ONNX_FILE)
+        decoder_path = os.path.join(ocr_dir, DECODER_STEP_ONNX_FILE)
+        if not (os.path.exists(encoder_path) and os.path.exists(decoder_path)):
+            export_48px_onnx(_load_torch_model(ocr_dir), encoder_path, decoder_path)
+        crops = list_images(crops_dir)[:max_samples]
+        out = quantize_onnx_static(encoder_path, _ocr_encoder_samples(crops), op_types=OCR_ENCODER_STATIC_OP_TYPES)
+        logger.info(f'48px OCR encoder INT8 模型已生成（{len(crops)} 个切片校准）: {out}')
+        out = quantize_onnx_dynamic(decoder_path)
+        logger.info(f'48px OCR decoder INT8 模型已生成（动态量化）: {out}')
+
+
+def _box_iou(a: np.ndarray, b: np.ndarray) -> float:
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def detection_f1(reference: List[np.ndarray], predicted: List[np.ndarray], iou_threshold: float = 0.5) -> float:
+    """按 IoU 贪心匹配计算 F1，框格式为 [x1, y1, x2, y2]"""
+    matched = 0
+    used = set()
+    for ref in reference:
+        best, best_iou = None, iou_threshold
+        for j, pred in enumerate(predicted):
+            if j in used:
+                continue
+            iou = _box_iou(ref, pred)
+            if iou >= best_iou:
+                best, best_iou = j, iou
+        if best is not None:
+            used.add(best)
+            matched += 1
+    if not reference and not predicted:
+        return 1.0
+    precision = matched / len(predicted) if predicted else 0.0
+    recall = matched / len(reference) if reference else 0.0
+    return 2 * precision * recall / (precision + recall) if precision + recall > 0 else 0.0
+
+
+def char_error_rate(reference: str, hypothesis: str) -> float:
+    if not reference:
+        return 0.0 if not hypothesis else 1.0
+    prev = list(range(len(hypothesis) + 1))
+    for i, rc in enumerate(reference, 1):
+        cur = [i] + [0] * len(hypothesis)
+        for j, hc in enumerate(hypothesis, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (rc != hc))
+        prev = cur
+    return prev[-1] / len(reference)
+
+
+async def _run_detector(detector_key, pages: List[np.ndarray], quantize: bool):
+    from ..detection import get_detector
+    detector = get_detector(detector_key)
+    await detector.download()
+    if detector.is_loaded():
+        await detector.unload()
+    detector.quantize = quantize
+    await detector.load('cpu')
+    boxes = []
+    start = time.perf_counter()
+    for img in pages:
+        textlines, _, _ = await detector.detect(img, 2048, 0.5, 0.7, 2.3, False, False, False)
+        boxes.append([np.array([t.aabb.x, t.aabb.y, t.aabb.x + t.aabb.w, t.aabb.y + t.aabb.h]) for t in textlines])
+    elapsed = time.perf_counter() - start
+    await detector.unload()
+    return boxes, elapsed
+
+
+def _read_labels(crops_dir: str) -> Dict[str, str]:
+    labels_path = os.path.join(crops_dir, 'labels.txt')
+    labels = {}
+    if os.path.exists(labels_path):
+        with open(labels_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if '\t' in line:
+                    name, text = line.rstrip('\n').split('\t', 1)
+                    labels[name] = text
+    return labels
+
+
+def _run_ocr_variants(crops_dir: str) -> Dict[str, Tuple[List[str], float]]:
+    import torch
+    from ..ocr.model_48px_onnx import (
+        ENCODER_ONNX_FILE, DECODER_STEP_ONNX_FILE, Model48pxOnnxRunner, _decode_text, _load_torch_model,
+    )
+
+    ocr_dir = _model_dir('ocr')
+    model = _load_torch_model(ocr_dir)
+    qmodel, _ = quantize_dynamic_model(_load_torch_model(ocr_dir))
+    image, widths = _ocr_crop_batch(list_images(crops_dir))
+
+    variants = {
+        'torch_fp32': lambda: model.infer_beam_batch_tensor(torch.from_numpy(image), widths, beams_k=5, max_seq_length=255),
+        'torch_int8': lambda: qmodel.infer_beam_batch_tensor(torch.from_numpy(image), widths, beams_k=5, max_seq_length=255),
+    }
+    encoder_path = os.path.join(ocr_dir, ENCODER_ONNX_FILE)
+    decoder_path = os.path.join(ocr_dir, DECODER_STEP_ONNX_FILE)
+    for name, enc, dec in (('onnx_fp32', encoder_path, decoder_path),
+                           ('onnx_int8', int8_path(encoder_path), int8_path(decoder_path))):
+        if os.path.exists(enc) and os.path.exists(dec):
+            runner = Model48pxOnnxRunner(enc, dec)
+            variants[name] = (lambda r: lambda: r.infer_beam_batch(image, widths, beams_k=5, max_seq_length=255))(runner)
+
+    results = {}
+    for name, fn in variants.items():
+        with torch.no_grad():
+            start = time.perf_counter()
+            ret = fn()
+            elapsed = time.perf_counter() - start
+        results[name] = ([_decode_text(model.dictionary, r[0]) for r in ret], elapsed)
+    return results
+
+
+def evaluate(pages_dir: Optional[str], crops_dir: Optional[str], detectors: List[str]) -> dict:
+    """输出并返回 INT8 相对 FP32 的精度变化和加速比"""
+    import asyncio
+    from ..config import Detector
+
+    report = {}
+    if pages_dir:
+        pages = [_read_rgb(p) for p in list_images(pages_dir)]
+        print(f'Detection ({len(pages)} pages, FP32 output as reference)')
+        for key in detectors:
+            fp32_boxes, fp32_time = asyncio.run(_run_detector(Detector(key), pages, False))
+            int8_boxes, int8_time = asyncio.run(_run_detector(Detector(key), pages, True))
+            f1 = np.mean([detection_f1(r, p) for r, p in zip(fp32_boxes, int8_boxes)]) if pages else 1.0
+            speedup = fp32_time / max(int8_time, 1e-9)
+            print(f'  {key:>10}: F1 {f1:.4f}, fp32 {fp32_time:.2f}s, int8 {int8_time:.2f}s, speed-up x{speedup:.2f}')
+            report.setdefault('detection', {})[key] = {
+                'pages': len(pages), 'f1': float(f1), 'fp32_s': fp32_time, 'int8_s': int8_time, 'speedup': speedup,
+            }
+
+    if crops_dir:
+        labels = _read_labels(crops_dir)
+        names = [os.path.basename(p) for p in list_images(crops_dir)]
+        results = _run_ocr_variants(crops_dir)
+        if labels:
+            reference = [labels.get(n, '') for n in names]
+            ref_name = 'labels.txt'
+        else:
+            reference = results['torch_fp32'][0]
+            ref_name = 'torch_fp32'
+        base_time = results['torch_fp32'][1]
+        print(f'OCR ({len(names)} crops, reference: {ref_name})')
+        for name, (texts, elapsed) in results.items():
+            cer = np.mean([char_error_rate(r, h) for r, h in zip(reference, texts)]) if texts else 0.0
+            speedup = base_time / max(elapsed, 1e-9)
+            print(f'  {name:>10}: CER {cer:.4f}, {elapsed:.2f}s, speed-up x{speedup:.2f}')
+            report.setdefault('ocr', {'crops': len(names), 'reference': ref_name})[name] = {
+                'cer': float(cer), 'seconds': elapsed, 'speedup': speedup,
+            }
+    return report
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='INT8 calibration / evaluation for CPU inference')
+    parser.add_argument('action', choices=['calibrate', 'evaluate'])
+    parser.add_argument('--pages', help='Directory of sample manga pages (detection)')
+    parser.add_argument('--crops', help='Directory of text line crops (48px OCR)')
+    parser.add_argument('--max-samples', type=int, default=64)
+    parser.add_argument('--detectors', default='dbconvnext,ctd', help='Comma separated detectors to evaluate')
+    parser.add_argument('--output', help='Write the evaluation report to this JSON file')
+    args = parser.parse_args()
+
+    if not args.pages and not args.crops:
+        parser.error('at least one of --pages / --crops is required')
+    if args.action == 'calibrate':
+        calibrate(args.pages, args.crops, args.max_samples)
+    else:
+        report = evaluate(args.pages, args.crops, [d for d in args.detectors.split(',') if d])
+        if args.output:
+            import json
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,319 @@
+"""
+共享内存图像
+
+把 numpy 图像放进 multiprocessing.shared_memory，跨进程传递时只序列化名字、形状和类型，
+接收方直接映射同一块内存，不复制像素数据。
+
+由创建方负责 unlink；接收方用完后只需 close。
+
+SharedImageRing 在此基础上提供可复用的槽位环，配合 pack_frames / unpack_frames
+把请求和结果中的大图替换为句柄，用于 shared 模式的本机进程间传输。
+"""
+import os
+import sys
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .generic import Context
+
+
+def _tracker_id() -> Optional[Tuple[int, int]]:
+    """
+    当前进程所用 resource_tracker 管道的 (st_dev, st_ino)，未启动或无需登记时为 None。
+    multiprocessing 启动的子进程继承父进程的管道，与父进程共用同一个 tracker
+    """
+    if sys.platform == 'win32' or sys.version_info >= (3, 13):
+        return None
+    from multiprocessing import resource_tracker
+    fd = getattr(resource_tracker._resource_tracker, '_fd', None)
+    if fd is None:
+        return None
+    try:
+        stat = os.fstat(fd)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+def _attach_shm(name: str, tracker: Optional[Tuple[int, int]] = None) -> shared_memory.SharedMemory:
+    """附加已有的共享内存；tracker 为创建方的 _tracker_id()"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    # Python < 3.13 在附加时也会登记到本进程的 resource_tracker。
+    # 与创建方共用同一个 tracker 时只是重复登记，取消登记反而会删掉创建方的登记（创建方 unlink 时 tracker 报 KeyError）；
+    # 使用自己的 tracker 时，退出时会误删创建方的共享内存，需要取消登记
+    if sys.platform != 'win32' and (tracker is None or _tracker_id() != tracker):
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+    return shm
+
+
+class SharedImage:
+    """共享内存中的 numpy 数组，pickle 时只传递 (name, shape, dtype, tracker)"""
+
+    def __init__(self, shape: Tuple[int, ...], dtype, name: Optional[str] = None, tracker: Optional[Tuple[int, int]] = None):
+        self.shape = tuple(int(s) for s in shape)
+        self.dtype = np.dtype(dtype)
+        nbytes = max(1, int(np.prod(self.shape)) * self.dtype.itemsize)
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self._owner = True
+            self.tracker = _tracker_id()
+        else:
+            self._shm = _attach_shm(name, tracker)
+            self._owner = False
+            self.tracker = tracker
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self._shm.buf)
+
+    @classmethod
+    def from_array(cls, arr: np.ndarray) -> 'SharedImage':
+        image = cls(arr.shape, arr.dtype)
+        image.array[...] = arr
+        return image
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def handle(self) -> tuple:
+        return self._shm.name, self.shape, self.dtype.str, self.tracker
+
+    @classmethod
+    def attach(cls, handle: tuple) -> 'SharedImage':
+        name, shape, dtype, tracker = handle
+        return cls(shape, dtype, name=name, tracker=tracker)
+
+    def __reduce__(self):
+        return SharedImage.attach, (self.handle,)
+
+    def copy(self) -> np.ndarray:
+        return np.array(self.array, copy=True)
+
+    def close(self):
+        # 先释放 ndarray 对缓冲区的引用，否则 close 会报 BufferError
+        self.array = None
+        try:
+            self._shm.close()
+        except Exception:
+            pass
+
+    def release(self):
+        """关闭并（若为创建方）删除共享内存"""
+        owner = self._owner
+        self.close()
+        if owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class SharedFrame:
+    """
+    环形缓冲区中一帧的句柄：只包含共享内存名、形状和类型，pickle 后只有几十字节
+
+    read() 直接映射槽位、不复制，返回值在 release() 之前有效；
+    创建方释放槽位后内容可能被下一帧覆盖，需要长期持有时用 copy()
+    """
+    __slots__ = ('name', 'shape', 'dtype', 'mode', 'slot', 'generation', 'tracker', '_shm')
+
+    def __init__(self, name: str, shape: Tuple[int, ...], dtype: str, mode: Optional[str], slot: int, generation: int,
+                 tracker: Optional[Tuple[int, int]] = None):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+        self.mode = mode
+        self.slot = slot
+        self.generation = generation
+        self.tracker = tracker
+        self._shm = None
+
+    def __getstate__(self):
+        return (self.name, self.shape, self.dtype, self.mode, self.slot, self.generation, self.tracker)
+
+    def __setstate__(self, state):
+        self.name, self.shape, self.dtype, self.mode, self.slot, self.generation, self.tracker = state
+        self._shm = None
+
+    @property
+    def nbytes(self) -> int:
+        return int(np.prod(self.shape)) * np.dtype(self.dtype).itemsize
+
+    def read(self):
+        """
+        附加共享内存，返回直接映射槽位的 numpy 数组；mode 不为空时返回 PIL 图片
+        （L/RGBA 等 PIL 能直接映射的模式不复制，RGB 由 PIL 转换为内部格式时复制）
+        """
+        if self._shm is None:
+            self._shm = _attach_shm(self.name, self.tracker)
+        view = np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=self._shm.buf)
+        if self.mode is None:
+            return view
+        from PIL import Image
+        return Image.fromarray(view, self.mode)
+
+    def copy(self):
+        """复制出与共享内存无关的数组/图片"""
+        attached = self._shm is not None
+        value = self.read().copy()
+        if not attached:
+            self.release()
+        return value
+
+    def release(self):
+        """关闭 read() 建立的映射，调用前应丢弃 read() 返回的数组/图片"""
+        shm, self._shm = self._shm, None
+        if shm is None:
+            return
+        try:
+            shm.close()
+        except BufferError:
+            # 仍有数组引用这块内存，保留映射，丢弃引用后可再次调用
+            self._shm = shm
+
+
+class SharedImageRing:
+    """
+    固定数量的共享内存槽位，循环复用，用于在进程之间传递图片和 mask
+
+    put() 把数组或 PIL 图片复制进一个空闲槽位并返回 SharedFrame 句柄，接收方用 SharedFrame.read() 映射数据。
+    槽位在创建方调用 release() 之前一直被占用，生命周期由调用方显式管理；
+    没有空闲槽位时 put() 返回 None，调用方应退回普通 pickle。
+    槽位按需创建，帧比槽位大时重新分配该槽位。
+    """
+
+    def __init__(self, slots: int = 4):
+        import threading
+        self.slots = slots
+        self._buffers: list = [None] * slots
+        self._busy = [False] * slots
+        self._generation = [0] * slots
+        self._lock = threading.Lock()
+
+    def put(self, value) -> Optional[SharedFrame]:
+        mode = None
+        if not isinstance(value, np.ndarray):
+            # PIL 图片
+            mode = value.mode
+            value = np.asarray(value)
+        nbytes = value.nbytes
+        with self._lock:
+            candidates = [i for i in range(self.slots) if not self._busy[i]]
+            if not candidates:
+                return None
+            # 优先使用容量足够的槽位，避免重新分配
+            fitting = [i for i in candidates if self._buffers[i] is not None and self._buffers[i].shape[0] >= nbytes]
+            slot = fitting[0] if fitting else candidates[0]
+            self._busy[slot] = True
+            self._generation[slot] += 1
+            generation = self._generation[slot]
+        try:
+            buffer = self._buffers[slot]
+            if buffer is None or buffer.shape[0] < nbytes:
+                if buffer is not None:
+                    buffer.release()
+                self._buffers[slot] = buffer = SharedImage((max(nbytes, 1),), np.uint8)
+            view = np.ndarray(value.shape, dtype=value.dtype, buffer=buffer._shm.buf)
+            view[...] = value
+            del view
+        except Exception:
+            self.release(slot)
+            raise
+        return SharedFrame(buffer.name, tuple(value.shape), value.dtype.str, mode, slot, generation, buffer.tracker)
+
+    def release(self, frame):
+        """释放槽位（SharedFrame 或槽位序号）；对已被复用的旧句柄不做任何事"""
+        with self._lock:
+            if isinstance(frame, SharedFrame):
+                if self._generation[frame.slot] != frame.generation:
+                    return
+                frame = frame.slot
+            self._busy[frame] = False
+
+    def release_all(self):
+        with self._lock:
+            self._busy = [False] * self.slots
+
+    def close(self):
+        """删除所有共享内存，之后不能再使用"""
+        with self._lock:
+            for buffer in self._buffers:
+                if buffer is not None:
+                    buffer.release()
+            self._buffers = [None] * self.slots
+            self._busy = [False] * self.slots
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _is_image(value) -> bool:
+    return hasattr(value, 'mode') and hasattr(value, 'size') and hasattr(value, 'tobytes')
+
+
+def pack_frames(obj, ring: SharedImageRing, frames: list, min_bytes: int = 1 << 20):
+    """
+    把 obj 中不小于 min_bytes 的 numpy 数组和 PIL 图片放入 ring，替换为 SharedFrame 句柄，
+    放入的句柄追加到 frames 中；支持 dict（包括 Context）、list、tuple，不修改原对象
+    """
+    if isinstance(obj, np.ndarray) or _is_image(obj):
+        nbytes = obj.nbytes if isinstance(obj, np.ndarray) else obj.width * obj.height * len(obj.getbands())
+        if nbytes >= min_bytes and (isinstance(obj, np.ndarray) or obj.mode in ('L', 'LA', 'RGB', 'RGBA', 'I', 'F')):
+            frame = ring.put(obj)
+            if frame is not None:
+                frames.append(frame)
+                return frame
+        return obj
+    if type(obj) is dict or isinstance(obj, Context):
+        packed = Context() if isinstance(obj, Context) else {}
+        for key, value in obj.items():
+            packed[key] = pack_frames(value, ring, frames, min_bytes)
+        return packed
+    if isinstance(obj, (list, tuple)) and type(obj) in (list, tuple):
+        return type(obj)(pack_frames(value, ring, frames, min_bytes) for value in obj)
+    return obj
+
+
+def unpack_frames(obj, frames: Optional[list] = None):
+    """
+    pack_frames 的逆操作：把 SharedFrame 句柄替换为数组/图片。
+    传入 frames 时返回直接映射共享内存的视图并把句柄追加到 frames，用完后调用 release_frames(frames)；
+    不传时复制出数据，适用于无法确定槽位何时被复用的场合
+    """
+    if isinstance(obj, SharedFrame):
+        if frames is None:
+            return obj.copy()
+        frames.append(obj)
+        return obj.read()
+    if type(obj) is dict or isinstance(obj, Context):
+        if not any(isinstance(value, (SharedFrame, dict, list, tuple)) for value in obj.values()):
+            return obj
+        for key, value in obj.items():
+            obj[key] = unpack_frames(value, frames)
+        return obj
+    if isinstance(obj, (list, tuple)) and type(obj) in (list, tuple):
+        return type(obj)(unpack_frames(value, frames) for value in obj)
+    return obj
+
+
+def release_frames(frames: list):
+    """关闭 unpack_frames 建立的映射"""
+    for frame in frames:
+        frame.release()
+    frames.clear()
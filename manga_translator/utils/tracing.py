@@ -0,0 +1,255 @@
+"""
+阶段级追踪
+
+enable() 之后记录各阶段（_run_*）、模型加载、网络请求、图片读写和队列等待的 span，
+每个 span 附带页面、线程和内存变化（进程 RSS、CUDA 已分配显存）。
+结果可以导出为 Chrome trace JSON（chrome://tracing 或 https://ui.perfetto.dev 直接打开），
+并在批次结束时输出按 span 汇总的耗时表。
+
+未启用时 span() 直接返回共享的空上下文管理器，开销只有一次属性判断。
+
+    with tracer.span('detection', 'stage', page='001.png'):
+        ...
+"""
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+from .log import get_logger
+
+logger = get_logger('Tracing')
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+_process = None
+
+
+def _process_rss() -> int:
+    global _process
+    try:
+        if _process is None:
+            import psutil
+            _process = psutil.Process()
+        return _process.memory_info().rss
+    except Exception:
+        return 0
+
+
+def _cuda_allocated() -> int:
+    # 只在 torch 已导入且 CUDA 已初始化时读取，避免追踪本身触发 CUDA 初始化
+    torch = sys.modules.get('torch')
+    if torch is None:
+        return 0
+    try:
+        if torch.cuda.is_initialized():
+            return torch.cuda.memory_allocated()
+    except Exception:
+        pass
+    return 0
+
+
+def page_of(ctx) -> Optional[str]:
+    """从 Context 取页面标识：优先文件名，其次流水线中的页序号"""
+    if ctx is None:
+        return None
+    name = getattr(ctx, 'image_name', None)
+    if name:
+        return os.path.basename(str(name))
+    index = getattr(ctx, 'page_index', None)
+    return None if index is None else str(index)
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'cat', 'page', 'args', 'start', 'rss', 'vram')
+
+    def __init__(self, tracer: 'Tracer', name: str, cat: str, page: Optional[str], args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.page = page
+        self.args = args
+
+    def __enter__(self):
+        if self.tracer.memory:
+            self.rss = _process_rss()
+            self.vram = _cuda_allocated()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        args = self.args
+        if self.page is not None:
+            args['page'] = self.page
+        if self.tracer.memory:
+            args['rss_delta_mb'] = round((_process_rss() - self.rss) / 1048576, 2)
+            vram = _cuda_allocated()
+            if vram or self.vram:
+                args['vram_delta_mb'] = round((vram - self.vram) / 1048576, 2)
+        if exc_type is not None:
+            args['error'] = exc_type.__name__
+        self.tracer._record(self.name, self.cat, self.start, end, args)
+        return False
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.memory = True
+        self.output_path: Optional[str] = None
+        self._events = []
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter_ns()
+        self._batch_depth = 0
+
+    def enable(self, output_path: Optional[str] = None, memory: bool = True):
+        """开始记录；output_path 为 Chrome trace 的输出路径（None 表示只输出汇总表）"""
+        self.output_path = output_path
+        self.memory = memory
+        self.enabled = True
+        logger.info(f'Tracing enabled{f", writing Chrome trace to {output_path}" if output_path else ""}')
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._events = []
+            self._threads = {}
+            self._origin = time.perf_counter_ns()
+
+    def _enter_batch(self):
+        with self._lock:
+            self._batch_depth += 1
+
+    def _exit_batch(self) -> bool:
+        """退出一层批次，返回是否为最外层"""
+        with self._lock:
+            self._batch_depth -= 1
+            return self._batch_depth == 0
+
+    def span(self, name: str, cat: str = 'stage', page: Optional[str] = None, **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, cat, page, args)
+
+    def _record(self, name: str, cat: str, start_ns: int, end_ns: int, args: dict):
+        thread = threading.current_thread()
+        event = {
+            'name': name,
+            'cat': cat,
+            'ph': 'X',
+            'ts': (start_ns - self._origin) / 1000,
+            'dur': (end_ns - start_ns) / 1000,
+            'pid': os.getpid(),
+            'tid': thread.ident,
+            'args': args,
+        }
+        with self._lock:
+            self._events.append(event)
+            self._threads.setdefault((event['pid'], thread.ident), thread.name)
+
+    def chrome_trace(self) -> dict:
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                    for (pid, tid), name in threads.items()]
+        return {'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}
+
+    def export(self, path: Optional[str] = None) -> Optional[str]:
+        path = path or self.output_path
+        if not path:
+            return None
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
+        return path
+
+    def summary(self) -> list:
+        """按 (类别, 名称) 汇总：次数、总耗时、平均/最大耗时、占总时长比例、RSS 变化合计"""
+        with self._lock:
+            events = list(self._events)
+        if not events:
+            return []
+        wall = max(e['ts'] + e['dur'] for e in events) - min(e['ts'] for e in events)
+        groups = {}
+        for e in events:
+            row = groups.setdefault((e['cat'], e['name']), {'cat': e['cat'], 'name': e['name'], 'count': 0,
+                                                             'total_ms': 0.0, 'max_ms': 0.0, 'rss_delta_mb': 0.0})
+            dur_ms = e['dur'] / 1000
+            row['count'] += 1
+            row['total_ms'] += dur_ms
+            row['max_ms'] = max(row['max_ms'], dur_ms)
+            row['rss_delta_mb'] += e['args'].get('rss_delta_mb', 0.0)
+        rows = sorted(groups.values(), key=lambda r: r['total_ms'], reverse=True)
+        for row in rows:
+            row['mean_ms'] = row['total_ms'] / row['count']
+            row['wall_pct'] = 100 * row['total_ms'] * 1000 / wall if wall > 0 else 0.0
+        return rows
+
+    def format_summary(self) -> str:
+        rows = self.summary()
+        if not rows:
+            return ''
+        lines = [f'{"category":<10} {"span":<32} {"count":>6} {"total s":>9} {"mean ms":>9} {"max ms":>9} {"wall %":>7} {"RSS MB":>8}']
+        for row in rows:
+            lines.append(f'{row["cat"]:<10} {row["name"][:32]:<32} {row["count"]:>6} {row["total_ms"] / 1000:>9.2f} '
+                         f'{row["mean_ms"]:>9.1f} {row["max_ms"]:>9.1f} {row["wall_pct"]:>7.1f} {row["rss_delta_mb"]:>8.1f}')
+        return '\n'.join(lines)
+
+    def flush(self):
+        """写出 Chrome trace 并输出汇总表"""
+        try:
+            path = self.export()
+            table = self.format_summary()
+            if table:
+                logger.info('Trace summary (spans of nested categories overlap, wall % can exceed 100):\n' + table)
+            if path:
+                logger.info(f'Chrome trace written to {path}')
+        except Exception as e:
+            logger.error(f'Failed to write trace: {e}')
+
+
+tracer = Tracer()
+
+
+def traced_stage(name: str):
+    """包裹 MangaTranslator._run_*(config, ctx)，以 ctx 所属页面记录 span"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, config, ctx, *args, **kwargs):
+            if not tracer.enabled:
+                return await func(self, config, ctx, *args, **kwargs)
+            with tracer.span(name, 'stage', page=page_of(ctx)):
+                return await func(self, config, ctx, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def traced_batch(func):
+    """
+    包裹批量翻译入口：记录整个批次的 span，最外层批次结束时写出 trace 和汇总表，
+    然后清空已记录的 span，下一个批次重新开始记录
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not tracer.enabled:
+            return await func(*args, **kwargs)
+        tracer._enter_batch()
+        try:
+            with tracer.span(func.__name__, 'batch'):
+                return await func(*args, **kwargs)
+        finally:
+            if tracer._exit_batch():
+                tracer.flush()
+                tracer.reset()
+    return wrapper
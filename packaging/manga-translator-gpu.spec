@@ -1,5 +1,5 @@
 # -*- mode: python ; coding: utf-8 -*-
-from PyInstaller.utils.hooks import collect_data_files, collect_all, get_package_paths
+from PyInstaller.utils.hooks import collect_data_files, collect_all, collect_submodules, get_package_paths
 import os
 
 # Collect data files dynamically instead of using a hardcoded path
@@ -30,6 +30,16 @@ try:
 except Exception:
     pass
 
+# 检测/OCR/修复/翻译/超分/上色的注册表按 'module:Class' 字符串延迟导入实现模块，
+# PyInstaller 的静态分析看不到这些导入，需要显式收集子模块
+registry_hiddenimports = []
+for _pkg in ('manga_translator.detection', 'manga_translator.ocr', 'manga_translator.inpainting',
+             'manga_translator.translators', 'manga_translator.upscaling', 'manga_translator.colorization'):
+    try:
+        registry_hiddenimports += collect_submodules(_pkg)
+    except Exception:
+        pass
+
 a = Analysis(
     ['../desktop_qt_ui/main.py'],  # 相对于packaging目录
     pathex=[],
@@ -49,7 +59,7 @@ a = Analysis(
         'manga_translator.ocr.paddleocr_vl_model.modeling_paddleocr_vl',
         'manga_translator.ocr.paddleocr_vl_model.processing_paddleocr_vl',
         'manga_translator.ocr.paddleocr_vl_model.image_processing',
-    ] + onnx_hiddenimports,  # 添加隐式导入
+    ] + onnx_hiddenimports + registry_hiddenimports,  # 添加隐式导入
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[os.path.join(SPECPATH, 'pyi_rth_onnxruntime.py')],
@@ -0,0 +1,32 @@
+import functools
+
+import pytest
+
+from manga_translator.rendering import text_render
+
+from benchmarks.common import DEFAULT_FONT
+
+
+@pytest.fixture(autouse=True, scope='session')
+def _memoize_hyphenator():
+    # Hyphenator 每次创建都会检查/下载词典，测试中每种语言只创建一次
+    original = text_render.select_hyphenator
+    text_render.select_hyphenator = functools.lru_cache(maxsize=None)(original)
+    yield
+    text_render.select_hyphenator = original
+
+
+@pytest.fixture(autouse=True, scope='session')
+def _font_coverage_cache(tmp_path_factory):
+    # 字体覆盖范围缓存写到临时目录，不在 models/ 下留下文件
+    original = text_render.FONT_COVERAGE_CACHE_DIR
+    text_render.FONT_COVERAGE_CACHE_DIR = str(tmp_path_factory.mktemp('font_coverage'))
+    yield
+    text_render.FONT_COVERAGE_CACHE_DIR = original
+
+
+@pytest.fixture
+def font_path():
+    text_render.set_font(DEFAULT_FONT)
+    text_render.clear_layout_caches()
+    return DEFAULT_FONT
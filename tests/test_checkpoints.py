@@ -0,0 +1,67 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from benchmarks.checkpoint_harness import base_config, make_page, make_translator, prepare_page, run_harness
+
+
+@pytest.mark.parametrize('store', ['memory', 'disk'])
+def test_config_change_reruns_only_affected_stages(tmp_path, store):
+    # 例如只改字体时只重新渲染，只换翻译器时不再执行检测/OCR/修复
+    rows = asyncio.run(run_harness(str(tmp_path) if store == 'disk' else None))
+    failed = [(row['change'], row['executed']) for row in rows if not row['ok']]
+    assert not failed
+
+
+def _translate(translator, pages, config, batch_size):
+    async def run():
+        contexts = [(await prepare_page(translator, page, config), config) for page in pages]
+        await translator._batch_translate_contexts(contexts, batch_size)
+        return contexts
+    return asyncio.run(run())
+
+
+def test_translation_key_covers_previous_pages():
+    translator, counts = make_translator()
+    translator.context_size = 1
+    config = base_config()
+    a, b, c = make_page(shade=0), make_page(shade=50), make_page(shade=100)
+
+    _translate(translator, [a, b], config, 1)
+    assert counts['translated_pages'] == 2
+    for previous, expected in ((a, 0), (c, 2)):
+        # 新任务从空的上下文历史开始；前一页不同时，后一页的上下文不同，需要重新翻译
+        translator.all_page_translations = []
+        counts.clear()
+        _translate(translator, [previous, b], config, 1)
+        assert counts['translated_pages'] == expected
+
+
+def test_translation_key_covers_batch_pages():
+    translator, counts = make_translator()
+    config = base_config()
+    a, b, c = make_page(shade=0), make_page(shade=50), make_page(shade=100)
+
+    _translate(translator, [a, b], config, 2)
+    counts.clear()
+    _translate(translator, [a, b], config, 2)
+    assert counts['translated_pages'] == 0
+    # HQ 翻译器把整批页面一起发送，批次组成变化时整批重新翻译
+    contexts = _translate(translator, [a, c], config, 2)
+    assert counts['translated_pages'] == 2
+    assert all(ctx.text_regions[0].translation for ctx, _ in contexts)
+
+
+def test_detection_hit_restores_debug_mask(tmp_path):
+    translator, counts = make_translator()
+    translator.verbose = True
+    translator._result_path = lambda name: str(tmp_path / name)
+    config = base_config()
+    page = make_page()
+
+    first = asyncio.run(prepare_page(translator, page, config))
+    second = asyncio.run(prepare_page(translator, page, config))
+    assert counts['detection'] == 1
+    assert first.raw_mask_mask is not None
+    assert np.array_equal(second.raw_mask_mask, first.raw_mask_mask)
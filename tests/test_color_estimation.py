@@ -0,0 +1,15 @@
+import numpy as np
+
+from benchmarks.color_estimation_bench import DICTIONARY, estimate_colors_per_char, make_batch
+from manga_translator.ocr.model_48px import estimate_colors_batch
+
+
+def test_batch_matches_per_char():
+    batch = make_batch(120, 40, np.random.default_rng(1))
+    assert estimate_colors_batch(batch, DICTIONARY) == estimate_colors_per_char(batch, DICTIONARY)
+
+
+def test_region_without_colors():
+    # 只有 <S></S> 的区域没有任何字符颜色，应得到全 0
+    batch = make_batch(4, 1, np.random.default_rng(2))
+    assert estimate_colors_batch(batch, DICTIONARY) == estimate_colors_per_char(batch, DICTIONARY)
@@ -0,0 +1,29 @@
+import os
+import shutil
+
+from manga_translator.rendering import text_render
+from manga_translator.utils import BASE_PATH
+
+FONTS_DIR = os.path.join(BASE_PATH, 'fonts')
+
+
+def test_edited_font_gets_new_cache_entry(tmp_path, monkeypatch):
+    cache_dir = tmp_path / 'cache'
+    monkeypatch.setattr(text_render, 'FONT_COVERAGE_CACHE_DIR', str(cache_dir))
+    font = tmp_path / 'font.ttf'
+    shutil.copyfile(os.path.join(FONTS_DIR, 'anime_ace.ttf'), font)
+    first = text_render.get_font_coverage(str(font))
+    assert first and len(os.listdir(cache_dir)) == 1
+
+    # 同一路径换成另一个字体文件：进程内缓存和磁盘缓存都不能返回旧结果
+    shutil.copyfile(os.path.join(FONTS_DIR, 'comic shanns 2.ttf'), font)
+    stat = os.stat(font)
+    os.utime(font, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    second = text_render.get_font_coverage(str(font))
+    assert second != first
+    assert len(os.listdir(cache_dir)) == 2
+
+    # 清空进程内缓存后从磁盘读到的是新字体的结果
+    text_render._font_coverage.clear()
+    assert text_render.get_font_coverage(str(font)) == second
+    assert text_render.get_font_coverage(os.path.join(FONTS_DIR, 'comic shanns 2.ttf')) == second
@@ -0,0 +1,34 @@
+import copy
+
+import numpy as np
+import pytest
+
+from manga_translator.rendering import resize_regions_to_font_size, text_render
+
+from benchmarks.font_fit_bench import legacy_fit_font_size, make_regions, strict_config, use_fit
+
+
+@pytest.mark.parametrize('page', ['dense_en_horizontal', 'dense_en_br', 'dense_en_vertical'])
+def test_fit_font_size_matches_legacy_search(font_path, page):
+    # 严格布局在基准页面上得到的字号与原来的两段循环相同
+    regions = make_regions(page, 16)
+    img = np.zeros((2400, 2000, 3), dtype=np.uint8)
+    sizes = {}
+    for name, fit in (('legacy', legacy_fit_font_size), ('current', text_render.fit_font_size)):
+        batch = copy.deepcopy(regions)
+        with use_fit(fit):
+            resize_regions_to_font_size(img, batch, strict_config())
+        sizes[name] = [region.font_size for region in batch]
+    assert sizes['current'] == sizes['legacy']
+
+
+def test_fit_font_size_bounds(font_path):
+    text = 'the quick brown fox jumps over the lazy dog ' * 4
+    for horizontal in (True, False):
+        args = (text, horizontal, 200, 200, 3)
+        size = text_render.fit_font_size(*args, 8, 60)
+        # 都放不下时原来的循环返回 min_size - 1，由调用方取 max(..., min_size)
+        assert size == max(legacy_fit_font_size(*args, 8, 60), 8)
+        assert 8 <= size <= 60
+    assert text_render.fit_font_size(text, True, 20, 20, 1, 10, 30) == 10
+    assert text_render.fit_font_size('hi', True, 500, 100, 1, 10, 30) == 30
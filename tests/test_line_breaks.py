@@ -0,0 +1,23 @@
+import pytest
+
+from manga_translator.config import Config
+from manga_translator.rendering import optimize_line_breaks_for_region
+
+from benchmarks.line_break_bench import line_uniformity, make_cases
+
+
+@pytest.mark.parametrize('strict', [False, True])
+def test_dp_matches_exhaustive(font_path, strict):
+    config = Config()
+    config.render.layout_mode = 'smart_scaling'
+    config.render.strict_smart_scaling = strict
+    # 断句不超过 10 个时 exhaustive 枚举全部组合，两种方法应得到相同的方案
+    for case in make_cases('en_horizontal', 16, 1, 8, seed=strict):
+        region, font_size, width, height = case
+        exhaustive = optimize_line_breaks_for_region(region, config, font_size, width, height, method='exhaustive')
+        dp = optimize_line_breaks_for_region(region, config, font_size, width, height, method='dp')
+        if exhaustive[0] != dp[0]:
+            # 不同的文本只允许是字号和均匀度都相同的并列方案
+            assert dp[1] == pytest.approx(exhaustive[1])
+            assert line_uniformity(region, config, dp[0], font_size) == pytest.approx(
+                line_uniformity(region, config, exhaustive[0], font_size))
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from manga_translator.utils.inference import ModelWrapper
+from manga_translator.utils.model_manager import MB, model_manager
+
+
+class _Dummy(ModelWrapper):
+    unload_delay = 0.05
+
+    def __init__(self, key):
+        self._KEY = key
+        super().__init__()
+        self.model = None
+
+    async def _load(self, device):
+        self.model = object()
+
+    async def _unload(self):
+        await asyncio.sleep(self.unload_delay)
+        self.model = None
+
+    async def _infer(self):
+        assert self.model is not None
+        await asyncio.sleep(0.05)
+        assert self.model is not None
+        return self._key
+
+
+@pytest.fixture
+def budget(tmp_path, monkeypatch):
+    monkeypatch.setattr(_Dummy, '_MODEL_DIR', str(tmp_path))
+    model_manager.configure(ram_budget_mb=3)
+    yield
+    model_manager.configure(0, 0)
+    model_manager._footprints.clear()
+
+
+def test_infer_waits_for_eviction_and_reloads(budget):
+    async def scenario():
+        a, b = _Dummy('dummy_a'), _Dummy('dummy_b')
+        await a.load('cpu')
+        model_manager._entries[id(a)].ram = 2 * MB
+        model_manager._footprints['dummy_b'] = (2 * MB, 0)
+        # b 的加载会卸载 a；卸载过程中 a 上的推理应等待并重新加载，而不是在卸载中的模型上运行
+        load_b = asyncio.create_task(b.load('cpu'))
+        await asyncio.sleep(0.01)
+        assert model_manager._entries[id(a)].evicting
+        result = await a.infer()
+        await load_b
+        return a, b, result
+
+    a, b, result = asyncio.run(scenario())
+    assert result == 'dummy_a'
+    assert a.is_loaded() and b.is_loaded()
+    for wrapper in (a, b):
+        asyncio.run(wrapper.unload())
+
+
+def test_pinned_model_is_not_evicted(budget):
+    async def scenario():
+        a, b = _Dummy('dummy_a'), _Dummy('dummy_b')
+        await a.load('cpu')
+        model_manager._entries[id(a)].ram = 2 * MB
+        model_manager._footprints['dummy_b'] = (2 * MB, 0)
+        infer_a = asyncio.create_task(a.infer())
+        await asyncio.sleep(0.01)
+        await b.load('cpu')
+        assert a.is_loaded()
+        return a, b, await infer_a
+
+    a, b, result = asyncio.run(scenario())
+    assert result == 'dummy_a'
+    for wrapper in (a, b):
+        asyncio.run(wrapper.unload())
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('onnxruntime')
+pytest.importorskip('onnx')
+
+from manga_translator.ocr.model_48px import estimate_colors_batch
+
+from benchmarks.ocr_48px_onnx_bench import DICTIONARY, compare, export, make_crops, make_model, run_onnx, run_torch
+
+
+def test_beam_search_matches_torch(tmp_path):
+    # 随机权重导出的两张图在宿主侧 beam search 后应与 torch 的 infer_beam_batch_tensor 一致
+    model = make_model(seed=0)
+    runner = export(model, str(tmp_path))
+    image, widths = make_crops(6, seed=1)
+    torch_results = run_torch(model, image, widths, max_seq_length=16)
+    onnx_results = run_onnx(runner, image, widths, max_seq_length=16)
+
+    report = compare(torch_results, onnx_results)
+    assert report['token_matches'] == len(widths)
+    assert report['max_prob_rel_diff'] < 1e-4
+    assert report['max_color_diff'] < 1e-5
+    torch_colors = estimate_colors_batch(torch_results, DICTIONARY)
+    onnx_colors = estimate_colors_batch(onnx_results, DICTIONARY)
+    assert np.abs(np.array(torch_colors, dtype=np.int64) - np.array(onnx_colors, dtype=np.int64)).max() <= 1
@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+ort = pytest.importorskip('onnxruntime')
+onnx = pytest.importorskip('onnx')
+
+from manga_translator.utils.onnx_session import IOBindingRunner, create_session
+
+
+@pytest.fixture
+def double_model(tmp_path):
+    from onnx import TensorProto, helper
+    x = helper.make_tensor_value_info('x', TensorProto.FLOAT, ['n', 4])
+    y = helper.make_tensor_value_info('y', TensorProto.FLOAT, ['n', 4])
+    two = helper.make_tensor('two', TensorProto.FLOAT, [], [2.0])
+    graph = helper.make_graph([helper.make_node('Mul', ['x', 'two'], ['y'])], 'double', [x], [y], [two])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)])
+    model.ir_version = 8
+    path = str(tmp_path / 'double.onnx')
+    onnx.save(model, path)
+    return path
+
+
+def test_outputs_are_views_until_next_run(double_model):
+    runner = IOBindingRunner(create_session(double_model))
+    first = runner.run({'x': np.ones((2, 4), dtype=np.float32)})[0]
+    second = runner.run({'x': np.full((2, 4), 3, dtype=np.float32)})[0]
+    kept = second.copy()
+    third = runner.run({'x': np.full((2, 4), 5, dtype=np.float32)})[0]
+    assert (first == 2).all() and (kept == 6).all() and (third == 10).all()
+    # 同一形状的输出复用绑定缓冲区，不复制
+    assert np.shares_memory(second, third) and (second == 10).all()
+
+
+def test_concurrent_runs(double_model):
+    runner = IOBindingRunner(create_session(double_model))
+
+    def run(i):
+        results = []
+        for j in range(50):
+            value = i * 100 + j
+            out = runner.run({'x': np.full((3, 4), value, dtype=np.float32)})[0]
+            results.append((out == 2 * value).all())
+        return all(results)
+
+    with ThreadPoolExecutor(4) as pool:
+        assert all(pool.map(run, range(4)))
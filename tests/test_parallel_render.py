@@ -0,0 +1,63 @@
+import asyncio
+import copy
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from manga_translator.config import Config
+from manga_translator.rendering import dispatch, text_render
+from manga_translator.utils.generic import BASE_PATH
+
+from benchmarks.layout_cache_bench import make_chapter
+from benchmarks.parallel_render_bench import make_page
+
+
+def _render(img, page, font_path, workers):
+    config = Config()
+    config.render.render_workers = workers
+    return asyncio.run(dispatch(img.copy(), copy.deepcopy(page), font_path, config))
+
+
+def test_parallel_matches_sequential(font_path):
+    img, page = make_page(12)
+    expected = _render(img, page, font_path, 1)
+    assert np.array_equal(_render(img, page, font_path, 3), expected)
+
+
+def test_concurrent_dispatch_keeps_own_font(font_path):
+    # 多个流水线线程同时用不同的默认字体渲染，每个页面都应使用自己的字体
+    other_font = os.path.join(BASE_PATH, 'fonts', 'comic shanns 2.ttf')
+    img, page = make_page(8)
+    fonts = [font_path, other_font] * 2
+    expected = {font: _render(img, page, font, 2) for font in set(fonts)}
+    with ThreadPoolExecutor(len(fonts)) as pool:
+        outputs = list(pool.map(lambda font: _render(img, page, font, 2), fonts))
+    assert not np.array_equal(expected[font_path], expected[other_font])
+    assert all(np.array_equal(output, expected[font]) for output, font in zip(outputs, fonts))
+
+
+def test_layout_cache_matches_uncached(font_path):
+    chapter = make_chapter(pages=2, regions=12)
+    img = np.full((1400, 1200, 3), 255, dtype=np.uint8)
+    maxsize = text_render.LAYOUT_CACHE.maxsize
+    try:
+        text_render.LAYOUT_CACHE.maxsize = text_render.SHAPING_CACHE.maxsize = 0
+        expected = [_render(img, page, font_path, 1) for page in chapter]
+    finally:
+        text_render.LAYOUT_CACHE.maxsize = text_render.SHAPING_CACHE.maxsize = maxsize
+    text_render.clear_layout_caches()
+    outputs = [_render(img, page, font_path, 1) for page in chapter + chapter]
+    assert all(np.array_equal(a, b) for a, b in zip(outputs, expected + expected))
+
+
+def test_render_pool_survives_varying_region_counts(font_path):
+    # 不同页面的区域数不同时复用同一个线程池，并发 dispatch 不会碰到已关闭的线程池
+    from manga_translator import rendering
+    pages = [make_page(regions) for regions in (2, 5, 12, 3)]
+    expected = [_render(img, page, font_path, 1) for img, page in pages]
+    pool = rendering._get_render_pool(3)
+    with ThreadPoolExecutor(len(pages)) as executor:
+        outputs = list(executor.map(lambda item: _render(*item, font_path, 3), pages))
+    assert all(np.array_equal(output, exp) for output, exp in zip(outputs, expected))
+    assert rendering._render_pool is pool
@@ -0,0 +1,28 @@
+import pytest
+
+from manga_translator.rendering import text_render_pillow_eng as pillow_eng
+
+from benchmarks.pillow_placement_bench import bench_render, legacy_solve, make_bboxes
+
+
+@pytest.mark.parametrize('count, seed', [(20, 0), (40, 1), (60, 2)])
+def test_grid_solver_matches_naive(count, seed):
+    bboxes = make_bboxes(count, 800, 1200, seed=seed)
+    assert pillow_eng.solve_collisions_spiral_xyxy((800, 1200), bboxes) == legacy_solve((800, 1200), bboxes)
+
+
+def test_spiral_rings_keep_point_order():
+    bounds = (0, 0, 30, 20)
+    expected = [(5, 5)]
+    for radius in range(1, 40):
+        for dx in range(-radius, radius + 1):
+            expected += [(5 + dx, 5 - radius), (5 + dx, 5 + radius)]
+        for dy in range(-radius + 1, radius):
+            expected += [(5 - radius, 5 + dy), (5 + radius, 5 + dy)]
+    expected = [(x, y) for x, y in expected if 0 <= x <= 30 and 0 <= y <= 20]
+    points = [(int(x), int(y)) for _, xs, ys in pillow_eng._spiral_rings(5, 5, 40 ** 2, bounds) for x, y in zip(xs, ys)]
+    assert points == expected
+
+
+def test_render_matches_uncached_naive(font_path):
+    assert bench_render(font_path, regions=12, width=800, height=1200, repeat=1)['pixel_identical']
@@ -0,0 +1,18 @@
+from manga_translator.args import create_parser
+from manga_translator.config import CliConfig
+from manga_translator.mode.local import _apply_pipeline_args
+
+
+def test_pipeline_flags_override_config():
+    cli_config = CliConfig(pipeline_inpaint_workers=2, pipeline_queue_mb=512).model_dump()
+    args = create_parser().parse_args(['local', '-i', 'page.png', '--concurrent', '--pipeline-render-workers', '3',
+                                       '--pipeline-process-workers', '2', '--pipeline-serialize-render'])
+    _apply_pipeline_args(args, cli_config)
+    assert args.concurrent
+    assert cli_config['pipeline_render_workers'] == 3
+    assert cli_config['pipeline_process_workers'] == 2
+    assert cli_config['pipeline_serialize_render'] is True
+    # 未指定的参数保留配置文件中的值
+    assert cli_config['pipeline_inpaint_workers'] == 2
+    assert cli_config['pipeline_queue_mb'] == 512
+    assert cli_config['pipeline_queue_pages'] == 0
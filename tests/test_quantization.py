@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from manga_translator.utils.quantization import char_error_rate, detection_f1
+
+
+def test_detection_f1():
+    ref = [np.array([0, 0, 10, 10]), np.array([20, 20, 30, 30])]
+    assert detection_f1(ref, ref) == 1.0
+    assert detection_f1(ref, [np.array([0, 0, 10, 9])]) == 2 / 3
+    assert detection_f1([], []) == 1.0
+
+
+def test_char_error_rate():
+    assert char_error_rate('漫画翻訳', '漫画翻訳') == 0.0
+    assert char_error_rate('漫画翻訳', '漫画翻') == 0.25
+    assert char_error_rate('', 'a') == 1.0
+
+
+def test_ctd_int8_close_to_fp32(tmp_path):
+    pytest.importorskip('onnxruntime')
+    pytest.importorskip('onnx')
+    from benchmarks.quantization_bench import CTD_OUTPUTS, evaluate_ctd
+
+    report = evaluate_ctd(str(tmp_path), pages=2, input_size=256)
+    for name in CTD_OUTPUTS:
+        assert report[f'{name}_rel_err'] < 0.02, report
+
+
+def test_48px_int8_close_to_fp32(tmp_path):
+    onnx = pytest.importorskip('onnx')
+    pytest.importorskip('onnxruntime')
+    from benchmarks.quantization_bench import evaluate_ocr
+
+    # 同时覆盖：decoder 共用权重时动态量化后能创建会话，encoder 静态量化不量化位置索引和注意力掩码
+    report = evaluate_ocr(str(tmp_path), lines=6, calibration=2)
+    assert report['torch_quantized_layers'] > 0
+    for key, value in report.items():
+        if key.endswith('_rel_err'):
+            assert value < (0.1 if key.startswith('onnx_static_cross') else 0.05), (key, report)
+    # 动态量化不生成 ConvInteger（CPU 上比 FP32 慢数倍）
+    encoder = onnx.load(str(tmp_path / 'encoder.int8.onnx'))
+    assert not any(node.op_type == 'ConvInteger' for node in encoder.graph.node)
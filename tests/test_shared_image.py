@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import numpy as np
+from PIL import Image
+
+from manga_translator.utils.shared_image import SharedImageRing, pack_frames, release_frames, unpack_frames
+
+
+def test_read_maps_slot_without_copy():
+    with SharedImageRing(2) as ring:
+        frame = ring.put(np.arange(12, dtype=np.uint8).reshape(3, 4))
+        view = frame.read()
+        assert not view.flags.owndata
+        # 写入槽位后视图直接可见
+        ring._buffers[frame.slot].array[0] = 99
+        assert view[0, 0] == 99
+        del view
+        frame.release()
+        assert frame._shm is None
+
+
+def test_unpack_views_and_copies():
+    image = Image.new('RGBA', (64, 64), (1, 2, 3, 4))
+    with SharedImageRing(2) as ring:
+        packed = pack_frames({'image': image, 'mask': np.ones((8, 8), np.uint8)}, ring, [], min_bytes=0)
+        frames = []
+        mapped = unpack_frames(dict(packed), frames)
+        assert len(frames) == 2 and mapped['image'].getpixel((5, 5)) == (1, 2, 3, 4)
+        del mapped
+        release_frames(frames)
+        assert frames == []
+
+        copied = unpack_frames(dict(packed))
+        ring.release_all()
+        ring.put(np.zeros((64, 64, 4), np.uint8))
+        assert copied['image'].getpixel((5, 5)) == (1, 2, 3, 4)
+        assert all(frame._shm is None for frame in (packed['image'], packed['mask']))
+
+
+def test_child_attach_keeps_creator_registration(tmp_path):
+    # 子进程与创建方共用 resource_tracker：附加后不能删掉创建方的登记，否则 unlink 时 tracker 打印 KeyError
+    script = textwrap.dedent('''
+        import multiprocessing
+        import numpy as np
+        from manga_translator.utils.shared_image import SharedImageRing, release_frames, unpack_frames
+
+        def child(frame, conn):
+            frames = []
+            value = unpack_frames(frame, frames)
+            conn.send(int(value.sum()))
+            del value
+            release_frames(frames)
+
+        if __name__ == '__main__':
+            ctx = multiprocessing.get_context('spawn')
+            ring = SharedImageRing(1)
+            frame = ring.put(np.ones((256, 256), np.uint8))
+            parent, conn = ctx.Pipe()
+            process = ctx.Process(target=child, args=(frame, conn))
+            process.start()
+            assert parent.recv() == 256 * 256
+            process.join()
+            ring.close()
+    ''')
+    (tmp_path / 'attach_child.py').write_text(script)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, 'PYTHONPATH': root}
+    result = subprocess.run([sys.executable, str(tmp_path / 'attach_child.py')], capture_output=True, text=True,
+                            timeout=120, cwd=root, env=env)
+    assert result.returncode == 0, result.stderr
+    assert 'KeyError' not in result.stderr
+    assert 'leaked' not in result.stderr
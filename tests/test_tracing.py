@@ -0,0 +1,31 @@
+import asyncio
+import json
+
+from manga_translator.utils.tracing import Tracer, traced_batch
+from manga_translator.utils import tracing
+
+
+def test_outermost_batch_flushes_and_resets(tmp_path, monkeypatch):
+    tracer = Tracer()
+    monkeypatch.setattr(tracing, 'tracer', tracer)
+    path = tmp_path / 'trace.json'
+    tracer.enable(str(path), memory=False)
+
+    @traced_batch
+    async def inner():
+        with tracer.span('stage', 'stage'):
+            pass
+
+    @traced_batch
+    async def outer():
+        await inner()
+        assert not path.exists()
+
+    for _ in range(2):
+        asyncio.run(outer())
+        names = [e['name'] for e in json.loads(path.read_text())['traceEvents'] if e['ph'] == 'X']
+        # 每次只包含本批次的 span，之前批次的记录已清空
+        assert sorted(names) == ['inner', 'outer', 'stage']
+        assert tracer._batch_depth == 0
+        assert not tracer._events
+        path.unlink()
@@ -0,0 +1,55 @@
+import os
+import time
+
+import pytest
+
+from manga_translator.mode import subprocess_manager
+from manga_translator.mode.subprocess_manager import WorkerPool
+
+
+def _fake_worker(worker_id, output_dir, verbose, overwrite, total_files, config_dict, inbox, outbox):
+    if config_dict.get('hang_on_start'):
+        time.sleep(60)
+    outbox.send({'type': 'ready', 'worker': worker_id, 'rss_mb': 0.0})
+    pages = 0
+    while True:
+        task = inbox.get()
+        if task is None:
+            break
+        index, file_path = task
+        if file_path == 'crash':
+            os._exit(1)
+        pages += 1
+        outbox.send({'type': 'done', 'worker': worker_id, 'file': file_path, 'error': None,
+                     'pages': pages, 'rss_mb': 0.0})
+
+
+@pytest.fixture(autouse=True)
+def fake_worker(monkeypatch):
+    monkeypatch.setattr(subprocess_manager, 'worker_main', _fake_worker)
+    monkeypatch.setattr(WorkerPool, 'POLL_INTERVAL', 0.05)
+
+
+def _pool(workers, **kwargs):
+    config = kwargs.pop('config', {})
+    return WorkerPool(workers, '', config, False, True, 0, memory_limit_percent=0, **kwargs)
+
+
+def test_pages_are_distributed_over_workers():
+    files = [f'{i}.png' for i in range(12)]
+    assert _pool(3).run(files) == (12, 0)
+
+
+def test_crashing_worker_does_not_break_others():
+    files = ['a.png', 'crash', 'b.png', 'c.png', 'd.png']
+    pool = _pool(2)
+    assert pool.run(files) == (4, 1)
+    assert pool.restarts >= WorkerPool.MAX_PAGE_ATTEMPTS
+
+
+def test_warmup_timeout_counts_as_start_failure():
+    start = time.monotonic()
+    pool = _pool(1, warmup_timeout=0.5, config={'hang_on_start': True})
+    assert pool.run(['a.png', 'b.png']) == (0, 2)
+    assert pool.restarts == WorkerPool.MAX_START_FAILURES
+    assert time.monotonic() - start < 30